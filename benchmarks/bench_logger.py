@@ -0,0 +1,55 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+日志辅助函数的微基准测试：级别被禁用时每次调用的开销。
+Micro-benchmark of the logging helpers: the cost per call when the level is disabled.
+
+使用示例 (Usage Example):
+    PYTHONPATH=src python benchmarks/bench_logger.py
+"""
+
+import logging
+import timeit
+
+from visiondesk.utils.logger import LogEmoji, get_logger, log_ai, log_sampled, log_throttled
+
+
+def main() -> None:
+    bench_logger = get_logger("visiondesk.bench")
+    bench_logger.setLevel(logging.WARNING)
+    # Keep the unguarded records off the console so only dispatch cost is measured / 不输出未检查级别的记录，只测量分发开销
+    bench_logger.propagate = False
+    bench_logger.addHandler(logging.NullHandler())
+
+    def unguarded_step() -> None:
+        # The previous log_step body: always builds and dispatches a record / 之前的 log_step 实现：总是创建并分发记录
+        record = bench_logger.makeRecord(bench_logger.name, logging.INFO, "(custom)", 0, "tick", (), None)
+        record.emoji = LogEmoji.AI
+        bench_logger.handle(record)
+
+    calls = 200_000
+    cases = {
+        "unguarded makeRecord+handle": unguarded_step,
+        "log_ai (disabled)": lambda: log_ai(bench_logger, "tick"),
+        "log_throttled (disabled)": lambda: log_throttled(bench_logger, "bench", "tick"),
+        "log_sampled (disabled)": lambda: log_sampled(bench_logger, "bench", "tick"),
+        "logger.info (disabled)": lambda: bench_logger.info("tick"),
+    }
+    for label, case in cases.items():
+        seconds = min(timeit.repeat(case, number=calls, repeat=3))
+        print(f"{label:>28}: {seconds / calls * 1e9:8.1f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+OpenAI 提供商的基准测试：复用连接池的会话与每次请求新建会话的对比，以及流式请求体的内存占用。
+Benchmark of the OpenAI provider: pooled sessions against a new session per request,
+and the memory used by streamed request bodies.
+
+使用示例 (Usage Example):
+    PYTHONPATH=src python benchmarks/bench_openai.py --requests 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+import tracemalloc
+
+from visiondesk.ai.providers.mock_server import MockChatServer
+from visiondesk.ai.providers.openai import OpenAIProvider
+from visiondesk.core.services.screenshot_service import SyntheticFrameSource
+from visiondesk.utils.image_utils import prepare_image
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pooled sessions and streamed request bodies")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--size", type=int, default=256, help="edge length of the test image")
+    parser.add_argument("--in-flight", type=int, default=10, help="concurrent full-screen requests for the memory test")
+    args = parser.parse_args()
+
+    source = SyntheticFrameSource(args.size, args.size)
+    source.fill_rect(0, 0, args.size // 2, args.size // 2, (40, 80, 160, 255))
+    image = prepare_image(source.grab(0, 0, args.size, args.size))
+
+    async def run_pooled(base_url: str) -> None:
+        async with OpenAIProvider(api_key="sk-mock", base_url=base_url) as provider:
+            for _ in range(args.requests):
+                await provider.analyze(image, "Describe.", "mock-model")
+
+    async def run_per_request(base_url: str) -> None:
+        for _ in range(args.requests):
+            async with OpenAIProvider(api_key="sk-mock", base_url=base_url) as provider:
+                await provider.analyze(image, "Describe.", "mock-model")
+
+    async def benchmark() -> None:
+        for label, runner in (("per-request session", run_per_request), ("pooled session", run_pooled)):
+            async with MockChatServer() as server:
+                start = time.perf_counter()
+                await runner(server.base_url)
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{label:>20}: {args.requests} requests in {elapsed * 1000:8.1f} ms "
+                    f"({elapsed * 1000 / args.requests:6.2f} ms/request), "
+                    f"{len(server.connections)} TCP connection(s)"
+                )
+
+    async def measure_memory() -> None:
+        # 无法压缩的全屏截图；服务器运行在子进程中，因此只统计客户端一侧的内存
+        # Incompressible full-screen captures; the server runs in a subprocess so only client-side memory is traced
+        screen = SyntheticFrameSource(1920, 1080, canvas=bytearray(os.urandom(1920 * 1080 * 4)))
+        images = [prepare_image(screen.grab(0, 0, 1920, 1080), "PNG") for _ in range(args.in_flight)]
+
+        tracemalloc.start()
+        bodies = [
+            json.dumps({"model": "mock-model", "messages": [{"role": "user", "content": [
+                {"type": "image_url", "image_url": {"url": image.data_url()}},
+            ]}]}).encode("utf-8")
+            for image in images
+        ]
+        _, buffered_peak = tracemalloc.get_traced_memory()
+        del bodies
+        tracemalloc.stop()
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "visiondesk.ai.providers.mock_server",
+            "--port", str(port), "--first-token-delay", "0", "--token-delay", "0",
+            stdout=asyncio.subprocess.PIPE,
+        )
+        try:
+            await server.stdout.readline()
+            async with OpenAIProvider(api_key="sk-mock", base_url=f"http://127.0.0.1:{port}/v1") as provider:
+                tracemalloc.start()
+                await asyncio.gather(*(provider.analyze(image, "Describe.", "mock-model") for image in images))
+                _, streamed_peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+        finally:
+            server.terminate()
+            await server.wait()
+
+        print(
+            f"{args.in_flight} x {images[0].nbytes} byte images in flight: "
+            f"buffered JSON bodies peak {buffered_peak / 2**20:6.1f} MiB, "
+            f"streamed bodies peak {streamed_peak / 2**20:6.1f} MiB"
+        )
+
+    asyncio.run(benchmark())
+    asyncio.run(measure_memory())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+区域值类型的基准测试：Region 与 Rect 的构造和命中测试开销对比。
+Benchmark of the region value types: construction and hit-testing cost of Region against Rect.
+
+使用示例 (Usage Example):
+    PYTHONPATH=src python benchmarks/bench_region.py
+"""
+
+import timeit
+
+from visiondesk.models.region import Rect, Region
+
+
+def main() -> None:
+    number = 100_000
+    region_build = timeit.timeit(lambda: Region(x=10, y=20, width=300, height=200), number=number)
+    rect_build = timeit.timeit(lambda: Rect(10, 20, 300, 200), number=number)
+    region = Region(x=10, y=20, width=300, height=200)
+    rect = region.to_rect()
+    region_hit = timeit.timeit(lambda: region.contains_point(150, 120), number=number)
+    rect_hit = timeit.timeit(lambda: rect.contains_point(150, 120), number=number)
+    assert rect.to_region() == region and Rect.from_region(region) == rect
+
+    print(f"构造 | Construction ({number} 次 | times):")
+    print(f"  Region: {region_build / number * 1e9:8.0f} ns")
+    print(f"  Rect:   {rect_build / number * 1e9:8.0f} ns ({region_build / rect_build:.1f}x)")
+    print(f"contains_point ({number} 次 | times):")
+    print(f"  Region: {region_hit / number * 1e9:8.0f} ns")
+    print(f"  Rect:   {rect_hit / number * 1e9:8.0f} ns ({region_hit / rect_hit:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
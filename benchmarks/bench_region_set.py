@@ -0,0 +1,61 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+区域集合的基准测试：逐个调用 Region.contains_point 与 RegionSet 的命中测试对比。
+Benchmark of the region set: Region.contains_point one by one against RegionSet hit-testing.
+
+使用示例 (Usage Example):
+    PYTHONPATH=src python benchmarks/bench_region_set.py
+"""
+
+import random
+import timeit
+
+from visiondesk.models.region import Region
+from visiondesk.models.region_set import RegionSet
+
+
+def main() -> None:
+    rng = random.Random(0)
+    regions = [
+        Region(x=rng.randrange(0, 3000), y=rng.randrange(0, 1800),
+               width=rng.randrange(20, 600), height=rng.randrange(20, 400), name=f"region-{i}")
+        for i in range(500)
+    ]
+    region_set = RegionSet(regions)
+    points = [(rng.randrange(0, 3840), rng.randrange(0, 2160)) for _ in range(200)]
+
+    def models() -> None:
+        for x, y in points:
+            [i for i, region in enumerate(regions) if region.contains_point(x, y)]
+
+    def region_set_hits() -> None:
+        for x, y in points:
+            region_set.contains_point(x, y)
+
+    for x, y in points:
+        expected = [i for i, region in enumerate(regions) if region.contains_point(x, y)]
+        assert region_set.contains_point(x, y) == expected
+
+    runs = 5
+    model_seconds = timeit.timeit(models, number=runs) / (runs * len(points))
+    set_seconds = timeit.timeit(region_set_hits, number=runs) / (runs * len(points))
+    print(f"{len(regions)} 个区域的命中测试 | Hit-testing {len(regions)} regions ({region_set.backend})")
+    print(f"  Region.contains_point: {model_seconds * 1e6:8.1f} µs/point")
+    print(f"  RegionSet.contains_point: {set_seconds * 1e6:8.1f} µs/point ({model_seconds / set_seconds:.1f}x)")
+    print(f"  重叠的区域对 | Overlapping pairs: {len(region_set.overlapping_pairs())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,9 @@ This module provides the command-line entry point for the VisionDesk application
 allowing the app to be started from the command line.
 """
 
+import sys
+
 from visiondesk.main import main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -21,12 +21,47 @@ This module defines data models related to vision analysis.
 
 主要类:
 - VisionModel: 视觉分析模型的基类，定义通用接口
+- TokenUsage: 一次请求的令牌用量
 - AnalysisResult: 视觉分析结果的数据模型
 
 Main classes:
 - VisionModel: Base class for vision analysis models, defining common interfaces
+- TokenUsage: Token usage of one request
 - AnalysisResult: Data model for vision analysis results
 """
 
+from pydantic import BaseModel, Field
+
 # TODO: 实现视觉模型类
 # TODO: Implement vision model classes
+
+
+class TokenUsage(BaseModel):
+    """
+    一次请求的令牌用量。
+    Token usage of one request.
+    """
+
+    prompt_tokens: int = Field(default=0, ge=0, description="输入令牌数 | Number of input tokens")
+    completion_tokens: int = Field(default=0, ge=0, description="输出令牌数 | Number of output tokens")
+
+    @property
+    def total_tokens(self) -> int:
+        """
+        返回输入和输出令牌的总数。
+        Return the total number of input and output tokens.
+        """
+        return self.prompt_tokens + self.completion_tokens
+
+
+class AnalysisResult(BaseModel):
+    """
+    视觉分析结果。
+    Vision analysis result.
+    """
+
+    text: str = Field(description="分析结果文本 | Analysis result text")
+    model: str = Field(default="", description="生成结果的模型名称 | Name of the model that produced the result")
+    usage: TokenUsage = Field(default_factory=TokenUsage, description="令牌用量 | Token usage")
+    finish_reason: str = Field(default="stop", description="结束原因 | Finish reason")
+    cached: bool = Field(default=False, description="结果是否来自响应缓存 | Whether the result came from the response cache")
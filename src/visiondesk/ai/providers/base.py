@@ -16,15 +16,289 @@
 VisionDesk AI 提供商基类模块。
 VisionDesk AI provider base module.
 
-此模块定义了所有 AI 提供商应实现的接口。
-This module defines the interface that all AI providers should implement.
+此模块定义了所有 AI 提供商应实现的接口。接口是异步的：提供商以文本增量的形式流式返回结果，
+在流结束时报告令牌用量，并且可以随时取消。
+This module defines the interface that all AI providers should implement. The interface
+is asynchronous: providers stream results as text deltas, report token usage when the
+stream ends, and can be cancelled at any time.
 
 主要类:
 - BaseProvider: AI提供商的抽象基类，定义通用接口
+- AnalysisStream: 一次流式分析的句柄，可异步迭代文本增量
+- FinishReason: 提供商流中服务器报告的结束原因
 
 Main classes:
 - BaseProvider: Abstract base class for AI providers, defining common interfaces
+- AnalysisStream: Handle of one streaming analysis, async-iterable over text deltas
+- FinishReason: Finish reason reported by the server within a provider stream
 """
 
-# TODO: 实现 AI 提供商基类
-# TODO: Implement AI provider base class
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, List, NamedTuple, Optional, Union
+
+from visiondesk.ai.models.vision_model import AnalysisResult, TokenUsage
+from visiondesk.utils.image_utils import EncodedImage
+
+
+class FinishReason(NamedTuple):
+    """
+    服务器报告的结束原因（如 "stop"、"length"、"content_filter"）。
+    Finish reason reported by the server (e.g. "stop", "length", "content_filter").
+    """
+
+    reason: str
+
+
+# 提供商流中的元素：文本增量、服务器报告的结束原因，或流结束时的令牌用量
+# Items of a provider stream: text deltas, the finish reason reported by the server,
+# or the token usage when the stream ends
+StreamItem = Union[str, FinishReason, TokenUsage]
+
+
+class AnalysisStream:
+    """
+    一次流式分析的句柄。
+    Handle of one streaming analysis.
+
+    异步迭代时依次返回文本增量；流结束后可通过 text、usage 和 result() 获取完整结果。
+    调用 cancel() 或取消正在迭代的任务都会停止流并释放底层连接。
+    Iterating asynchronously yields text deltas. Once the stream ends, the complete result
+    is available through text, usage and result(). Calling cancel(), or cancelling the task
+    iterating over the stream, stops the stream and releases the underlying connection.
+    """
+
+    def __init__(self, items: AsyncIterator[StreamItem], model: str):
+        """
+        初始化流句柄。
+        Initialize the stream handle.
+
+        参数:
+            items: 提供商产生的流元素
+            model: 模型名称
+
+        Parameters:
+            items: Stream items produced by the provider
+            model: Model name
+        """
+        self._items = items
+        self._parts: List[str] = []
+        self.model = model
+        self.usage = TokenUsage()
+        self.finish_reason: Optional[str] = None
+        self.finished = False
+        self.cancelled = False
+
+    def __aiter__(self) -> "AnalysisStream":
+        return self
+
+    async def __anext__(self) -> str:
+        while not self.cancelled:
+            try:
+                item = await self._items.__anext__()
+            except StopAsyncIteration:
+                self.finished = True
+                raise
+            except asyncio.CancelledError:
+                self.cancelled = True
+                await self.aclose()
+                raise
+
+            if isinstance(item, TokenUsage):
+                self.usage = item
+                continue
+            if isinstance(item, FinishReason):
+                self.finish_reason = item.reason
+                continue
+            self._parts.append(item)
+            return item
+
+        await self.aclose()
+        raise StopAsyncIteration
+
+    @property
+    def text(self) -> str:
+        """
+        返回到目前为止收到的全部文本。
+        Return all text received so far.
+        """
+        return "".join(self._parts)
+
+    def cancel(self) -> None:
+        """
+        取消流。下一次迭代将结束，底层连接随之释放。
+        Cancel the stream. The next iteration ends and the underlying connection is released.
+        """
+        self.cancelled = True
+
+    async def aclose(self) -> None:
+        """
+        关闭底层流并释放资源。
+        Close the underlying stream and release its resources.
+        """
+        aclose = getattr(self._items, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    async def collect(self) -> AnalysisResult:
+        """
+        读取流直到结束，并返回完整结果。
+        Read the stream to the end and return the complete result.
+        """
+        async for _ in self:
+            pass
+        return self.result()
+
+    def result(self) -> AnalysisResult:
+        """
+        以当前收到的内容构造分析结果。
+        Build an analysis result from the content received so far.
+
+        只有服务器报告了结束原因时才使用它；流结束但没有结束原因时结果为 "incomplete"。
+        The finish reason is only taken from the server; a stream that ended without one
+        yields "incomplete".
+        """
+        if self.cancelled:
+            finish_reason = "cancelled"
+        elif self.finished and self.finish_reason:
+            finish_reason = self.finish_reason
+        else:
+            finish_reason = "incomplete"
+        return AnalysisResult(text=self.text, model=self.model, usage=self.usage, finish_reason=finish_reason)
+
+
+class BaseProvider(ABC):
+    """
+    AI 提供商的抽象基类。
+    Abstract base class for AI providers.
+
+    子类只需实现 _stream 异步生成器：依次产生文本增量、服务器报告的 FinishReason，
+    最后（可选地）产生一个 TokenUsage。非流式的 analyze 由基类在 _stream 之上实现。
+    Subclasses only implement the _stream async generator: it yields text deltas, the
+    FinishReason reported by the server and finally (optionally) one TokenUsage. The
+    non-streaming analyze is implemented by the base class on top of _stream.
+    """
+
+    name: str = "base"
+
+    def __init__(self) -> None:
+        """
+        初始化提供商。
+        Initialize the provider.
+        """
+        self.logger = logging.getLogger(__name__)
+
+    @abstractmethod
+    def _stream(
+        self,
+        image: EncodedImage,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncIterator[StreamItem]:
+        """
+        产生分析结果的文本增量和结束原因，最后产生令牌用量。
+        Yield text deltas of the analysis and its finish reason, followed by the token usage.
+
+        参数:
+            image: 要分析的图像（已预处理并编码）
+            prompt: 提示词
+            model: 模型名称
+            temperature: 温度参数
+            max_tokens: 最大输出令牌数
+
+        返回:
+            文本增量、结束原因和令牌用量的异步迭代器
+
+        Parameters:
+            image: Image to analyze (already preprocessed and encoded)
+            prompt: Prompt text
+            model: Model name
+            temperature: Temperature parameter
+            max_tokens: Maximum number of output tokens
+
+        Returns:
+            Async iterator of text deltas, the finish reason and the token usage
+        """
+
+    def stream(
+        self,
+        image: EncodedImage,
+        prompt: str,
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+    ) -> AnalysisStream:
+        """
+        以流的形式分析图像。
+        Analyze an image as a stream.
+
+        参数:
+            image: 要分析的图像（已预处理并编码）
+            prompt: 提示词
+            model: 模型名称
+            temperature: 温度参数
+            max_tokens: 最大输出令牌数
+
+        返回:
+            可异步迭代文本增量的 AnalysisStream
+
+        Parameters:
+            image: Image to analyze (already preprocessed and encoded)
+            prompt: Prompt text
+            model: Model name
+            temperature: Temperature parameter
+            max_tokens: Maximum number of output tokens
+
+        Returns:
+            An AnalysisStream yielding text deltas
+        """
+        return AnalysisStream(self._stream(image, prompt, model, temperature, max_tokens), model)
+
+    async def analyze(
+        self,
+        image: EncodedImage,
+        prompt: str,
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+    ) -> AnalysisResult:
+        """
+        分析图像并返回完整结果。
+        Analyze an image and return the complete result.
+
+        参数:
+            image: 要分析的图像（已预处理并编码）
+            prompt: 提示词
+            model: 模型名称
+            temperature: 温度参数
+            max_tokens: 最大输出令牌数
+
+        返回:
+            分析结果
+
+        Parameters:
+            image: Image to analyze (already preprocessed and encoded)
+            prompt: Prompt text
+            model: Model name
+            temperature: Temperature parameter
+            max_tokens: Maximum number of output tokens
+
+        Returns:
+            The analysis result
+        """
+        return await self.stream(image, prompt, model, temperature, max_tokens).collect()
+
+    async def aclose(self) -> None:
+        """
+        释放提供商持有的资源（例如 HTTP 会话）。
+        Release resources held by the provider (e.g. HTTP sessions).
+        """
+
+    async def __aenter__(self) -> "BaseProvider":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
@@ -0,0 +1,115 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+VisionDesk 本地模拟提供商模块。
+VisionDesk local mock provider module.
+
+此模块提供一个确定性的本地 AI 提供商，不访问网络，用于离线测试吞吐量和延迟。
+This module provides a deterministic local AI provider that never touches the network,
+for testing throughput and latency offline.
+
+主要类:
+- MockProvider: 确定性的本地模拟提供商
+
+Main classes:
+- MockProvider: Deterministic local mock provider
+"""
+
+import asyncio
+import json
+import re
+import zlib
+from typing import AsyncIterator
+
+from visiondesk.ai.models.vision_model import TokenUsage
+from visiondesk.ai.providers.base import BaseProvider, FinishReason, StreamItem
+from visiondesk.utils.image_utils import EncodedImage
+
+# 拼图提示词中列出 JSON 键的行 / Line of a mosaic prompt listing the JSON keys
+_MOSAIC_KEYS = re.compile(r"^JSON keys: (\[.*\])$", re.MULTILINE)
+
+
+class MockProvider(BaseProvider):
+    """
+    确定性的本地模拟提供商。
+    Deterministic local mock provider.
+
+    相同的图像和参数总是产生相同的回复。回复按单词流式返回，首个增量之前等待
+    first_token_delay 秒，之后每个增量之间等待 token_delay 秒，以模拟真实模型的延迟特征。
+    The same image and parameters always produce the same reply. The reply is streamed word
+    by word, waiting first_token_delay seconds before the first delta and token_delay seconds
+    between deltas, to mimic the latency profile of a real model.
+    """
+
+    name = "mock"
+
+    def __init__(self, first_token_delay: float = 0.0, token_delay: float = 0.0):
+        """
+        初始化模拟提供商。
+        Initialize the mock provider.
+
+        参数:
+            first_token_delay: 首个文本增量之前的延迟（秒）
+            token_delay: 相邻文本增量之间的延迟（秒）
+
+        Parameters:
+            first_token_delay: Delay before the first text delta (seconds)
+            token_delay: Delay between consecutive text deltas (seconds)
+        """
+        super().__init__()
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.calls = 0
+
+    @staticmethod
+    def reply_for(image: EncodedImage, prompt: str, model: str) -> str:
+        """
+        返回给定输入对应的确定性回复。拼图请求的回复是以图块编号为键的 JSON 对象。
+        Return the deterministic reply for the given input. Mosaic requests get a JSON object
+        keyed by tile ID.
+        """
+        reply = (
+            f"[{model}] {image.width}x{image.height} {image.mime_type} {zlib.crc32(image.data):08x}: "
+            f"mock analysis for prompt of {len(prompt)} characters."
+        )
+        keys = _MOSAIC_KEYS.search(prompt)
+        if keys is None:
+            return reply
+        return json.dumps({tile_id: f"{reply} ({tile_id})" for tile_id in json.loads(keys.group(1))})
+
+    async def _stream(
+        self,
+        image: EncodedImage,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncIterator[StreamItem]:
+        self.calls += 1
+        words = self.reply_for(image, prompt, model).split(" ")
+        truncated = len(words) > max_tokens
+        words = words[:max_tokens]
+
+        await asyncio.sleep(self.first_token_delay)
+        for i, word in enumerate(words):
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield word if i == 0 else " " + word
+
+        yield FinishReason("length" if truncated else "stop")
+        yield TokenUsage(
+            prompt_tokens=image.estimated_tokens() + len(prompt) // 4 + 1,
+            completion_tokens=len(words),
+        )
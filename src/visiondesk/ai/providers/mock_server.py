@@ -0,0 +1,245 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+VisionDesk 本地模拟 HTTP 服务器模块。
+VisionDesk local mock HTTP server module.
+
+此模块提供一个微型本地 HTTP 服务器，使用 OpenAI chat-completions 的传输格式（包括 SSE 流式响应），
+用于在不访问真实 API 的情况下离线测试 HTTP 提供商的吞吐量和延迟。
+This module provides a tiny local HTTP server that speaks the OpenAI chat-completions wire
+format (including SSE streaming), for testing the throughput and latency of HTTP providers
+offline, without touching the real API.
+
+主要类:
+- MockChatServer: 模拟 chat-completions 端点的本地服务器
+
+Main classes:
+- MockChatServer: Local server emulating the chat-completions endpoint
+
+使用示例 (Usage Example):
+    python -m visiondesk.ai.providers.mock_server --port 8765
+"""
+
+import asyncio
+import json
+import logging
+import socket
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from aiohttp import web
+
+
+class MockChatServer:
+    """
+    模拟 OpenAI chat-completions 端点的本地服务器。
+    Local server emulating the OpenAI chat-completions endpoint.
+
+    回复内容由请求确定性地生成。服务器记录请求数、不同 TCP 连接数和接收的字节数，
+    以便基准测试可以验证连接复用的效果。
+    Replies are generated deterministically from the request. The server records the number
+    of requests, distinct TCP connections and bytes received, so benchmarks can verify the
+    effect of connection reuse.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        first_token_delay: float = 0.0,
+        token_delay: float = 0.0,
+    ):
+        """
+        初始化模拟服务器。
+        Initialize the mock server.
+
+        参数:
+            host: 监听地址
+            port: 监听端口（0 表示自动选择空闲端口）
+            first_token_delay: 首个文本增量（或非流式响应）之前的延迟（秒）
+            token_delay: 流式响应中相邻文本增量之间的延迟（秒）
+
+        Parameters:
+            host: Listening address
+            port: Listening port (0 picks a free port)
+            first_token_delay: Delay before the first text delta (or the non-streaming response), in seconds
+            token_delay: Delay between consecutive text deltas of a streaming response, in seconds
+        """
+        self.logger = logging.getLogger(__name__)
+        self.host = host
+        self.port = port
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+
+        self.requests = 0
+        self.bytes_received = 0
+        self.connections: Set[Tuple[Any, ...]] = set()
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        """
+        返回服务器的 API 基础地址（与 OpenAI 的 https://api.openai.com/v1 对应）。
+        Return the API base URL of the server (the counterpart of https://api.openai.com/v1).
+        """
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self) -> str:
+        """
+        启动服务器。
+        Start the server.
+
+        返回:
+            服务器的 API 基础地址
+
+        Returns:
+            The API base URL of the server
+        """
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/v1/chat/completions", self._handle_chat)
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        self.port = sock.getsockname()[1]
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.SockSite(self._runner, sock).start()
+        self.logger.info(f"模拟服务器已启动: {self.base_url} | Mock server started: {self.base_url}")
+        return self.base_url
+
+    async def stop(self) -> None:
+        """
+        停止服务器。
+        Stop the server.
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockChatServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+
+    @staticmethod
+    def reply_for(body: Dict[str, Any]) -> str:
+        """
+        返回给定请求体对应的确定性回复。
+        Return the deterministic reply for the given request body.
+        """
+        images = 0
+        prompt_chars = 0
+        for message in body.get("messages", []):
+            content = message.get("content")
+            if isinstance(content, str):
+                prompt_chars += len(content)
+                continue
+            for part in content or []:
+                if part.get("type") == "image_url":
+                    images += 1
+                elif part.get("type") == "text":
+                    prompt_chars += len(part.get("text", ""))
+        return (
+            f"[{body.get('model', '')}] mock analysis of {images} image(s) "
+            f"for prompt of {prompt_chars} characters."
+        )
+
+    def _chunk(self, body: Dict[str, Any], delta: Dict[str, Any], finish_reason: Optional[str]) -> bytes:
+        payload = {
+            "id": f"chatcmpl-mock-{self.requests}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+    async def _handle_chat(self, request: web.Request) -> web.StreamResponse:
+        raw = await request.read()
+        self.requests += 1
+        self.bytes_received += len(raw)
+        if request.transport is not None:
+            self.connections.add(request.transport.get_extra_info("peername"))
+
+        body = json.loads(raw)
+        words = self.reply_for(body).split(" ")
+        finish_reason = "length" if body.get("max_tokens") and len(words) > body["max_tokens"] else "stop"
+        words = words[: body.get("max_tokens") or None]
+        usage = {
+            "prompt_tokens": len(raw) // 4,
+            "completion_tokens": len(words),
+            "total_tokens": len(raw) // 4 + len(words),
+        }
+
+        await asyncio.sleep(self.first_token_delay)
+
+        if not body.get("stream"):
+            return web.json_response({
+                "id": f"chatcmpl-mock-{self.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", ""),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": " ".join(words)},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": usage,
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(self._chunk(body, {"role": "assistant", "content": ""}, None))
+        for i, word in enumerate(words):
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            await response.write(self._chunk(body, {"content": word if i == 0 else " " + word}, None))
+        await response.write(self._chunk(body, {}, finish_reason))
+
+        if (body.get("stream_options") or {}).get("include_usage"):
+            payload = {
+                "id": f"chatcmpl-mock-{self.requests}",
+                "object": "chat.completion.chunk",
+                "model": body.get("model", ""),
+                "choices": [],
+                "usage": usage,
+            }
+            await response.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="VisionDesk mock chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    async def serve() -> None:
+        async with MockChatServer(args.host, args.port, args.first_token_delay, args.token_delay) as server:
+            print(f"Serving OpenAI-compatible mock API at {server.base_url}", flush=True)
+            await asyncio.Event().wait()
+
+    asyncio.run(serve())
@@ -19,6 +19,18 @@ VisionDesk OpenAI provider module.
 此模块提供与 OpenAI API 的集成，专门用于视觉分析。
 This module provides integration with the OpenAI API, specifically for vision analysis.
 
+每个提供商持有一个长期存在的 HTTP 会话：连接池中的连接通过 HTTP keep-alive 在请求之间复用，
+因此周期性捕获时不必为每次分析重新进行 TCP 和 TLS 握手。
+Each provider holds one long-lived HTTP session: pooled connections are reused between
+requests through HTTP keep-alive, so periodic capture does not pay a new TCP and TLS
+handshake for every analysis.
+
+请求体以流的形式发送：JSON 前缀、分块编码的 base64 图像数据和 JSON 后缀依次写入连接，
+不会在内存中同时持有编码图像、base64 字符串和完整的 JSON 请求体。
+The request body is streamed: the JSON prefix, the image's base64 data encoded chunk by
+chunk, and the JSON suffix are written to the connection in turn, without holding the
+encoded image, a base64 string and the complete JSON body in memory at once.
+
 主要类:
 - OpenAIProvider: 实现基类接口，提供 OpenAI API 的具体集成
 
@@ -26,5 +38,210 @@ Main classes:
 - OpenAIProvider: Implements the base interface, providing specific integration with OpenAI API
 """
 
-# TODO: 实现 OpenAI 提供商功能
-# TODO: Implement OpenAI provider functionality
+import json
+import os
+from typing import AsyncIterator, Optional, Tuple
+
+import aiohttp
+
+from visiondesk.ai.models.vision_model import TokenUsage
+from visiondesk.ai.providers.base import BaseProvider, FinishReason, StreamItem
+from visiondesk.models.settings import AISettings
+from visiondesk.utils.image_utils import EncodedImage
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+# 请求体 JSON 中图像数据的占位符，序列化后在此处切分出前缀和后缀
+# Placeholder for the image data in the request JSON; the serialized body is split here into prefix and suffix
+_IMAGE_PLACEHOLDER = "\x00IMAGE\x00"
+
+
+class OpenAIProvider(BaseProvider):
+    """
+    OpenAI chat-completions 视觉提供商。
+    OpenAI chat-completions vision provider.
+
+    HTTP 会话在首次请求时于当前事件循环上创建，之后所有请求共享它，直到调用 aclose()。
+    连接池大小、keep-alive 时长和超时均可配置。
+    The HTTP session is created on the current event loop by the first request and shared by
+    all later requests until aclose() is called. Pool size, keep-alive duration and timeouts
+    are configurable.
+    """
+
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = DEFAULT_BASE_URL,
+        pool_size: int = 8,
+        connect_timeout: float = 10.0,
+        request_timeout: float = 60.0,
+        keepalive_timeout: float = 60.0,
+    ):
+        """
+        初始化 OpenAI 提供商。
+        Initialize the OpenAI provider.
+
+        参数:
+            api_key: API 密钥，None 时读取 OPENAI_API_KEY 环境变量
+            base_url: API 基础地址
+            pool_size: 连接池中的最大连接数
+            connect_timeout: 建立连接的超时时间（秒）
+            request_timeout: 单个请求的总超时时间（秒）
+            keepalive_timeout: 空闲连接保持打开的时间（秒）
+
+        Parameters:
+            api_key: API key, read from the OPENAI_API_KEY environment variable when None
+            base_url: API base URL
+            pool_size: Maximum number of connections in the pool
+            connect_timeout: Connection timeout (seconds)
+            request_timeout: Total timeout of a single request (seconds)
+            keepalive_timeout: How long idle connections are kept open (seconds)
+        """
+        super().__init__()
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self.keepalive_timeout = keepalive_timeout
+
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def from_settings(cls, settings: AISettings) -> "OpenAIProvider":
+        """
+        根据 AI 设置创建提供商。
+        Create a provider from AI settings.
+        """
+        return cls(
+            api_key=settings.api_key,
+            base_url=settings.base_url,
+            pool_size=settings.connection_pool_size,
+            connect_timeout=settings.connect_timeout,
+            request_timeout=settings.request_timeout,
+            keepalive_timeout=settings.keepalive_timeout,
+        )
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        返回共享的 HTTP 会话，必要时创建。必须在事件循环中访问。
+        Return the shared HTTP session, creating it if needed. Must be accessed inside the event loop.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=self.request_timeout,
+                connect=self.connect_timeout,
+            )
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers)
+            self.logger.debug(
+                f"已创建 HTTP 会话 (连接池大小 {self.pool_size}) | "
+                f"Created HTTP session (pool size {self.pool_size})"
+            )
+        return self._session
+
+    def _body_parts(
+        self,
+        image: EncodedImage,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> Tuple[bytes, bytes]:
+        body = {
+            "model": model,
+            "messages": [{
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image_url", "image_url": {"url": f"data:{image.mime_type};base64,{_IMAGE_PLACEHOLDER}"}},
+                ],
+            }],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        # 图像地址之后只有数字和布尔值，因此最后一次出现的占位符一定是图像数据，即使提示词或模型名中也含有占位符
+        # Only numbers and booleans follow the image URL, so the last occurrence of the placeholder is always the
+        # image data, even when the prompt or model name contains the placeholder too
+        prefix, _, suffix = json.dumps(body, ensure_ascii=False).rpartition(json.dumps(_IMAGE_PLACEHOLDER)[1:-1])
+        return prefix.encode("utf-8"), suffix.encode("utf-8")
+
+    async def _stream(
+        self,
+        image: EncodedImage,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncIterator[StreamItem]:
+        prefix, suffix = self._body_parts(image, prompt, model, temperature, max_tokens)
+
+        async def body() -> AsyncIterator[bytes]:
+            yield prefix
+            for chunk in image.iter_base64():
+                yield chunk
+            yield suffix
+
+        # 长度已知，因此使用 Content-Length 而不是分块传输编码
+        # The length is known up front, so Content-Length is sent instead of chunked transfer encoding
+        length = len(prefix) + image.base64_length + len(suffix)
+        async with self.session.post(
+            f"{self.base_url}/chat/completions",
+            data=body(),
+            headers={"Content-Length": str(length)},
+        ) as response:
+            if response.status >= 400:
+                detail = await response.text()
+                self.logger.error(
+                    f"OpenAI 请求失败 ({response.status}): {detail} | "
+                    f"OpenAI request failed ({response.status}): {detail}"
+                )
+                response.raise_for_status()
+
+            # 服务器发送事件：每个事件一行 "data: {...}"，以 "data: [DONE]" 结束
+            # Server-sent events: one "data: {...}" line per event, ending with "data: [DONE]"
+            async for line in response.content:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+
+                chunk = json.loads(data)
+                usage = chunk.get("usage")
+                if usage:
+                    yield TokenUsage(
+                        prompt_tokens=usage.get("prompt_tokens", 0),
+                        completion_tokens=usage.get("completion_tokens", 0),
+                    )
+                for choice in chunk.get("choices") or []:
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        yield content
+                    if choice.get("finish_reason"):
+                        yield FinishReason(choice["finish_reason"])
+
+    async def aclose(self) -> None:
+        """
+        关闭 HTTP 会话及其连接池中的所有连接。
+        Close the HTTP session and every connection in its pool.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            self.logger.debug("已关闭 HTTP 会话 | Closed HTTP session")
+        self._session = None
+
@@ -21,69 +21,277 @@ This module defines the main class of the VisionDesk application, responsible fo
 coordinating all components of the application.
 """
 
-# import logging
-# from typing import Optional
-# from PySide6 import QtWidgets
-#
-# from visiondesk.core.config import Config
-# from visiondesk.ui.components.main_window import MainWindow
-# from visiondesk.utils.logger import setup_logger
-#
-#
-# class App:
-#     """
-#     VisionDesk 应用程序的主类。
-#     Main class for the VisionDesk application.
-#
-#     负责初始化并协调应用程序的各个组件，如 UI、服务和配置管理。
-#     Responsible for initializing and coordinating various components of the
-#     application, such as UI, services, and configuration management.
-#     """
-#
-#     def __init__(self):
-#         """
-#         初始化 VisionDesk 应用程序实例。
-#         Initialize the VisionDesk application instance.
-#         """
-#         setup_logger()
-#         self.logger = logging.getLogger(__name__)
-#         self.logger.info("初始化 VisionDesk 应用程序 | Initializing VisionDesk application")
-#
-#         self.config = Config()
-#         self.qt_app: Optional[QtWidgets.QApplication] = None
-#         self.main_window: Optional[MainWindow] = None
-#
-#     def start(self) -> None:
-#         """
-#         启动 VisionDesk 应用程序。
-#         Start the VisionDesk application.
-#
-#         初始化 Qt 应用程序和主窗口，并进入应用程序的主事件循环。
-#         Initializes the Qt application and main window, and enters the main event loop.
-#         """
-#         self.logger.info("启动 VisionDesk 应用程序 | Starting VisionDesk application")
-#         self.qt_app = QtWidgets.QApplication([])
-#         self.qt_app.setApplicationName("VisionDesk")
-#
-#         self.main_window = MainWindow(self.config)
-#         self.main_window.show()
-#
-#         exit_code = self.qt_app.exec()
-#         self.logger.info(f"应用程序退出，代码：{exit_code} | Application exited with code: {exit_code}")
-#         return exit_code
-#
-#     def shutdown(self) -> None:
-#         """
-#         关闭 VisionDesk 应用程序。
-#         Shut down the VisionDesk application.
-#
-#         执行必要的清理操作，如保存配置和关闭服务。
-#         Performs necessary cleanup operations, such as saving configurations and shutting down services.
-#         """
-#         self.logger.info("关闭 VisionDesk 应用程序 | Shutting down VisionDesk application")
-#         if self.main_window:
-#             self.main_window.close()
-#
-#         # 保存配置，关闭服务等操作
-#         # Save configuration, shut down services, etc.
-#         self.config.save()
+import logging
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Set, Tuple
+from PySide6 import QtWidgets
+
+from visiondesk.ai.models.vision_model import AnalysisResult
+from visiondesk.core.config import Config
+from visiondesk.core.config_watcher import ConfigWatcher
+from visiondesk.core.event_loop import BackgroundEventLoop
+from visiondesk.core.region_index import RegionIndex
+from visiondesk.core.scheduler import CaptureScheduler
+from visiondesk.core.services.ai_service import AIService, create_provider
+from visiondesk.core.services.change_detector import ChangeDetector
+from visiondesk.core.services.screenshot_service import Frame, ScreenshotService
+from visiondesk.models.region import Region
+from visiondesk.ui.components.main_window import MainWindow
+from visiondesk.utils.logger import setup_logging, shutdown_logging
+
+
+class App:
+    """
+    VisionDesk 应用程序的主类。
+    Main class for the VisionDesk application.
+
+    负责初始化并协调应用程序的各个组件，如 UI、服务和配置管理。
+    Responsible for initializing and coordinating various components of the
+    application, such as UI, services, and configuration management.
+    """
+
+    def __init__(self) -> None:
+        """
+        初始化 VisionDesk 应用程序实例。
+        Initialize the VisionDesk application instance.
+        """
+        # 日志在后台线程中格式化和写入，避免在 GUI 线程和捕获线程中进行文件 I/O
+        # Log records are formatted and written on a background thread, keeping file I/O off the GUI and capture threads
+        setup_logging(use_colors=True, async_logging=True, dedup_window=30.0, sample_rates={"SCREENSHOT": 0.2})
+        self.logger = logging.getLogger(__name__)
+        self.logger.info("初始化 VisionDesk 应用程序 | Initializing VisionDesk application")
+
+        self.config = Config()
+
+        # 异步服务运行在后台事件循环上，HTTP 连接池在整个应用生命周期内复用
+        # Async services run on the background event loop; the HTTP connection pool is reused for the app's lifetime
+        self.event_loop = BackgroundEventLoop()
+        self.screenshot_service = ScreenshotService()
+        settings = self.config.settings
+        self.ai_service = AIService(settings.ai, create_provider(settings.ai), capture=settings.capture)
+        self.change_detector = ChangeDetector.from_settings(settings.capture)
+
+        # 自动捕获在独立的调度线程中运行，不占用 Qt GUI 线程
+        # Automatic capture runs on its own scheduler thread, off the Qt GUI thread
+        self.scheduler = CaptureScheduler(
+            settings.capture.interval_seconds,
+            self._capture_cycle,
+            policy=settings.capture.backpressure_policy,
+        )
+        self.latest_results: Dict[str, AnalysisResult] = {}
+        # 因超出周期预算而推迟的区域，下一个周期优先分析
+        # Regions deferred by the cycle budget, analyzed first in the next cycle
+        self._deferred_regions: Set[str] = set()
+        self.config.subscribe(self._on_capture_settings_changed, section="capture")
+        self.config.subscribe(self._on_ai_settings_changed, section="ai")
+
+        # 外部修改配置文件（例如通过文件下发更新）时热重载，无需重启
+        # Hot-reload external edits of the configuration file (e.g. updates pushed by file drop) without a restart
+        self.config_watcher = ConfigWatcher(self.config)
+        # 保存区域的空间索引，随配置增量更新，供界面按屏幕位置查询区域
+        # Spatial index of the saved regions, updated incrementally with the config, for UI queries by screen position
+        self.region_index = RegionIndex.from_config(self.config)
+
+        self.qt_app: Optional[QtWidgets.QApplication] = None
+        self.main_window: Optional[MainWindow] = None
+
+    def start(self) -> int:
+        """
+        启动 VisionDesk 应用程序。
+        Start the VisionDesk application.
+
+        初始化 Qt 应用程序和主窗口，并进入应用程序的主事件循环。主事件循环结束（或启动失败）后，
+        总会调用 shutdown() 关闭 HTTP 会话、保存待保存的配置并刷新日志队列。
+        Initializes the Qt application and main window, and enters the main event loop. Once the
+        loop ends (or startup fails), shutdown() always runs, closing the HTTP session, saving
+        any pending configuration and flushing the log queue.
+
+        返回:
+            应用程序的退出代码
+
+        Returns:
+            Exit code of the application
+        """
+        self.logger.info("启动 VisionDesk 应用程序 | Starting VisionDesk application")
+        try:
+            self.event_loop.start()
+            self.config_watcher.start()
+            self.qt_app = QtWidgets.QApplication([])
+            self.qt_app.setApplicationName("VisionDesk")
+            # 显示器布局只在显示器变化时重新读取 / The monitor layout is only re-read on display changes
+            self.screenshot_service.topology.connect_qt(self.qt_app)
+
+            self.main_window = MainWindow(self.config)
+            self.main_window.show()
+
+            if self.config.settings.capture.auto_capture:
+                self.scheduler.start()
+
+            exit_code: int = self.qt_app.exec()
+            self.logger.info(f"应用程序退出，代码：{exit_code} | Application exited with code: {exit_code}")
+            return exit_code
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """
+        关闭 VisionDesk 应用程序。
+        Shut down the VisionDesk application.
+
+        执行必要的清理操作，如保存配置和关闭服务。start() 在退出前会调用它。
+        Performs necessary cleanup operations, such as saving configurations and shutting down services.
+        start() calls it before returning.
+        """
+        self.logger.info("关闭 VisionDesk 应用程序 | Shutting down VisionDesk application")
+        if self.main_window:
+            self.main_window.close()
+        self.scheduler.stop()
+        self.config_watcher.stop()
+        self.region_index.close()
+
+        # 关闭服务：AI 服务的 HTTP 会话必须在创建它的事件循环上关闭
+        # Shut down services: the AI service's HTTP session must be closed on the loop that created it
+        try:
+            self.event_loop.run(self.ai_service.aclose(), timeout=10)
+        except Exception as e:
+            self.logger.error(f"关闭 AI 服务失败: {e} | Failed to close AI service: {e}")
+        self.event_loop.stop()
+        self.screenshot_service.close()
+
+        # 停止延迟保存并保存配置
+        # Stop deferred saving and save configuration
+        self.config.close()
+
+        # 最后刷新日志队列，确保关闭过程中的日志全部写入
+        # Flush the log queue last, so every record from the shutdown is written
+        shutdown_logging()
+
+    def _on_capture_settings_changed(self, section: str, key: str, value: Any) -> None:
+        """
+        将捕获设置的修改应用到调度器。
+        Apply changes of the capture settings to the scheduler.
+        """
+        if key == "interval_seconds":
+            self.scheduler.set_interval(value)
+        elif key == "backpressure_policy":
+            self.scheduler.policy = value
+        elif key == "auto_capture":
+            if value:
+                self.scheduler.start()
+            else:
+                self.scheduler.stop()
+        elif key == "change_threshold":
+            self.change_detector.threshold = value
+        elif key in ("change_tile_size", "change_row_step", "change_quantize_bits"):
+            # 已保存的签名按旧的分块和采样计算，新的检测器从头建立基线
+            # Saved signatures were computed with the old tiling and sampling; the new detector starts new baselines
+            self.change_detector = ChangeDetector.from_settings(self.config.settings.capture)
+
+    def _on_ai_settings_changed(self, section: str, key: str, value: Any) -> None:
+        """
+        将 AI 设置的修改应用到 AI 服务。
+        Apply changes of the AI settings to the AI service.
+
+        max_concurrent_requests、提示词、温度等设置在每次请求时读取，无需处理；
+        只在创建服务时读取的设置会记录一条需要重启的警告。
+        Settings read on every request (max_concurrent_requests, prompt, temperature, ...)
+        need no handling; for settings only read when the service is created, a warning that
+        a restart is needed is logged.
+        """
+        if key in ("requests_per_minute", "tokens_per_minute"):
+            self.ai_service.update_rate_limits()
+        elif key == "model_name":
+            self.ai_service.update_image_profile()
+        elif key in AIService.CONNECTION_KEYS:
+            # 新提供商在第一次请求时按新设置创建 HTTP 会话
+            # The new provider creates its HTTP session with the new settings on its first request
+            self.event_loop.submit(self.ai_service.replace_provider(create_provider(self.config.settings.ai)))
+        elif key in AIService.RESTART_KEYS:
+            self.logger.warning(
+                f"AI 设置 {key} 的修改将在重启后生效 | Change of AI setting {key} takes effect after a restart"
+            )
+
+    def _capture_cycle(self) -> Optional["Future[None]"]:
+        """
+        执行一个自动捕获周期（在调度线程中调用）。
+        Run one automatic capture cycle (called on the scheduler thread).
+
+        捕获所有已保存的区域（没有保存区域时捕获主显示器），只把内容发生变化的区域提交到
+        后台事件循环进行分析。
+        Captures all saved regions (the primary monitor when none are saved) and submits only
+        the regions whose content changed to the background event loop for analysis.
+
+        返回:
+            分析的 Future；没有区域发生变化时返回 None
+
+        Returns:
+            Future of the analysis, or None when no region changed
+        """
+        regions = list(self.config.settings.saved_regions.values())
+        if regions:
+            # 无法捕获的区域（例如不在屏幕内）本周期跳过，不影响其他区域
+            # Regions that could not be captured (e.g. off screen) are skipped this cycle without affecting the rest
+            captured = [
+                (region, frame)
+                for region, frame in zip(regions, self.screenshot_service.capture_regions(regions))
+                if frame is not None
+            ]
+            regions = [region for region, _ in captured]
+            frames = [frame for _, frame in captured]
+        else:
+            frame = self.screenshot_service.capture_screen()
+            regions = [Region(x=frame.left, y=frame.top, width=frame.width, height=frame.height, name="screen")]
+            frames = [frame]
+
+        changed = self.change_detector.filter_changed(regions, frames)
+        if not changed:
+            return None
+        return self.event_loop.submit(self._analyze_regions(changed))
+
+    async def _analyze_regions(self, changed: List[Tuple[Region, Frame]]) -> None:
+        """
+        分析发生变化的区域，并记录每个区域的最新结果。
+        Analyze the changed regions and record the latest result of each region.
+
+        发送前按周期的令牌和请求预算规划；超出预算的区域被推迟到下一个周期，并在那时优先分析。
+        Requests are planned against the cycle's token and request budget before dispatch;
+        regions over budget are deferred to the next cycle, where they go first.
+
+        小区域被拼成以编号标注的拼图（提示词中附带各编号的区域名称），一次往返即可分析，
+        回复再按编号拆分回各个区域。
+        Small regions are tiled into a mosaic labelled with tile IDs (the prompt maps each ID
+        to its region name), analyzed in one round trip, and the reply is split back out per
+        region.
+
+        参数:
+            changed: (区域, 帧) 列表
+
+        Parameters:
+            changed: List of (region, frame)
+        """
+        deferred = self._deferred_regions
+        changed = sorted(changed, key=lambda item: ChangeDetector.region_key(item[0]) not in deferred)
+        frames = [frame for _, frame in changed]
+        labels = [ChangeDetector.region_key(region) for region, _ in changed]
+        plan = self.ai_service.plan_budget(frames, labels=labels)
+        self._deferred_regions = set()
+        for index in plan.deferred:
+            # 清除签名，使推迟的区域在下一个节拍重新分析
+            # Forget the signature so the deferred region is analyzed again on the next tick
+            key = ChangeDetector.region_key(changed[index][0])
+            self.change_detector.reset(key)
+            self._deferred_regions.add(key)
+
+        async for index, result in self.ai_service.analyze_images(frames, return_exceptions=True, plan=plan):
+            region = changed[index][0]
+            key = ChangeDetector.region_key(region)
+            if isinstance(result, BaseException):
+                # 分析失败时清除签名，使该区域在下一个节拍重新分析
+                # Forget the signature on failure so the region is analyzed again on the next tick
+                self.change_detector.reset(key)
+                continue
+            self.latest_results[key] = result
+            self.logger.info(
+                f"区域 {key} 分析完成 | Region {key} analyzed: {result.text[:80]}",
+                extra={"op": "AI", "region": key, "tokens": result.usage.total_tokens},
+            )
@@ -19,16 +19,46 @@ VisionDesk configuration management module.
 此模块负责管理应用程序的配置设置，包括加载、保存和访问配置项。
 This module is responsible for managing application configuration settings,
 including loading, saving, and accessing configuration items.
+
+配置文件通过临时文件加 os.replace 原子写入，写入过程中崩溃不会截断文件。set() 不会立即写盘，
+而是安排一次延迟保存：短时间内的多次修改合并为一次写入，并在后台线程中完成。
+The configuration file is written atomically via a temporary file plus os.replace, so a
+crash mid-write never truncates it. set() does not write immediately but schedules a
+deferred save: many changes within a short window are coalesced into a single write,
+performed on a background thread.
+
+Config 记录被修改的部分和键：没有修改时跳过保存，保存时只重新序列化被修改的部分（saved_regions 按区域缓存），
+并向订阅者发送变更通知，订阅者无需轮询 Config.get。
+Config tracks the sections and keys that changed: saves are skipped when nothing changed,
+only changed sections are re-serialized on save (saved_regions is cached per region), and
+subscribers receive change notifications instead of polling Config.get.
+
+reload() 重新读取被外部修改的配置文件，只重新验证发生变化的部分和区域（由 ConfigWatcher 调用）。
+reload() re-reads a configuration file edited externally, re-validating only the sections
+and regions that changed (called by ConfigWatcher).
 """
 
 import json
 import os
 import logging
+import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from visiondesk.models.region import Region
 from visiondesk.models.settings import Settings
 
+# 变更回调：callback(section, key, value)，删除区域时 value 为 None
+# Change callback: callback(section, key, value); value is None when a region is removed
+ChangeCallback = Callable[[str, str, Any], None]
+
+# 保存的区域所在的部分 / Section holding the saved regions
+REGIONS_SECTION = "saved_regions"
+
 
 class Config:
     """
@@ -39,18 +69,48 @@ class Config:
     Responsible for handling the loading, saving, and accessing of application settings.
     """
 
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, save_delay: float = 0.5, max_save_delay: float = 5.0):
         """
         初始化配置管理器。
         Initialize the configuration manager.
 
         参数:
             config_path: 配置文件的路径。如果未提供，则使用默认路径。
+            save_delay: 最后一次修改后延迟保存的时间（秒）
+            max_save_delay: 第一次未保存的修改最多等待多久被写入（秒）
 
         Parameters:
             config_path: Path to the configuration file. If not provided, a default path is used.
+            save_delay: Delay after the last change before the deferred save (seconds)
+            max_save_delay: Maximum time the first unsaved change waits to be written (seconds)
         """
         self.logger = logging.getLogger(__name__)
+        self.save_delay = save_delay
+        self.max_save_delay = max_save_delay
+
+        # 延迟保存的状态，由 _lock 保护
+        # State of the deferred save, guarded by _lock
+        self._lock = threading.RLock()
+        self._save_requested = threading.Condition(self._lock)
+        self._save_due: Optional[float] = None
+        self._first_change: Optional[float] = None
+        self._save_thread: Optional[threading.Thread] = None
+        self._closed = False
+        # 从序列化到 os.replace 期间持有，使较旧的文本不会覆盖较新的文本；总在 _lock 之前获取
+        # Held from serialization through os.replace, so older text never overwrites newer text;
+        # always acquired before _lock
+        self._write_lock = threading.Lock()
+
+        # 变更跟踪：被修改的部分及其键，以及各部分（和各区域）序列化后的 JSON 文本缓存
+        # Change tracking: changed sections and their keys, plus the serialized JSON text cached per section (and per region)
+        self._dirty: Dict[str, Set[str]] = {}
+        self._file_stale = False
+        self._section_cache: Dict[str, str] = {}
+        self._region_cache: Dict[str, str] = {}
+        self._subscribers: List[Tuple[Optional[str], ChangeCallback]] = []
+        # 最近一次读取或写入的文件内容，用于忽略自身的写入
+        # File content last read or written, used to ignore our own writes
+        self._last_text: Optional[str] = None
 
         if config_path is None:
             # 使用默认配置路径（用户主目录下的.visiondesk文件夹）
@@ -79,37 +139,305 @@ class Config:
         从配置文件加载设置。
         Load settings from the configuration file.
         """
+        with self._lock:
+            self._dirty.clear()
+            self._section_cache.clear()
+            self._region_cache.clear()
+            self._file_stale = not self.config_file.exists()
+
         if not self.config_file.exists():
             self.logger.info(f"配置文件不存在，使用默认设置 | Configuration file does not exist, using default settings")
             return
 
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
+            text = self.config_file.read_text(encoding='utf-8')
+            config_data = json.loads(text)
 
             # 将加载的数据应用到设置对象
             # Apply loaded data to settings object
             self.settings = Settings.model_validate(config_data)
+            self._last_text = text
             self.logger.info(f"已从 {self.config_file} 加载配置 | Configuration loaded from {self.config_file}")
         except Exception as e:
             self.logger.error(f"加载配置时出错: {e} | Error loading configuration: {e}")
 
-    def save(self) -> None:
+    def save(self, force: bool = False) -> None:
+        """
+        立即将当前设置原子地保存到配置文件（取代任何待执行的延迟保存）。没有修改时跳过。
+        Atomically save current settings to the configuration file now (replacing any pending
+        deferred save). Skipped when nothing changed.
+
+        参数:
+            force: 即使没有修改也写入
+
+        Parameters:
+            force: Write even if nothing changed
+        """
+        # 并发的保存依次进行，每次都序列化开始写入时的最新设置
+        # Concurrent saves take turns, each serializing the latest settings when its write starts
+        with self._write_lock:
+            with self._lock:
+                self._save_due = None
+                self._first_change = None
+                if not (force or self._dirty or self._file_stale):
+                    self.logger.debug("配置未修改，跳过保存 | Configuration unchanged, skipping save")
+                    return
+                dirty, self._dirty = self._dirty, {}
+                # 将设置序列化为JSON（只重新序列化被修改的部分）
+                # Serialize settings to JSON (only changed sections are re-serialized)
+                text = self._serialize()
+                self._last_text = text
+
+            try:
+                self._write_atomic(text)
+                with self._lock:
+                    self._file_stale = False
+                self.logger.info(f"已将配置保存至 {self.config_file} | Configuration saved to {self.config_file}")
+            except Exception as e:
+                # 保留修改标记，以便下次保存时重试
+                # Keep the changes marked, so the next save retries them
+                with self._lock:
+                    for section, keys in dirty.items():
+                        self._dirty.setdefault(section, set()).update(keys)
+                self.logger.error(f"保存配置时出错: {e} | Error saving configuration: {e}")
+
+    def reload(self) -> Dict[str, Set[str]]:
         """
-        将当前设置保存到配置文件。
-        Save current settings to the configuration file.
+        重新读取配置文件并应用外部修改。
+        Re-read the configuration file and apply external changes.
+
+        只有发生变化的部分（以及 saved_regions 中发生变化的区域）会被重新验证。所有变化先验证，
+        全部通过后才一起应用：任何验证失败都不会修改当前设置。修改直接赋值到现有的部分对象上，
+        因此其他组件持有的引用保持有效；尚未保存的本地修改优先于文件内容。
+        Only the sections that changed (and the changed regions of saved_regions) are
+        re-validated. Every change is validated before any is applied, so a validation
+        failure leaves the current settings untouched. Values are assigned onto the existing
+        section objects, so references held by other components stay valid; unsaved local
+        changes take precedence over the file.
+
+        返回:
+            部分名称到已应用的键集合的字典，文件未变化或无效时为空
+
+        Returns:
+            Dictionary mapping section names to the set of applied keys; empty when the file
+            is unchanged or invalid
         """
         try:
-            # 将设置序列化为JSON
-            # Serialize settings to JSON
-            config_data = self.settings.model_dump(mode='json')
+            text = self.config_file.read_text(encoding='utf-8')
+        except OSError as e:
+            self.logger.error(f"读取配置时出错: {e} | Error reading configuration: {e}")
+            return {}
 
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=2, ensure_ascii=False)
+        with self._lock:
+            if text == self._last_text:
+                return {}
+            try:
+                data = json.loads(text)
+                changes = self._validate_changes(data)
+            except (ValueError, ValidationError) as e:
+                self.logger.error(f"重新加载配置时出错，保留当前设置: {e} | "
+                                  f"Error reloading configuration, keeping current settings: {e}")
+                return {}
 
-            self.logger.info(f"已将配置保存至 {self.config_file} | Configuration saved to {self.config_file}")
-        except Exception as e:
-            self.logger.error(f"保存配置时出错: {e} | Error saving configuration: {e}")
+            # 所有变化都已通过验证，一起应用
+            # Every change validated; apply them together
+            for section, key, value in changes:
+                if section == REGIONS_SECTION:
+                    if value is None:
+                        self.settings.saved_regions.pop(key, None)
+                    else:
+                        self.settings.saved_regions[key] = value
+                    self._region_cache.pop(key, None)
+                elif key == section:
+                    # 顶层的标量设置 / Top-level scalar setting
+                    setattr(self.settings, section, value)
+                    self._section_cache.pop(section, None)
+                else:
+                    setattr(getattr(self.settings, section), key, value)
+                    self._section_cache.pop(section, None)
+            self._last_text = text
+
+        applied: Dict[str, Set[str]] = {}
+        for section, key, value in changes:
+            applied.setdefault(section, set()).add(key)
+            self._notify(section, key, value)
+        if applied:
+            self.logger.info(f"已重新加载配置: {sorted(applied)} | Configuration reloaded: {sorted(applied)}")
+        return applied
+
+    def _validate_changes(self, data: Any) -> List[Tuple[str, str, Any]]:
+        """
+        将文件数据与当前设置比较，返回经过验证的 (section, key, value) 变化列表。
+        Compare file data with the current settings and return the validated (section, key, value) changes.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("配置文件的顶层必须是对象 | The top level of the configuration file must be an object")
+
+        changes: List[Tuple[str, str, Any]] = []
+        for name, field in Settings.model_fields.items():
+            if name not in data:
+                continue
+            raw = data[name]
+            current = getattr(self.settings, name)
+            dirty = self._dirty.get(name, set())
+
+            if name == REGIONS_SECTION:
+                if not isinstance(raw, dict):
+                    raise ValueError(f"{name} 必须是对象 | {name} must be an object")
+                for region_name in current.keys() - raw.keys() - dirty:
+                    changes.append((name, region_name, None))
+                for region_name, region_data in raw.items():
+                    existing = current.get(region_name)
+                    if region_name in dirty or (
+                            existing is not None and existing.model_dump(mode='json') == region_data):
+                        continue
+                    changes.append((name, region_name, Region.model_validate(region_data)))
+            elif isinstance(current, BaseModel):
+                if raw == current.model_dump(mode='json'):
+                    continue
+                section = type(current).model_validate(raw)
+                for key in type(current).model_fields:
+                    value = getattr(section, key)
+                    if key not in dirty and value != getattr(current, key):
+                        changes.append((name, key, value))
+            elif raw != current:
+                annotation = Any if field.annotation is None else field.annotation
+                changes.append((name, name, TypeAdapter(annotation).validate_python(raw)))
+        return changes
+
+    @property
+    def is_dirty(self) -> bool:
+        """
+        返回是否有尚未保存的修改。
+        Return whether there are unsaved changes.
+        """
+        with self._lock:
+            return bool(self._dirty) or self._file_stale
+
+    def dirty_keys(self) -> Dict[str, Set[str]]:
+        """
+        返回尚未保存的修改。
+        Return the unsaved changes.
+
+        返回:
+            部分名称到被修改键集合的字典
+
+        Returns:
+            Dictionary mapping section names to the set of changed keys
+        """
+        with self._lock:
+            return {section: set(keys) for section, keys in self._dirty.items()}
+
+    def subscribe(self, callback: ChangeCallback, section: Optional[str] = None) -> Callable[[], None]:
+        """
+        订阅配置变更通知。回调在修改配置的线程中调用。
+        Subscribe to configuration change notifications. Callbacks run on the thread that made the change.
+
+        参数:
+            callback: 以 (section, key, value) 调用的回调
+            section: 只接收该部分的通知，None 表示接收所有部分
+
+        返回:
+            取消订阅的函数
+
+        Parameters:
+            callback: Callback called with (section, key, value)
+            section: Only receive notifications for this section, None receives all sections
+
+        Returns:
+            Function that cancels the subscription
+        """
+        entry = (section, callback)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def schedule_save(self) -> None:
+        """
+        安排一次后台延迟保存。在 save_delay 内的多次调用合并为一次写入，
+        但第一次调用后最多 max_save_delay 秒就会写入。
+        Schedule a deferred save on a background thread. Calls within save_delay of each other
+        are coalesced into one write, which happens at most max_save_delay seconds after the first call.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            now = time.monotonic()
+            if self._first_change is None:
+                self._first_change = now
+            self._save_due = min(now + self.save_delay, self._first_change + self.max_save_delay)
+            if self._save_thread is None:
+                self._save_thread = threading.Thread(
+                    target=self._run_saves, name="visiondesk-config-save", daemon=True
+                )
+                self._save_thread.start()
+            self._save_requested.notify()
+
+    def flush(self) -> None:
+        """
+        如果有待执行的延迟保存，立即在当前线程中执行。
+        Perform a pending deferred save now, on the calling thread.
+        """
+        with self._lock:
+            pending = self._save_due is not None
+        if pending:
+            self.save()
+
+    def close(self) -> None:
+        """
+        停止后台保存线程并保存当前设置。
+        Stop the background save thread and save current settings.
+        """
+        with self._lock:
+            self._closed = True
+            self._save_requested.notify()
+            thread, self._save_thread = self._save_thread, None
+        if thread is not None:
+            thread.join()
+        self.save()
+
+    def _run_saves(self) -> None:
+        with self._lock:
+            while not self._closed:
+                if self._save_due is None:
+                    self._save_requested.wait()
+                    continue
+                timeout = self._save_due - time.monotonic()
+                if timeout > 0:
+                    self._save_requested.wait(timeout)
+                    continue
+                # save() 重新获取可重入锁；写盘在锁外进行
+                # save() re-acquires the reentrant lock; the disk write happens outside it
+                self._lock.release()
+                try:
+                    self.save()
+                finally:
+                    self._lock.acquire()
+
+    def _write_atomic(self, text: str) -> None:
+        """
+        写入同目录下的临时文件并 fsync，然后用 os.replace 替换配置文件。
+        Write to a temporary file in the same directory, fsync it, then os.replace the configuration file.
+        """
+        fd, temp_path = tempfile.mkstemp(prefix=".config.", suffix=".tmp", dir=self.config_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.config_file)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
 
     def get(self, section: str, key: str, default: Any = None) -> Any:
         """
@@ -143,6 +471,9 @@ class Config:
         设置配置值。
         Set a configuration value.
 
+        修改会通过 schedule_save() 延迟保存。
+        The change is saved later via schedule_save().
+
         参数:
             section: 配置部分名称
             key: 配置键名
@@ -154,7 +485,120 @@ class Config:
             value: Value to set
         """
         try:
-            section_data = getattr(self.settings, section)
-            setattr(section_data, key, value)
+            with self._lock:
+                section_data = getattr(self.settings, section)
+                if getattr(section_data, key) == value:
+                    return
+                setattr(section_data, key, value)
+                self._mark_dirty(section, key)
+            self._notify(section, key, value)
+            self.schedule_save()
         except AttributeError:
             self.logger.error(f"无法设置配置 {section}.{key}: 部分或键不存在 | Cannot set configuration {section}.{key}: section or key does not exist")
+
+    def set_region(self, region: Region) -> None:
+        """
+        添加或替换保存的区域（以区域名称为键）。
+        Add or replace a saved region (keyed by the region name).
+
+        参数:
+            region: 要保存的区域，必须有名称
+
+        Parameters:
+            region: Region to save; it must have a name
+        """
+        if not region.name:
+            raise ValueError("保存的区域必须有名称 | A saved region must have a name")
+        with self._lock:
+            if self.settings.saved_regions.get(region.name) == region:
+                return
+            self.settings.saved_regions[region.name] = region
+            self._region_cache.pop(region.name, None)
+            self._mark_dirty(REGIONS_SECTION, region.name)
+        self._notify(REGIONS_SECTION, region.name, region)
+        self.schedule_save()
+
+    def remove_region(self, name: str) -> bool:
+        """
+        删除保存的区域。
+        Remove a saved region.
+
+        参数:
+            name: 区域名称
+
+        返回:
+            区域是否存在并已删除
+
+        Parameters:
+            name: Region name
+
+        Returns:
+            Whether the region existed and was removed
+        """
+        with self._lock:
+            if self.settings.saved_regions.pop(name, None) is None:
+                return False
+            self._region_cache.pop(name, None)
+            self._mark_dirty(REGIONS_SECTION, name)
+        self._notify(REGIONS_SECTION, name, None)
+        self.schedule_save()
+        return True
+
+    def _mark_dirty(self, section: str, key: str) -> None:
+        self._dirty.setdefault(section, set()).add(key)
+        if section != REGIONS_SECTION:
+            self._section_cache.pop(section, None)
+
+    def _notify(self, section: str, key: str, value: Any) -> None:
+        with self._lock:
+            subscribers = [callback for wanted, callback in self._subscribers if wanted in (None, section)]
+        for callback in subscribers:
+            try:
+                callback(section, key, value)
+            except Exception as e:
+                self.logger.error(
+                    f"配置变更回调出错 {section}.{key}: {e} | Configuration change callback failed for {section}.{key}: {e}",
+                    exc_info=True
+                )
+
+    def _serialize(self) -> str:
+        """
+        生成与 json.dumps(settings, indent=2) 相同的文本，复用未修改部分的缓存文本。
+        Produce the same text as json.dumps(settings, indent=2), reusing the cached text of unchanged sections.
+        """
+        parts = []
+        for name in Settings.model_fields:
+            if name == REGIONS_SECTION:
+                text = self._serialize_regions()
+            else:
+                cached = self._section_cache.get(name)
+                if cached is None:
+                    value = getattr(self.settings, name)
+                    data = value.model_dump(mode='json') if isinstance(value, BaseModel) else value
+                    cached = _dumps(data, level=1)
+                    self._section_cache[name] = cached
+                text = cached
+            parts.append(f"  {_dumps(name)}: {text}")
+        return "{\n" + ",\n".join(parts) + "\n}"
+
+    def _serialize_regions(self) -> str:
+        regions = self.settings.saved_regions
+        if not regions:
+            return "{}"
+        parts = []
+        for name, region in regions.items():
+            text = self._region_cache.get(name)
+            if text is None:
+                text = _dumps(region.model_dump(mode='json'), level=2)
+                self._region_cache[name] = text
+            parts.append(f"    {_dumps(name)}: {text}")
+        return "{\n" + ",\n".join(parts) + "\n  }"
+
+
+def _dumps(data: Any, level: int = 0) -> str:
+    """
+    以 2 空格缩进序列化为 JSON，并将续行缩进到给定的嵌套层级。
+    Serialize to JSON with a 2-space indent, indenting continuation lines to the given nesting level.
+    """
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    return text.replace("\n", "\n" + "  " * level) if level else text
@@ -0,0 +1,240 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+VisionDesk 配置文件监视模块。
+VisionDesk configuration file watcher module.
+
+此模块监视 config.json 的外部修改（例如通过文件下发的配置更新），并调用 Config.reload()
+只应用发生变化的部分，无需重启应用。在 Linux 上通过 ctypes 使用 inotify 监视配置目录
+（原子替换会更换文件的 inode，因此监视目录而不是文件），其他平台上退回到定期检查文件状态。
+Config 自身的写入会被 reload() 识别并忽略。
+This module watches config.json for external edits (such as configuration updates pushed by
+file drop) and calls Config.reload() to apply only the sections that changed, without
+restarting the application. On Linux it uses inotify via ctypes on the configuration
+directory (an atomic replace swaps the file's inode, so the directory is watched rather than
+the file); on other platforms it falls back to polling the file's status. Config's own
+writes are recognised and ignored by reload().
+
+主要类:
+- ConfigWatcher: 配置文件监视器
+
+Main classes:
+- ConfigWatcher: Configuration file watcher
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Optional, Tuple
+
+from visiondesk.core.config import Config
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+# inotify event masks (see <sys/inotify.h>)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _inotify_fd(directory: str) -> Optional[int]:
+    """
+    为目录创建 inotify 监视，不可用时返回 None。
+    Create an inotify watch on a directory, or return None when inotify is unavailable.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd: int = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+class ConfigWatcher:
+    """
+    配置文件监视器。
+    Configuration file watcher.
+
+    检测到 config.json 的修改后，等待 settle_delay 秒让写入方完成（期间的多次修改合并），
+    然后调用 Config.reload()。
+    When config.json changes, waits settle_delay seconds for the writer to finish (merging
+    any further changes in the meantime), then calls Config.reload().
+    """
+
+    def __init__(self, config: Config, poll_interval: float = 1.0, settle_delay: float = 0.2):
+        """
+        初始化配置文件监视器（尚未启动）。
+        Initialize the configuration file watcher (not started yet).
+
+        参数:
+            config: 要重新加载的配置
+            poll_interval: 轮询模式下检查文件的间隔（秒）
+            settle_delay: 检测到修改后等待写入完成的时间（秒）
+
+        Parameters:
+            config: Configuration to reload
+            poll_interval: Interval between file checks in polling mode (seconds)
+            settle_delay: Time to wait for a write to finish after a change is detected (seconds)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+        self.poll_interval = poll_interval
+        self.settle_delay = settle_delay
+        self.reloads = 0
+
+        self._fd: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        """
+        返回监视器是否正在运行。
+        Return whether the watcher is running.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def uses_inotify(self) -> bool:
+        """
+        返回监视器是否使用 inotify（否则为轮询）。
+        Return whether the watcher uses inotify (polling otherwise).
+        """
+        return self._fd is not None
+
+    def start(self) -> None:
+        """
+        启动监视线程。
+        Start the watcher thread.
+        """
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._fd = fd = _inotify_fd(str(self.config.config_dir))
+        if fd is not None:
+            self._thread = threading.Thread(
+                target=self._watch_inotify, args=(fd,), name="visiondesk-config-watch", daemon=True
+            )
+        else:
+            self._thread = threading.Thread(target=self._watch_polling, name="visiondesk-config-watch", daemon=True)
+        self._thread.start()
+        mode = "inotify" if self._fd is not None else "polling"
+        self.logger.info(f"配置文件监视已启动 ({mode}) | Configuration watcher started ({mode})")
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        停止监视线程。
+        Stop the watcher thread.
+
+        inotify 描述符只在线程退出后关闭；线程未能在超时内退出时保留线程和描述符（之后可再次调用 stop()）。
+        The inotify descriptor is only closed once the thread has exited; if the thread does not
+        exit within the timeout, both are kept (stop() can be called again).
+
+        参数:
+            timeout: 等待线程退出的最长时间（秒）
+
+        Parameters:
+            timeout: Maximum time to wait for the thread to exit (seconds)
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        if thread.is_alive():
+            self.logger.warning(
+                f"配置文件监视未能在 {timeout} 秒内停止 | Configuration watcher did not stop within {timeout}s"
+            )
+            return
+        self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.logger.info("配置文件监视已停止 | Configuration watcher stopped")
+
+    def _watch_inotify(self, fd: int) -> None:
+        name = os.fsencode(self.config.config_file.name)
+        while not self._stop.is_set():
+            # 带超时等待，以便及时响应停止请求 / Wait with a timeout, to notice stop requests promptly
+            readable, _, _ = select.select([fd], [], [], 0.5)
+            if not readable or not self._read_events(fd, name):
+                continue
+            # 合并写入方接下来的事件 / Merge the writer's follow-up events
+            while not self._stop.wait(self.settle_delay):
+                if not select.select([fd], [], [], 0)[0]:
+                    break
+                self._read_events(fd, name)
+            self._reload()
+
+    @staticmethod
+    def _read_events(fd: int, name: bytes) -> bool:
+        """
+        读取所有待处理的 inotify 事件，返回其中是否有配置文件的事件。
+        Read all pending inotify events and return whether any concerns the configuration file.
+        """
+        matched = False
+        try:
+            buffer = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            _, _, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            if buffer[offset:offset + length].rstrip(b"\0") == name:
+                matched = True
+            offset += length
+        return matched
+
+    def _watch_polling(self) -> None:
+        signature = self._signature()
+        while not self._stop.wait(self.poll_interval):
+            current = self._signature()
+            if current == signature:
+                continue
+            # 等待写入稳定 / Wait for the write to settle
+            if self._stop.wait(self.settle_delay):
+                break
+            signature = self._signature()
+            self._reload()
+
+    def _signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.config.config_file)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _reload(self) -> None:
+        try:
+            if self.config.reload():
+                self.reloads += 1
+        except Exception as e:
+            self.logger.error(f"重新加载配置失败: {e} | Failed to reload configuration: {e}", exc_info=True)
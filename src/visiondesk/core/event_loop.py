@@ -0,0 +1,180 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+VisionDesk 后台事件循环模块。
+VisionDesk background event loop module.
+
+Qt 的主线程运行自己的事件循环，因此异步服务（AI 请求、HTTP 会话）运行在一个独立线程中的
+asyncio 事件循环上。长期存在的资源（例如提供商的连接池）绑定在这个循环上，在整个应用生命周期内复用。
+The Qt main thread runs its own event loop, so asynchronous services (AI requests, HTTP
+sessions) run on an asyncio event loop in a separate thread. Long-lived resources (such as a
+provider's connection pool) are bound to that loop and reused for the lifetime of the application.
+
+主要类:
+- BackgroundEventLoop: 在后台线程中运行的 asyncio 事件循环
+
+Main classes:
+- BackgroundEventLoop: asyncio event loop running in a background thread
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class BackgroundEventLoop:
+    """
+    在后台线程中运行的 asyncio 事件循环。
+    asyncio event loop running in a background thread.
+
+    任意线程都可以通过 submit() 提交协程并得到 concurrent.futures.Future，
+    或通过 run() 阻塞等待结果。
+    Any thread can submit a coroutine with submit() and get a concurrent.futures.Future,
+    or block for its result with run().
+    """
+
+    def __init__(self, name: str = "visiondesk-async"):
+        """
+        初始化后台事件循环（尚未启动）。
+        Initialize the background event loop (not started yet).
+
+        参数:
+            name: 后台线程名称
+
+        Parameters:
+            name: Name of the background thread
+        """
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        """
+        返回事件循环是否正在运行。
+        Return whether the event loop is running.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """
+        启动后台线程（如果尚未启动）。
+        Start the background thread (if not started yet).
+
+        返回:
+            正在运行的事件循环
+
+        Returns:
+            The running event loop
+        """
+        with self._lock:
+            if self.is_running and self.loop is not None:
+                return self.loop
+
+            loop = self.loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+            self.logger.debug(f"后台事件循环已启动: {self.name} | Background event loop started: {self.name}")
+            return loop
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> "Future[T]":
+        """
+        在后台事件循环上调度协程。
+        Schedule a coroutine on the background event loop.
+
+        参数:
+            coro: 要运行的协程
+
+        返回:
+            协程结果的 Future
+
+        Parameters:
+            coro: Coroutine to run
+
+        Returns:
+            Future of the coroutine's result
+        """
+        loop = self.start()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """
+        在后台事件循环上运行协程并阻塞等待结果。
+        Run a coroutine on the background event loop and block until it completes.
+
+        参数:
+            coro: 要运行的协程
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        返回:
+            协程的结果
+
+        Parameters:
+            coro: Coroutine to run
+            timeout: Maximum time to wait (seconds), None waits forever
+
+        Returns:
+            The coroutine's result
+        """
+        return self.submit(coro).result(timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        取消剩余任务，停止事件循环并等待后台线程退出。
+        Cancel the remaining tasks, stop the event loop and wait for the background thread to exit.
+
+        参数:
+            timeout: 等待后台线程退出的最长时间（秒）
+
+        Parameters:
+            timeout: Maximum time to wait for the background thread to exit (seconds)
+        """
+        with self._lock:
+            loop, thread = self.loop, self._thread
+            if loop is None or thread is None or not thread.is_alive():
+                return
+
+            async def cancel_pending() -> None:
+                tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await loop.shutdown_asyncgens()
+
+            try:
+                asyncio.run_coroutine_threadsafe(cancel_pending(), loop).result(timeout)
+            except Exception as e:
+                self.logger.warning(f"取消后台任务失败: {e} | Failed to cancel background tasks: {e}")
+
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
+            self._thread = None
+            self.logger.debug(f"后台事件循环已停止: {self.name} | Background event loop stopped: {self.name}")
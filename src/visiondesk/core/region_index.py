@@ -0,0 +1,351 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+VisionDesk 区域空间索引模块。
+VisionDesk region spatial index module.
+
+此模块为保存的区域提供基于均匀网格的空间索引：屏幕坐标空间被划分为固定大小的单元格，
+每个单元格记录与之重叠的区域名称。点查询只检查一个单元格，矩形查询只检查其覆盖的单元格，
+因此有数百个区域时也能在亚毫秒内回答。索引可以订阅 Config，在区域通过 Config.set_region、
+Config.remove_region 或热重载被添加或删除时增量更新。
+This module provides a uniform-grid spatial index over saved regions: screen coordinate
+space is divided into fixed-size cells, and each cell records the names of the regions
+overlapping it. A point query inspects one cell and a rectangle query only the cells it
+covers, so answers take well under a millisecond even with hundreds of regions. The index
+can subscribe to Config and is updated incrementally as regions are added or removed via
+Config.set_region, Config.remove_region or a hot reload.
+
+主要类:
+- RegionIndex: 保存区域的均匀网格空间索引
+
+Main classes:
+- RegionIndex: Uniform-grid spatial index of saved regions
+"""
+
+import math
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from visiondesk.core.config import REGIONS_SECTION, Config
+from visiondesk.models.region import Region
+
+# 边界元组 (left, top, right, bottom) / Bounds tuple (left, top, right, bottom)
+Bounds = Tuple[int, int, int, int]
+# 矩形元组 (x, y, width, height)，与 visiondesk.models.region.Rect 值类型不同
+# Rectangle tuple (x, y, width, height), distinct from the visiondesk.models.region.Rect value type
+RectTuple = Tuple[int, int, int, int]
+
+
+class RegionIndex:
+    """
+    保存区域的均匀网格空间索引。
+    Uniform-grid spatial index of saved regions.
+
+    区域以名称为键；边界语义与 Region 一致（contains_point 包含右边和下边）。
+    所有方法都是线程安全的：Config 的通知可能来自配置监视线程，而查询来自 GUI 或捕获线程。
+    Regions are keyed by name; bounds follow Region (contains_point includes the right and
+    bottom edges). Every method is thread-safe: Config notifications may come from the config
+    watcher thread while queries come from the GUI or capture threads.
+    """
+
+    def __init__(self, regions: Iterable[Region] = (), cell_size: int = 256):
+        """
+        初始化空间索引。
+        Initialize the spatial index.
+
+        参数:
+            regions: 初始区域（必须有名称）
+            cell_size: 网格单元格的边长（像素）
+
+        Parameters:
+            regions: Initial regions (they must have names)
+            cell_size: Edge length of a grid cell (pixels)
+        """
+        if cell_size <= 0:
+            raise ValueError(f"单元格大小必须为正数: {cell_size} | Cell size must be positive: {cell_size}")
+        self.cell_size = cell_size
+        self._bounds: Dict[str, Bounds] = {}
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        # 被占用单元格的范围，修改时失效 / Extent of the occupied cells, invalidated on change
+        self._extent: Optional[Tuple[int, int, int, int]] = None
+        self._lock = threading.Lock()
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        for region in regions:
+            self.add(region)
+
+    @classmethod
+    def from_config(cls, config: Config, cell_size: int = 256) -> "RegionIndex":
+        """
+        为配置中保存的区域创建索引，并订阅其变更以保持同步。
+        Create an index of the configuration's saved regions and subscribe to its changes to stay in sync.
+
+        参数:
+            config: 配置
+            cell_size: 网格单元格的边长（像素）
+
+        返回:
+            与配置保持同步的索引
+
+        Parameters:
+            config: Configuration
+            cell_size: Edge length of a grid cell (pixels)
+
+        Returns:
+            Index kept in sync with the configuration
+        """
+        index = cls(cell_size=cell_size)
+        index._unsubscribe = config.subscribe(index._on_region_changed, section=REGIONS_SECTION)
+        for name, region in list(config.settings.saved_regions.items()):
+            index.add(region, name)
+        return index
+
+    def close(self) -> None:
+        """
+        取消对配置的订阅。
+        Unsubscribe from the configuration.
+        """
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def __len__(self) -> int:
+        return len(self._bounds)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._bounds
+
+    def add(self, region: Region, name: Optional[str] = None) -> None:
+        """
+        添加或替换区域。
+        Add or replace a region.
+
+        参数:
+            region: 区域
+            name: 索引键，默认为区域名称
+
+        Parameters:
+            region: Region
+            name: Index key, the region name by default
+        """
+        name = name or region.name
+        if not name:
+            raise ValueError("被索引的区域必须有名称 | An indexed region must have a name")
+        bounds = region.bounds
+        with self._lock:
+            self._remove(name)
+            self._extent = None
+            self._bounds[name] = bounds
+            for cell in self._cells_of(bounds):
+                self._cells.setdefault(cell, set()).add(name)
+
+    def remove(self, name: str) -> bool:
+        """
+        删除区域。
+        Remove a region.
+
+        返回:
+            区域是否存在并已删除
+
+        Returns:
+            Whether the region existed and was removed
+        """
+        with self._lock:
+            return self._remove(name)
+
+    def at_point(self, x: int, y: int) -> List[str]:
+        """
+        返回包含给定点的区域名称。
+        Return the names of the regions containing the given point.
+
+        参数:
+            x: 点的 X 坐标
+            y: 点的 Y 坐标
+
+        返回:
+            区域名称列表（按名称排序）
+
+        Parameters:
+            x: X coordinate of the point
+            y: Y coordinate of the point
+
+        Returns:
+            List of region names (sorted by name)
+        """
+        with self._lock:
+            candidates = self._cells.get((x // self.cell_size, y // self.cell_size), ())
+            return sorted(
+                name for name in candidates
+                if self._bounds[name][0] <= x <= self._bounds[name][2]
+                and self._bounds[name][1] <= y <= self._bounds[name][3]
+            )
+
+    def intersecting(self, x: int, y: int, width: int, height: int) -> List[str]:
+        """
+        返回与给定矩形重叠（面积大于零）的区域名称。
+        Return the names of the regions overlapping (with positive area) the given rectangle.
+
+        参数:
+            x: 矩形左上角的 X 坐标
+            y: 矩形左上角的 Y 坐标
+            width: 矩形宽度
+            height: 矩形高度
+
+        返回:
+            区域名称列表（按名称排序）
+
+        Parameters:
+            x: X coordinate of the rectangle's top-left corner
+            y: Y coordinate of the rectangle's top-left corner
+            width: Rectangle width
+            height: Rectangle height
+
+        Returns:
+            List of region names (sorted by name)
+        """
+        with self._lock:
+            return sorted(self._intersecting((x, y, x + width, y + height)))
+
+    def affected_by(self, dirty_rects: Iterable[RectTuple]) -> List[str]:
+        """
+        返回受任一脏矩形影响的区域名称。
+        Return the names of the regions affected by any of the dirty rectangles.
+
+        参数:
+            dirty_rects: 发生变化的屏幕矩形 (x, y, width, height)
+
+        返回:
+            区域名称列表（按名称排序）
+
+        Parameters:
+            dirty_rects: Changed screen rectangles (x, y, width, height)
+
+        Returns:
+            List of region names (sorted by name)
+        """
+        affected: Set[str] = set()
+        with self._lock:
+            for x, y, width, height in dirty_rects:
+                affected |= self._intersecting((x, y, x + width, y + height))
+        return sorted(affected)
+
+    def nearest(self, x: int, y: int) -> Optional[str]:
+        """
+        返回离给定点最近的区域名称（包含该点的区域距离为零）。
+        Return the name of the region nearest to the given point (regions containing it are at distance zero).
+
+        从点所在的单元格开始逐圈向外搜索，一旦剩余的圈不可能更近就停止。
+        Searches ring by ring outwards from the point's cell, stopping once no remaining ring can be closer.
+
+        参数:
+            x: 点的 X 坐标
+            y: 点的 Y 坐标
+
+        返回:
+            最近区域的名称，索引为空时返回 None
+
+        Parameters:
+            x: X coordinate of the point
+            y: Y coordinate of the point
+
+        Returns:
+            Name of the nearest region, None when the index is empty
+        """
+        with self._lock:
+            if not self._bounds:
+                return None
+            cx, cy = x // self.cell_size, y // self.cell_size
+            max_ring = self._max_ring(cx, cy)
+            best: Optional[Tuple[float, str]] = None
+            for ring in range(max_ring + 1):
+                # 第 ring 圈中的区域离点至少 (ring - 1) * cell_size
+                # Regions first seen in ring r are at least (r - 1) * cell_size away
+                if best is not None and best[0] <= (ring - 1) * self.cell_size:
+                    break
+                for cell in self._ring(cx, cy, ring):
+                    for name in self._cells.get(cell, ()):
+                        candidate = (self._distance(self._bounds[name], x, y), name)
+                        if best is None or candidate < best:
+                            best = candidate
+            return best[1] if best is not None else None
+
+    def _on_region_changed(self, section: str, key: str, value: Any) -> None:
+        if value is None:
+            self.remove(key)
+        else:
+            self.add(value, key)
+
+    def _remove(self, name: str) -> bool:
+        bounds = self._bounds.pop(name, None)
+        if bounds is None:
+            return False
+        self._extent = None
+        for cell in self._cells_of(bounds):
+            names = self._cells.get(cell)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._cells[cell]
+        return True
+
+    def _intersecting(self, bounds: Bounds) -> Set[str]:
+        left, top, right, bottom = bounds
+        if right <= left or bottom <= top:
+            return set()
+        candidates: Set[str] = set()
+        for cell in self._cells_of(bounds):
+            candidates |= self._cells.get(cell, set())
+        return {
+            name for name in candidates
+            if self._bounds[name][0] < right and left < self._bounds[name][2]
+            and self._bounds[name][1] < bottom and top < self._bounds[name][3]
+        }
+
+    def _cells_of(self, bounds: Bounds) -> Iterator[Tuple[int, int]]:
+        """
+        返回边界（包括右边和下边）覆盖的单元格。
+        Return the cells covered by the bounds (right and bottom edges included).
+        """
+        left, top, right, bottom = bounds
+        size = self.cell_size
+        for cx in range(left // size, right // size + 1):
+            for cy in range(top // size, bottom // size + 1):
+                yield cx, cy
+
+    def _max_ring(self, cx: int, cy: int) -> int:
+        if self._extent is None:
+            xs = [x for x, _ in self._cells]
+            ys = [y for _, y in self._cells]
+            self._extent = (min(xs), min(ys), max(xs), max(ys))
+        min_x, min_y, max_x, max_y = self._extent
+        return max(cx - min_x, max_x - cx, cy - min_y, max_y - cy, 0)
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int) -> Iterator[Tuple[int, int]]:
+        if ring == 0:
+            yield cx, cy
+            return
+        for x in range(cx - ring, cx + ring + 1):
+            yield x, cy - ring
+            yield x, cy + ring
+        for y in range(cy - ring + 1, cy + ring):
+            yield cx - ring, y
+            yield cx + ring, y
+
+    @staticmethod
+    def _distance(bounds: Bounds, x: int, y: int) -> float:
+        left, top, right, bottom = bounds
+        dx = max(left - x, 0, x - right)
+        dy = max(top - y, 0, y - bottom)
+        return math.hypot(dx, dy)
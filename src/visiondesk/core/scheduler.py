@@ -0,0 +1,346 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+VisionDesk 捕获调度器模块。
+VisionDesk capture scheduler module.
+
+此模块提供以固定频率驱动自动捕获的调度器。调度器运行在独立线程中（不占用 Qt GUI 线程），
+节拍时间由起始时间加整数倍间隔计算，因此不会累积漂移；当上一个分析周期仍在进行时，
+新的节拍会被丢弃或合并，避免慢速的模型响应堆积无界的工作。
+This module provides a scheduler that drives automatic capture at a fixed rate. The
+scheduler runs on its own thread (off the Qt GUI thread). Tick times are computed as the
+start time plus whole multiples of the interval, so no drift accumulates. While the previous
+analysis cycle is still in flight, new ticks are dropped or coalesced, so slow model
+responses cannot pile up unbounded work.
+
+主要类:
+- CaptureScheduler: 无漂移、带背压的捕获调度器
+- TickStat: 单个节拍的计时统计
+
+Main classes:
+- CaptureScheduler: Drift-free capture scheduler with backpressure
+- TickStat: Timing statistics of a single tick
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional
+
+# 背压策略：上一个周期仍在进行时，丢弃节拍，或在其完成后立即补跑一次
+# Backpressure policies: while the previous cycle is in flight, drop the tick, or run once
+# as soon as it completes
+POLICY_DROP = "drop"
+POLICY_COALESCE = "coalesce"
+
+# 一个捕获周期：同步执行捕获，可选地返回仍在进行的分析的 Future
+# One capture cycle: captures synchronously and optionally returns a Future of the analysis still in flight
+CycleCallback = Callable[[], Optional["Future[Any]"]]
+
+
+class TickStat(NamedTuple):
+    """
+    单个节拍的计时统计（时间均为 time.monotonic() 秒）。
+    Timing statistics of a single tick (times in time.monotonic() seconds).
+    """
+
+    # 节拍序号，从 0 开始 / Tick number, from 0
+    number: int
+    scheduled: float
+    started: float
+    action: str
+    missed: int = 0
+    capture_seconds: float = 0.0
+
+    @property
+    def lag(self) -> float:
+        """
+        返回节拍实际开始时间相对计划时间的延迟（秒）。
+        Return how late the tick started relative to its scheduled time (seconds).
+        """
+        return self.started - self.scheduled
+
+
+class CaptureScheduler:
+    """
+    无漂移、带背压的捕获调度器。
+    Drift-free capture scheduler with backpressure.
+
+    第 n 个节拍计划在 start + n * interval 执行。错过的节拍（例如系统休眠后）被跳过并计入统计，
+    而不是连续补跑。每个节拍调用一次 callback；如果上一次返回的 Future 尚未完成，则按策略处理：
+    "drop" 丢弃该节拍，"coalesce" 在上一个周期完成后立即补跑一次（多个等待的节拍合并为一次）。
+    Tick n is scheduled at start + n * interval. Missed ticks (e.g. after the system sleeps)
+    are skipped and counted instead of being replayed back to back. Each tick calls the
+    callback once; if the Future it last returned is not done yet, the policy applies:
+    "drop" discards the tick, "coalesce" runs once as soon as the previous cycle completes
+    (any number of waiting ticks merge into that one run).
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        callback: CycleCallback,
+        policy: str = POLICY_COALESCE,
+        history: int = 100,
+        name: str = "visiondesk-capture",
+    ):
+        """
+        初始化捕获调度器（尚未启动）。
+        Initialize the capture scheduler (not started yet).
+
+        参数:
+            interval: 节拍间隔（秒）
+            callback: 每个节拍调用的捕获周期
+            policy: 背压策略，"drop" 或 "coalesce"
+            history: 保留的节拍统计条数
+            name: 调度线程名称
+
+        Parameters:
+            interval: Tick interval (seconds)
+            callback: Capture cycle called on every tick
+            policy: Backpressure policy, "drop" or "coalesce"
+            history: Number of tick statistics to keep
+            name: Name of the scheduler thread
+        """
+        if interval <= 0:
+            raise ValueError(f"间隔必须为正数: {interval} | Interval must be positive: {interval}")
+        if policy not in (POLICY_DROP, POLICY_COALESCE):
+            raise ValueError(f"未知的背压策略: {policy} | Unknown backpressure policy: {policy}")
+
+        self.logger = logging.getLogger(__name__)
+        self.interval = interval
+        self.callback = callback
+        self.policy = policy
+        self.name = name
+
+        self.ticks = 0
+        self.runs = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.missed = 0
+        self.failures = 0
+        self.history: Deque[TickStat] = deque(maxlen=history)
+
+        self._in_flight: Optional["Future[Any]"] = None
+        self._pending: Optional[TickStat] = None
+        self._cycle_seconds: Deque[float] = deque(maxlen=history)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._start = 0.0
+        self._index = 0
+
+    @property
+    def is_running(self) -> bool:
+        """
+        返回调度器是否正在运行。
+        Return whether the scheduler is running.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        启动调度线程。第一个节拍立即执行。
+        Start the scheduler thread. The first tick runs immediately.
+
+        如果上一次 stop() 超时、旧线程仍在退出，则不会启动新线程。
+        Nothing is started while the thread of a timed-out stop() is still exiting.
+        """
+        if self.is_running:
+            if self._stop.is_set():
+                self.logger.warning(
+                    "上一个调度线程仍在退出，暂不启动 | The previous scheduler thread is still exiting; not starting"
+                )
+            return
+        self._stop.clear()
+        self._wake.clear()
+        self._start = time.monotonic()
+        self._index = 0
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self.logger.info(
+            f"捕获调度器已启动，间隔 {self.interval} 秒，策略 {self.policy} | "
+            f"Capture scheduler started, interval {self.interval}s, policy {self.policy}"
+        )
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """
+        停止调度线程。正在进行的分析周期不会被取消。
+        Stop the scheduler thread. An analysis cycle in flight is not cancelled.
+
+        线程未能在超时内退出时保留其引用（之后可再次调用 stop() 等待它）。
+        If the thread does not exit within the timeout, its reference is kept (stop() can be
+        called again to wait for it).
+
+        参数:
+            timeout: 等待线程退出的最长时间（秒）
+
+        Parameters:
+            timeout: Maximum time to wait for the thread to exit (seconds)
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        thread.join(timeout)
+        if thread.is_alive():
+            # 保留线程引用，使 start() 不会在它退出前启动第二个调度线程
+            # Keep the reference, so start() cannot launch a second scheduler thread before this one exits
+            self.logger.warning(
+                f"捕获调度器未能在 {timeout} 秒内停止 | Capture scheduler did not stop within {timeout}s"
+            )
+            return
+        self._thread = None
+        self.logger.info("捕获调度器已停止 | Capture scheduler stopped")
+
+    def set_interval(self, interval: float) -> None:
+        """
+        修改节拍间隔。节拍时间从下一个节拍重新计算。
+        Change the tick interval. Tick times are recomputed from the next tick on.
+        """
+        if interval <= 0:
+            raise ValueError(f"间隔必须为正数: {interval} | Interval must be positive: {interval}")
+        with self._lock:
+            self._start = time.monotonic()
+            self._index = 1
+            self.interval = interval
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                deadline = self._start + self._index * self.interval
+            timeout = deadline - time.monotonic()
+            if timeout > 0 and self._wake.wait(timeout):
+                self._wake.clear()
+                if self._stop.is_set():
+                    break
+                pending = self._take_pending()
+                if pending is not None:
+                    self._execute(pending._replace(started=time.monotonic()))
+                continue
+
+            now = time.monotonic()
+            with self._lock:
+                # 跳过错过的节拍，下一个节拍对齐到网格上的下一个时间点
+                # Skip missed ticks; the next tick aligns to the next point on the grid
+                missed = max(0, int((now - deadline) // self.interval))
+                index = self._index + missed
+                self._index = index + 1
+            self.missed += missed
+            self._tick(TickStat(index, deadline + missed * self.interval, now, "run", missed))
+
+    def _tick(self, stat: TickStat) -> None:
+        self.ticks += 1
+        in_flight = self._in_flight
+        if in_flight is None or in_flight.done():
+            self._execute(stat)
+            return
+
+        if self.policy == POLICY_DROP:
+            self.dropped += 1
+            self.history.append(stat._replace(action="dropped"))
+            self.logger.debug(
+                f"上一周期仍在进行，丢弃节拍 {stat.number} | "
+                f"Previous cycle still in flight, dropped tick {stat.number}"
+            )
+            return
+
+        with self._lock:
+            if self._pending is not None:
+                self.coalesced += 1
+                self.history.append(self._pending._replace(action="coalesced"))
+            self._pending = stat
+        if in_flight.done():
+            # 周期恰好在登记等待节拍之前完成，其完成回调未看到该节拍
+            # The cycle completed just before the tick was registered, so its done callback missed it
+            self._wake.set()
+        self.logger.debug(
+            f"上一周期仍在进行，节拍 {stat.number} 将在其完成后执行 | "
+            f"Previous cycle still in flight, tick {stat.number} runs when it completes"
+        )
+
+    def _take_pending(self) -> Optional[TickStat]:
+        # 唤醒也可能来自 set_interval，此时上一个周期可能仍在进行，等待的节拍须继续等待
+        # Wake-ups also come from set_interval while the previous cycle may still be in flight;
+        # the waiting tick must keep waiting then
+        in_flight = self._in_flight
+        if in_flight is not None and not in_flight.done():
+            return None
+        with self._lock:
+            pending, self._pending = self._pending, None
+        return pending
+
+    def _execute(self, stat: TickStat) -> None:
+        self.runs += 1
+        try:
+            future = self.callback()
+        except Exception as e:
+            self.failures += 1
+            self.logger.error(f"捕获周期出错: {e} | Capture cycle failed: {e}", exc_info=True)
+            future = None
+
+        capture_seconds = time.monotonic() - stat.started
+        self.history.append(stat._replace(capture_seconds=capture_seconds))
+
+        if future is None:
+            self._cycle_seconds.append(capture_seconds)
+            return
+        self._in_flight = future
+        future.add_done_callback(lambda f: self._on_cycle_done(f, stat.started))
+
+    def _on_cycle_done(self, future: "Future[Any]", started: float) -> None:
+        self._cycle_seconds.append(time.monotonic() - started)
+        if not future.cancelled() and future.exception() is not None:
+            self.failures += 1
+            self.logger.error(
+                f"分析周期出错: {future.exception()} | Analysis cycle failed: {future.exception()}"
+            )
+        with self._lock:
+            has_pending = self._pending is not None
+        if has_pending:
+            self._wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        返回节拍计时统计。
+        Return tick timing statistics.
+
+        返回:
+            包含节拍、执行、丢弃、合并和错过次数，以及延迟和周期耗时（秒）的字典
+
+        Returns:
+            Dictionary with the tick, run, dropped, coalesced and missed counts, plus lag and
+            cycle durations (seconds)
+        """
+        lags: List[float] = [stat.lag for stat in self.history if stat.action == "run"]
+        cycles = list(self._cycle_seconds)
+        return {
+            "ticks": self.ticks,
+            "runs": self.runs,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "missed": self.missed,
+            "failures": self.failures,
+            "in_flight": self._in_flight is not None and not self._in_flight.done(),
+            "lag_mean": sum(lags) / len(lags) if lags else 0.0,
+            "lag_max": max(lags, default=0.0),
+            "cycle_mean": sum(cycles) / len(cycles) if cycles else 0.0,
+            "cycle_max": max(cycles, default=0.0),
+        }
@@ -19,16 +19,996 @@ VisionDesk AI service module.
 此模块提供与 AI 提供商的集成，处理图像分析和解释请求。
 This module provides integration with AI providers, handling image analysis and interpretation requests.
 
+主要类:
+- AIService: AI 服务，负责缓存查询、并发控制、速率限制和调用 AI 提供商
+    - analyze_image: 分析单个图像并返回结果
+    - analyze_images: 批量分析多个图像并返回结果
+    - plan_budget: 在发送前按周期预算规划每个图像的分辨率和请求数
+    - analyze_mosaic: 把多个小区域拼成一张图像，在一个请求中分析，并按区域拆分结果
+- BudgetPlan: 一个捕获周期的令牌和请求预算计划
+- PlannedImage: 预算计划中的单个图像请求
+- PlannedMosaic: 预算计划中的单个拼图请求
+
+Main classes:
+- AIService: AI service, responsible for cache lookups, concurrency control, rate limiting
+  and calling the AI provider
+    - analyze_image: Analyze a single image and return results
+    - analyze_images: Analyze multiple images in batch and return results
+    - plan_budget: Plan each image's resolution and the request count against the cycle budget before dispatch
+    - analyze_mosaic: Tile several small regions into one image, analyze it in a single request and
+      split the result by region
+- BudgetPlan: Token and request budget plan of one capture cycle
+- PlannedImage: A single image request of a budget plan
+- PlannedMosaic: A single mosaic request of a budget plan
+
 主要函数:
-- analyze_image: 分析单个图像并返回结果
-- analyze_images: 批量分析多个图像并返回结果
+- estimate_text_tokens: 粗略估算文本的令牌数
+- mosaic_tile_id: 返回拼图中第 n 个图块的 ASCII 编号
+- mosaic_prompt: 构造拼图请求的提示词，要求按图块编号分别以 JSON 回答
+- split_mosaic_reply: 把拼图请求的 JSON 回复按图块编号拆分
 - get_available_providers: 获取可用的 AI 提供商列表
+- create_provider: 根据设置创建 AI 提供商
 
 Main functions:
-- analyze_image: Analyze a single image and return results
-- analyze_images: Analyze multiple images in batch and return results
+- estimate_text_tokens: Roughly estimate the tokens of a text
+- mosaic_tile_id: Return the ASCII ID of the n-th tile of a mosaic
+- mosaic_prompt: Build the prompt of a mosaic request, asking for a JSON answer per tile ID
+- split_mosaic_reply: Split the JSON reply of a mosaic request by tile ID
 - get_available_providers: Get list of available AI providers
+- create_provider: Create an AI provider from the settings
 """
 
-# TODO: 实现 AI 服务功能
-# TODO: Implement AI service functionality
+import asyncio
+import json
+import logging
+import threading
+import weakref
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from visiondesk.ai.models.vision_model import AnalysisResult, TokenUsage
+from visiondesk.ai.providers.base import BaseProvider
+from visiondesk.ai.providers.mock import MockProvider
+from visiondesk.ai.providers.openai import OpenAIProvider
+from visiondesk.core.services.rate_limiter import ProviderRateLimiter, get_rate_limiter
+from visiondesk.core.services.response_cache import DEFAULT_CACHE_FILE, ResponseCache
+from visiondesk.core.services.screenshot_service import Frame
+from visiondesk.models.settings import AISettings, CaptureSettings
+from visiondesk.utils.image_utils import (
+    EncodedImage,
+    MosaicLayout,
+    content_hash,
+    estimate_image_tokens,
+    get_image_profile,
+    pack_mosaic,
+    plan_image_size,
+    prepare_image,
+    prepare_mosaic,
+)
+from visiondesk.utils.logger import log_timed
+
+
+def estimate_text_tokens(text: str) -> int:
+    """
+    粗略估算文本的令牌数：ASCII 字符约 4 个一个令牌，其他字符（如中文）约每个一个令牌。
+    Roughly estimate the tokens of a text: about 4 ASCII characters per token, and about one
+    token per other character (such as Chinese).
+    """
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+# 拼图请求的最大输出令牌数 / Maximum output tokens of a mosaic request
+MOSAIC_MAX_OUTPUT_TOKENS = 4000
+
+
+def mosaic_tile_id(position: int) -> str:
+    """
+    返回拼图中第 position 个图块（从 0 开始）的编号，例如 "R1"。
+    Return the ID of the tile at position (0-based) of a mosaic, such as "R1".
+
+    图块上绘制的是这个编号而不是区域名称：编号只含 ASCII 字符，默认字体总能绘制，并且在同一张拼图中唯一，
+    即使两个区域的名称相同。
+    Tiles are labelled with this ID rather than the region name: it is ASCII only, so the
+    default font can always draw it, and it is unique within a mosaic even when two regions
+    share a name.
+    """
+    return f"R{position + 1}"
+
+
+def mosaic_prompt(prompt: str, tile_ids: Sequence[str], names: Optional[Sequence[str]] = None) -> str:
+    """
+    为拼图请求构造提示词：在原提示词后要求模型按图块编号分别回答，并以 JSON 对象回复。
+    Build the prompt of a mosaic request: the original prompt followed by instructions to
+    answer per tile ID, as a JSON object.
+
+    给出 names 时，提示词还列出每个编号对应的区域名称，供模型参考。
+    When names are given, the prompt also lists the region name of each ID for context.
+    """
+    text = (
+        f"{prompt}\n\n"
+        "这张图像由多个屏幕区域拼接而成，每个区域上方的黄色标签是它的编号。请分别分析每个区域，"
+        "只回复一个 JSON 对象：键为区域编号，值为该区域的分析文本。 | "
+        "This image is a mosaic of screen regions, each marked by the yellow ID label above it. "
+        "Analyze each region separately and reply with only a JSON object whose keys are the "
+        "region IDs and whose values are the analysis text of each region.\n"
+    )
+    if names is not None:
+        text += f"Region names: {json.dumps(dict(zip(tile_ids, names)), ensure_ascii=False)}\n"
+    return text + f"JSON keys: {json.dumps(list(tile_ids))}"
+
+
+def split_mosaic_reply(text: str, tile_ids: Sequence[str]) -> Dict[str, str]:
+    """
+    把拼图请求的 JSON 回复按图块编号拆分。
+    Split the JSON reply of a mosaic request by tile ID.
+
+    回复中 JSON 对象之外的内容（例如 Markdown 代码块标记）会被忽略；不是字符串的值会被序列化为 JSON。
+    Anything around the JSON object (such as Markdown code fences) is ignored; values that
+    are not strings are serialized back to JSON.
+
+    参数:
+        text: 模型的回复文本
+        tile_ids: 请求中的图块编号
+
+    返回:
+        编号 -> 分析文本，只包含回复中出现的编号
+
+    Parameters:
+        text: Reply text of the model
+        tile_ids: Tile IDs of the request
+
+    Returns:
+        ID -> analysis text, only for the IDs present in the reply
+    """
+    start, end = text.find("{"), text.rfind("}")
+    try:
+        if start < 0 or end < start:
+            raise ValueError("no JSON object")
+        data = json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise ValueError(f"拼图回复不是 JSON 对象: {e} | Mosaic reply is not a JSON object: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("拼图回复不是 JSON 对象 | Mosaic reply is not a JSON object")
+
+    answers = {}
+    for tile_id in tile_ids:
+        value = data.get(tile_id)
+        if value is not None:
+            answers[tile_id] = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return answers
+
+
+class PlannedImage(NamedTuple):
+    """
+    预算计划中的单个图像请求。
+    A single image request of a budget plan.
+    """
+
+    # 输入索引 / Input index
+    input_index: int
+    # 图像令牌上限，None 表示只按模型规则缩放 / Image token cap, None for the model's own scaling only
+    max_image_tokens: Optional[int]
+    # 整个请求（图像、提示词和最大输出）的预估令牌数 / Estimated tokens of the whole request (image, prompt and maximum output)
+    estimated_tokens: int
+
+
+class PlannedMosaic(NamedTuple):
+    """
+    预算计划中的单个拼图请求。
+    A single mosaic request of a budget plan.
+    """
+
+    # 拼图中各区域的输入索引，与 layout.tiles 的顺序一致 / Input indices of the regions, in the order of layout.tiles
+    indices: Tuple[int, ...]
+    # 各区域的名称，与 indices 的顺序一致 / Region names, in the order of indices
+    names: Tuple[str, ...]
+    # 拼图布局，图块以 mosaic_tile_id 编号标注 / Mosaic layout, tiles labelled with mosaic_tile_id IDs
+    layout: MosaicLayout
+    # 拼图的图像令牌上限，None 表示不缩小 / Image token cap of the mosaic, None for no downscale
+    max_image_tokens: Optional[int]
+    # 整个请求的预估令牌数 / Estimated tokens of the whole request
+    estimated_tokens: int
+
+
+class BudgetPlan(NamedTuple):
+    """
+    一个捕获周期的令牌和请求预算计划。
+    Token and request budget plan of one capture cycle.
+    """
+
+    # 本周期发送的请求 / Requests sent in this cycle
+    requests: List[Union[PlannedImage, PlannedMosaic]]
+    # 超出预算、推迟到下一周期的输入索引 / Input indices over budget, deferred to the next cycle
+    deferred: List[int]
+    # 周期令牌预算，None 表示不限制 / Cycle token budget, None for unlimited
+    token_budget: Optional[int]
+
+    @property
+    def estimated_tokens(self) -> int:
+        """
+        返回本周期所有请求的预估令牌总数。
+        Return the total estimated tokens of this cycle's requests.
+        """
+        return sum(request.estimated_tokens for request in self.requests)
+
+
+class AIService:
+    """
+    AI 服务。
+    AI service.
+
+    在调用 AI 提供商之前，先用图像内容的精确哈希以及模型、提示词和温度查询响应缓存；
+    命中时直接返回缓存的结果，节省一次网络往返和一次付费 API 调用。
+    Before calling the AI provider, the response cache is queried with the exact hash
+    of the image content plus model, prompt and temperature. On a hit the cached result is
+    returned directly, saving a network round trip and a paid API call.
+
+    未命中缓存的请求受最大并发数限制，并通过提供商共享的令牌桶限制每分钟请求数和令牌数。
+    Requests that miss the cache are bounded by the maximum number in flight and pass
+    through the provider's shared token buckets for requests and tokens per minute.
+
+    发送前，图像按模型的分块和令牌规则缩小，并以捕获设置中的格式和质量编码。
+    Before sending, images are downscaled by the model's tiling and token rules and encoded
+    with the format and quality from the capture settings.
+
+    plan_budget 在发送前按模型的分块规则估算每个请求的令牌数，并根据周期的令牌和请求预算
+    选择每个图像的分辨率和要推迟的图像，使请求成本在发送前就可预测。
+    plan_budget estimates each request's tokens from the model's tiling rules before
+    dispatch, and picks each image's resolution and the images to defer from the cycle's
+    token and request budget, so request cost is known before anything is sent.
+    """
+
+    # 修改后需要重建提供商（及其 HTTP 会话）的设置
+    # Settings whose change requires rebuilding the provider (and its HTTP session)
+    CONNECTION_KEYS = frozenset(
+        {"api_key", "base_url", "connection_pool_size", "connect_timeout", "request_timeout", "keepalive_timeout"}
+    )
+    # 只在创建服务时读取、修改后需要重启才能生效的设置
+    # Settings only read when the service is created, whose change takes effect after a restart
+    RESTART_KEYS = frozenset(
+        {"provider", "cache_enabled", "cache_ttl_seconds", "cache_max_entries", "cache_max_bytes", "cache_persist"}
+    )
+
+    def __init__(
+        self,
+        settings: AISettings,
+        provider: BaseProvider,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[ProviderRateLimiter] = None,
+        capture: Optional[CaptureSettings] = None,
+    ):
+        """
+        初始化 AI 服务。
+        Initialize the AI service.
+
+        参数:
+            settings: AI 设置
+            provider: AI 提供商
+            cache: 响应缓存。如果未提供且设置中启用了缓存，则根据设置创建
+            rate_limiter: 速率限制器。如果未提供，则使用该提供商共享的限制器
+            capture: 捕获设置（图像格式和质量）。如果未提供，则使用默认设置
+
+        Parameters:
+            settings: AI settings
+            provider: AI provider
+            cache: Response cache. If not provided and caching is enabled in the settings,
+                one is created from the settings
+            rate_limiter: Rate limiter. If not provided, the limiter shared by the provider is used
+            capture: Capture settings (image format and quality). If not provided, the defaults are used
+        """
+        self.logger = logging.getLogger(__name__)
+        self.settings = settings
+        self.provider = provider
+        self.capture = capture or CaptureSettings()
+        self.image_profile = get_image_profile(settings.model_name)
+
+        if cache is None and settings.cache_enabled:
+            cache = ResponseCache(
+                max_entries=settings.cache_max_entries,
+                max_bytes=settings.cache_max_bytes,
+                ttl_seconds=settings.cache_ttl_seconds,
+                persist_path=DEFAULT_CACHE_FILE if settings.cache_persist else None,
+            )
+            cache.load()
+        self.cache = cache
+
+        if rate_limiter is None:
+            rate_limiter = get_rate_limiter(
+                settings.provider, settings.requests_per_minute, settings.tokens_per_minute
+            )
+        self.rate_limiter = rate_limiter
+        # 每个事件循环一个并发信号量，连同创建时的上限 / One concurrency semaphore per event loop, with the limit it was built for
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[int, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._semaphore_lock = threading.Lock()
+        # 已被替换、等待关闭的提供商 / Replaced providers waiting to be closed
+        self._retired_providers: List[BaseProvider] = []
+
+    def update_image_profile(self) -> None:
+        """
+        按设置中的模型名称重新选择图像令牌规则（模型名称被修改或热重载后调用）。
+        Re-select the image token rules for the model name in the settings (call after the
+        model name is edited or hot-reloaded).
+        """
+        self.image_profile = get_image_profile(self.settings.model_name)
+
+    async def replace_provider(self, provider: BaseProvider) -> None:
+        """
+        让之后的请求使用新的提供商（例如连接设置被修改后）。旧提供商在 request_timeout 秒后
+        （已发出的请求此时已完成或超时）关闭，或在 aclose() 时关闭。
+        Use a new provider for subsequent requests (e.g. after the connection settings
+        changed). The old provider is closed after request_timeout seconds, by which time
+        requests already sent on it have finished or timed out, or by aclose().
+
+        参数:
+            provider: 新的 AI 提供商
+
+        Parameters:
+            provider: New AI provider
+        """
+        old, self.provider = self.provider, provider
+        self._retired_providers.append(old)
+        await asyncio.sleep(self.settings.request_timeout)
+        if old in self._retired_providers:
+            self._retired_providers.remove(old)
+            await old.aclose()
+
+    def update_rate_limits(self) -> None:
+        """
+        将设置中的每分钟请求数和令牌数应用到速率限制器（设置被修改或热重载后调用）。
+        Apply the requests and tokens per minute from the settings to the rate limiter (call
+        after the settings are edited or hot-reloaded).
+        """
+        self.rate_limiter.update(self.settings.requests_per_minute, self.settings.tokens_per_minute)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """
+        返回当前事件循环的并发信号量；max_concurrent_requests 被修改后重新创建。
+        Return the concurrency semaphore of the running event loop, rebuilt after
+        max_concurrent_requests changes.
+
+        已持有旧信号量的请求在完成时释放旧信号量，因此切换期间的并发数可能短暂超过新上限。
+        Requests holding the old semaphore release it when they finish, so concurrency may
+        briefly exceed the new limit during the switch.
+        """
+        loop = asyncio.get_running_loop()
+        limit = self.settings.max_concurrent_requests
+        with self._semaphore_lock:
+            entry = self._semaphores.get(loop)
+            if entry is None or entry[0] != limit:
+                entry = self._semaphores[loop] = (limit, asyncio.Semaphore(limit))
+            return entry[1]
+
+    def estimate_tokens(self, frame: Frame, prompt: str, max_image_tokens: Optional[int] = None) -> int:
+        """
+        估算一次分析请求的令牌数（图像输入、提示词输入以及最大输出）。
+        Estimate the token count of one analysis request (image input, prompt input and
+        maximum output).
+
+        图像按实际发送的分辨率（模型规则缩放、吸附到图块边界并受 max_image_tokens 限制）计算。
+        The image is counted at the resolution actually sent (scaled by the model's rules,
+        snapped to tile boundaries and capped by max_image_tokens).
+
+        参数:
+            frame: 要分析的图像帧
+            prompt: 提示词
+            max_image_tokens: 图像令牌上限，None 表示不限制
+
+        返回:
+            预估令牌数
+
+        Parameters:
+            frame: Image frame to analyze
+            prompt: Prompt text
+            max_image_tokens: Image token cap, None for no limit
+
+        Returns:
+            Estimated token count
+        """
+        size = plan_image_size(frame.width, frame.height, self.image_profile, max_image_tokens)
+        image_tokens = estimate_image_tokens(*size, self.image_profile)
+        return image_tokens + estimate_text_tokens(prompt) + self.settings.max_tokens
+
+    def cycle_budget(self) -> Tuple[Optional[int], Optional[int]]:
+        """
+        返回一个捕获周期的令牌预算和最大请求数。
+        Return the token budget and the maximum request count of one capture cycle.
+
+        未显式设置时，按每分钟限额乘以捕获间隔推算，使持续的自动捕获不会超出提供商的速率限制。
+        When not set explicitly, they are derived from the per-minute limits times the capture
+        interval, so sustained automatic capture stays within the provider's rate limits.
+
+        返回:
+            (令牌预算, 最大请求数)，None 表示不限制
+
+        Returns:
+            (token budget, maximum requests), None for unlimited
+        """
+        minutes = self.capture.interval_seconds / 60.0
+        token_budget = self.settings.cycle_token_budget or None
+        if token_budget is None and self.settings.tokens_per_minute:
+            token_budget = max(1, int(self.settings.tokens_per_minute * minutes))
+        max_requests = self.settings.cycle_max_requests or None
+        if max_requests is None and self.settings.requests_per_minute:
+            max_requests = max(1, int(self.settings.requests_per_minute * minutes))
+        return token_budget, max_requests
+
+    def plan_budget(
+        self,
+        frames: Sequence[Frame],
+        prompt: Optional[str] = None,
+        labels: Optional[Sequence[str]] = None,
+    ) -> BudgetPlan:
+        """
+        在发送前按周期预算规划请求：选择发送哪些图像，以及每个图像的分辨率。
+        Plan the requests against the cycle budget before dispatch: choose which images are
+        sent, and at which resolution.
+
+        给出 labels 且启用了拼图时，只占一个图块的小区域先被拼成以编号标注的拼图，每个拼图作为
+        一个请求参与规划。
+        When labels are given and mosaics are enabled, small regions that fit in a single tile
+        are first tiled into mosaics labelled with tile IDs, and each mosaic is planned as one
+        request.
+
+        越靠前的帧优先级越高（拼图的优先级取其第一个区域）。超出最大请求数、或连一个图块都放不进令牌预算的帧被推迟。
+        其余帧在扣除提示词和最大输出之后分配剩余的图像令牌：能完整放下的小图像保持原有分辨率，
+        较大的图像平分剩余令牌并按图块边界缩小。预算小于单个请求时，仍然发送第一帧，
+        由速率限制器负责等待。
+        Earlier frames take priority (a mosaic takes that of its first region). Frames beyond the maximum request count, or that
+        cannot fit even one tile into the token budget, are deferred. The remaining image
+        tokens (after the prompt and maximum output) are then shared out: small images that
+        fit keep their resolution, and larger ones split what is left and are downscaled
+        tile boundary by tile boundary. When the budget is below a single request, the first
+        frame is still sent and the rate limiter does the waiting.
+
+        参数:
+            frames: 要分析的图像帧列表（按优先级排序）
+            prompt: 提示词。如果未提供，则使用设置中的提示词
+            labels: 每个帧的名称（通常是区域名称，可以重复），写入拼图提示词；None 表示不拼图
+
+        返回:
+            预算计划
+
+        Parameters:
+            frames: Image frames to analyze (in priority order)
+            prompt: Prompt text. If not provided, the prompt from the settings is used
+            labels: Name of each frame (usually the region name, duplicates allowed), given to the
+                model in mosaic prompts; None for no mosaics
+
+        Returns:
+            The budget plan
+        """
+        prompt = prompt or self.settings.prompt
+        profile = self.image_profile
+        token_budget, max_requests = self.cycle_budget()
+        overhead = estimate_text_tokens(prompt) + self.settings.max_tokens
+        min_image_tokens = profile.tokens_for(1, 1)
+
+        # 请求单元: (输入索引, 宽度, 高度, 拼图布局, 提示词和最大输出的令牌数)
+        # Request units: (input indices, width, height, mosaic layout, prompt and maximum output tokens)
+        units: List[Tuple[Tuple[int, ...], int, int, Optional[MosaicLayout], int]] = []
+        mosaicked: Set[int] = set()
+        if labels is not None and self.settings.mosaic_enabled:
+            # 只占一个图块的小区域拼成拼图 / Regions that fit in a single tile are tiled into mosaics
+            small = [
+                index for index, frame in enumerate(frames)
+                if estimate_image_tokens(*plan_image_size(frame.width, frame.height, profile), profile)
+                <= min_image_tokens
+            ]
+            if len(small) > 1:
+                # 按编号而不是名称装箱，重名的区域互不冲突 / Pack by tile ID rather than name, so regions sharing a name do not clash
+                index_of = {mosaic_tile_id(position): index for position, index in enumerate(small)}
+                items = [(tile_id, frames[index].width, frames[index].height) for tile_id, index in index_of.items()]
+                for layout in pack_mosaic(items, profile.max_edge, profile.short_edge, profile.tile_size):
+                    if len(layout.tiles) < 2:
+                        continue
+                    indices = tuple(index_of[tile.label] for tile in layout.tiles)
+                    mosaic_text, mosaic_output = self._mosaic_request(
+                        prompt, [tile.label for tile in layout.tiles], [labels[index] for index in indices]
+                    )
+                    units.append(
+                        (indices, layout.width, layout.height, layout, estimate_text_tokens(mosaic_text) + mosaic_output)
+                    )
+                    mosaicked.update(indices)
+        units.extend(
+            ((index,), frame.width, frame.height, None, overhead)
+            for index, frame in enumerate(frames) if index not in mosaicked
+        )
+        units.sort(key=lambda unit: min(unit[0]))
+
+        count, spent = 0, 0
+        for unit in units:
+            cost = unit[4] + min_image_tokens
+            if max_requests is not None and count >= max_requests:
+                break
+            if token_budget is not None and count and spent + cost > token_budget:
+                break
+            count, spent = count + 1, spent + cost
+        kept = units[:count]
+
+        full = [estimate_image_tokens(*plan_image_size(unit[1], unit[2], profile), profile) for unit in kept]
+        overheads = sum(unit[4] for unit in kept)
+        caps: List[Optional[int]] = [None] * count
+        if token_budget is not None and sum(full) + overheads > token_budget:
+            # 从小到大分配：放得下的保持原样，其余平分剩余令牌（按实际用量扣除，未用完的留给后面的图像）
+            # Share out smallest first: those that fit stay as they are, the rest split what is
+            # left (charging actual use, so any slack goes to the images after them)
+            remaining = token_budget - overheads
+            order = sorted(range(count), key=full.__getitem__)
+            for position, unit_index in enumerate(order):
+                # 预算连提示词和最大输出都放不下时 remaining 为负；每个图像至少保留一个图块
+                # remaining is negative when the budget cannot even cover the prompts and maximum
+                # outputs; every image keeps at least one tile
+                share = max(min_image_tokens, remaining // (count - position))
+                if full[unit_index] > share:
+                    caps[unit_index] = share
+                    size = plan_image_size(kept[unit_index][1], kept[unit_index][2], profile, share)
+                    remaining -= estimate_image_tokens(*size, profile)
+                else:
+                    remaining -= full[unit_index]
+
+        requests: List[Union[PlannedImage, PlannedMosaic]] = []
+        for (indices, _, _, unit_layout, _), cap in zip(kept, caps):
+            if unit_layout is None:
+                requests.append(PlannedImage(indices[0], cap, self.estimate_tokens(frames[indices[0]], prompt, cap)))
+            else:
+                names = tuple(labels[index] for index in indices)  # type: ignore[index]
+                estimated = self._estimate_mosaic_tokens(unit_layout, prompt, cap, names)
+                requests.append(PlannedMosaic(indices, names, unit_layout, cap, estimated))
+        deferred = sorted(index for unit in units[count:] for index in unit[0])
+        plan = BudgetPlan(requests, deferred, token_budget)
+        downscaled = sum(cap is not None for cap in caps)
+        mosaics = sum(isinstance(request, PlannedMosaic) for request in requests)
+        if plan.deferred or downscaled:
+            self.logger.info(
+                f"令牌预算 {token_budget}: 发送 {count} 个请求（{mosaics} 个拼图，缩小 {downscaled} 个图像），"
+                f"推迟 {len(plan.deferred)} 个 | Token budget {token_budget}: sending {count} requests "
+                f"({mosaics} mosaics, {downscaled} images downscaled), deferring {len(plan.deferred)}",
+                extra={"op": "AI", "tokens": plan.estimated_tokens},
+            )
+        return plan
+
+    def _mosaic_request(
+        self, prompt: str, tile_ids: Sequence[str], names: Optional[Sequence[str]] = None
+    ) -> Tuple[str, int]:
+        """
+        返回拼图请求的提示词和最大输出令牌数（每个区域一份回复，总数不超过 MOSAIC_MAX_OUTPUT_TOKENS）。
+        Return the prompt and maximum output tokens of a mosaic request (one answer per region,
+        at most MOSAIC_MAX_OUTPUT_TOKENS in total).
+        """
+        max_tokens = min(self.settings.max_tokens * len(tile_ids), MOSAIC_MAX_OUTPUT_TOKENS)
+        return mosaic_prompt(prompt, tile_ids, names), max_tokens
+
+    def _estimate_mosaic_tokens(
+        self,
+        layout: MosaicLayout,
+        prompt: str,
+        max_image_tokens: Optional[int],
+        names: Optional[Sequence[str]] = None,
+    ) -> int:
+        text, max_tokens = self._mosaic_request(prompt, [tile.label for tile in layout.tiles], names)
+        size = plan_image_size(layout.width, layout.height, self.image_profile, max_image_tokens)
+        return estimate_image_tokens(*size, self.image_profile) + estimate_text_tokens(text) + max_tokens
+
+    async def prepare_image(self, frame: Frame, max_image_tokens: Optional[int] = None) -> EncodedImage:
+        """
+        在工作线程中预处理并编码图像，不阻塞事件循环。
+        Preprocess and encode an image in a worker thread, without blocking the event loop.
+
+        参数:
+            frame: 要分析的图像帧
+            max_image_tokens: 图像令牌上限，None 表示不限制
+
+        返回:
+            编码后的图像
+
+        Parameters:
+            frame: Image frame to analyze
+            max_image_tokens: Image token cap, None for no limit
+
+        Returns:
+            The encoded image
+        """
+        return await asyncio.to_thread(
+            prepare_image,
+            frame,
+            self.capture.image_format,
+            self.capture.capture_quality,
+            self.image_profile,
+            max_image_tokens,
+        )
+
+    def _cache_key(self, frame: Frame, prompt: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return ResponseCache.make_key(
+            content_hash(frame), self.settings.model_name, prompt, self.settings.temperature
+        )
+
+    def _cached_result(self, key: Optional[str]) -> Optional[AnalysisResult]:
+        if key is None:
+            return None
+        cached = self.cache.get(key)  # type: ignore[union-attr]
+        if cached is None:
+            return None
+        self.logger.debug("命中响应缓存 | Response cache hit")
+        return AnalysisResult(text=cached, model=self.settings.model_name, cached=True)
+
+    async def analyze_image(
+        self,
+        frame: Frame,
+        prompt: Optional[str] = None,
+        max_image_tokens: Optional[int] = None,
+    ) -> AnalysisResult:
+        """
+        分析单个图像。
+        Analyze a single image.
+
+        参数:
+            frame: 要分析的图像帧
+            prompt: 提示词。如果未提供，则使用设置中的提示词
+            max_image_tokens: 图像令牌上限（通常来自 plan_budget），None 表示不限制
+
+        返回:
+            分析结果
+
+        Parameters:
+            frame: Image frame to analyze
+            prompt: Prompt text. If not provided, the prompt from the settings is used
+            max_image_tokens: Image token cap (usually from plan_budget), None for no limit
+
+        Returns:
+            The analysis result
+        """
+        prompt = prompt or self.settings.prompt
+        key = self._cache_key(frame, prompt)
+        cached = self._cached_result(key)
+        if cached is not None:
+            return cached
+
+        async with self._get_semaphore():
+            estimated = self.estimate_tokens(frame, prompt, max_image_tokens)
+            await self.rate_limiter.acquire(estimated)
+            image = await self.prepare_image(frame, max_image_tokens)
+            with log_timed(
+                self.logger, "图像分析完成 | Image analysis completed", op="AI", payload_bytes=image.nbytes
+            ) as fields:
+                result = await self.provider.analyze(
+                    image,
+                    prompt=prompt,
+                    model=self.settings.model_name,
+                    temperature=self.settings.temperature,
+                    max_tokens=self.settings.max_tokens,
+                )
+                fields["tokens"] = result.usage.total_tokens
+
+        self._record_result(key, estimated, result)
+        return result
+
+    async def stream_image(self, frame: Frame, prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        以流的形式分析单个图像，逐个返回文本增量，便于界面尽早显示首批内容。
+        Analyze a single image as a stream, yielding text deltas so the UI can show the first
+        tokens as early as possible.
+
+        命中缓存时一次性返回缓存的文本。取消迭代任务会取消底层请求。
+        On a cache hit the cached text is yielded at once. Cancelling the iterating task
+        cancels the underlying request.
+
+        参数:
+            frame: 要分析的图像帧
+            prompt: 提示词。如果未提供，则使用设置中的提示词
+
+        返回:
+            文本增量的异步迭代器
+
+        Parameters:
+            frame: Image frame to analyze
+            prompt: Prompt text. If not provided, the prompt from the settings is used
+
+        Returns:
+            Async iterator of text deltas
+        """
+        prompt = prompt or self.settings.prompt
+        key = self._cache_key(frame, prompt)
+        cached = self._cached_result(key)
+        if cached is not None:
+            yield cached.text
+            return
+
+        async with self._get_semaphore():
+            estimated = self.estimate_tokens(frame, prompt)
+            await self.rate_limiter.acquire(estimated)
+            image = await self.prepare_image(frame)
+            stream = self.provider.stream(
+                image,
+                prompt=prompt,
+                model=self.settings.model_name,
+                temperature=self.settings.temperature,
+                max_tokens=self.settings.max_tokens,
+            )
+            try:
+                async for delta in stream:
+                    yield delta
+            finally:
+                await stream.aclose()
+
+        if stream.finished:
+            self._record_result(key, estimated, stream.result())
+
+    def _record_result(self, key: Optional[str], estimated: int, result: AnalysisResult) -> None:
+        if result.usage.total_tokens:
+            self.rate_limiter.record_usage(estimated, result.usage.total_tokens)
+        if key is not None and result.finish_reason == "stop":
+            self.cache.put(key, result.text)  # type: ignore[union-attr]
+
+    async def analyze_mosaic(
+        self,
+        frames: Sequence[Frame],
+        names: Optional[Sequence[str]] = None,
+        prompt: Optional[str] = None,
+        max_image_tokens: Optional[int] = None,
+    ) -> List[Optional[AnalysisResult]]:
+        """
+        把多个小区域拼成带编号的图像，在一个请求中分析，并把 JSON 回复按编号拆分为每个区域的结果。
+        Tile several small regions into an image labelled with tile IDs, analyze it in a single
+        request and split the JSON reply into one result per region.
+
+        每个区域先单独查询响应缓存，只有未命中的区域进入拼图；拆分出的结果也按区域写入缓存。
+        一张拼图放不下时会发送多个拼图请求。请求的令牌用量平均分摊到各区域的结果上。
+        Each region is looked up in the response cache on its own and only the misses are
+        tiled; the split results are cached per region as well. Regions that do not fit one
+        mosaic are sent as several mosaic requests. The request's token usage is split evenly
+        across the regions' results.
+
+        参数:
+            frames: 要分析的区域帧列表
+            names: 每个区域的名称（可以重复），写入提示词供模型参考；None 表示只使用编号
+            prompt: 提示词。如果未提供，则使用设置中的提示词
+            max_image_tokens: 每张拼图的图像令牌上限，None 表示不限制
+
+        返回:
+            与 frames 顺序一致的分析结果；回复中缺少的区域为 None
+
+        Parameters:
+            frames: Region frames to analyze
+            names: Name of each region (duplicates allowed), given to the model in the prompt;
+                None for tile IDs only
+            prompt: Prompt text. If not provided, the prompt from the settings is used
+            max_image_tokens: Image token cap of each mosaic, None for no limit
+
+        Returns:
+            Analysis results in the order of frames; None for regions missing from the reply
+        """
+        prompt = prompt or self.settings.prompt
+        results: List[Optional[AnalysisResult]] = [None] * len(frames)
+        # 图块编号 -> (输入位置, 缓存键) / Tile ID -> (input position, cache key)
+        misses: Dict[str, Tuple[int, Optional[str]]] = {}
+        for position, frame in enumerate(frames):
+            key = self._cache_key(frame, prompt)
+            cached = self._cached_result(key)
+            if cached is not None:
+                results[position] = cached
+            else:
+                misses[mosaic_tile_id(position)] = (position, key)
+        if len(misses) == 1:
+            position, _ = next(iter(misses.values()))
+            results[position] = await self.analyze_image(frames[position], prompt)
+        elif misses:
+            profile = self.image_profile
+            items = [
+                (tile_id, frames[position].width, frames[position].height) for tile_id, (position, _) in misses.items()
+            ]
+            layouts = pack_mosaic(items, profile.max_edge, profile.short_edge, profile.tile_size)
+            for answers in await asyncio.gather(
+                *(self._analyze_layout(layout, frames, names, misses, prompt, max_image_tokens) for layout in layouts)
+            ):
+                for position, result in answers.items():
+                    results[position] = result
+        return results
+
+    async def _analyze_layout(
+        self,
+        layout: MosaicLayout,
+        frames: Sequence[Frame],
+        names: Optional[Sequence[str]],
+        misses: Dict[str, Tuple[int, Optional[str]]],
+        prompt: str,
+        max_image_tokens: Optional[int],
+    ) -> Dict[int, AnalysisResult]:
+        tile_ids = [tile.label for tile in layout.tiles]
+        positions = [misses[tile_id][0] for tile_id in tile_ids]
+        tile_names = None if names is None else [names[position] for position in positions]
+        text, max_tokens = self._mosaic_request(prompt, tile_ids, tile_names)
+        tile_frames = {tile_id: frames[position] for tile_id, position in zip(tile_ids, positions)}
+
+        async with self._get_semaphore():
+            estimated = self._estimate_mosaic_tokens(layout, prompt, max_image_tokens, tile_names)
+            await self.rate_limiter.acquire(estimated)
+            image = await asyncio.to_thread(
+                prepare_mosaic,
+                layout,
+                tile_frames,
+                self.capture.image_format,
+                self.capture.capture_quality,
+                self.image_profile,
+                max_image_tokens,
+            )
+            with log_timed(
+                self.logger, "拼图分析完成 | Mosaic analysis completed",
+                op="AI", region=",".join(tile_names or tile_ids), payload_bytes=image.nbytes,
+            ) as fields:
+                result = await self.provider.analyze(
+                    image,
+                    prompt=text,
+                    model=self.settings.model_name,
+                    temperature=self.settings.temperature,
+                    max_tokens=max_tokens,
+                )
+                fields["tokens"] = result.usage.total_tokens
+
+        self._record_result(None, estimated, result)
+        share = TokenUsage(
+            prompt_tokens=result.usage.prompt_tokens // len(tile_ids),
+            completion_tokens=result.usage.completion_tokens // len(tile_ids),
+        )
+        answers = {}
+        for tile_id, answer in split_mosaic_reply(result.text, tile_ids).items():
+            position, key = misses[tile_id]
+            answers[position] = AnalysisResult(
+                text=answer, model=result.model, usage=share, finish_reason=result.finish_reason
+            )
+            if key is not None and result.finish_reason == "stop":
+                self.cache.put(key, answer)  # type: ignore[union-attr]
+        return answers
+
+    async def analyze_images(
+        self,
+        frames: Sequence[Frame],
+        prompt: Optional[str] = None,
+        return_exceptions: bool = False,
+        plan: Optional[BudgetPlan] = None,
+    ) -> AsyncIterator[Tuple[int, Union[AnalysisResult, BaseException]]]:
+        """
+        并发分析多个图像，并按完成顺序（而不是输入顺序）逐个返回结果。
+        Analyze multiple images concurrently, yielding results in completion order
+        (not input order).
+
+        同时进行的请求数受 max_concurrent_requests 限制。如果调用方提前停止迭代，
+        尚未完成的请求会被取消。
+        The number of requests in flight is bounded by max_concurrent_requests. If the caller
+        stops iterating early, outstanding requests are cancelled.
+
+        给出 plan 时只发送计划中的请求，并使用计划的图像令牌上限；拼图中的每个区域各返回一个结果，
+        回复中缺少的区域返回 ValueError；被推迟的帧不会返回结果。
+        When plan is given, only the planned requests are sent, with the planned image token
+        caps; each region of a mosaic yields its own result, and regions missing from the
+        reply yield a ValueError; deferred frames yield no result.
+
+        参数:
+            frames: 要分析的图像帧列表
+            prompt: 提示词。如果未提供，则使用设置中的提示词
+            return_exceptions: 为 True 时，失败的请求以异常对象的形式返回；否则抛出第一个异常
+            plan: 由 plan_budget 为这些帧生成的预算计划，None 表示全部按原分辨率发送
+
+        返回:
+            (输入索引, 结果) 的异步迭代器
+
+        Parameters:
+            frames: Image frames to analyze
+            prompt: Prompt text. If not provided, the prompt from the settings is used
+            return_exceptions: When True, failed requests are yielded as exception objects;
+                otherwise the first exception is raised
+            plan: Budget plan produced by plan_budget for these frames, None to send them all
+                at full resolution
+
+        Returns:
+            Async iterator of (input index, result)
+        """
+
+        async def run(
+            request: Union[PlannedImage, PlannedMosaic]
+        ) -> List[Tuple[int, Union[AnalysisResult, BaseException]]]:
+            if isinstance(request, PlannedImage):
+                indices: Tuple[int, ...] = (request.input_index,)
+            else:
+                indices = request.indices
+            try:
+                if isinstance(request, PlannedImage):
+                    frame = frames[request.input_index]
+                    return [(request.input_index, await self.analyze_image(frame, prompt, request.max_image_tokens))]
+                results = await self.analyze_mosaic(
+                    [frames[index] for index in indices], request.names, prompt, request.max_image_tokens
+                )
+                missing = [name for name, result in zip(request.names, results) if result is None]
+                if not missing:
+                    return [(index, result) for index, result in zip(indices, results) if result is not None]
+                error = ValueError(
+                    f"拼图回复缺少区域: {', '.join(missing)} | Mosaic reply has no answer for: {', '.join(missing)}"
+                )
+                if not return_exceptions:
+                    raise error
+                self.logger.error(str(error))
+                return [(index, error if result is None else result) for index, result in zip(indices, results)]
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                self.logger.error(f"分析图像 {indices} 时出错: {e} | Error analyzing images {indices}: {e}")
+                return [(index, e) for index in indices]
+
+        if plan is None:
+            requests: List[Union[PlannedImage, PlannedMosaic]] = [
+                PlannedImage(index, None, 0) for index in range(len(frames))
+            ]
+        else:
+            requests = plan.requests
+        tasks = [asyncio.ensure_future(run(request)) for request in requests]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                for item in await completed:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            # 等待被取消的请求真正结束，释放信号量和连接 / Wait for cancelled requests to finish, releasing the semaphore and connections
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        """
+        关闭 AI 服务：释放提供商资源，并持久化响应缓存。
+        Close the AI service: release provider resources and persist the response cache.
+        """
+        retired, self._retired_providers = self._retired_providers, []
+        for provider in retired:
+            await provider.aclose()
+        await self.provider.aclose()
+        if self.cache is not None:
+            self.cache.save()
+
+
+# 提供商名称 -> 工厂函数
+# Provider name -> factory function
+_PROVIDERS: Dict[str, Callable[[AISettings], BaseProvider]] = {
+    MockProvider.name: lambda settings: MockProvider(),
+    OpenAIProvider.name: OpenAIProvider.from_settings,
+}
+
+
+def get_available_providers() -> List[str]:
+    """
+    获取可用的 AI 提供商列表。
+    Get the list of available AI providers.
+
+    返回:
+        提供商名称列表
+
+    Returns:
+        List of provider names
+    """
+    return sorted(_PROVIDERS)
+
+
+def create_provider(settings: AISettings) -> BaseProvider:
+    """
+    根据设置创建 AI 提供商。
+    Create an AI provider from the settings.
+
+    参数:
+        settings: AI 设置
+
+    返回:
+        AI 提供商实例
+
+    Parameters:
+        settings: AI settings
+
+    Returns:
+        AI provider instance
+    """
+    factory = _PROVIDERS.get(settings.provider)
+    if factory is None:
+        raise ValueError(
+            f"未知的 AI 提供商: {settings.provider} | Unknown AI provider: {settings.provider}"
+        )
+    return factory(settings)
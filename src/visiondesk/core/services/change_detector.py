@@ -0,0 +1,284 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+VisionDesk 变化检测模块。
+VisionDesk change detection module.
+
+此模块位于截图服务和 AI 服务之间，按区域判断屏幕内容是否发生了变化，
+只有内容确实变化的区域才会被送往 AI 服务。
+This module sits between the screenshot service and the AI service. It decides per region
+whether the screen content has changed, so only regions whose content actually changed are
+sent on to the AI service.
+
+检测方法：将帧划分为图块，对每个图块的采样行（可丢弃颜色低位以忽略噪声）计算 CRC32 签名，
+当变化图块所占比例达到阈值时认为区域已变化。基准签名只在区域被报告为已变化时更新，
+因此逐帧累积的缓慢变化最终也会被报告。
+Method: the frame is split into tiles, and a CRC32 signature is computed per tile over
+sampled rows (optionally with low colour bits dropped to ignore noise). A region counts as
+changed when the fraction of changed tiles reaches the threshold. The baseline signatures
+are only replaced when a region is reported as changed, so slow changes that accumulate
+tick by tick are reported too.
+
+主要类:
+- ChangeDetector: 按区域进行变化检测
+
+Main classes:
+- ChangeDetector: Per-region change detection
+"""
+
+import logging
+import threading
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from visiondesk.core.services.screenshot_service import BYTES_PER_PIXEL, Frame
+from visiondesk.models.region import Region
+from visiondesk.models.settings import CaptureSettings
+
+Signature = Tuple[Tuple[int, int], List[int]]
+
+
+class ChangeDetector:
+    """
+    按区域的屏幕内容变化检测器。
+    Per-region screen content change detector.
+
+    检测器为每个区域保存上一次看到的图块签名，并将新帧与之比较。
+    The detector keeps the tile signatures last seen for each region and compares new
+    frames against them.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.01,
+        tile_size: int = 32,
+        row_step: int = 2,
+        quantize_bits: int = 2,
+    ):
+        """
+        初始化变化检测器。
+        Initialize the change detector.
+
+        参数:
+            threshold: 区域被视为已变化所需的变化图块比例（0 表示任意图块变化即视为变化）
+            tile_size: 图块边长（像素）
+            row_step: 每隔多少行采样一行
+            quantize_bits: 比较前丢弃的颜色低位数
+
+        Parameters:
+            threshold: Fraction of changed tiles required for a region to count as changed
+                (0 means any changed tile counts)
+            tile_size: Tile edge length in pixels
+            row_step: Sample every Nth pixel row
+            quantize_bits: Number of low colour bits dropped before comparison
+        """
+        if tile_size <= 0 or row_step <= 0:
+            raise ValueError("tile_size 和 row_step 必须为正数 | tile_size and row_step must be positive")
+        if not 0 <= quantize_bits < 8:
+            raise ValueError(f"quantize_bits 必须在 0-7 之间 | quantize_bits must be in 0-7: {quantize_bits}")
+
+        self.logger = logging.getLogger(__name__)
+        self.threshold = threshold
+        self.tile_size = tile_size
+        self.row_step = row_step
+        self.quantize_bits = quantize_bits
+
+        mask = (0xFF << quantize_bits) & 0xFF
+        self._quantize_table: Optional[bytes] = (
+            bytes(b & mask for b in range(256)) if quantize_bits else None
+        )
+        self._signatures: Dict[str, Signature] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, capture: CaptureSettings) -> "ChangeDetector":
+        """
+        根据捕获设置创建变化检测器。
+        Create a change detector from capture settings.
+
+        参数:
+            capture: 屏幕捕获设置
+
+        返回:
+            配置好的 ChangeDetector
+
+        Parameters:
+            capture: Screen capture settings
+
+        Returns:
+            A configured ChangeDetector
+        """
+        return cls(
+            threshold=capture.change_threshold,
+            tile_size=capture.change_tile_size,
+            row_step=capture.change_row_step,
+            quantize_bits=capture.change_quantize_bits,
+        )
+
+    @staticmethod
+    def region_key(region: Region) -> str:
+        """
+        返回用于保存区域状态的键：区域名称，或没有名称时的坐标。
+        Return the key under which a region's state is kept: its name, or its coordinates
+        when it has no name.
+        """
+        return region.name or "{}, {}, {}, {}".format(*region.coordinates)
+
+    def signature(self, frame: Frame) -> List[int]:
+        """
+        计算帧的图块签名。
+        Compute the tile signatures of a frame.
+
+        参数:
+            frame: 要计算签名的帧
+
+        返回:
+            按行优先顺序排列的每个图块的 CRC32 签名
+
+        Parameters:
+            frame: Frame to compute signatures for
+
+        Returns:
+            CRC32 signature of every tile, in row-major order
+        """
+        tile = self.tile_size
+        tile_bytes = tile * BYTES_PER_PIXEL
+        row_bytes = frame.width * BYTES_PER_PIXEL
+        columns = range(0, row_bytes, tile_bytes)
+        tiles_per_row = len(columns)
+        table = self._quantize_table
+
+        signatures = [0] * (tiles_per_row * ((frame.height + tile - 1) // tile))
+        for y in range(0, frame.height, self.row_step):
+            row = frame.row(y)
+            if table is not None:
+                row = memoryview(row.tobytes().translate(table))
+            base = (y // tile) * tiles_per_row
+            for i, start in enumerate(columns):
+                signatures[base + i] = zlib.crc32(row[start:start + tile_bytes], signatures[base + i])
+        return signatures
+
+    def changed_fraction(self, key: str, frame: Frame) -> float:
+        """
+        计算帧相对于该键基准签名的变化图块比例（不更新基准）。
+        Compute the fraction of tiles that changed against the key's baseline signatures
+        (without updating the baseline).
+
+        参数:
+            key: 区域键
+            frame: 区域的新帧
+
+        返回:
+            变化图块所占比例；首次出现或尺寸改变时为 1.0
+
+        Parameters:
+            key: Region key
+            frame: New frame of the region
+
+        Returns:
+            Fraction of changed tiles; 1.0 on first sight or when the size changed
+        """
+        current = self.signature(frame)
+        with self._lock:
+            previous = self._signatures.get(key)
+        return self._fraction(previous, frame.size, current)
+
+    def has_changed(self, key: str, frame: Frame) -> bool:
+        """
+        判断区域内容是否发生了变化；变化时把该帧记录为新的基准。
+        Decide whether the content of a region has changed; when it has, the frame becomes
+        the new baseline.
+
+        未达到阈值的帧不会替换基准，因此每个节拍只变化一点的区域会在累积变化达到阈值时被报告。
+        Frames below the threshold do not replace the baseline, so a region that changes a
+        little every tick is reported once the accumulated change reaches the threshold.
+
+        参数:
+            key: 区域键
+            frame: 区域的新帧
+
+        返回:
+            如果变化图块比例达到阈值且大于零（或首次出现），则为 True
+
+        Parameters:
+            key: Region key
+            frame: New frame of the region
+
+        Returns:
+            True if the changed tile fraction is above zero and at least the threshold (or
+            on first sight)
+        """
+        current = self.signature(frame)
+        with self._lock:
+            fraction = self._fraction(self._signatures.get(key), frame.size, current)
+            changed = fraction > 0 and fraction >= self.threshold
+            if changed:
+                self._signatures[key] = (frame.size, current)
+        return changed
+
+    @staticmethod
+    def _fraction(previous: Optional[Signature], size: Tuple[int, int], current: List[int]) -> float:
+        if previous is None or previous[0] != size:
+            return 1.0
+        changed = sum(1 for old, new in zip(previous[1], current) if old != new)
+        return changed / len(current)
+
+    def filter_changed(
+        self, regions: Sequence[Region], frames: Sequence[Frame]
+    ) -> List[Tuple[Region, Frame]]:
+        """
+        过滤出内容发生变化的区域。
+        Filter out the regions whose content changed.
+
+        参数:
+            regions: 区域列表
+            frames: 与区域一一对应的帧列表
+
+        返回:
+            内容发生变化的 (区域, 帧) 列表
+
+        Parameters:
+            regions: List of regions
+            frames: List of frames matching the regions one to one
+
+        Returns:
+            List of (region, frame) pairs whose content changed
+        """
+        changed = [
+            (region, frame)
+            for region, frame in zip(regions, frames)
+            if self.has_changed(self.region_key(region), frame)
+        ]
+        self.logger.debug(
+            f"{len(changed)}/{len(regions)} 个区域发生变化 | {len(changed)}/{len(regions)} regions changed"
+        )
+        return changed
+
+    def reset(self, key: Optional[str] = None) -> None:
+        """
+        清除记录的签名，使下一帧被视为已变化。
+        Clear recorded signatures so that the next frame counts as changed.
+
+        参数:
+            key: 要清除的区域键。如果未提供，则清除所有区域
+
+        Parameters:
+            key: Region key to clear. If not provided, all regions are cleared
+        """
+        with self._lock:
+            if key is None:
+                self._signatures.clear()
+            else:
+                self._signatures.pop(key, None)
@@ -0,0 +1,192 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+VisionDesk 显示器拓扑模块。
+VisionDesk monitor topology module.
+
+此模块缓存显示器布局，并把区域的逻辑坐标映射为物理像素。Qt 的逻辑坐标以每个显示器的左上角为
+缩放原点：显示器原点在逻辑和物理坐标中相同，显示器内部的偏移按设备像素比缩放。因此带有
+monitor_id 和 scale 的区域映射为：物理 = 原点 + (逻辑 - 原点) × scale；没有 monitor_id 的区域坐标
+已是物理像素，忽略 scale。显示器布局只在显示器
+变化事件（Qt 的屏幕增删、几何或 DPI 变化）时失效，捕获时不需要重新查询布局。
+This module caches the monitor layout and maps the logical coordinates of regions to
+physical pixels. Qt's logical coordinates use each monitor's top-left corner as the scaling
+origin: a monitor's origin is the same in logical and physical coordinates, and offsets
+within the monitor scale by the device pixel ratio. A region carrying monitor_id and scale
+therefore maps as: physical = origin + (logical - origin) × scale; a region without
+monitor_id is already in physical pixels and its scale is ignored. The layout is only
+invalidated by display-change events (Qt screens added or removed, geometry or DPI changes),
+so captures never re-query it.
+
+主要类:
+- MonitorInfo: 单个显示器的物理几何信息
+- MonitorTopology: 缓存的显示器布局和逻辑到物理的映射
+
+Main classes:
+- MonitorInfo: Physical geometry of a single monitor
+- MonitorTopology: Cached monitor layout and logical-to-physical mapping
+"""
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Optional, Tuple
+
+from visiondesk.models.region import Region
+from visiondesk.utils.logger import LogEmoji, log_throttled
+
+if TYPE_CHECKING:
+    from visiondesk.core.services.screenshot_service import FrameSource
+
+Bounds = Tuple[int, int, int, int]
+
+
+class MonitorInfo(NamedTuple):
+    """
+    单个显示器的物理几何信息（编号与 mss 相同，0 为整个虚拟屏幕）。
+    Physical geometry of a single monitor (numbered as in mss, 0 is the whole virtual screen).
+    """
+
+    number: int
+    left: int
+    top: int
+    width: int
+    height: int
+
+
+class MonitorTopology:
+    """
+    缓存的显示器布局和逻辑到物理的映射。
+    Cached monitor layout and logical-to-physical mapping.
+
+    布局在第一次使用时从帧来源读取，之后一直复用，直到 invalidate() 被调用。
+    The layout is read from the frame source on first use and reused until invalidate() is called.
+    """
+
+    def __init__(self, source: "FrameSource"):
+        """
+        初始化显示器拓扑。
+        Initialize the monitor topology.
+
+        参数:
+            source: 提供显示器布局的帧来源
+
+        Parameters:
+            source: Frame source providing the monitor layout
+        """
+        self.logger = logging.getLogger(__name__)
+        self.source = source
+        self.generation = 0
+        self._monitors: Optional[List[MonitorInfo]] = None
+        self._lock = threading.Lock()
+        self._qt_screens: List[Any] = []
+
+    @property
+    def monitors(self) -> List[MonitorInfo]:
+        """
+        返回缓存的显示器布局。
+        Return the cached monitor layout.
+        """
+        monitors = self._monitors
+        if monitors is None:
+            with self._lock:
+                if self._monitors is None:
+                    self._monitors = [
+                        MonitorInfo(i, m["left"], m["top"], m["width"], m["height"])
+                        for i, m in enumerate(self.source.monitors)
+                    ]
+                monitors = self._monitors
+        return monitors
+
+    def invalidate(self) -> None:
+        """
+        丢弃缓存的布局（在显示器变化时调用）。下一次使用时重新读取。
+        Discard the cached layout (call on display changes). It is read again on next use.
+        """
+        with self._lock:
+            self._monitors = None
+            self.generation += 1
+        self.source.refresh_monitors()
+        self.logger.info("显示器布局已变化 | Monitor layout changed")
+
+    def to_physical(self, region: Region) -> Bounds:
+        """
+        将区域映射为物理像素边界。
+        Map a region to physical pixel bounds.
+
+        没有 monitor_id 的区域已经是物理坐标（忽略 scale），直接返回其边界，不访问布局。
+        Regions without monitor_id are already physical (their scale is ignored), and their
+        bounds are returned directly without touching the layout.
+
+        参数:
+            region: 区域（设置了 monitor_id 时为逻辑坐标）
+
+        返回:
+            物理像素边界 (left, top, right, bottom)
+
+        Parameters:
+            region: Region (logical coordinates when monitor_id is set)
+
+        Returns:
+            Physical pixel bounds (left, top, right, bottom)
+        """
+        if region.monitor_id is None:
+            return region.bounds
+
+        scale = region.scale
+        monitors = self.monitors
+        if region.monitor_id < len(monitors):
+            monitor = monitors[region.monitor_id]
+            origin_x, origin_y = monitor.left, monitor.top
+        else:
+            # 显示器已断开：按虚拟屏幕坐标处理，而不是让捕获失败
+            # Monitor disconnected: treat as virtual-screen coordinates instead of failing the capture
+            log_throttled(
+                self.logger, f"monitor:{region.monitor_id}",
+                f"区域 {region.name} 的显示器 {region.monitor_id} 不存在 | "
+                f"Monitor {region.monitor_id} of region {region.name} does not exist",
+                interval=60.0, emoji=LogEmoji.WARNING, level=logging.WARNING,
+            )
+            origin_x = origin_y = 0
+
+        left = origin_x + round((region.x - origin_x) * scale)
+        top = origin_y + round((region.y - origin_y) * scale)
+        return left, top, left + round(region.width * scale), top + round(region.height * scale)
+
+    def connect_qt(self, qt_app: Any) -> None:
+        """
+        连接 Qt 的显示器变化信号，使布局在变化时失效。
+        Connect Qt's display-change signals so the layout is invalidated when it changes.
+
+        参数:
+            qt_app: QGuiApplication 或 QApplication 实例
+
+        Parameters:
+            qt_app: QGuiApplication or QApplication instance
+        """
+        qt_app.screenAdded.connect(self._on_screen_added)
+        qt_app.screenRemoved.connect(lambda screen: self.invalidate())
+        qt_app.primaryScreenChanged.connect(lambda screen: self.invalidate())
+        for screen in qt_app.screens():
+            self._watch_screen(screen)
+
+    def _on_screen_added(self, screen: Any) -> None:
+        self._watch_screen(screen)
+        self.invalidate()
+
+    def _watch_screen(self, screen: Any) -> None:
+        screen.geometryChanged.connect(lambda rect: self.invalidate())
+        screen.logicalDotsPerInchChanged.connect(lambda dpi: self.invalidate())
+        # 保留引用，避免连接随包装对象一起被回收 / Keep a reference so the connections outlive the wrapper
+        self._qt_screens.append(screen)
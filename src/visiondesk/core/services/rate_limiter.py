@@ -0,0 +1,292 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+VisionDesk 速率限制模块。
+VisionDesk rate limiting module.
+
+此模块为 AI 提供商提供基于令牌桶的异步速率限制，同时限制每分钟请求数和每分钟令牌数。
+This module provides token-bucket based asynchronous rate limiting for AI providers,
+limiting both requests per minute and tokens per minute.
+
+主要类:
+- TokenBucket: 异步令牌桶
+- ProviderRateLimiter: 单个提供商的请求数和令牌数限制器
+
+Main classes:
+- TokenBucket: Asynchronous token bucket
+- ProviderRateLimiter: Request and token limiter for a single provider
+
+主要函数:
+- get_rate_limiter: 获取（或创建）某个提供商共享的速率限制器
+
+Main functions:
+- get_rate_limiter: Get (or create) the rate limiter shared by a provider
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """
+    异步令牌桶。
+    Asynchronous token bucket.
+
+    令牌以恒定速率补充，直到达到容量上限。获取令牌时如果不足，则等待到补充足够为止；
+    等待者按先来先服务的顺序获得令牌。速率为 0 表示不限制。
+    Tokens refill at a constant rate up to the capacity. Acquiring more tokens than are
+    available waits until enough have refilled; waiters are served first come, first served.
+    A rate of 0 means unlimited.
+
+    令牌数可以在多个事件循环（线程）之间共享：令牌的计算由线程锁保护，排队用的 asyncio.Lock
+    则为每个事件循环单独创建，因此令牌桶不会绑定到第一个使用它的事件循环。
+    The token count can be shared across event loops (threads): the token arithmetic is
+    guarded by a thread lock, while the asyncio.Lock used for queueing is created per event
+    loop, so the bucket never binds to the first loop that uses it.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        初始化令牌桶。
+        Initialize the token bucket.
+
+        参数:
+            rate_per_minute: 每分钟补充的令牌数（0 表示不限制）
+            capacity: 桶容量。如果未提供，则等于每分钟补充的令牌数
+
+        Parameters:
+            rate_per_minute: Tokens refilled per minute (0 means unlimited)
+            capacity: Bucket capacity. Defaults to the tokens refilled per minute
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else float(rate_per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._state_lock = threading.Lock()
+        self._loop_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def unlimited(self) -> bool:
+        """
+        令牌桶是否不限制速率。
+        Whether the bucket is unlimited.
+        """
+        return self.rate <= 0
+
+    def set_rate(self, rate_per_minute: float, capacity: Optional[float] = None) -> None:
+        """
+        修改补充速率和容量，已有的令牌保留（不超过新容量）。
+        Change the refill rate and capacity, keeping the tokens already available (up to the
+        new capacity).
+
+        参数:
+            rate_per_minute: 每分钟补充的令牌数（0 表示不限制）
+            capacity: 桶容量。如果未提供，则等于每分钟补充的令牌数
+
+        Parameters:
+            rate_per_minute: Tokens refilled per minute (0 means unlimited)
+            capacity: Bucket capacity. Defaults to the tokens refilled per minute
+        """
+        with self._state_lock:
+            was_unlimited = self.unlimited
+            self._refill()
+            self.rate = rate_per_minute / 60.0
+            self.capacity = capacity if capacity is not None else float(rate_per_minute)
+            # 从不限制切换为限制时以满桶开始 / Start with a full bucket when switching from unlimited
+            self._tokens = self.capacity if was_unlimited else min(self._tokens, self.capacity)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _loop_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._state_lock:
+            lock = self._loop_locks.get(loop)
+            if lock is None:
+                lock = self._loop_locks[loop] = asyncio.Lock()
+            return lock
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """
+        获取令牌，不足时等待。
+        Acquire tokens, waiting while there are not enough.
+
+        参数:
+            amount: 要获取的令牌数（超过容量时按容量计算）
+
+        Parameters:
+            amount: Number of tokens to acquire (clamped to the capacity)
+        """
+        if self.unlimited:
+            return
+
+        async with self._loop_lock():
+            while True:
+                with self._state_lock:
+                    # 等待期间速率可能被修改 / The rate may change while waiting
+                    if self.rate <= 0:
+                        return
+                    self._refill()
+                    needed = min(amount, self.capacity)
+                    if self._tokens >= needed:
+                        self._tokens -= needed
+                        return
+                    delay = (needed - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+
+    def consume(self, amount: float) -> None:
+        """
+        立即扣除令牌（可为负数以退还令牌），不等待。用于根据实际用量修正预估。
+        Deduct tokens immediately (negative amounts refund tokens) without waiting. Used to
+        correct an estimate with the actual usage.
+
+        参数:
+            amount: 要扣除的令牌数
+
+        Parameters:
+            amount: Number of tokens to deduct
+        """
+        with self._state_lock:
+            if self.unlimited:
+                return
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+
+class ProviderRateLimiter:
+    """
+    单个 AI 提供商的速率限制器。
+    Rate limiter for a single AI provider.
+
+    每个请求需要同时获得一个请求令牌和预估数量的令牌数令牌。
+    Every request must obtain one request token and its estimated number of model tokens.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        初始化速率限制器。
+        Initialize the rate limiter.
+
+        参数:
+            requests_per_minute: 每分钟最大请求数（0 表示不限制）
+            tokens_per_minute: 每分钟最大令牌数（0 表示不限制）
+
+        Parameters:
+            requests_per_minute: Maximum requests per minute (0 means unlimited)
+            tokens_per_minute: Maximum tokens per minute (0 means unlimited)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def update(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        """
+        修改限制（例如设置被修改或热重载时）；未变化的限制保持原状。
+        Change the limits (for example when the settings are edited or hot-reloaded);
+        unchanged limits are left as they are.
+
+        参数:
+            requests_per_minute: 每分钟最大请求数（0 表示不限制）
+            tokens_per_minute: 每分钟最大令牌数（0 表示不限制）
+
+        Parameters:
+            requests_per_minute: Maximum requests per minute (0 means unlimited)
+            tokens_per_minute: Maximum tokens per minute (0 means unlimited)
+        """
+        if requests_per_minute != self.requests_per_minute:
+            self.requests_per_minute = requests_per_minute
+            self.requests.set_rate(requests_per_minute)
+        if tokens_per_minute != self.tokens_per_minute:
+            self.tokens_per_minute = tokens_per_minute
+            self.tokens.set_rate(tokens_per_minute)
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        """
+        为一个请求获取许可。
+        Acquire permission for one request.
+
+        参数:
+            estimated_tokens: 请求的预估令牌数（输入加最大输出）
+
+        Parameters:
+            estimated_tokens: Estimated token count of the request (input plus maximum output)
+        """
+        await self.requests.acquire(1)
+        await self.tokens.acquire(estimated_tokens)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """
+        根据实际用量修正令牌数桶。
+        Correct the token bucket with the actual usage.
+
+        参数:
+            estimated_tokens: 获取许可时使用的预估令牌数
+            actual_tokens: 提供商报告的实际令牌数
+
+        Parameters:
+            estimated_tokens: Estimated token count used when acquiring permission
+            actual_tokens: Actual token count reported by the provider
+        """
+        self.tokens.consume(actual_tokens - estimated_tokens)
+
+
+_limiters: Dict[str, ProviderRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, requests_per_minute: int, tokens_per_minute: int) -> ProviderRateLimiter:
+    """
+    获取某个提供商共享的速率限制器，必要时创建。
+    Get the rate limiter shared by a provider, creating it if necessary.
+
+    同一提供商的所有服务实例共享同一个限制器，因为速率限制是按账户而不是按实例计算的。
+    All service instances of the same provider share one limiter, since rate limits apply
+    per account rather than per instance.
+
+    如果已有的限制器使用不同的限制，则更新为给定的限制。
+    If the existing limiter has different limits, it is updated to the given ones.
+
+    参数:
+        provider: 提供商名称
+        requests_per_minute: 每分钟最大请求数
+        tokens_per_minute: 每分钟最大令牌数
+
+    返回:
+        该提供商的 ProviderRateLimiter
+
+    Parameters:
+        provider: Provider name
+        requests_per_minute: Maximum requests per minute
+        tokens_per_minute: Maximum tokens per minute
+
+    Returns:
+        The ProviderRateLimiter of the provider
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limiter = ProviderRateLimiter(requests_per_minute, tokens_per_minute)
+            _limiters[provider] = limiter
+        else:
+            limiter.update(requests_per_minute, tokens_per_minute)
+        return limiter
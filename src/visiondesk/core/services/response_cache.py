@@ -0,0 +1,278 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+VisionDesk AI 响应缓存模块。
+VisionDesk AI response cache module.
+
+此模块提供以内容为地址的 AI 响应缓存。缓存键由图像内容的精确哈希以及模型名称、提示词和温度组成，
+因此相同的截图可以直接复用之前的分析结果，而无需再次调用付费 API；哪怕只有一个计数器或
+一行小字变化，也不会命中过时的结果。
+This module provides a content-addressed cache for AI responses. Keys combine an exact
+hash of the image content with the model name, prompt and temperature, so identical
+screenshots reuse an earlier analysis instead of another paid API call, while a change to
+even a single counter or line of small text never hits a stale answer.
+
+主要类:
+- ResponseCache: 带 LRU 和 TTL 淘汰、按条目数和字节数限制、可持久化到磁盘的响应缓存
+
+Main classes:
+- ResponseCache: Response cache with LRU and TTL eviction, bounded by entry count and
+  bytes, and optionally persisted to disk
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from visiondesk.utils.constants import CACHE_DIR
+
+# 默认的缓存持久化文件
+# Default cache persistence file
+DEFAULT_CACHE_FILE = CACHE_DIR / "responses.json"
+
+
+class ResponseCache:
+    """
+    AI 响应缓存。
+    AI response cache.
+
+    条目按最近使用顺序保存；超过 TTL 的条目在访问时被丢弃，超出条目数或字节数上限时
+    淘汰最久未使用的条目。所有操作都是线程安全的。
+    Entries are kept in recently-used order. Entries older than the TTL are dropped when
+    accessed, and the least recently used entries are evicted when the entry count or byte
+    limit is exceeded. All operations are thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 4 * 1024 * 1024,
+        ttl_seconds: float = 3600,
+        persist_path: Optional[Union[str, Path]] = None,
+    ):
+        """
+        初始化响应缓存。
+        Initialize the response cache.
+
+        参数:
+            max_entries: 最大条目数
+            max_bytes: 所有条目（键和值，UTF-8 编码）的最大总字节数
+            ttl_seconds: 条目的存活时间（秒）
+            persist_path: 持久化文件路径。如果未提供，则缓存只保存在内存中
+
+        Parameters:
+            max_entries: Maximum number of entries
+            max_bytes: Maximum total bytes of all entries (keys and values, UTF-8 encoded)
+            ttl_seconds: Time to live of an entry, in seconds
+            persist_path: Persistence file path. If not provided, the cache is memory-only
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = Path(persist_path) if persist_path is not None else None
+
+        # 键 -> (值, 过期时间, 字节数)
+        # key -> (value, expiry time, size in bytes)
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(image_hash: int, model: str, prompt: str, temperature: float) -> str:
+        """
+        构造缓存键。
+        Build a cache key.
+
+        参数:
+            image_hash: 图像内容的精确哈希（见 image_utils.content_hash）
+            model: 模型名称
+            prompt: 提示词
+            temperature: 温度参数
+
+        返回:
+            缓存键字符串
+
+        Parameters:
+            image_hash: Exact hash of the image content (see image_utils.content_hash)
+            model: Model name
+            prompt: Prompt text
+            temperature: Temperature parameter
+
+        Returns:
+            Cache key string
+        """
+        params = hashlib.sha1(f"{model}\0{prompt}\0{temperature:.3f}".encode("utf-8")).hexdigest()
+        return f"{image_hash:016x}:{params}"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        """
+        返回当前所有条目的总字节数。
+        Return the total bytes of all current entries.
+        """
+        return self._total_bytes
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        获取缓存的响应。
+        Get a cached response.
+
+        参数:
+            key: 缓存键
+
+        返回:
+            缓存的响应；如果不存在或已过期，则为 None
+
+        Parameters:
+            key: Cache key
+
+        Returns:
+            The cached response, or None if it is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: str) -> None:
+        """
+        存入响应。
+        Store a response.
+
+        参数:
+            key: 缓存键
+            value: 响应文本
+
+        Parameters:
+            key: Cache key
+            value: Response text
+        """
+        self._insert(key, value, time.time() + self.ttl_seconds)
+
+    def _insert(self, key: str, value: str, expires_at: float) -> None:
+        size = len(key.encode("utf-8")) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._total_bytes += size
+            self._evict()
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def _evict(self) -> None:
+        """
+        淘汰过期条目以及超出限制的最久未使用条目（调用方需持有锁）。
+        Evict expired entries and least recently used entries beyond the limits
+        (the caller must hold the lock).
+        """
+        now = time.time()
+        expired = [key for key, (_, expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            self._remove(key)
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+
+    def clear(self) -> None:
+        """
+        清空缓存。
+        Clear the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def load(self) -> None:
+        """
+        从持久化文件加载缓存条目，已过期的条目会被忽略。
+        Load cache entries from the persistence file; expired entries are skipped.
+        """
+        if self.persist_path is None or not self.persist_path.exists():
+            return
+
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                data: Dict[str, list] = json.load(f)
+
+            now = time.time()
+            for key, (value, expires_at) in data.items():
+                if expires_at > now:
+                    self._insert(key, value, expires_at)
+            self.logger.info(
+                f"已从 {self.persist_path} 加载 {len(self)} 条缓存响应 | "
+                f"Loaded {len(self)} cached responses from {self.persist_path}"
+            )
+        except Exception as e:
+            self.logger.error(f"加载响应缓存时出错: {e} | Error loading response cache: {e}")
+
+    def save(self) -> None:
+        """
+        将未过期的缓存条目保存到持久化文件（先写入临时文件再替换，避免文件损坏）。
+        Save unexpired cache entries to the persistence file (written to a temporary file
+        first and then replaced, to avoid corrupting it).
+        """
+        if self.persist_path is None:
+            return
+
+        try:
+            now = time.time()
+            with self._lock:
+                data = {
+                    key: [value, expires_at]
+                    for key, (value, expires_at, _) in self._entries.items()
+                    if expires_at > now
+                }
+
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.persist_path.with_suffix(self.persist_path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+            self.logger.debug(
+                f"已将 {len(data)} 条缓存响应保存至 {self.persist_path} | "
+                f"Saved {len(data)} cached responses to {self.persist_path}"
+            )
+        except Exception as e:
+            self.logger.error(f"保存响应缓存时出错: {e} | Error saving response cache: {e}")
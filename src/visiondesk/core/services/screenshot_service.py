@@ -17,18 +17,837 @@ VisionDesk 屏幕截图服务模块。
 VisionDesk screenshot service module.
 
 此模块提供屏幕截图功能，支持捕获整个屏幕或指定区域的图像。
+截图以原始 BGRA 缓冲区（Frame）的形式返回，不会在每一帧都转换为 PIL 图像。
 This module provides screenshot functionality, supporting capture of the entire screen or specified regions.
+Captures are returned as raw BGRA buffers (Frame) instead of being converted to PIL images on every frame.
+
+主要类:
+- Frame: 原始 BGRA 像素缓冲区的零拷贝视图，兼容 memoryview 和 NumPy
+- FrameSource: 帧来源的抽象基类
+- MSSFrameSource: 基于持久 mss 实例的真实屏幕帧来源
+- SyntheticFrameSource: 基于内存或文件的模拟帧来源，用于无界面的 CI 环境
+- ScreenshotService: 截图服务，封装帧来源并提供捕获接口
+
+Main classes:
+- Frame: Zero-copy view over a raw BGRA pixel buffer, memoryview and NumPy compatible
+- FrameSource: Abstract base class for frame sources
+- MSSFrameSource: Real screen frame source backed by a persistent mss instance
+- SyntheticFrameSource: In-memory or file-backed stand-in frame source for headless CI
+- ScreenshotService: Screenshot service wrapping a frame source and exposing capture APIs
 
 主要函数:
 - capture_screen: 捕获整个屏幕的截图
 - capture_region: 捕获指定区域的截图
-- capture_regions: 捕获多个指定区域的截图
+- capture_regions: 捕获多个指定区域的截图（合并相邻区域，一次抓取后按区域切片）
+- merge_bounds: 将重叠或相邻的矩形合并为尽可能少的抓取矩形
 
 Main functions:
 - capture_screen: Capture a screenshot of the entire screen
 - capture_region: Capture a screenshot of a specified region
-- capture_regions: Capture screenshots of multiple specified regions
+- capture_regions: Capture screenshots of multiple specified regions (nearby regions are
+  merged, grabbed once and sliced per region)
+- merge_bounds: Merge overlapping or nearby rectangles into as few grab rectangles as possible
 """
 
-# TODO: 实现屏幕截图服务功能
-# TODO: Implement screenshot service functionality
+import logging
+import mmap
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from visiondesk.core.services.monitor_topology import MonitorTopology
+from visiondesk.models.region import Region
+from visiondesk.utils.logger import LogEmoji, log_throttled, log_timed
+
+# 每个像素的字节数（BGRA）
+# Bytes per pixel (BGRA)
+BYTES_PER_PIXEL = 4
+
+# 合并区域时允许的默认间距（像素）
+# Default gap (pixels) within which regions are merged into one grab
+DEFAULT_MERGE_GAP = 32
+
+BufferLike = Union[bytes, bytearray, memoryview, mmap.mmap]
+Bounds = Tuple[int, int, int, int]
+
+
+class Frame:
+    """
+    原始 BGRA 像素缓冲区的零拷贝视图。
+    Zero-copy view over a raw BGRA pixel buffer.
+
+    Frame 不拥有像素数据，只记录底层缓冲区中的偏移量和行跨度，因此裁剪子区域不会复制像素。
+    通过 __array_interface__，可以使用 numpy.asarray(frame) 得到形状为 (height, width, 4)
+    的数组而无需复制。
+    A Frame does not own its pixels; it records an offset and row stride into the underlying
+    buffer, so cropping a sub-region never copies pixels. Through __array_interface__,
+    numpy.asarray(frame) yields a (height, width, 4) array without copying.
+    """
+
+    __slots__ = ("buffer", "width", "height", "stride", "offset", "left", "top")
+
+    def __init__(
+        self,
+        buffer: BufferLike,
+        width: int,
+        height: int,
+        stride: Optional[int] = None,
+        offset: int = 0,
+        left: int = 0,
+        top: int = 0,
+    ):
+        """
+        初始化帧视图。
+        Initialize the frame view.
+
+        参数:
+            buffer: 底层 BGRA 像素缓冲区
+            width: 帧宽度（像素）
+            height: 帧高度（像素）
+            stride: 每行字节数。如果未提供，则为 width * 4
+            offset: 帧第一个像素在缓冲区中的字节偏移量
+            left: 帧左上角在屏幕坐标中的 X 坐标
+            top: 帧左上角在屏幕坐标中的 Y 坐标
+
+        Parameters:
+            buffer: Underlying BGRA pixel buffer
+            width: Frame width in pixels
+            height: Frame height in pixels
+            stride: Bytes per row. Defaults to width * 4
+            offset: Byte offset of the first pixel of the frame within the buffer
+            left: Screen X coordinate of the top-left corner of the frame
+            top: Screen Y coordinate of the top-left corner of the frame
+        """
+        view = buffer if isinstance(buffer, memoryview) else memoryview(buffer)
+        if view.format != "B" or view.ndim != 1:
+            view = view.cast("B")
+
+        if stride is None:
+            stride = width * BYTES_PER_PIXEL
+        if width <= 0 or height <= 0:
+            raise ValueError(f"无效的帧尺寸 | Invalid frame size: {width} x {height}")
+        if stride < width * BYTES_PER_PIXEL:
+            raise ValueError(f"行跨度过小 | Stride too small: {stride} < {width * BYTES_PER_PIXEL}")
+        if offset + stride * (height - 1) + width * BYTES_PER_PIXEL > len(view):
+            raise ValueError("缓冲区不足以容纳该帧 | Buffer too small for the frame")
+
+        self.buffer = view
+        self.width = width
+        self.height = height
+        self.stride = stride
+        self.offset = offset
+        self.left = left
+        self.top = top
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """
+        以元组形式返回帧尺寸 (width, height)。
+        Return the frame size as a tuple (width, height).
+        """
+        return (self.width, self.height)
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """
+        以元组形式返回帧在屏幕坐标中的边界 (left, top, right, bottom)。
+        Return the frame bounds in screen coordinates as a tuple (left, top, right, bottom).
+        """
+        return (self.left, self.top, self.left + self.width, self.top + self.height)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        返回帧像素数据的字节数（不含行填充）。
+        Return the number of pixel bytes in the frame (excluding row padding).
+        """
+        return self.width * self.height * BYTES_PER_PIXEL
+
+    @property
+    def is_contiguous(self) -> bool:
+        """
+        帧的各行在缓冲区中是否连续存放。
+        Whether the rows of the frame are stored contiguously in the buffer.
+        """
+        return self.stride == self.width * BYTES_PER_PIXEL
+
+    def row(self, y: int) -> memoryview:
+        """
+        返回第 y 行像素的 memoryview（不复制）。
+        Return a memoryview of row y (no copy).
+
+        参数:
+            y: 行索引（相对于帧）
+
+        返回:
+            该行 BGRA 字节的 memoryview
+
+        Parameters:
+            y: Row index (relative to the frame)
+
+        Returns:
+            memoryview of the BGRA bytes of that row
+        """
+        if not 0 <= y < self.height:
+            raise IndexError(f"行索引越界 | Row index out of range: {y}")
+        start = self.offset + y * self.stride
+        return self.buffer[start:start + self.width * BYTES_PER_PIXEL]
+
+    def rows(self) -> Iterator[memoryview]:
+        """
+        依次返回每一行像素的 memoryview。
+        Yield a memoryview for each row of pixels.
+        """
+        row_bytes = self.width * BYTES_PER_PIXEL
+        start = self.offset
+        for _ in range(self.height):
+            yield self.buffer[start:start + row_bytes]
+            start += self.stride
+
+    def view(self, x: int, y: int, width: int, height: int) -> "Frame":
+        """
+        返回帧中一个子区域的零拷贝视图。
+        Return a zero-copy view of a sub-region of the frame.
+
+        参数:
+            x: 子区域左上角的 X 坐标（相对于帧）
+            y: 子区域左上角的 Y 坐标（相对于帧）
+            width: 子区域宽度
+            height: 子区域高度
+
+        返回:
+            共享同一缓冲区的新 Frame
+
+        Parameters:
+            x: X coordinate of the sub-region's top-left corner (relative to the frame)
+            y: Y coordinate of the sub-region's top-left corner (relative to the frame)
+            width: Sub-region width
+            height: Sub-region height
+
+        Returns:
+            A new Frame sharing the same buffer
+        """
+        if x < 0 or y < 0 or x + width > self.width or y + height > self.height:
+            raise ValueError(
+                f"子区域超出帧范围 | Sub-region ({x}, {y}, {width} x {height}) "
+                f"exceeds frame {self.width} x {self.height}"
+            )
+        return Frame(
+            self.buffer,
+            width,
+            height,
+            stride=self.stride,
+            offset=self.offset + y * self.stride + x * BYTES_PER_PIXEL,
+            left=self.left + x,
+            top=self.top + y,
+        )
+
+    def tobytes(self) -> bytes:
+        """
+        返回帧像素的连续副本（BGRA）。
+        Return a contiguous copy of the frame pixels (BGRA).
+        """
+        if self.is_contiguous:
+            return self.buffer[self.offset:self.offset + self.nbytes].tobytes()
+        return b"".join(self.rows())
+
+    @property
+    def __array_interface__(self) -> Dict[str, Any]:
+        """
+        NumPy 数组接口，使 numpy.asarray(frame) 无需复制即可得到 (height, width, 4) 数组。
+        NumPy array interface, letting numpy.asarray(frame) build a (height, width, 4)
+        array without copying.
+        """
+        return {
+            "version": 3,
+            "shape": (self.height, self.width, BYTES_PER_PIXEL),
+            "typestr": "|u1",
+            "strides": (self.stride, BYTES_PER_PIXEL, 1),
+            "data": self.buffer,
+            "offset": self.offset,
+        }
+
+    def __repr__(self) -> str:
+        return f"Frame({self.width} x {self.height} at ({self.left}, {self.top}), stride={self.stride})"
+
+
+class FrameSource(ABC):
+    """
+    帧来源的抽象基类。
+    Abstract base class for frame sources.
+
+    帧来源负责从屏幕（或其替代品）中抓取矩形区域的原始像素。
+    A frame source is responsible for grabbing raw pixels of a rectangle from the screen
+    (or a stand-in for it).
+    """
+
+    @property
+    @abstractmethod
+    def monitors(self) -> List[Dict[str, int]]:
+        """
+        返回显示器布局，格式与 mss 相同：索引 0 为整个虚拟屏幕，之后为各个显示器。
+        Return the monitor layout in the same format as mss: index 0 is the whole
+        virtual screen, followed by each monitor.
+        """
+
+    @abstractmethod
+    def grab(self, left: int, top: int, width: int, height: int) -> Frame:
+        """
+        抓取屏幕坐标中的一个矩形区域。
+        Grab a rectangle in screen coordinates.
+
+        参数:
+            left: 矩形左上角的 X 坐标
+            top: 矩形左上角的 Y 坐标
+            width: 矩形宽度
+            height: 矩形高度
+
+        返回:
+            包含该区域像素的 Frame
+
+        Parameters:
+            left: X coordinate of the rectangle's top-left corner
+            top: Y coordinate of the rectangle's top-left corner
+            width: Rectangle width
+            height: Rectangle height
+
+        Returns:
+            A Frame holding the pixels of the rectangle
+        """
+
+    def refresh_monitors(self) -> None:  # noqa: B027 - 可选钩子 / optional hook
+        """
+        使帧来源在下一次访问 monitors 时重新读取显示器布局（在显示器变化时调用）。
+        Make the frame source re-read the monitor layout on the next access to monitors (call on display changes).
+
+        可选钩子：布局固定的帧来源无需覆盖，默认不做任何事。
+        Optional hook: sources with a fixed layout need not override it; it does nothing by default.
+        """
+
+    def close(self) -> None:  # noqa: B027 - 可选钩子 / optional hook
+        """
+        释放帧来源持有的资源。
+        Release resources held by the frame source.
+
+        可选钩子：不持有资源的帧来源无需覆盖，默认不做任何事。
+        Optional hook: sources holding no resources need not override it; it does nothing by default.
+        """
+
+
+class MSSFrameSource(FrameSource):
+    """
+    基于 mss 的真实屏幕帧来源。
+    Real screen frame source backed by mss.
+
+    每个线程只创建一次 mss 实例并在之后的抓取中复用（mss 实例不能跨线程共享），
+    返回的 Frame 直接引用 mss 的原始 BGRA 缓冲区，不经过 PIL。
+    An mss instance is created once per thread and reused for subsequent grabs
+    (mss instances cannot be shared across threads). Returned frames reference the
+    raw BGRA buffer from mss directly, without going through PIL.
+
+    mss 实例会缓存显示器布局，因此 refresh_monitors() 让每个线程在下一次使用时重新创建实例。
+    mss instances cache the monitor layout, so refresh_monitors() makes every thread recreate
+    its instance on next use.
+    """
+
+    def __init__(self) -> None:
+        """
+        初始化 mss 帧来源。
+        Initialize the mss frame source.
+        """
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+        self._instances: List[Any] = []
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def _get_sct(self) -> Any:
+        """
+        获取当前线程的 mss 实例，必要时创建。
+        Get the mss instance for the current thread, creating it if necessary.
+        """
+        sct = getattr(self._local, "sct", None)
+        if sct is not None and self._local.generation != self._generation:
+            # 显示器布局已变化，丢弃缓存了旧布局的实例 / The layout changed; drop the instance caching the old one
+            with self._lock:
+                if sct in self._instances:
+                    self._instances.remove(sct)
+            sct.close()
+            sct = None
+        if sct is None:
+            import mss
+
+            sct = mss.mss()
+            self._local.sct = sct
+            self._local.generation = self._generation
+            with self._lock:
+                self._instances.append(sct)
+            self.logger.debug(
+                f"已为线程 {threading.current_thread().name} 创建 mss 实例 | "
+                f"Created mss instance for thread {threading.current_thread().name}"
+            )
+        return sct
+
+    @property
+    def monitors(self) -> List[Dict[str, int]]:
+        monitors: List[Dict[str, int]] = self._get_sct().monitors
+        return monitors
+
+    def refresh_monitors(self) -> None:
+        self._generation += 1
+
+    def grab(self, left: int, top: int, width: int, height: int) -> Frame:
+        shot = self._get_sct().grab({"left": left, "top": top, "width": width, "height": height})
+        return Frame(shot.raw, shot.width, shot.height, left=shot.left, top=shot.top)
+
+    def close(self) -> None:
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for sct in instances:
+            try:
+                sct.close()
+            except Exception as e:
+                self.logger.warning(f"关闭 mss 实例时出错: {e} | Error closing mss instance: {e}")
+        self._local = threading.local()
+
+
+class SyntheticFrameSource(FrameSource):
+    """
+    模拟帧来源，用于无界面的 CI 环境。
+    Synthetic frame source for headless CI.
+
+    以一块内存（或内存映射文件）中的 BGRA 画布代替真实屏幕。每次抓取都会返回所请求区域的
+    快照，与真实截图的语义一致。
+    Uses a BGRA canvas held in memory (or a memory-mapped file) in place of a real screen.
+    Each grab returns a snapshot of the requested rectangle, matching the semantics of a
+    real screenshot.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        canvas: Optional[BufferLike] = None,
+        monitors: Optional[Sequence[Tuple[int, int, int, int]]] = None,
+        fill: Tuple[int, int, int, int] = (0, 0, 0, 255),
+    ):
+        """
+        初始化模拟帧来源。
+        Initialize the synthetic frame source.
+
+        参数:
+            width: 虚拟屏幕宽度
+            height: 虚拟屏幕高度
+            canvas: 可选的 BGRA 画布缓冲区。如果未提供，则创建以 fill 填充的新画布
+            monitors: 可选的显示器列表 (left, top, width, height)。默认为覆盖整个画布的单个显示器
+            fill: 新画布的填充颜色 (B, G, R, A)
+
+        Parameters:
+            width: Virtual screen width
+            height: Virtual screen height
+            canvas: Optional BGRA canvas buffer. A new canvas filled with `fill` is created if omitted
+            monitors: Optional list of monitors (left, top, width, height). Defaults to a single
+                monitor covering the whole canvas
+            fill: Fill colour (B, G, R, A) for a new canvas
+        """
+        if canvas is None:
+            canvas = bytearray(bytes(fill) * (width * height))
+        self._canvas = Frame(canvas, width, height)
+        self.width = width
+        self.height = height
+
+        if monitors is None:
+            monitors = [(0, 0, width, height)]
+        self._monitors = [{"left": 0, "top": 0, "width": width, "height": height}] + [
+            {"left": left, "top": top, "width": w, "height": h} for left, top, w, h in monitors
+        ]
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], width: int, height: int) -> "SyntheticFrameSource":
+        """
+        以内存映射方式从原始 BGRA 文件创建帧来源。
+        Create a frame source from a raw BGRA file via a memory map.
+
+        参数:
+            path: 原始 BGRA 文件路径
+            width: 画布宽度
+            height: 画布高度
+
+        返回:
+            由该文件支撑的 SyntheticFrameSource
+
+        Parameters:
+            path: Path to the raw BGRA file
+            width: Canvas width
+            height: Canvas height
+
+        Returns:
+            A SyntheticFrameSource backed by the file
+        """
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(width, height, canvas=data)
+
+    @classmethod
+    def from_image(cls, path: Union[str, Path]) -> "SyntheticFrameSource":
+        """
+        从图像文件（PNG、JPEG 等）创建帧来源。图像只会在加载时转换一次为 BGRA。
+        Create a frame source from an image file (PNG, JPEG, ...). The image is converted
+        to BGRA only once, at load time.
+
+        参数:
+            path: 图像文件路径
+
+        返回:
+            以该图像为画布的 SyntheticFrameSource
+
+        Parameters:
+            path: Path to the image file
+
+        Returns:
+            A SyntheticFrameSource using the image as its canvas
+        """
+        from PIL import Image
+
+        with Image.open(path) as image:
+            rgba = image.convert("RGBA")
+            data = bytearray(rgba.tobytes("raw", "BGRA"))
+            return cls(rgba.width, rgba.height, canvas=data)
+
+    @property
+    def canvas(self) -> Frame:
+        """
+        返回整个画布的 Frame 视图。
+        Return a Frame view of the whole canvas.
+        """
+        return self._canvas
+
+    @property
+    def monitors(self) -> List[Dict[str, int]]:
+        return self._monitors
+
+    def fill_rect(
+        self, left: int, top: int, width: int, height: int, color: Tuple[int, int, int, int]
+    ) -> None:
+        """
+        用纯色填充画布中的一个矩形，用于模拟屏幕内容的变化。
+        Fill a rectangle of the canvas with a solid colour, to simulate screen content changes.
+
+        参数:
+            left: 矩形左上角的 X 坐标
+            top: 矩形左上角的 Y 坐标
+            width: 矩形宽度
+            height: 矩形高度
+            color: 填充颜色 (B, G, R, A)
+
+        Parameters:
+            left: X coordinate of the rectangle's top-left corner
+            top: Y coordinate of the rectangle's top-left corner
+            width: Rectangle width
+            height: Rectangle height
+            color: Fill colour (B, G, R, A)
+        """
+        target = self._canvas.view(left, top, width, height)
+        if target.buffer.readonly:
+            raise ValueError("画布为只读 | Canvas is read-only")
+        row = bytes(color) * width
+        start = target.offset
+        for _ in range(height):
+            target.buffer[start:start + len(row)] = row
+            start += target.stride
+
+    def grab(self, left: int, top: int, width: int, height: int) -> Frame:
+        snapshot = self._canvas.view(left, top, width, height).tobytes()
+        return Frame(snapshot, width, height, left=left, top=top)
+
+
+class ScreenshotService:
+    """
+    截图服务。
+    Screenshot service.
+
+    封装一个长期存在的帧来源，并提供捕获屏幕、单个区域和多个区域的接口。
+    Wraps a long-lived frame source and provides APIs for capturing the screen, a single
+    region, and multiple regions.
+    """
+
+    def __init__(self, source: Optional[FrameSource] = None, merge_gap: int = DEFAULT_MERGE_GAP):
+        """
+        初始化截图服务。
+        Initialize the screenshot service.
+
+        参数:
+            source: 帧来源。如果未提供，则在首次捕获时创建 MSSFrameSource
+            merge_gap: 批量捕获时，间距不超过该值（像素）的区域会合并为一次抓取
+
+        Parameters:
+            source: Frame source. If not provided, an MSSFrameSource is created on first capture
+            merge_gap: When capturing in batch, regions no further apart than this many
+                pixels are merged into a single grab
+        """
+        self.logger = logging.getLogger(__name__)
+        self._source = source
+        self._topology: Optional[MonitorTopology] = None
+        self.merge_gap = merge_gap
+
+    @property
+    def source(self) -> FrameSource:
+        """
+        返回当前使用的帧来源。
+        Return the frame source in use.
+        """
+        if self._source is None:
+            self._source = MSSFrameSource()
+        return self._source
+
+    @property
+    def topology(self) -> MonitorTopology:
+        """
+        返回帧来源的缓存显示器布局。
+        Return the cached monitor layout of the frame source.
+        """
+        if self._topology is None:
+            self._topology = MonitorTopology(self.source)
+        return self._topology
+
+    def physical_bounds(self, region: Region) -> Bounds:
+        """
+        返回区域的物理像素边界（见 MonitorTopology.to_physical）。
+        Return the physical pixel bounds of a region (see MonitorTopology.to_physical).
+        """
+        return self.topology.to_physical(region)
+
+    def capture_screen(self, monitor: int = 1) -> Frame:
+        """
+        捕获整个显示器的截图。
+        Capture a screenshot of an entire monitor.
+
+        参数:
+            monitor: 显示器索引（0 表示所有显示器组成的虚拟屏幕）
+
+        返回:
+            显示器的 Frame
+
+        Parameters:
+            monitor: Monitor index (0 means the virtual screen spanning all monitors)
+
+        Returns:
+            Frame of the monitor
+        """
+        monitors = self.topology.monitors
+        if not 0 <= monitor < len(monitors):
+            raise ValueError(f"显示器索引无效: {monitor} | Invalid monitor index: {monitor}")
+        info = monitors[monitor]
+        return self.source.grab(info.left, info.top, info.width, info.height)
+
+    def capture_region(self, region: Region) -> Frame:
+        """
+        捕获指定区域的截图。
+        Capture a screenshot of a specified region.
+
+        带有 monitor_id 的区域会按缓存的显示器布局映射为物理像素，返回的 Frame 为物理分辨率。
+        Regions with a monitor_id are mapped to physical pixels using the cached monitor
+        layout; the returned frame has the physical resolution.
+
+        参数:
+            region: 要捕获的屏幕区域
+
+        返回:
+            区域的 Frame
+
+        Parameters:
+            region: Screen region to capture
+
+        Returns:
+            Frame of the region
+        """
+        with log_timed(
+            self.logger, "已捕获区域 | Captured region", op="SCREENSHOT", region=region.name or str(region)
+        ) as fields:
+            left, top, right, bottom = self.physical_bounds(region)
+            frame = self.source.grab(left, top, right - left, bottom - top)
+            fields["payload_bytes"] = frame.nbytes
+        return frame
+
+    def capture_regions(self, regions: Sequence[Region]) -> List[Optional[Frame]]:
+        """
+        捕获多个指定区域的截图。
+        Capture screenshots of multiple specified regions.
+
+        重叠或相邻的区域会先合并为尽可能少的包围矩形，每个包围矩形只抓取一次，
+        然后每个区域得到共享缓冲区上的零拷贝视图。
+        Overlapping or nearby regions are first merged into as few bounding rectangles as
+        possible. Each bounding rectangle is grabbed once, and every region gets a
+        zero-copy view into the shared buffer.
+
+        区域先被裁剪到虚拟屏幕之内，部分超出屏幕的区域只返回可见部分。一个区域的失败不会影响其他区域：
+        完全不可见的区域，以及所在抓取失败的区域，返回 None（并记录警告）。
+        Regions are first clipped to the virtual screen, so a region partly off screen yields
+        its visible part. A failure never affects the other regions: regions with no visible
+        pixels, and regions whose grab failed, yield None (and a warning is logged).
+
+        参数:
+            regions: 要捕获的屏幕区域列表
+
+        返回:
+            与输入顺序一致的 Frame 列表，无法捕获的区域为 None
+
+        Parameters:
+            regions: Screen regions to capture
+
+        Returns:
+            List of frames in the same order as the input, None for regions that could not
+            be captured
+        """
+        frames: List[Optional[Frame]] = [None] * len(regions)
+        labels = [region.name or str(region) for region in regions]
+        # 可见区域的裁剪后边界，以及它们的输入索引 / Clipped bounds of the visible regions, and their input indices
+        bounds: List[Bounds] = []
+        visible: List[int] = []
+        for index, region in enumerate(regions):
+            clipped = self._clip_to_screen(self.physical_bounds(region))
+            if clipped is None:
+                log_throttled(
+                    self.logger, f"offscreen:{labels[index]}",
+                    f"区域 {labels[index]} 不在屏幕内 | Region {labels[index]} is off screen",
+                    interval=60.0, emoji=LogEmoji.WARNING, level=logging.WARNING,
+                )
+                continue
+            bounds.append(clipped)
+            visible.append(index)
+        groups = merge_bounds(bounds, self.merge_gap)
+
+        with log_timed(
+            self.logger,
+            f"已通过 {len(groups)} 次抓取捕获 {len(regions)} 个区域 | "
+            f"Captured {len(regions)} regions with {len(groups)} grabs",
+            op="SCREENSHOT",
+            region=labels,
+        ) as fields:
+            payload_bytes = 0
+            for (left, top, right, bottom), members in groups:
+                try:
+                    shared = self.source.grab(left, top, right - left, bottom - top)
+                except Exception as e:
+                    names = ", ".join(labels[visible[member]] for member in members)
+                    self.logger.warning(
+                        f"抓取区域 {names} 时出错: {e} | Error grabbing regions {names}: {e}",
+                        extra={"op": "SCREENSHOT", "error": f"{type(e).__name__}: {e}"},
+                    )
+                    continue
+                payload_bytes += shared.nbytes
+                for member in members:
+                    r_left, r_top, r_right, r_bottom = bounds[member]
+                    frames[visible[member]] = shared.view(
+                        r_left - shared.left, r_top - shared.top, r_right - r_left, r_bottom - r_top
+                    )
+            fields["payload_bytes"] = payload_bytes
+
+        return frames
+
+    def _clip_to_screen(self, bounds: Bounds) -> Optional[Bounds]:
+        """
+        把边界裁剪到虚拟屏幕之内；没有可见部分时返回 None。
+        Clip bounds to the virtual screen; None when nothing of them is visible.
+        """
+        screen = self.topology.monitors[0]
+        left, top = max(bounds[0], screen.left), max(bounds[1], screen.top)
+        right = min(bounds[2], screen.left + screen.width)
+        bottom = min(bounds[3], screen.top + screen.height)
+        if right <= left or bottom <= top:
+            return None
+        return (left, top, right, bottom)
+
+    def close(self) -> None:
+        """
+        关闭截图服务并释放帧来源。
+        Close the screenshot service and release the frame source.
+        """
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+    def __enter__(self) -> "ScreenshotService":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def merge_bounds(bounds: Sequence[Bounds], gap: int = 0) -> List[Tuple[Bounds, List[int]]]:
+    """
+    将重叠或相邻的矩形合并为尽可能少的包围矩形。
+    Merge overlapping or nearby rectangles into as few bounding rectangles as possible.
+
+    两个矩形之间的间距不超过 gap 时会被合并；合并会一直进行，直到没有可以合并的矩形为止。
+    Two rectangles are merged when they are at most `gap` pixels apart; merging repeats
+    until no further rectangles can be merged.
+
+    参数:
+        bounds: 矩形列表 (left, top, right, bottom)
+        gap: 允许合并的最大间距（像素）
+
+    返回:
+        (包围矩形, 属于该矩形的输入索引列表) 的列表
+
+    Parameters:
+        bounds: Rectangles as (left, top, right, bottom)
+        gap: Maximum gap (pixels) at which rectangles are still merged
+
+    Returns:
+        List of (bounding rectangle, indices of the input rectangles it covers)
+    """
+    groups: List[Tuple[Bounds, List[int]]] = [(tuple(b), [i]) for i, b in enumerate(bounds)]  # type: ignore[misc]
+
+    merged = True
+    while merged:
+        merged = False
+        i = 0
+        while i < len(groups):
+            (l1, t1, r1, b1), members = groups[i]
+            j = i + 1
+            while j < len(groups):
+                (l2, t2, r2, b2), others = groups[j]
+                if l2 <= r1 + gap and l1 <= r2 + gap and t2 <= b1 + gap and t1 <= b2 + gap:
+                    l1, t1, r1, b1 = min(l1, l2), min(t1, t2), max(r1, r2), max(b1, b2)
+                    members = members + others
+                    groups[i] = ((l1, t1, r1, b1), members)
+                    del groups[j]
+                    merged = True
+                else:
+                    j += 1
+            i += 1
+
+    return groups
+
+
+_default_service: Optional[ScreenshotService] = None
+_default_service_lock = threading.Lock()
+
+
+def get_screenshot_service() -> ScreenshotService:
+    """
+    获取默认的截图服务实例（使用真实屏幕）。
+    Get the default screenshot service instance (using the real screen).
+    """
+    global _default_service
+    with _default_service_lock:
+        if _default_service is None:
+            _default_service = ScreenshotService()
+        return _default_service
+
+
+def capture_screen(monitor: int = 1) -> Frame:
+    """Capture a screenshot of an entire monitor. / 捕获整个显示器的截图。"""
+    return get_screenshot_service().capture_screen(monitor)
+
+
+def capture_region(region: Region) -> Frame:
+    """Capture a screenshot of a specified region. / 捕获指定区域的截图。"""
+    return get_screenshot_service().capture_region(region)
+
+
+def capture_regions(regions: Sequence[Region]) -> List[Optional[Frame]]:
+    """Capture screenshots of multiple specified regions. / 捕获多个指定区域的截图。"""
+    return get_screenshot_service().capture_regions(regions)
@@ -22,21 +22,27 @@ creating and launching the App instance.
 """
 
 import sys
-from src.visiondesk.utils import setup_logging, get_logger
 
-def main() -> None:
 
-    # Logger:
-    setup_logging(
-        default_level="INFO",
-        use_emoji=True,
-        use_colors=True,
-        file_logging=True,
-        console_logging=True
-    )
+def main() -> int:
+    """
+    创建并运行 VisionDesk 应用程序，直到主窗口关闭。
+    Create and run the VisionDesk application until the main window is closed.
+
+    App（以及 Qt）在这里才导入，使导入本模块保持轻量。日志由 App 配置。
+    App (and with it Qt) is imported here, keeping the import of this module light. Logging
+    is configured by App.
+
+    返回:
+        应用程序的退出代码
+
+    Returns:
+        Exit code of the application
+    """
+    from visiondesk.app import App
+
+    return App().start()
 
-    logger = get_logger(__name__)
-    logger.info("🎇 Application starting... ")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
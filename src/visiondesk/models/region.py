@@ -18,9 +18,24 @@ VisionDesk region data model module.
 
 此模块定义了屏幕区域选择和捕获的数据模型。
 This module defines data models for screen region selection and capture.
+
+Region 是经过 pydantic 验证的模型，用于配置和持久化；Rect 是使用 __slots__ 的轻量值类型，
+构造时不做验证，用于捕获和选择等热循环中频繁创建的临时区域。两者可以在持久化边界无损转换。
+Region is a pydantic-validated model used for configuration and persistence; Rect is a
+lightweight __slots__ value type that skips validation on construction, for the transient
+regions created in hot loops such as capture and selection. The two convert losslessly at
+persistence boundaries.
+
+主要类:
+- Region: 经过验证的屏幕区域模型
+- Rect: 轻量的屏幕区域值类型
+
+Main classes:
+- Region: Validated screen region model
+- Rect: Lightweight screen region value type
 """
 
-from typing import Tuple, Optional
+from typing import Any, Tuple, Optional
 from pydantic import BaseModel, Field
 
 
@@ -29,8 +44,13 @@ class Region(BaseModel):
     屏幕区域数据模型。
     Screen region data model.
 
-    表示屏幕上被选择用于分析的矩形区域。
+    表示屏幕上被选择用于分析的矩形区域。设置了 monitor_id 时，坐标为 Qt 的逻辑坐标，
+    MonitorTopology 按 scale 将其映射为该显示器上的物理像素；没有 monitor_id 时，坐标即为物理像素，
+    scale 被忽略。
     Represents a rectangular region on screen that has been selected for analysis.
+    When monitor_id is set, coordinates are Qt logical coordinates, which MonitorTopology maps
+    to physical pixels on that monitor using scale; without monitor_id, coordinates are
+    physical pixels and scale is ignored.
     """
 
     x: int = Field(description="区域左上角的 X 坐标 | X coordinate of the top-left corner of the region")
@@ -38,6 +58,20 @@ class Region(BaseModel):
     width: int = Field(gt=0, description="区域的宽度 | Width of the region")
     height: int = Field(gt=0, description="区域的高度 | Height of the region")
     name: Optional[str] = Field(default=None, description="区域的自定义名称 | Custom name for the region")
+    monitor_id: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="区域所在显示器的索引（与 mss 相同，从 1 开始）；为空时坐标即为物理像素 | "
+                    "Index of the monitor holding the region (as in mss, starting at 1); "
+                    "when empty the coordinates are physical pixels"
+    )
+    scale: float = Field(
+        default=1.0,
+        gt=0,
+        description="选择区域时显示器的设备像素比，用于将逻辑坐标映射为物理像素；仅在设置了 monitor_id 时使用 | "
+                    "Device pixel ratio of the monitor when the region was selected, used to map "
+                    "logical coordinates to physical pixels; only used when monitor_id is set"
+    )
 
     @property
     def coordinates(self) -> Tuple[int, int, int, int]:
@@ -86,8 +120,14 @@ class Region(BaseModel):
         Returns:
             True if the point is within the region, False otherwise
         """
-        left, top, right, bottom = self.bounds
-        return left <= x <= right and top <= y <= bottom
+        return self.x <= x <= self.x + self.width and self.y <= y <= self.y + self.height
+
+    def to_rect(self) -> "Rect":
+        """
+        转换为轻量的 Rect（不再验证）。
+        Convert to a lightweight Rect (without validating again).
+        """
+        return Rect(self.x, self.y, self.width, self.height, self.name, self.monitor_id, self.scale)
 
     def __str__(self) -> str:
         """
@@ -104,3 +144,128 @@ class Region(BaseModel):
             return f"{self.name}: ({self.x}, {self.y}, {self.width} x {self.height})"
         else:
             return f"Region: ({self.x}, {self.y}, {self.width} x {self.height})"
+
+
+class Rect:
+    """
+    轻量的屏幕区域值类型。
+    Lightweight screen region value type.
+
+    与 Region 有相同的 coordinates、bounds 和 contains_point 语义，但构造时不做验证，
+    只有在通过 to_region() 进入持久化边界时才验证一次。约定上不可变。
+    Has the same coordinates, bounds and contains_point semantics as Region, but does not
+    validate on construction; it is validated once, when it crosses a persistence boundary
+    via to_region(). Immutable by convention.
+    """
+
+    __slots__ = ("x", "y", "width", "height", "name", "monitor_id", "scale")
+
+    def __init__(
+        self,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        name: Optional[str] = None,
+        monitor_id: Optional[int] = None,
+        scale: float = 1.0,
+    ):
+        """
+        创建区域（不做验证）。
+        Create a region (without validation).
+
+        参数:
+            x: 左上角的 X 坐标
+            y: 左上角的 Y 坐标
+            width: 宽度
+            height: 高度
+            name: 可选的名称
+            monitor_id: 可选的显示器索引
+            scale: 设备像素比
+
+        Parameters:
+            x: X coordinate of the top-left corner
+            y: Y coordinate of the top-left corner
+            width: Width
+            height: Height
+            name: Optional name
+            monitor_id: Optional monitor index
+            scale: Device pixel ratio
+        """
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.name = name
+        self.monitor_id = monitor_id
+        self.scale = scale
+
+    @classmethod
+    def from_region(cls, region: Region) -> "Rect":
+        """
+        从已验证的 Region 创建。
+        Create from a validated Region.
+        """
+        return cls(region.x, region.y, region.width, region.height, region.name, region.monitor_id, region.scale)
+
+    def to_region(self) -> Region:
+        """
+        转换为 Region，并在此时验证。
+        Convert to a Region, validating at this point.
+
+        返回:
+            经过验证的区域
+
+        Returns:
+            The validated region
+        """
+        return Region(
+            x=self.x, y=self.y, width=self.width, height=self.height, name=self.name,
+            monitor_id=self.monitor_id, scale=self.scale
+        )
+
+    @property
+    def coordinates(self) -> Tuple[int, int, int, int]:
+        """
+        以元组形式返回区域坐标 (x, y, width, height)。
+        Return the region coordinates as a tuple (x, y, width, height).
+        """
+        return (self.x, self.y, self.width, self.height)
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """
+        以元组形式返回区域边界 (left, top, right, bottom)。
+        Return the region bounds as a tuple (left, top, right, bottom).
+        """
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+
+    def contains_point(self, x: int, y: int) -> bool:
+        """
+        检查给定点是否在区域内（包含右边和下边，与 Region 一致）。
+        Check if the given point is within the region (right and bottom edges included, as in Region).
+        """
+        return self.x <= x <= self.x + self.width and self.y <= y <= self.y + self.height
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Rect):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def _key(self) -> Tuple[Any, ...]:
+        return (self.x, self.y, self.width, self.height, self.name, self.monitor_id, self.scale)
+
+    def __repr__(self) -> str:
+        return (
+            f"Rect(x={self.x}, y={self.y}, width={self.width}, height={self.height}, name={self.name!r}, "
+            f"monitor_id={self.monitor_id}, scale={self.scale})"
+        )
+
+    def __str__(self) -> str:
+        if self.name:
+            return f"{self.name}: ({self.x}, {self.y}, {self.width} x {self.height})"
+        return f"Region: ({self.x}, {self.y}, {self.width} x {self.height})"
+
@@ -0,0 +1,368 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+VisionDesk 区域集合模块。
+VisionDesk region set module.
+
+此模块提供以连续数组存储大量区域坐标的容器。坐标按列存放在 array('i') 中；安装了
+image-processing 额外依赖（NumPy）时，点命中测试和重叠查询通过对这些数组的零复制视图向量化执行，
+否则退回到遍历整数数组的循环（仍然不需要访问 pydantic 模型）。
+This module provides a container storing the coordinates of many regions in contiguous
+arrays. Coordinates are stored column-wise in array('i'); when the image-processing extra
+(NumPy) is installed, hit-testing and overlap queries run vectorized over zero-copy views of
+those arrays, otherwise they fall back to loops over the integer arrays (still without
+touching pydantic models).
+
+主要类:
+- RegionSet: 数组存储的区域集合
+
+Main classes:
+- RegionSet: Array-backed set of regions
+"""
+
+from array import array
+from types import ModuleType
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from visiondesk.models.region import Region
+
+np: Optional[ModuleType]
+try:
+    import numpy as np
+except ImportError:  # 未安装 image-processing 额外依赖 / image-processing extra not installed
+    np = None
+
+# 边界元组 (left, top, right, bottom) / Bounds tuple (left, top, right, bottom)
+Bounds = Tuple[int, int, int, int]
+
+
+class RegionSet:
+    """
+    数组存储的区域集合。
+    Array-backed set of regions.
+
+    区域按插入顺序编号；查询返回这些索引。边界语义与 Region 一致：right = x + width，
+    contains_point 包含右边和下边。
+    Regions are numbered in insertion order; queries return these indices. Bounds follow
+    Region: right = x + width, and contains_point includes the right and bottom edges.
+    """
+
+    def __init__(self, regions: Iterable[Region] = ()):
+        """
+        初始化区域集合。
+        Initialize the region set.
+
+        参数:
+            regions: 初始区域
+
+        Parameters:
+            regions: Initial regions
+        """
+        self._left = array("i")
+        self._top = array("i")
+        self._right = array("i")
+        self._bottom = array("i")
+        self._names: List[Optional[str]] = []
+        self._monitor_ids: List[Optional[int]] = []
+        self._scales = array("d")
+        self._by_name: Dict[str, int] = {}
+        # 列数组的 NumPy 视图，修改前释放（被导出的 array 不能改变大小）
+        # NumPy views of the column arrays, released before mutation (an exported array cannot resize)
+        self._views: Optional[Tuple[Any, Any, Any, Any]] = None
+        for region in regions:
+            self.add(region)
+
+    @classmethod
+    def from_regions(cls, regions: Iterable[Region]) -> "RegionSet":
+        """
+        从区域创建集合。
+        Create a set from regions.
+        """
+        return cls(regions)
+
+    @property
+    def backend(self) -> str:
+        """
+        返回查询使用的实现："numpy" 或 "array"。
+        Return the implementation used by queries: "numpy" or "array".
+        """
+        return "numpy" if np is not None else "array"
+
+    @property
+    def names(self) -> List[Optional[str]]:
+        """
+        返回按索引排列的区域名称。
+        Return the region names, by index.
+        """
+        return list(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[Region]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index: int) -> Region:
+        left, top, right, bottom = self.bounds(index)
+        # 坐标在加入时已经验证过 / Coordinates were validated when added
+        return Region.model_construct(
+            x=left, y=top, width=right - left, height=bottom - top, name=self._names[index],
+            monitor_id=self._monitor_ids[index], scale=self._scales[index]
+        )
+
+    def to_regions(self) -> List[Region]:
+        """
+        转换为区域列表。
+        Convert to a list of regions.
+        """
+        return list(self)
+
+    def bounds(self, index: int) -> Bounds:
+        """
+        返回区域的边界 (left, top, right, bottom)。
+        Return the bounds (left, top, right, bottom) of a region.
+        """
+        return self._left[index], self._top[index], self._right[index], self._bottom[index]
+
+    def index_of(self, name: str) -> Optional[int]:
+        """
+        返回具有给定名称的区域的索引。
+        Return the index of the region with the given name.
+        """
+        return self._by_name.get(name)
+
+    def add(self, region: Region) -> int:
+        """
+        添加区域。
+        Add a region.
+
+        参数:
+            region: 要添加的区域
+
+        返回:
+            新区域的索引
+
+        Parameters:
+            region: Region to add
+
+        Returns:
+            Index of the new region
+        """
+        self._views = None
+        left, top, right, bottom = region.bounds
+        self._left.append(left)
+        self._top.append(top)
+        self._right.append(right)
+        self._bottom.append(bottom)
+        index = len(self._names)
+        self._names.append(region.name)
+        self._monitor_ids.append(region.monitor_id)
+        self._scales.append(region.scale)
+        if region.name is not None:
+            self._by_name[region.name] = index
+        return index
+
+    def remove(self, index: int) -> None:
+        """
+        删除区域。之后区域的索引减一。
+        Remove a region. The indices of later regions decrease by one.
+        """
+        self._views = None
+        for column in (self._left, self._top, self._right, self._bottom):
+            del column[index]
+        del self._names[index]
+        del self._monitor_ids[index]
+        del self._scales[index]
+        self._by_name = {name: i for i, name in enumerate(self._names) if name is not None}
+
+    def contains_point(self, x: int, y: int) -> List[int]:
+        """
+        返回包含给定点的所有区域的索引。
+        Return the indices of every region containing the given point.
+
+        参数:
+            x: 点的 X 坐标
+            y: 点的 Y 坐标
+
+        返回:
+            按索引升序排列的区域索引列表
+
+        Parameters:
+            x: X coordinate of the point
+            y: Y coordinate of the point
+
+        Returns:
+            List of region indices, in ascending order
+        """
+        views = self._numpy_views()
+        if views is not None and np is not None:
+            left, top, right, bottom = views
+            mask = (left <= x) & (x <= right) & (top <= y) & (y <= bottom)
+            hits: List[int] = np.flatnonzero(mask).tolist()
+            return hits
+        return [
+            i for i, (left, top, right, bottom)
+            in enumerate(zip(self._left, self._top, self._right, self._bottom))
+            if left <= x <= right and top <= y <= bottom
+        ]
+
+    def intersecting(self, x: int, y: int, width: int, height: int) -> List[int]:
+        """
+        返回与给定矩形重叠（面积大于零）的所有区域的索引。
+        Return the indices of every region overlapping (with positive area) the given rectangle.
+
+        参数:
+            x: 矩形左上角的 X 坐标
+            y: 矩形左上角的 Y 坐标
+            width: 矩形宽度
+            height: 矩形高度
+
+        返回:
+            按索引升序排列的区域索引列表
+
+        Parameters:
+            x: X coordinate of the rectangle's top-left corner
+            y: Y coordinate of the rectangle's top-left corner
+            width: Rectangle width
+            height: Rectangle height
+
+        Returns:
+            List of region indices, in ascending order
+        """
+        right, bottom = x + width, y + height
+        views = self._numpy_views()
+        if views is not None and np is not None:
+            r_left, r_top, r_right, r_bottom = views
+            mask = (r_left < right) & (x < r_right) & (r_top < bottom) & (y < r_bottom)
+            hits: List[int] = np.flatnonzero(mask).tolist()
+            return hits
+        return [
+            i for i, (r_left, r_top, r_right, r_bottom)
+            in enumerate(zip(self._left, self._top, self._right, self._bottom))
+            if r_left < right and x < r_right and r_top < bottom and y < r_bottom
+        ]
+
+    def overlapping_pairs(self) -> List[Tuple[int, int]]:
+        """
+        返回所有相互重叠（面积大于零）的区域索引对 (i, j)，其中 i < j。
+        Return every pair of region indices (i, j), i < j, that overlap with positive area.
+        """
+        views = self._numpy_views()
+        if views is not None and np is not None:
+            left, top, right, bottom = views
+            overlap = (
+                (left[:, None] < right[None, :]) & (left[None, :] < right[:, None])
+                & (top[:, None] < bottom[None, :]) & (top[None, :] < bottom[:, None])
+            )
+            rows, cols = np.nonzero(np.triu(overlap, k=1))
+            return list(zip(rows.tolist(), cols.tolist()))
+        return [
+            (i, j)
+            for i in range(len(self))
+            for j in self.intersecting(
+                self._left[i], self._top[i], self._right[i] - self._left[i], self._bottom[i] - self._top[i]
+            )
+            if j > i
+        ]
+
+    def intersection_bounds(self, indices: Optional[Iterable[int]] = None) -> Optional[Bounds]:
+        """
+        返回所选区域的公共交集边界。
+        Return the bounds of the common intersection of the selected regions.
+
+        参数:
+            indices: 区域索引，None 表示所有区域
+
+        返回:
+            交集的边界 (left, top, right, bottom)，交集为空时返回 None
+
+        Parameters:
+            indices: Region indices, None selects every region
+
+        Returns:
+            Bounds (left, top, right, bottom) of the intersection, None when it is empty
+        """
+        columns = self._select(indices)
+        if columns is None:
+            return None
+        high, low = (np.max, np.min) if np is not None else (max, min)
+        left, top, right, bottom = high(columns[0]), high(columns[1]), low(columns[2]), low(columns[3])
+        if left >= right or top >= bottom:
+            return None
+        return int(left), int(top), int(right), int(bottom)
+
+    def union_bounds(self, indices: Optional[Iterable[int]] = None) -> Optional[Bounds]:
+        """
+        返回包围所选区域的最小边界。
+        Return the smallest bounds enclosing the selected regions.
+
+        参数:
+            indices: 区域索引，None 表示所有区域
+
+        返回:
+            并集外接矩形的边界 (left, top, right, bottom)，没有选中区域时返回 None
+
+        Parameters:
+            indices: Region indices, None selects every region
+
+        Returns:
+            Bounds (left, top, right, bottom) of the union's bounding box, None when nothing is selected
+        """
+        columns = self._select(indices)
+        if columns is None:
+            return None
+        high, low = (np.max, np.min) if np is not None else (max, min)
+        return int(low(columns[0])), int(low(columns[1])), int(high(columns[2])), int(high(columns[3]))
+
+    def _select(self, indices: Optional[Iterable[int]]) -> Optional[Tuple[Any, Any, Any, Any]]:
+        """
+        返回所选区域的坐标列，没有选中区域时返回 None。
+        Return the coordinate columns of the selected regions, None when nothing is selected.
+        """
+        views = self._numpy_views()
+        if indices is None:
+            if not len(self):
+                return None
+            if views is not None:
+                return views
+            return self._left, self._top, self._right, self._bottom
+
+        indices = list(indices)
+        if not indices:
+            return None
+        if views is not None:
+            left, top, right, bottom = views
+            return left[indices], top[indices], right[indices], bottom[indices]
+        return (
+            [self._left[i] for i in indices],
+            [self._top[i] for i in indices],
+            [self._right[i] for i in indices],
+            [self._bottom[i] for i in indices],
+        )
+
+    def _numpy_views(self) -> Optional[Tuple[Any, Any, Any, Any]]:
+        if np is None:
+            return None
+        if self._views is None:
+            # np.frombuffer 不复制数据；空数组没有可导出的缓冲区
+            # np.frombuffer does not copy; an empty array has no buffer to export
+            left, top, right, bottom = (
+                np.frombuffer(column, dtype=np.intc) if len(column) else np.empty(0, dtype=np.intc)
+                for column in (self._left, self._top, self._right, self._bottom)
+            )
+            self._views = left, top, right, bottom
+        return self._views
+
@@ -20,126 +20,271 @@ VisionDesk application settings model module.
 This module defines all settings for the application.
 """
 
-# from typing import Dict, List, Optional
-# from pydantic import BaseModel, Field
-#
-# from visiondesk.models.region import Region
-#
-#
-# class AISettings(BaseModel):
-#     """
-#     AI 相关设置。
-#     AI-related settings.
-#     """
-#
-#     provider: str = Field(
-#         default="openai",
-#         description="AI 提供商名称 | AI provider name"
-#     )
-#
-#     model_name: str = Field(
-#         default="gpt-4o",
-#         description="要使���的 AI 模型名称 | Name of the AI model to use"
-#     )
-#
-#     api_key: Optional[str] = Field(
-#         default=None,
-#         description="API 密钥 | API key"
-#     )
-#
-#     temperature: float = Field(
-#         default=0.7,
-#         ge=0.0,
-#         le=2.0,
-#         description="模型温度参数，控制随机性 | Model temperature parameter, controls randomness"
-#     )
-#
-#     max_tokens: int = Field(
-#         default=500,
-#         ge=50,
-#         le=4000,
-#         description="回复的最大令牌数 | Maximum number of tokens in the response"
-#     )
-#
-#
-# class UISettings(BaseModel):
-#     """
-#     用户界面相关设置。
-#     User interface related settings.
-#     """
-#
-#     theme: str = Field(
-#         default="system",
-#         description="应用程序主题 (system, light, dark) | Application theme (system, light, dark)"
-#     )
-#
-#     font_size: int = Field(
-#         default=10,
-#         ge=8,
-#         le=18,
-#         description="UI 字体大小 | UI font size"
-#     )
-#
-#     overlay_opacity: float = Field(
-#         default=0.85,
-#         ge=0.1,
-#         le=1.0,
-#         description="浮窗透明度 | Overlay window opacity"
-#     )
-#
-#     language: str = Field(
-#         default="zh_CN",
-#         description="应用程序语言 | Application language"
-#     )
-#
-#
-# class CaptureSettings(BaseModel):
-#     """
-#     屏幕捕获相关设置。
-#     Screen capture related settings.
-#     """
-#
-#     interval_seconds: int = Field(
-#         default=5,
-#         ge=1,
-#         le=3600,
-#         description="屏幕捕获间隔（秒） | Screen capture interval (seconds)"
-#     )
-#
-#     auto_capture: bool = Field(
-#         default=False,
-#         description="是否启用自动捕获 | Whether to enable automatic capture"
-#     )
-#
-#     capture_quality: int = Field(
-#         default=85,
-#         ge=1,
-#         le=100,
-#         description="JPEG 图像质量 | JPEG image quality"
-#     )
-#
-#
-# class Settings(BaseModel):
-#     """
-#     应用程序总体设置。
-#     Overall application settings.
-#     """
-#
-#     ai: AISettings = Field(default_factory=AISettings)
-#     ui: UISettings = Field(default_factory=UISettings)
-#     capture: CaptureSettings = Field(default_factory=CaptureSettings)
-#
-#     saved_regions: Dict[str, Region] = Field(
-#         default_factory=dict,
-#         description="保存的屏幕区域 | Saved screen regions"
-#     )
-#
-#     startup_with_system: bool = Field(
-#         default=False,
-#         description="是否在系统启动时自动启动应用 | Whether to start the application automatically with the system"
-#     )
-#
-#     update_check: bool = Field(
-#         default=True,
-#         description="是否自动检查更新 | Whether to automatically check for updates"
-#     )
+from typing import Dict, Optional
+from pydantic import BaseModel, Field
+
+from visiondesk.models.region import Region
+
+
+class AISettings(BaseModel):
+    """
+    AI 相关设置。
+    AI-related settings.
+    """
+
+    provider: str = Field(
+        default="openai",
+        description="AI 提供商名称 | AI provider name"
+    )
+
+    model_name: str = Field(
+        default="gpt-4o",
+        description="要使用的 AI 模型名称 | Name of the AI model to use"
+    )
+
+    api_key: Optional[str] = Field(
+        default=None,
+        description="API 密钥 | API key"
+    )
+
+    temperature: float = Field(
+        default=0.7,
+        ge=0.0,
+        le=2.0,
+        description="模型温度参数，控制随机性 | Model temperature parameter, controls randomness"
+    )
+
+    max_tokens: int = Field(
+        default=500,
+        ge=50,
+        le=4000,
+        description="回复的最大令牌数 | Maximum number of tokens in the response"
+    )
+
+    base_url: str = Field(
+        default="https://api.openai.com/v1",
+        description="API 基础地址 | API base URL"
+    )
+
+    connection_pool_size: int = Field(
+        default=8,
+        ge=1,
+        le=100,
+        description="每个提供商复用的最大 HTTP 连接数 | Maximum number of pooled HTTP connections per provider"
+    )
+
+    connect_timeout: float = Field(
+        default=10.0,
+        gt=0,
+        description="建立连接的超时时间（秒） | Connection timeout (seconds)"
+    )
+
+    request_timeout: float = Field(
+        default=60.0,
+        gt=0,
+        description="单个请求的总超时时间（秒） | Total timeout of a single request (seconds)"
+    )
+
+    keepalive_timeout: float = Field(
+        default=60.0,
+        gt=0,
+        description="空闲连接保持打开的时间（秒） | How long idle connections are kept open (seconds)"
+    )
+
+    prompt: str = Field(
+        default="请描述并分析这张截图中的内容。 | Describe and analyse the content of this screenshot.",
+        description="分析图像时使用的提示词 | Prompt used when analysing an image"
+    )
+
+    max_concurrent_requests: int = Field(
+        default=4,
+        ge=1,
+        le=64,
+        description="同时进行的最大请求数 | Maximum number of requests in flight"
+    )
+
+    requests_per_minute: int = Field(
+        default=60,
+        ge=0,
+        description="每分钟最大请求数（0 表示不限制） | Maximum requests per minute (0 means unlimited)"
+    )
+
+    tokens_per_minute: int = Field(
+        default=30000,
+        ge=0,
+        description="每分钟最大令牌数（0 表示不限制） | Maximum tokens per minute (0 means unlimited)"
+    )
+
+    cycle_token_budget: int = Field(
+        default=0,
+        ge=0,
+        description="每个捕获周期的令牌预算（0 表示按每分钟令牌数和捕获间隔推算） | "
+                    "Token budget of one capture cycle (0 derives it from tokens per minute and the capture interval)"
+    )
+
+    cycle_max_requests: int = Field(
+        default=0,
+        ge=0,
+        description="每个捕获周期最多发送的请求数，用于限制周期延迟（0 表示按每分钟请求数和捕获间隔推算） | "
+                    "Maximum requests sent per capture cycle, bounding cycle latency "
+                    "(0 derives it from requests per minute and the capture interval)"
+    )
+
+    mosaic_enabled: bool = Field(
+        default=True,
+        description="是否把多个小区域拼成一张带标签的图像，在一个请求中分析 | "
+                    "Whether to tile several small regions into one labelled image analyzed in a single request"
+    )
+
+    cache_enabled: bool = Field(
+        default=True,
+        description="是否缓存相同截图的分析结果 | Whether to cache analyses of identical screenshots"
+    )
+
+    cache_ttl_seconds: int = Field(
+        default=3600,
+        ge=1,
+        description="缓存条目的存活时间（秒） | Time to live of cache entries (seconds)"
+    )
+
+    cache_max_entries: int = Field(
+        default=256,
+        ge=1,
+        description="缓存的最大条目数 | Maximum number of cache entries"
+    )
+
+    cache_max_bytes: int = Field(
+        default=4 * 1024 * 1024,
+        ge=1024,
+        description="缓存的最大字节数 | Maximum cache size in bytes"
+    )
+
+    cache_persist: bool = Field(
+        default=True,
+        description="是否将缓存持久化到 ~/.visiondesk/cache | Whether to persist the cache under ~/.visiondesk/cache"
+    )
+
+
+class UISettings(BaseModel):
+    """
+    用户界面相关设置。
+    User interface related settings.
+    """
+
+    theme: str = Field(
+        default="system",
+        description="应用程序主题 (system, light, dark) | Application theme (system, light, dark)"
+    )
+
+    font_size: int = Field(
+        default=10,
+        ge=8,
+        le=18,
+        description="UI 字体大小 | UI font size"
+    )
+
+    overlay_opacity: float = Field(
+        default=0.85,
+        ge=0.1,
+        le=1.0,
+        description="浮窗透明度 | Overlay window opacity"
+    )
+
+    language: str = Field(
+        default="zh_CN",
+        description="应用程序语言 | Application language"
+    )
+
+
+class CaptureSettings(BaseModel):
+    """
+    屏幕捕获相关设置。
+    Screen capture related settings.
+    """
+
+    interval_seconds: int = Field(
+        default=5,
+        ge=1,
+        le=3600,
+        description="屏幕捕获间隔（秒） | Screen capture interval (seconds)"
+    )
+
+    auto_capture: bool = Field(
+        default=False,
+        description="是否启用自动捕获 | Whether to enable automatic capture"
+    )
+
+    backpressure_policy: str = Field(
+        default="coalesce",
+        pattern="^(drop|coalesce)$",
+        description="上一次分析仍在进行时如何处理新的捕获节拍 (drop: 丢弃, coalesce: 完成后合并执行一次) | "
+                    "How capture ticks are handled while the previous analysis is in flight "
+                    "(drop: discard, coalesce: run once when it completes)"
+    )
+
+    capture_quality: int = Field(
+        default=85,
+        ge=1,
+        le=100,
+        description="JPEG/WebP 图像质量 | JPEG/WebP image quality"
+    )
+
+    image_format: str = Field(
+        default="JPEG",
+        pattern="(?i)^(jpeg|webp|png)$",
+        description="发送给 AI 的图像编码格式 (JPEG, WEBP, PNG) | Encoding format of images sent to the AI (JPEG, WEBP, PNG)"
+    )
+
+    change_threshold: float = Field(
+        default=0.01,
+        ge=0.0,
+        le=1.0,
+        description="区域被视为已变化所需的变化图块比例 | Fraction of changed tiles required for a region to count as changed"
+    )
+
+    change_tile_size: int = Field(
+        default=32,
+        ge=4,
+        le=512,
+        description="变化检测的图块边长（像素） | Tile edge length (pixels) used for change detection"
+    )
+
+    change_row_step: int = Field(
+        default=2,
+        ge=1,
+        le=32,
+        description="变化检测时每隔多少行采样一行 | Sample every Nth pixel row during change detection"
+    )
+
+    change_quantize_bits: int = Field(
+        default=2,
+        ge=0,
+        le=7,
+        description="比较前丢弃的颜色低位数，用于忽略细微噪声 | Low colour bits dropped before comparison, to ignore minor noise"
+    )
+
+
+class Settings(BaseModel):
+    """
+    应用程序总体设置。
+    Overall application settings.
+    """
+
+    ai: AISettings = Field(default_factory=AISettings)
+    ui: UISettings = Field(default_factory=UISettings)
+    capture: CaptureSettings = Field(default_factory=CaptureSettings)
+
+    saved_regions: Dict[str, Region] = Field(
+        default_factory=dict,
+        description="保存的屏幕区域 | Saved screen regions"
+    )
+
+    startup_with_system: bool = Field(
+        default=False,
+        description="是否在系统启动时自动启动应用 | Whether to start the application automatically with the system"
+    )
+
+    update_check: bool = Field(
+        default=True,
+        description="是否自动检查更新 | Whether to automatically check for updates"
+    )
@@ -20,232 +20,232 @@ VisionDesk main window module.
 This module defines the main window interface of the application.
 """
 
-# import logging
-# from typing import Optional
-#
-# from PySide6.QtCore import Qt, Slot
-# from PySide6.QtGui import QAction, QIcon
-# from PySide6.QtWidgets import (
-#     QMainWindow, QMenuBar, QMenu, QStatusBar,
-#     QSystemTrayIcon, QWidget, QVBoxLayout
-# )
-#
-# from visiondesk.core.config import Config
-# from visiondesk.ui.shortcuts.shortcut_manager import ShortcutManager
-#
-#
-# class MainWindow(QMainWindow):
-#     """
-#     应用程序的主窗口。
-#     Main window of the application.
-#
-#     提供应用程序的主用户界面，包括菜单栏、工具栏和状态栏。
-#     Provides the main user interface of the application, including menu bar, toolbar, and status bar.
-#     """
-#
-#     def __init__(self, config: Config, parent: Optional[QWidget] = None):
-#         """
-#         初始化主窗口。
-#         Initialize the main window.
-#
-#         参数:
-#             config: 应用程序配置对象
-#             parent: 父窗口小部件
-#
-#         Parameters:
-#             config: Application configuration object
-#             parent: Parent widget
-#         """
-#         super().__init__(parent)
-#
-#         self.logger = logging.getLogger(__name__)
-#         self.logger.info("初始化主窗口 | Initializing main window")
-#
-#         self.config = config
-#         self.shortcut_manager = ShortcutManager(self)
-#
-#         self._setup_ui()
-#         self._setup_tray_icon()
-#         self._setup_shortcuts()
-#
-#     def _setup_ui(self) -> None:
-#         """
-#         设置用户界面组件。
-#         Set up the user interface components.
-#         """
-#         # 设置窗口属性
-#         # Set window properties
-#         self.setWindowTitle("VisionDesk")
-#         self.resize(800, 600)
-#
-#         # 创建中央小部件
-#         # Create central widget
-#         central_widget = QWidget()
-#         self.setCentralWidget(central_widget)
-#
-#         # 创建主布局
-#         # Create main layout
-#         main_layout = QVBoxLayout(central_widget)
-#         central_widget.setLayout(main_layout)
-#
-#         # 创建菜单
-#         # Create menus
-#         self._create_menus()
-#
-#         # 创建状态栏
-#         # Create status bar
-#         status_bar = QStatusBar(self)
-#         self.setStatusBar(status_bar)
-#         status_bar.showMessage("就绪 | Ready", 3000)
-#
-#     def _create_menus(self) -> None:
-#         """
-#         创建应用程序菜单。
-#         Create application menus.
-#         """
-#         # 主菜单
-#         # Main menu
-#         menu_bar = self.menuBar()
-#
-#         # 文件菜单
-#         # File menu
-#         file_menu = menu_bar.addMenu("文件(&F) | File")
-#
-#         capture_action = QAction("捕获屏幕(&C) | Capture Screen", self)
-#         capture_action.setShortcut("Ctrl+C")
-#         capture_action.triggered.connect(self._on_capture_screen)
-#         file_menu.addAction(capture_action)
-#
-#         file_menu.addSeparator()
-#
-#         exit_action = QAction("退出(&X) | Exit", self)
-#         exit_action.setShortcut("Alt+F4")
-#         exit_action.triggered.connect(self.close)
-#         file_menu.addAction(exit_action)
-#
-#         # 设置菜单
-#         # Settings menu
-#         settings_menu = menu_bar.addMenu("设置(&S) | Settings")
-#
-#         preferences_action = QAction("首选项(&P) | Preferences", self)
-#         preferences_action.triggered.connect(self._on_preferences)
-#         settings_menu.addAction(preferences_action)
-#
-#         # 帮助菜单
-#         # Help menu
-#         help_menu = menu_bar.addMenu("帮助(&H) | Help")
-#
-#         about_action = QAction("关于(&A) | About", self)
-#         about_action.triggered.connect(self._on_about)
-#         help_menu.addAction(about_action)
-#
-#     def _setup_tray_icon(self) -> None:
-#         """
-#         设置系统托盘图标。
-#         Set up system tray icon.
-#         """
-#         # 创建托盘图标
-#         # Create tray icon
-#         self.tray_icon = QSystemTrayIcon(self)
-#         self.tray_icon.setToolTip("VisionDesk")
-#
-#         # 创建托盘图标的上下文菜单
-#         # Create context menu for tray icon
-#         tray_menu = QMenu()
-#
-#         show_action = QAction("显示(&S) | Show", self)
-#         show_action.triggered.connect(self.show)
-#         tray_menu.addAction(show_action)
-#
-#         tray_menu.addSeparator()
-#
-#         exit_action = QAction("退出(&X) | Exit", self)
-#         exit_action.triggered.connect(self._on_exit)
-#         tray_menu.addAction(exit_action)
-#
-#         # 设置托盘图标的上下文菜单
-#         # Set context menu for tray icon
-#         self.tray_icon.setContextMenu(tray_menu)
-#
-#         # 显示托盘图标
-#         # Show tray icon
-#         self.tray_icon.show()
-#
-#     def _setup_shortcuts(self) -> None:
-#         """
-#         设置全局快捷键。
-#         Set up global shortcuts.
-#         """
-#         # 注册全局快捷键
-#         # Register global shortcuts
-#         self.shortcut_manager.register_shortcut(
-#             "capture_screen",
-#             "Ctrl+Alt+C",
-#             self._on_capture_screen
-#         )
-#
-#     def closeEvent(self, event) -> None:
-#         """
-#         处理窗口关闭事件。
-#         Handle window close event.
-#
-#         当用户尝试关闭窗口时，将窗口最小化到托盘而不是关闭应用程序。
-#         When user tries to close the window, minimize to tray instead of closing the application.
-#         """
-#         event.ignore()
-#         self.hide()
-#         self.tray_icon.showMessage(
-#             "VisionDesk",
-#             "应用程序正在后台运行。单击此图标以显示主窗口。\n"
-#             "Application is running in the background. Click this icon to show the main window.",
-#             QSystemTrayIcon.Information,
-#             2000
-#         )
-#
-#     @Slot()
-#     def _on_capture_screen(self) -> None:
-#         """
-#         处理屏幕捕获操作。
-#         Handle screen capture operation.
-#         """
-#         self.logger.info("触发屏幕捕获 | Screen capture triggered")
-#         # TODO: 实现屏幕捕获功能
-#         # TODO: Implement screen capture functionality
-#         self.statusBar().showMessage("屏幕捕获功能尚未实现 | Screen capture functionality not yet implemented", 3000)
-#
-#     @Slot()
-#     def _on_preferences(self) -> None:
-#         """
-#         显示首选项对话框。
-#         Show preferences dialog.
-#         """
-#         self.logger.info("打开首选项对话框 | Opening preferences dialog")
-#         # TODO: 实现首选项对话框
-#         # TODO: Implement preferences dialog
-#         self.statusBar().showMessage("首选项对话框尚未实现 | Preferences dialog not yet implemented", 3000)
-#
-#     @Slot()
-#     def _on_about(self) -> None:
-#         """
-#         显示关于对话框。
-#         Show about dialog.
-#         """
-#         self.logger.info("打开关于对话框 | Opening about dialog")
-#         # TODO: 实现关于对话框
-#         # TODO: Implement about dialog
-#         self.statusBar().showMessage("关于对话框尚未实现 | About dialog not yet implemented", 3000)
-#
-#     @Slot()
-#     def _on_exit(self) -> None:
-#         """
-#         退出应用程序。
-#         Exit the application.
-#         """
-#         self.logger.info("退出应用程序 | Exiting application")
-#         # 确保保存配置
-#         # Ensure configuration is saved
-#         self.config.save()
-#
-#         # 退出应用程序
-#         # Exit application
-#         QApplication.quit()
+import logging
+from typing import Optional
+
+from PySide6.QtCore import Slot
+from PySide6.QtGui import QAction, QCloseEvent
+from PySide6.QtWidgets import (
+    QApplication, QMainWindow, QMenu, QStatusBar,
+    QSystemTrayIcon, QWidget, QVBoxLayout
+)
+
+from visiondesk.core.config import Config
+from visiondesk.ui.shortcuts.shortcut_manager import ShortcutManager
+
+
+class MainWindow(QMainWindow):
+    """
+    应用程序的主窗口。
+    Main window of the application.
+
+    提供应用程序的主用户界面，包括菜单栏、工具栏和状态栏。
+    Provides the main user interface of the application, including menu bar, toolbar, and status bar.
+    """
+
+    def __init__(self, config: Config, parent: Optional[QWidget] = None):
+        """
+        初始化主窗口。
+        Initialize the main window.
+
+        参数:
+            config: 应用程序配置对象
+            parent: 父窗口小部件
+
+        Parameters:
+            config: Application configuration object
+            parent: Parent widget
+        """
+        super().__init__(parent)
+
+        self.logger = logging.getLogger(__name__)
+        self.logger.info("初始化主窗口 | Initializing main window")
+
+        self.config = config
+        self.shortcut_manager = ShortcutManager(self)
+
+        self._setup_ui()
+        self._setup_tray_icon()
+        self._setup_shortcuts()
+
+    def _setup_ui(self) -> None:
+        """
+        设置用户界面组件。
+        Set up the user interface components.
+        """
+        # 设置窗口属性
+        # Set window properties
+        self.setWindowTitle("VisionDesk")
+        self.resize(800, 600)
+
+        # 创建中央小部件
+        # Create central widget
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+
+        # 创建主布局
+        # Create main layout
+        main_layout = QVBoxLayout(central_widget)
+        central_widget.setLayout(main_layout)
+
+        # 创建菜单
+        # Create menus
+        self._create_menus()
+
+        # 创建状态栏
+        # Create status bar
+        status_bar = QStatusBar(self)
+        self.setStatusBar(status_bar)
+        status_bar.showMessage("就绪 | Ready", 3000)
+
+    def _create_menus(self) -> None:
+        """
+        创建应用程序菜单。
+        Create application menus.
+        """
+        # 主菜单
+        # Main menu
+        menu_bar = self.menuBar()
+
+        # 文件菜单
+        # File menu
+        file_menu = menu_bar.addMenu("文件(&F) | File")
+
+        capture_action = QAction("捕获屏幕(&C) | Capture Screen", self)
+        capture_action.setShortcut("Ctrl+C")
+        capture_action.triggered.connect(self._on_capture_screen)
+        file_menu.addAction(capture_action)
+
+        file_menu.addSeparator()
+
+        exit_action = QAction("退出(&X) | Exit", self)
+        exit_action.setShortcut("Alt+F4")
+        exit_action.triggered.connect(self.close)
+        file_menu.addAction(exit_action)
+
+        # 设置菜单
+        # Settings menu
+        settings_menu = menu_bar.addMenu("设置(&S) | Settings")
+
+        preferences_action = QAction("首选项(&P) | Preferences", self)
+        preferences_action.triggered.connect(self._on_preferences)
+        settings_menu.addAction(preferences_action)
+
+        # 帮助菜单
+        # Help menu
+        help_menu = menu_bar.addMenu("帮助(&H) | Help")
+
+        about_action = QAction("关于(&A) | About", self)
+        about_action.triggered.connect(self._on_about)
+        help_menu.addAction(about_action)
+
+    def _setup_tray_icon(self) -> None:
+        """
+        设置系统托盘图标。
+        Set up system tray icon.
+        """
+        # 创建托盘图标
+        # Create tray icon
+        self.tray_icon = QSystemTrayIcon(self)
+        self.tray_icon.setToolTip("VisionDesk")
+
+        # 创建托盘图标的上下文菜单
+        # Create context menu for tray icon
+        tray_menu = QMenu()
+
+        show_action = QAction("显示(&S) | Show", self)
+        show_action.triggered.connect(self.show)
+        tray_menu.addAction(show_action)
+
+        tray_menu.addSeparator()
+
+        exit_action = QAction("退出(&X) | Exit", self)
+        exit_action.triggered.connect(self._on_exit)
+        tray_menu.addAction(exit_action)
+
+        # 设置托盘图标的上下文菜单
+        # Set context menu for tray icon
+        self.tray_icon.setContextMenu(tray_menu)
+
+        # 显示托盘图标
+        # Show tray icon
+        self.tray_icon.show()
+
+    def _setup_shortcuts(self) -> None:
+        """
+        设置全局快捷键。
+        Set up global shortcuts.
+        """
+        # 注册全局快捷键
+        # Register global shortcuts
+        self.shortcut_manager.register_shortcut(
+            "capture_screen",
+            "Ctrl+Alt+C",
+            self._on_capture_screen
+        )
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        """
+        处理窗口关闭事件。
+        Handle window close event.
+
+        当用户尝试关闭窗口时，将窗口最小化到托盘而不是关闭应用程序。
+        When user tries to close the window, minimize to tray instead of closing the application.
+        """
+        event.ignore()
+        self.hide()
+        self.tray_icon.showMessage(
+            "VisionDesk",
+            "应用程序正在后台运行。单击此图标以显示主窗口。\n"
+            "Application is running in the background. Click this icon to show the main window.",
+            QSystemTrayIcon.Information,
+            2000
+        )
+
+    @Slot()
+    def _on_capture_screen(self) -> None:
+        """
+        处理屏幕捕获操作。
+        Handle screen capture operation.
+        """
+        self.logger.info("触发屏幕捕获 | Screen capture triggered")
+        # TODO: 实现屏幕捕获功能
+        # TODO: Implement screen capture functionality
+        self.statusBar().showMessage("屏幕捕获功能尚未实现 | Screen capture functionality not yet implemented", 3000)
+
+    @Slot()
+    def _on_preferences(self) -> None:
+        """
+        显示首选项对话框。
+        Show preferences dialog.
+        """
+        self.logger.info("打开首选项对话框 | Opening preferences dialog")
+        # TODO: 实现首选项对话框
+        # TODO: Implement preferences dialog
+        self.statusBar().showMessage("首选项对话框尚未实现 | Preferences dialog not yet implemented", 3000)
+
+    @Slot()
+    def _on_about(self) -> None:
+        """
+        显示关于对话框。
+        Show about dialog.
+        """
+        self.logger.info("打开关于对话框 | Opening about dialog")
+        # TODO: 实现关于对话框
+        # TODO: Implement about dialog
+        self.statusBar().showMessage("关于对话框尚未实现 | About dialog not yet implemented", 3000)
+
+    @Slot()
+    def _on_exit(self) -> None:
+        """
+        退出应用程序。
+        Exit the application.
+        """
+        self.logger.info("退出应用程序 | Exiting application")
+        # 确保保存配置
+        # Ensure configuration is saved
+        self.config.save()
+
+        # 退出应用程序
+        # Exit application
+        QApplication.quit()
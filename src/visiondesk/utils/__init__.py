@@ -22,6 +22,7 @@ This module contains various utility functions and helper classes used throughou
 
 from .logger import (
     setup_logging,
+    shutdown_logging,
     get_logger,
     log_step_start,
     log_step_complete,
@@ -31,11 +32,15 @@ from .logger import (
     log_network,
     log_ai,
     log_screenshot,
+    log_timed,
+    log_throttled,
+    log_sampled,
 )
 
 __all__ = [
     # 日志设置和获取函数
     "setup_logging",
+    "shutdown_logging",
     "get_logger",
 
     # 步骤日志函数
@@ -49,4 +54,11 @@ __all__ = [
     "log_network",
     "log_ai",
     "log_screenshot",
+
+    # 计时日志函数
+    "log_timed",
+
+    # 热循环日志函数
+    "log_throttled",
+    "log_sampled",
 ]
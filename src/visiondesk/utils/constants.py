@@ -41,3 +41,6 @@ from pathlib import Path
 # 定义日志目录
 LOGS_DIR = Path.home() / ".visiondesk" / "logs"
 
+# 定义缓存目录
+CACHE_DIR = Path.home() / ".visiondesk" / "cache"
+
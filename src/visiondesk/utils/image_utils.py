@@ -24,13 +24,833 @@ This module provides utility functions for image processing and manipulation.
 - convert_to_base64: 将图像转换为 base64 编码
 - enhance_image: 增强图像质量
 - crop_image: 裁剪图像
+- content_hash: 计算帧像素内容的精确哈希
+- estimate_image_tokens: 估算图像作为模型输入时消耗的令牌数
+- frame_to_image: 将 BGRA 帧转换为 PIL 图像
+- get_image_profile: 获取模型的图像分块与计费规则
+- plan_image_size: 根据模型规则选择目标分辨率
+- encode_image: 将图像编码为 JPEG/WebP/PNG
+- prepare_image: 从原始捕获缓冲区到编码图像的完整预处理流水线
+- pack_mosaic: 用货架式装箱把多个区域排列成带编号标签的拼图布局
+- build_mosaic: 按拼图布局把多个区域图像拼成一张带标签的图像
+- prepare_mosaic: 从区域帧到编码拼图的完整预处理流水线
+- iter_base64: 分块流式生成 base64 编码
+
+主要类:
+- ModelImageProfile: 视觉模型的图像缩放、分块和令牌计费规则
+- EncodedImage: 编码后的图像及其 base64 负载
+- MosaicTile: 拼图中单个区域的标签和位置
+- MosaicLayout: 拼图的尺寸和各区域的位置
 
 Main functions:
 - resize_image: Resize an image
 - convert_to_base64: Convert an image to base64 encoding
 - enhance_image: Enhance image quality
 - crop_image: Crop an image
+- content_hash: Compute an exact hash of a frame's pixel content
+- estimate_image_tokens: Estimate the tokens an image costs as model input
+- frame_to_image: Convert a BGRA frame to a PIL image
+- get_image_profile: Get the image tiling and billing rules of a model
+- plan_image_size: Choose the target resolution from the model's rules
+- encode_image: Encode an image as JPEG/WebP/PNG
+- prepare_image: Complete preprocessing pipeline from raw capture buffer to encoded image
+- pack_mosaic: Arrange several regions into mosaic layouts labelled with IDs, using shelf bin packing
+- build_mosaic: Tile several region images into one labelled image following a mosaic layout
+- prepare_mosaic: Complete preprocessing pipeline from region frames to an encoded mosaic
+- iter_base64: Produce base64 encoding as a chunked stream
+
+Main classes:
+- ModelImageProfile: Image scaling, tiling and token billing rules of a vision model
+- EncodedImage: An encoded image and its base64 payload
+- MosaicTile: Label and position of a single region in a mosaic
+- MosaicLayout: Size of a mosaic and the positions of its regions
 """
 
-# TODO: 实现图像处理工具函数
-# TODO: Implement image processing utility functions
+import base64
+import hashlib
+import io
+import math
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    from PIL import Image, ImageFont
+
+    from visiondesk.core.services.screenshot_service import Frame
+
+
+class ModelImageProfile(NamedTuple):
+    """
+    视觉模型的图像缩放、分块和令牌计费规则。
+    Image scaling, tiling and token billing rules of a vision model.
+
+    模型会先把输入图像缩放到 max_edge 以内、短边不超过 short_edge，然后按 tile_size 像素的图块计费。
+    发送比这更大的图像只会增加上传字节数，不会提高精度。
+    The model first scales the input image to fit within max_edge with its short side at
+    most short_edge, then bills it per tile_size-pixel tile. Sending a larger image only adds
+    upload bytes, with no accuracy gain.
+    """
+
+    max_edge: int = 2048
+    short_edge: int = 768
+    tile_size: int = 512
+    tokens_per_tile: int = 170
+    base_tokens: int = 85
+
+    def model_scale(self, width: float, height: float) -> float:
+        """
+        返回模型自身会对图像应用的缩放比例（不放大）。
+        Return the scale the model itself applies to an image (never upscaling).
+        """
+        scale = min(1.0, self.max_edge / max(width, height))
+        short_side = min(width, height) * scale
+        if short_side > self.short_edge:
+            scale *= self.short_edge / short_side
+        return scale
+
+    def tiles_for(self, width: float, height: float) -> int:
+        """
+        返回给定尺寸（已按模型规则缩放）的图块数。
+        Return the tile count of the given (already model-scaled) size.
+        """
+        return math.ceil(round(width) / self.tile_size) * math.ceil(round(height) / self.tile_size)
+
+    def tokens_for(self, width: float, height: float) -> int:
+        """
+        返回给定尺寸（已按模型规则缩放）的令牌数。
+        Return the token count of the given (already model-scaled) size.
+        """
+        return self.base_tokens + self.tokens_per_tile * self.tiles_for(width, height)
+
+
+# 默认图像规则（OpenAI gpt-4o 高细节模式）
+# Default image rules (OpenAI gpt-4o high detail)
+DEFAULT_IMAGE_PROFILE = ModelImageProfile()
+
+# 模型名称前缀 -> 图像规则，按最长前缀匹配
+# Model name prefix -> image rules, matched by longest prefix
+IMAGE_PROFILES: Dict[str, ModelImageProfile] = {
+    "gpt-4o": DEFAULT_IMAGE_PROFILE,
+    "gpt-4o-mini": ModelImageProfile(tokens_per_tile=5667, base_tokens=2833),
+    "gpt-4.1": DEFAULT_IMAGE_PROFILE,
+}
+
+# 支持的编码格式 -> MIME 类型
+# Supported encoding formats -> MIME type
+IMAGE_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "PNG": "image/png",
+}
+
+# 流式 base64 编码时每块的输入字节数（3 的倍数，因此各块的编码可以直接拼接）
+# Input bytes per chunk of streaming base64 encoding (a multiple of 3, so the encoded chunks concatenate directly)
+BASE64_CHUNK_SIZE = 48 * 1024
+
+
+class EncodedImage:
+    """
+    编码后的图像。
+    An encoded image.
+
+    data 是编码后的文件内容（例如 JPEG），base64 负载直接从它计算，不会生成额外的中间副本。
+    data holds the encoded file content (e.g. JPEG); the base64 payload is computed straight
+    from it, without an extra intermediate copy.
+    """
+
+    __slots__ = ("data", "mime_type", "width", "height", "source_size")
+
+    def __init__(
+        self,
+        data: memoryview,
+        mime_type: str,
+        width: int,
+        height: int,
+        source_size: Optional[Tuple[int, int]] = None,
+    ):
+        """
+        初始化编码图像。
+        Initialize the encoded image.
+
+        参数:
+            data: 编码后的图像数据
+            mime_type: MIME 类型
+            width: 编码图像的宽度
+            height: 编码图像的高度
+            source_size: 缩放前的原始尺寸，None 表示与编码尺寸相同
+
+        Parameters:
+            data: Encoded image data
+            mime_type: MIME type
+            width: Width of the encoded image
+            height: Height of the encoded image
+            source_size: Original size before scaling, None if equal to the encoded size
+        """
+        self.data = data
+        self.mime_type = mime_type
+        self.width = width
+        self.height = height
+        self.source_size = source_size or (width, height)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """
+        返回编码图像的尺寸 (宽度, 高度)。
+        Return the size of the encoded image as (width, height).
+        """
+        return self.width, self.height
+
+    @property
+    def nbytes(self) -> int:
+        """
+        返回编码数据的字节数。
+        Return the number of bytes of encoded data.
+        """
+        return len(self.data)
+
+    def estimated_tokens(self, profile: Optional[ModelImageProfile] = None) -> int:
+        """
+        返回该图像作为模型输入时的预估令牌数。
+        Return the estimated token count of this image as model input.
+        """
+        return estimate_image_tokens(self.width, self.height, profile)
+
+    @property
+    def base64_length(self) -> int:
+        """
+        返回 base64 编码后的字节数（不实际编码）。
+        Return the number of bytes after base64 encoding (without encoding).
+        """
+        return 4 * ((len(self.data) + 2) // 3)
+
+    def base64(self) -> str:
+        """
+        返回 base64 编码的图像数据。
+        Return the base64-encoded image data.
+        """
+        return base64.b64encode(self.data).decode("ascii")
+
+    def iter_base64(self, chunk_size: int = BASE64_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        分块返回 base64 编码的图像数据，任何时刻只有一个编码块在内存中。
+        Yield the base64-encoded image data in chunks, with only one encoded chunk in memory at a time.
+        """
+        return iter_base64(self.data, chunk_size)
+
+    def data_url(self) -> str:
+        """
+        返回 data URL（data:<MIME>;base64,<数据>）。
+        Return the data URL (data:<mime>;base64,<data>).
+        """
+        return f"data:{self.mime_type};base64,{self.base64()}"
+
+    def __repr__(self) -> str:
+        return (
+            f"EncodedImage({self.mime_type}, {self.width}x{self.height} "
+            f"from {self.source_size[0]}x{self.source_size[1]}, {self.nbytes} bytes)"
+        )
+
+
+def content_hash(frame: "Frame") -> int:
+    """
+    计算帧像素内容的精确哈希（128 位 BLAKE2b，包含尺寸）。
+    Compute an exact hash of a frame's pixel content (128-bit BLAKE2b, size included).
+
+    任何像素的变化（例如计数器或小号文字的变化）都会得到不同的哈希，与感知哈希不同，
+    因此适合作为响应缓存的键。像素直接从帧的缓冲区读取，不生成副本。
+    Any pixel change (such as a counter or small text changing) gives a different hash,
+    unlike a perceptual hash, which makes it suitable as a response cache key. Pixels are read straight
+    from the frame's buffer, without a copy.
+
+    参数:
+        frame: BGRA 帧
+
+    返回:
+        以整数表示的哈希值
+
+    Parameters:
+        frame: BGRA frame
+
+    Returns:
+        Hash value as an integer
+    """
+    digest = hashlib.blake2b(f"{frame.width}x{frame.height}".encode("ascii"), digest_size=16)
+    row_bytes = frame.width * 4
+    if frame.stride == row_bytes:
+        digest.update(frame.buffer[frame.offset:frame.offset + row_bytes * frame.height])
+    else:
+        for y in range(frame.height):
+            digest.update(frame.row(y))
+    return int.from_bytes(digest.digest(), "big")
+
+
+def estimate_image_tokens(width: int, height: int, profile: Optional["ModelImageProfile"] = None) -> int:
+    """
+    估算图像作为视觉模型输入时消耗的令牌数（默认使用 OpenAI 高细节模式规则）。
+    Estimate the tokens an image costs as vision model input (OpenAI high-detail rules by default).
+
+    图像先缩放到 2048 x 2048 以内，再将短边缩放到 768 以内，之后按 512 像素图块计费：
+    每个图块 170 个令牌，另加 85 个基础令牌。
+    The image is first scaled to fit within 2048 x 2048, then its short side is scaled to at
+    most 768, and it is then billed per 512-pixel tile: 170 tokens per tile plus 85 base tokens.
+
+    参数:
+        width: 图像宽度
+        height: 图像高度
+        profile: 模型的图像规则，None 表示默认规则
+
+    返回:
+        预估令牌数
+
+    Parameters:
+        width: Image width
+        height: Image height
+        profile: Image rules of the model, None for the default rules
+
+    Returns:
+        Estimated token count
+    """
+    profile = profile or DEFAULT_IMAGE_PROFILE
+    scale = profile.model_scale(width, height)
+    return profile.tokens_for(width * scale, height * scale)
+
+
+def frame_to_image(frame: "Frame") -> "Image.Image":
+    """
+    将 BGRA 帧转换为 RGB 格式的 PIL 图像。
+    Convert a BGRA frame to an RGB PIL image.
+
+    像素直接从帧的缓冲区解码（按行跨度读取），不会先生成中间的连续副本。
+    Pixels are decoded straight from the frame's buffer (honouring its row stride), without
+    an intermediate contiguous copy.
+
+    参数:
+        frame: BGRA 帧
+
+    返回:
+        RGB 模式的 PIL 图像
+
+    Parameters:
+        frame: BGRA frame
+
+    Returns:
+        PIL image in RGB mode
+    """
+    from PIL import Image
+
+    end = frame.offset + frame.stride * frame.height
+    data: Union[memoryview, bytes]
+    if end <= len(frame.buffer):
+        data, stride = frame.buffer[frame.offset:end], frame.stride
+    else:
+        # 帧位于共享缓冲区末尾，最后一行没有完整的行跨度
+        # The frame ends the shared buffer, so its last row lacks a full stride
+        data, stride = frame.tobytes(), frame.width * 4
+    # Pillow 接受任意缓冲区对象，但类型存根只声明了 bytes / Pillow accepts any buffer, though its stubs only declare bytes
+    return Image.frombuffer("RGB", frame.size, data, "raw", "BGRX", stride, 1)  # type: ignore[arg-type]
+
+
+def get_image_profile(model: str) -> ModelImageProfile:
+    """
+    获取模型的图像规则（按最长模型名前缀匹配，未知模型使用默认规则）。
+    Get the image rules of a model (longest model-name prefix match; unknown models get the
+    default rules).
+
+    参数:
+        model: 模型名称
+
+    返回:
+        模型的图像规则
+
+    Parameters:
+        model: Model name
+
+    Returns:
+        Image rules of the model
+    """
+    matches = [prefix for prefix in IMAGE_PROFILES if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_IMAGE_PROFILE
+    return IMAGE_PROFILES[max(matches, key=len)]
+
+
+def plan_image_size(
+    width: int,
+    height: int,
+    profile: Optional[ModelImageProfile] = None,
+    max_tokens: Optional[int] = None,
+    snap_tolerance: float = 0.1,
+) -> Tuple[int, int]:
+    """
+    根据模型的分块和令牌规则选择目标分辨率。
+    Choose the target resolution from the model's tiling and token rules.
+
+    首先应用模型自身的缩放（模型会丢弃超出的分辨率）。如果略微缩小（不超过 snap_tolerance）
+    就能少占一行或一列图块，则吸附到图块边界。如果给出 max_tokens，则继续按图块边界缩小，
+    直到预估令牌数不超过该预算（最少保留一个图块）。
+    The model's own scaling is applied first (the model discards any resolution beyond it).
+    If shrinking slightly (by at most snap_tolerance) saves a row or column of tiles, the
+    size snaps to the tile boundary. When max_tokens is given, the size keeps shrinking tile
+    boundary by tile boundary until the estimated tokens fit the budget (keeping at least one tile).
+
+    参数:
+        width: 原始宽度
+        height: 原始高度
+        profile: 模型的图像规则，None 表示默认规则
+        max_tokens: 图像令牌预算，None 表示不限制
+        snap_tolerance: 为吸附到图块边界允许额外缩小的比例
+
+    返回:
+        目标尺寸 (宽度, 高度)
+
+    Parameters:
+        width: Original width
+        height: Original height
+        profile: Image rules of the model, None for the default rules
+        max_tokens: Image token budget, None for no limit
+        snap_tolerance: Extra shrink ratio allowed in order to snap to a tile boundary
+
+    Returns:
+        Target size as (width, height)
+    """
+    profile = profile or DEFAULT_IMAGE_PROFILE
+    tile = profile.tile_size
+
+    def next_boundary(scale: float) -> Optional[float]:
+        # 小于当前比例、且使某一边恰好减少一个图块的最大比例
+        # Largest scale below the current one at which one side drops exactly one tile
+        candidates = []
+        for side in (width, height):
+            tiles = math.ceil(round(side * scale) / tile)
+            if tiles > 1:
+                candidates.append((tiles - 1) * tile / side)
+        return max(candidates) if candidates else None
+
+    scale = profile.model_scale(width, height)
+    snapped = next_boundary(scale)
+    if snapped is not None and snapped >= scale * (1 - snap_tolerance):
+        scale = snapped
+
+    if max_tokens is not None:
+        while profile.tokens_for(width * scale, height * scale) > max_tokens:
+            snapped = next_boundary(scale)
+            if snapped is None:
+                break
+            scale = snapped
+
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def resize_image(image: "Image.Image", size: Tuple[int, int]) -> "Image.Image":
+    """
+    使用快速滤波器调整图像大小。
+    Resize an image with a fast filter.
+
+    大幅缩小时先用整数倍的盒式缩减（reducing_gap）再进行双线性插值，速度接近最近邻，
+    而文本的清晰度与高质量滤波器相当。
+    Large downscales first apply an integer box reduction (reducing_gap) and then bilinear
+    interpolation, which runs close to nearest-neighbour speed while keeping text about as
+    legible as a high-quality filter.
+
+    参数:
+        image: 要调整的图像
+        size: 目标尺寸 (宽度, 高度)
+
+    返回:
+        调整后的图像（尺寸不变时返回原图像）
+
+    Parameters:
+        image: Image to resize
+        size: Target size as (width, height)
+
+    Returns:
+        The resized image (the original image if the size is unchanged)
+    """
+    from PIL import Image
+
+    if image.size == tuple(size):
+        return image
+    return image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+
+def enhance_image(image: "Image.Image", sharpness: float = 1.0, contrast: float = 1.0) -> "Image.Image":
+    """
+    增强图像质量（锐度和对比度），例如在大幅缩小后让文字更清晰。
+    Enhance image quality (sharpness and contrast), e.g. to keep text crisp after a large downscale.
+
+    参数:
+        image: 要增强的图像
+        sharpness: 锐度系数，1.0 表示不变
+        contrast: 对比度系数，1.0 表示不变
+
+    返回:
+        增强后的图像
+
+    Parameters:
+        image: Image to enhance
+        sharpness: Sharpness factor, 1.0 leaves it unchanged
+        contrast: Contrast factor, 1.0 leaves it unchanged
+
+    Returns:
+        The enhanced image
+    """
+    from PIL import ImageEnhance
+
+    if sharpness != 1.0:
+        image = ImageEnhance.Sharpness(image).enhance(sharpness)
+    if contrast != 1.0:
+        image = ImageEnhance.Contrast(image).enhance(contrast)
+    return image
+
+
+def encode_image(image: "Image.Image", image_format: str = "JPEG", quality: int = 85) -> memoryview:
+    """
+    将图像编码为 JPEG、WebP 或 PNG。
+    Encode an image as JPEG, WebP or PNG.
+
+    参数:
+        image: 要编码的图像
+        image_format: 图像格式（JPEG、WEBP、PNG）
+        quality: 有损格式的图像质量 (1-100)
+
+    返回:
+        编码后的数据（指向编码缓冲区的视图，不复制）
+
+    Parameters:
+        image: Image to encode
+        image_format: Image format (JPEG, WEBP, PNG)
+        quality: Image quality for lossy formats (1-100)
+
+    Returns:
+        The encoded data (a view of the encoding buffer, not a copy)
+    """
+    image_format = image_format.upper()
+    if image_format not in IMAGE_MIME_TYPES:
+        raise ValueError(f"不支持的图像格式: {image_format} | Unsupported image format: {image_format}")
+
+    if image_format == "JPEG":
+        options = {"quality": quality}
+    elif image_format == "WEBP":
+        options = {"quality": quality, "method": 2}
+    else:
+        # PNG 是无损的；较低的压缩级别编码速度快得多，体积只略大
+        # PNG is lossless; a low compression level encodes much faster for a slightly larger file
+        options = {"compress_level": 1}
+
+    output = io.BytesIO()
+    image.save(output, format=image_format, **options)
+    return output.getbuffer()
+
+
+def prepare_image(
+    frame: "Frame",
+    image_format: str = "JPEG",
+    quality: int = 85,
+    profile: Optional[ModelImageProfile] = None,
+    max_tokens: Optional[int] = None,
+) -> EncodedImage:
+    """
+    图像预处理流水线：原始捕获缓冲区 -> 按模型规则缩放 -> 编码。
+    Image preprocessing pipeline: raw capture buffer -> model-aware downscale -> encode.
+
+    参数:
+        frame: BGRA 帧
+        image_format: 图像格式（JPEG、WEBP、PNG）
+        quality: 有损格式的图像质量 (1-100)
+        profile: 模型的图像规则，None 表示默认规则
+        max_tokens: 图像令牌预算，None 表示不限制
+
+    返回:
+        编码后的图像
+
+    Parameters:
+        frame: BGRA frame
+        image_format: Image format (JPEG, WEBP, PNG)
+        quality: Image quality for lossy formats (1-100)
+        profile: Image rules of the model, None for the default rules
+        max_tokens: Image token budget, None for no limit
+
+    Returns:
+        The encoded image
+    """
+    target = plan_image_size(frame.width, frame.height, profile, max_tokens)
+    image = resize_image(frame_to_image(frame), target)
+    data = encode_image(image, image_format, quality)
+    return EncodedImage(data, IMAGE_MIME_TYPES[image_format.upper()], *image.size, source_size=frame.size)
+
+
+# 拼图单元格之间的间距，以及标签栏与文字之间的留白（像素）
+# Spacing between mosaic cells, and the margin around label text (pixels)
+MOSAIC_PADDING = 4
+MOSAIC_LABEL_MARGIN = 2
+# 拼图的背景色、标签栏颜色和标签文字颜色
+# Mosaic background, label bar and label text colours
+MOSAIC_BACKGROUND = (48, 48, 48)
+MOSAIC_LABEL_FILL = (0, 0, 0)
+MOSAIC_LABEL_TEXT = (255, 255, 0)
+
+
+class MosaicTile(NamedTuple):
+    """
+    拼图中单个区域的标签和位置（x、y 为区域图像的左上角，标签栏位于其正上方）。
+    Label and position of a single region in a mosaic (x and y are the top-left corner of the
+    region image; its label bar sits directly above it).
+
+    标签是简短的 ASCII 编号（例如 "R1"），而不是区域名称：默认的位图字体无法绘制中文等字符。
+    The label is a short ASCII ID (such as "R1") rather than the region name: the default
+    bitmap font cannot draw Chinese and other non-ASCII characters.
+    """
+
+    label: str
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+class MosaicLayout(NamedTuple):
+    """
+    拼图的尺寸和各区域的位置。
+    Size of a mosaic and the positions of its regions.
+    """
+
+    width: int
+    height: int
+    tiles: List[MosaicTile]
+
+
+@lru_cache(maxsize=1)
+def _label_font() -> "Union[ImageFont.ImageFont, ImageFont.FreeTypeFont]":
+    from PIL import ImageFont
+
+    return ImageFont.load_default()
+
+
+def _label_height() -> int:
+    return math.ceil(_label_font().getbbox("Ag")[3]) + 2 * MOSAIC_LABEL_MARGIN
+
+
+def pack_mosaic(
+    items: Sequence[Tuple[str, int, int]],
+    max_width: int = 2048,
+    max_height: int = 768,
+    tile_size: int = 512,
+) -> List[MosaicLayout]:
+    """
+    用货架式装箱（按高度递减的首次适应）把多个区域排列成一个或多个拼图布局。
+    Arrange several regions into one or more mosaic layouts with shelf bin packing (first fit
+    by decreasing height).
+
+    每个单元格由标签栏和其下方的区域图像组成，宽度至少能容纳标签文字。拼图的宽度取图块边长的
+    整数倍并尽量接近正方形，使拼图占用的图块尽量少；放不下的区域开启新的拼图。
+    默认的尺寸上限与模型自身的缩放规则一致（最长边 2048、短边 768），因此模型不会再缩小拼图。
+    超过上限的区域仍会被放入拼图，但该拼图会超出上限。
+    Each cell holds a label bar above the region image and is at least as wide as the label
+    text. The mosaic width is a multiple of the tile size chosen to keep the mosaic close to
+    square, so it covers as few tiles as possible; regions that do not fit open a new mosaic.
+    The default size limits match the model's own scaling rules (2048 on the long edge, 768
+    on the short edge), so the model never downscales the mosaic further. A region larger
+    than the limits is still placed, in a mosaic that exceeds them.
+
+    参数:
+        items: (标签, 宽度, 高度) 列表，标签必须唯一且只含 ASCII 字符
+        max_width: 拼图的最大宽度
+        max_height: 拼图的最大高度
+        tile_size: 模型的图块边长
+
+    返回:
+        拼图布局列表；每个布局中的区域按输入顺序排列
+
+    Parameters:
+        items: List of (label, width, height); labels must be unique and ASCII only
+        max_width: Maximum mosaic width
+        max_height: Maximum mosaic height
+        tile_size: Tile edge length of the model
+
+    Returns:
+        List of mosaic layouts; the regions within each layout are in input order
+    """
+    labels = [label for label, _, _ in items]
+    if len(set(labels)) != len(labels):
+        raise ValueError("拼图标签必须唯一 | Mosaic labels must be unique")
+    if not all(label.isascii() for label in labels):
+        raise ValueError("拼图标签只能包含 ASCII 字符 | Mosaic labels must be ASCII only")
+    if not items:
+        return []
+
+    font, label_height, pad = _label_font(), _label_height(), MOSAIC_PADDING
+    cells = [
+        (max(width, math.ceil(font.getlength(label)) + 2 * MOSAIC_LABEL_MARGIN), height + label_height)
+        for label, width, height in items
+    ]
+    area = sum((w + pad) * (h + pad) for w, h in cells)
+    widest = max(w for w, _ in cells) + 2 * pad
+    bin_width = max(widest, min(max_width, math.ceil(math.sqrt(area) / tile_size) * tile_size))
+
+    # 每个拼图: [货架列表, 已用高度]；每个货架: [y, 高度, 已用宽度, 成员列表]
+    # Each bin: [shelves, used height]; each shelf: [y, height, used width, members]
+    bins: List[list] = []
+    for i in sorted(range(len(items)), key=lambda i: -cells[i][1]):
+        w, h = cells[i]
+        placed = False
+        for shelves_and_height in bins:
+            for shelf in shelves_and_height[0]:
+                if h + pad <= shelf[1] and shelf[2] + w + pad <= bin_width:
+                    shelf[3].append((i, shelf[2], shelf[0]))
+                    shelf[2] += w + pad
+                    placed = True
+                    break
+            if placed:
+                break
+            if shelves_and_height[1] + h + pad <= max_height:
+                y = shelves_and_height[1]
+                shelves_and_height[0].append([y, h + pad, pad + w + pad, [(i, pad, y)]])
+                shelves_and_height[1] += h + pad
+                placed = True
+                break
+        if not placed:
+            bins.append([[[pad, h + pad, pad + w + pad, [(i, pad, pad)]]], pad + h + pad])
+
+    layouts = []
+    for shelves, height in bins:
+        placements = sorted(member for shelf in shelves for member in shelf[3])
+        tiles = [
+            MosaicTile(items[i][0], x, y + label_height, items[i][1], items[i][2])
+            for i, x, y in placements
+        ]
+        width = max(shelf[2] for shelf in shelves)
+        layouts.append(MosaicLayout(width, height, tiles))
+    return layouts
+
+
+def build_mosaic(layout: MosaicLayout, frames: Mapping[str, "Frame"]) -> "Image.Image":
+    """
+    按拼图布局把多个区域图像拼成一张带标签的 RGB 图像。
+    Tile several region images into one labelled RGB image following a mosaic layout.
+
+    参数:
+        layout: 由 pack_mosaic 生成的拼图布局
+        frames: 标签 -> 区域的 BGRA 帧
+
+    返回:
+        拼好的 PIL 图像
+
+    Parameters:
+        layout: Mosaic layout produced by pack_mosaic
+        frames: Label -> BGRA frame of the region
+
+    Returns:
+        The tiled PIL image
+    """
+    from PIL import Image, ImageDraw
+
+    mosaic = Image.new("RGB", (layout.width, layout.height), MOSAIC_BACKGROUND)
+    draw = ImageDraw.Draw(mosaic)
+    font, label_height = _label_font(), _label_height()
+    for tile in layout.tiles:
+        label_width = math.ceil(font.getlength(tile.label)) + 2 * MOSAIC_LABEL_MARGIN
+        top = tile.y - label_height
+        draw.rectangle(
+            (tile.x, top, tile.x + max(tile.width, label_width) - 1, tile.y - 1), fill=MOSAIC_LABEL_FILL
+        )
+        draw.text((tile.x + MOSAIC_LABEL_MARGIN, top + MOSAIC_LABEL_MARGIN), tile.label, fill=MOSAIC_LABEL_TEXT, font=font)
+        mosaic.paste(frame_to_image(frames[tile.label]), (tile.x, tile.y))
+    return mosaic
+
+
+def prepare_mosaic(
+    layout: MosaicLayout,
+    frames: Mapping[str, "Frame"],
+    image_format: str = "JPEG",
+    quality: int = 85,
+    profile: Optional[ModelImageProfile] = None,
+    max_tokens: Optional[int] = None,
+) -> EncodedImage:
+    """
+    拼图预处理流水线：区域帧 -> 带标签的拼图 -> 按模型规则缩放 -> 编码。
+    Mosaic preprocessing pipeline: region frames -> labelled mosaic -> model-aware downscale -> encode.
+
+    参数:
+        layout: 由 pack_mosaic 生成的拼图布局
+        frames: 标签 -> 区域的 BGRA 帧
+        image_format: 图像格式（JPEG、WEBP、PNG）
+        quality: 有损格式的图像质量 (1-100)
+        profile: 模型的图像规则，None 表示默认规则
+        max_tokens: 图像令牌预算，None 表示不限制
+
+    返回:
+        编码后的拼图
+
+    Parameters:
+        layout: Mosaic layout produced by pack_mosaic
+        frames: Label -> BGRA frame of the region
+        image_format: Image format (JPEG, WEBP, PNG)
+        quality: Image quality for lossy formats (1-100)
+        profile: Image rules of the model, None for the default rules
+        max_tokens: Image token budget, None for no limit
+
+    Returns:
+        The encoded mosaic
+    """
+    target = plan_image_size(layout.width, layout.height, profile, max_tokens)
+    image = resize_image(build_mosaic(layout, frames), target)
+    data = encode_image(image, image_format, quality)
+    return EncodedImage(
+        data, IMAGE_MIME_TYPES[image_format.upper()], *image.size, source_size=(layout.width, layout.height)
+    )
+
+
+def iter_base64(data: memoryview, chunk_size: int = BASE64_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    分块流式生成 base64 编码。
+    Produce base64 encoding as a chunked stream.
+
+    输入按 3 字节对齐切片（零复制视图），每块单独编码，因此各块直接拼接就是完整的 base64 编码，
+    无需同时持有完整的编码字符串。
+    The input is sliced at 3-byte-aligned boundaries (zero-copy views) and each slice is
+    encoded on its own, so the chunks concatenate into the complete base64 encoding without
+    ever holding the whole encoded string.
+
+    参数:
+        data: 要编码的数据
+        chunk_size: 每块的输入字节数（向下取整为 3 的倍数）
+
+    返回:
+        base64 编码块的迭代器
+
+    Parameters:
+        data: Data to encode
+        chunk_size: Input bytes per chunk (rounded down to a multiple of 3)
+
+    Returns:
+        Iterator of base64-encoded chunks
+    """
+    chunk_size = max(3, chunk_size - chunk_size % 3)
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield base64.b64encode(view[start:start + chunk_size])
+
+
+def convert_to_base64(frame: "Frame", image_format: str = "JPEG", quality: int = 85) -> str:
+    """
+    将帧预处理并编码为 base64 字符串。
+    Preprocess and encode a frame as a base64 string.
+
+    参数:
+        frame: BGRA 帧
+        image_format: 图像格式（JPEG、WEBP、PNG）
+        quality: 有损格式的图像质量 (1-100)
+
+    返回:
+        base64 编码的图像数据
+
+    Parameters:
+        frame: BGRA frame
+        image_format: Image format (JPEG, WEBP, PNG)
+        quality: Image quality for lossy formats (1-100)
+
+    Returns:
+        base64-encoded image data
+    """
+    return prepare_image(frame, image_format, quality).base64()
+
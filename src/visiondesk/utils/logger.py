@@ -20,6 +20,10 @@ Logging configuration and utilities for VisionDesk.
 This module provides a centralised logging setup with file rotation,
 console output, and different log levels for development and production.
 
+日志文件按天和按大小轮转，旧分段在后台线程中以 gzip 压缩，日志目录的总大小受 max_total_bytes 限制。
+Log files rotate at day boundaries and by size; old segments are gzip-compressed on a
+background thread, and the total size of the logs directory is capped by max_total_bytes.
+
 可用函数列表 (Available Functions):
 
 基础日志功能 (Basic Logging):
@@ -27,6 +31,21 @@ console output, and different log levels for development and production.
         获取日志记录器实例 / Get a logger instance
     - setup_logging(**kwargs) -> None
         配置日志系统 / Configure the logging system
+    - shutdown_logging() -> None
+        刷新并关闭日志处理器 / Flush and close the log handlers
+    - log_timed(logger, message, op, **fields)
+        记录一次操作的耗时和结构化字段 / Log the duration and structured fields of an operation
+
+热循环日志 (Hot-Loop Logging):
+    - log_throttled(logger, key, message, interval, ...)
+        每个键在每个时间间隔内最多记录一次 / Log at most once per interval per key
+    - log_sampled(logger, key, message, every, ...)
+        每个键每 N 次调用记录一次 / Log once every N calls per key
+
+    所有辅助函数在级别被禁用时都会立即返回，不创建 LogRecord。它们是线程安全的，
+    每个辅助函数只保留最近使用的 1024 个键的状态。
+    Every helper returns immediately when its level is disabled, without creating a LogRecord.
+    They are thread-safe, and each keeps state for only the 1024 most recently used keys.
 
 步骤日志 (Step Logging):
     - log_step_start(logger, message)
@@ -48,23 +67,66 @@ console output, and different log levels for development and production.
     - log_screenshot(logger, message)
         记录截图操作 / Log screenshot operation
 
+异步日志 (Async Logging):
+    setup_logging(async_logging=True) 时，日志调用只把记录放入有界队列，
+    格式化和文件/控制台写入都在后台监听线程中进行。
+    With setup_logging(async_logging=True), logging calls only put records on a bounded
+    queue; formatting and file/console writes happen on a background listener thread.
+
+延迟配置 (Lazy Configuration):
+    导入本模块没有副作用（不修改根日志器、不创建目录、不打开文件）。日志系统在显式调用
+    setup_logging() 时配置，或在第一次调用 get_logger() 或 log_* 辅助函数时以默认设置配置；
+    如果根日志器上已有处理器（宿主应用已自行配置日志），则保持不变。
+    Importing this module has no side effects (the root logger is not touched, no directories
+    are created, no files opened). Logging is configured when setup_logging() is called
+    explicitly, or with the default settings on the first call to get_logger() or a log_*
+    helper; if the root logger already has handlers (the host application configured
+    logging itself), it is left as is.
+
+结构化日志 (Structured Logging):
+    setup_logging(file_format="json") 时，日志文件为 JSON Lines 格式，每条记录包含操作类型 (op)
+    以及可选的 duration_ms、region、payload_bytes、tokens 字段（失败时还有 outcome 和 error），
+    便于分析工具直接读取。
+    With setup_logging(file_format="json"), the log file is JSON Lines: every record carries
+    the operation type (op) plus the optional duration_ms, region, payload_bytes and tokens
+    fields (and outcome and error on failure), for analysis tooling to read directly.
+
+日志过滤 (Log Filtering):
+    setup_logging(dedup_window=30) 将 30 秒内的相同消息折叠为一行 "又重复了 N 次" 的摘要；
+    setup_logging(sample_rates={"SCREENSHOT": 0.1}) 按 LogEmoji 操作类别只保留部分记录
+    (DedupFilter / SamplingFilter)。
+    setup_logging(dedup_window=30) collapses identical messages within 30 seconds into a
+    single "repeated N more times" line; setup_logging(sample_rates={"SCREENSHOT": 0.1}) keeps
+    only a fraction of the records of a LogEmoji operation category (DedupFilter / SamplingFilter).
+
 使用示例 (Usage Example):
     logger = get_logger(__name__)
     setup_logging(default_level="DEBUG", use_emoji=True)
     log_init(logger, "Starting application")
+    with log_timed(logger, "Analysed image", op="AI") as fields:
+        fields["tokens"] = 1234
 """
 
+import atexit
+import copy
+import gzip
+import json
 import logging
 import logging.handlers
+import os
+import queue
+import shutil
 import sys
-from typing import Optional, Dict, Any
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator, List
+from datetime import datetime, timedelta
+from pathlib import Path
 
 from .constants import LOGS_DIR
 
-# Create logs directory if it doesn't exist
-LOGS_DIR.mkdir(parents=True, exist_ok=True)
-
 
 class LogEmoji:
     """
@@ -112,6 +174,17 @@ class LogEmoji:
         }
         return level_map.get(level.upper(), '')
 
+    @classmethod
+    def category_of(cls, emoji: str) -> str:
+        """
+        Get the category name (e.g. "AI", "SCREENSHOT") of an emoji.
+        获取表情对应的类别名称（例如 "AI"、"SCREENSHOT"）。
+        """
+        for name, value in vars(cls).items():
+            if name.isupper() and value == emoji:
+                return name
+        return ''
+
 
 class VisionDeskFormatter(logging.Formatter):
     """
@@ -182,6 +255,506 @@ class VisionDeskFormatter(logging.Formatter):
         return result
 
 
+class JSONLinesFormatter(logging.Formatter):
+    """
+    Machine-readable formatter producing one JSON object per line.
+    机器可读的格式化器，每行输出一个 JSON 对象。
+
+    Besides timestamp, level, logger and message, the structured fields in FIELDS are
+    included whenever the record carries them (via log_step, log_timed or `extra`).
+    除时间戳、级别、日志名称和消息外，只要记录带有 FIELDS 中的结构化字段
+    （通过 log_step、log_timed 或 `extra`），就会一并输出。
+    """
+
+    FIELDS = (
+        "op", "duration_ms", "region", "payload_bytes", "tokens", "outcome", "error",
+        "suppressed", "sampled_every", "repeated",
+    )
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format the log record as a JSON line.
+        将日志记录格式化为一行 JSON。
+        """
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DedupFilter(logging.Filter):
+    """
+    Handler filter collapsing identical messages within a time window into one summary line.
+    处理器过滤器，将时间窗口内的相同消息折叠为一行摘要。
+
+    The first occurrence of a message passes; repeats within `window` seconds of it are
+    counted and suppressed. Once the window has expired, a single "repeated N more times"
+    record is written through the handler, carrying the count in its `repeated` field.
+    Records only count as identical when their structured fields in KEY_FIELDS match too.
+    Records with exception info and timed records (carrying `duration_ms`) are never
+    collapsed: every measurement is kept.
+    消息第一次出现时正常输出；在其后 `window` 秒内的重复消息只计数、不输出。窗口结束后，
+    通过处理器写入一条 "又重复了 N 次" 的记录，其 `repeated` 字段包含重复次数。
+    只有 KEY_FIELDS 中的结构化字段也相同时，记录才算相同。带异常信息的记录和计时记录
+    （带有 `duration_ms`）不会被折叠：每个测量值都会保留。
+    """
+
+    # Structured fields that distinguish otherwise identical messages / 区分相同消息的结构化字段
+    KEY_FIELDS = ("op", "region", "payload_bytes", "tokens", "outcome", "error")
+
+    _SUMMARY_MARKER = "_dedup_summary"
+
+    def __init__(self, handler: logging.Handler, window: float = 10.0, max_keys: int = 1024):
+        """
+        Initialise the filter for one handler.
+        为一个处理器初始化过滤器。
+
+        Args:
+            handler: Handler the summary records are written to / 写入摘要记录的处理器
+            window: Collapsing window in seconds / 折叠窗口（秒）
+            max_keys: Maximum number of distinct messages tracked / 跟踪的不同消息的最大数量
+        """
+        super().__init__()
+        self.handler = handler
+        self.window = window
+        self.max_keys = max_keys
+        # key -> [window start, suppressed count, last suppressed record]
+        # 键 -> [窗口开始时间, 被抑制的次数, 最后一条被抑制的记录]
+        self._entries: Dict[tuple, List[Any]] = {}
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Return whether the record should be written.
+        返回是否应写入该记录。
+        """
+        if (
+            record.exc_info
+            or record.exc_text
+            or getattr(record, self._SUMMARY_MARKER, False)
+            or getattr(record, "duration_ms", None) is not None
+        ):
+            return True
+
+        now = time.monotonic()
+        key = (record.name, record.levelno, record.getMessage()) + tuple(
+            getattr(record, field, None) for field in self.KEY_FIELDS
+        )
+        summaries: List[logging.LogRecord] = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                entry[2] = record
+                return False
+
+            if entry is not None:
+                del self._entries[key]
+                if entry[1]:
+                    summaries.append(self._summary(entry))
+            if now - self._last_sweep >= self.window:
+                summaries.extend(self._sweep(now))
+            if len(self._entries) >= self.max_keys:
+                # Evict the oldest window / 淘汰最早的窗口
+                oldest = next(iter(self._entries))
+                evicted = self._entries.pop(oldest)
+                if evicted[1]:
+                    summaries.append(self._summary(evicted))
+            self._entries[key] = [now, 0, None]
+
+        # Summaries are handled outside the lock / 在锁外处理摘要
+        for summary in summaries:
+            self.handler.handle(summary)
+        return True
+
+    def flush(self) -> None:
+        """
+        Write the summaries of all pending windows (called before the handler closes).
+        写入所有未结束窗口的摘要（在处理器关闭前调用）。
+        """
+        with self._lock:
+            summaries = [self._summary(entry) for entry in self._entries.values() if entry[1]]
+            self._entries.clear()
+        for summary in summaries:
+            self.handler.handle(summary)
+
+    def _sweep(self, now: float) -> List[logging.LogRecord]:
+        self._last_sweep = now
+        expired = [key for key, entry in self._entries.items() if now - entry[0] >= self.window]
+        summaries = []
+        for key in expired:
+            entry = self._entries.pop(key)
+            if entry[1]:
+                summaries.append(self._summary(entry))
+        return summaries
+
+    def _summary(self, entry: List[Any]) -> logging.LogRecord:
+        last: logging.LogRecord = entry[2]
+        count = entry[1]
+        summary = logging.makeLogRecord(last.__dict__)
+        summary.msg = f"{last.getMessage()} (repeated {count} more times / 又重复了 {count} 次)"
+        summary.args = ()
+        summary.repeated = count
+        setattr(summary, self._SUMMARY_MARKER, True)
+        return summary
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Filter keeping a fixed fraction of the records of each operation category.
+    按操作类别保留固定比例记录的过滤器。
+
+    Rates are keyed on the LogEmoji category carried in the record's `op` field (e.g.
+    {"SCREENSHOT": 0.1} keeps one screenshot record in ten). Sampling is deterministic and
+    only applies below WARNING; records without a rate pass unchanged. Kept records carry
+    the sampling period in their `sampled_every` field.
+    比例按记录 `op` 字段中的 LogEmoji 类别设置（例如 {"SCREENSHOT": 0.1} 表示每十条截图记录保留一条）。
+    采样是确定性的，且只作用于 WARNING 以下的级别；没有设置比例的记录原样通过。
+    被保留的记录的 `sampled_every` 字段包含采样周期。
+    """
+
+    _DECISION = "_sampling_decision"
+
+    def __init__(self, rates: Dict[str, float]):
+        """
+        Initialise the filter.
+        初始化过滤器。
+
+        Args:
+            rates: Fraction of records kept per category name or emoji, in [0, 1]
+                / 每个类别名称或表情保留的记录比例，取值范围 [0, 1]
+        """
+        super().__init__()
+        self.rates: Dict[str, float] = {}
+        for key, rate in rates.items():
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError(f"Sampling rate must be in [0, 1] / 采样比例必须在 [0, 1] 之间: {key}={rate}")
+            self.rates[LogEmoji.category_of(key) or key] = rate
+        # The first record of each category is kept / 每个类别的第一条记录总会被保留
+        self._credit: Dict[str, float] = {op: 1.0 - rate for op, rate in self.rates.items()}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Return whether the record should be kept.
+        返回是否应保留该记录。
+        """
+        if record.levelno >= logging.WARNING:
+            return True
+        op: Optional[str] = getattr(record, "op", None)
+        rate = self.rates.get(op) if op is not None else None
+        if op is None or rate is None:
+            return True
+        # The decision is stored on the record so that every handler agrees
+        # 决定保存在记录上，使所有处理器保持一致
+        stored: Optional[bool] = getattr(record, self._DECISION, None)
+        if stored is not None:
+            return stored
+
+        with self._lock:
+            credit = self._credit[op] + rate
+            decision = rate > 0 and credit >= 1.0
+            self._credit[op] = credit - 1.0 if decision else credit
+        setattr(record, self._DECISION, decision)
+        if decision and rate > 0 and getattr(record, "sampled_every", None) is None:
+            record.sampled_every = round(1 / rate)
+        return decision
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler for a bounded queue with a drop policy.
+    带丢弃策略的有界队列处理器。
+
+    Like the standard QueueHandler, the message is merged with its arguments and the
+    exception text is cached before enqueueing, so the record no longer refers to mutable
+    arguments or traceback frames. Line formatting happens on the listener thread, so the
+    emitting thread (e.g. the Qt GUI thread) does not pay for it.
+    与标准 QueueHandler 一样，入队前合并消息与参数并缓存异常文本，使记录不再引用可变参数或回溯帧。
+    行格式化在监听线程中进行，发出日志的线程（例如 Qt GUI 线程）无需为此付出开销。
+    """
+
+    DROP_NEW = "drop_new"
+    DROP_OLDEST = "drop_oldest"
+    BLOCK = "block"
+
+    # 仅用于缓存异常文本 / Only used to cache exception text
+    _exc_formatter = logging.Formatter()
+
+    def __init__(self, log_queue: queue.Queue, drop_policy: str = DROP_OLDEST, block_timeout: float = 1.0):
+        """
+        Initialise the queue handler.
+        初始化队列处理器。
+
+        Args:
+            log_queue: Bounded queue shared with the listener / 与监听器共享的有界队列
+            drop_policy: What to do when the queue is full: "drop_new", "drop_oldest" or "block"
+                / 队列已满时的处理方式："drop_new"、"drop_oldest" 或 "block"
+            block_timeout: Maximum wait in "block" mode before dropping (seconds)
+                / "block" 模式下丢弃前的最长等待时间（秒）
+        """
+        if drop_policy not in (self.DROP_NEW, self.DROP_OLDEST, self.BLOCK):
+            raise ValueError(f"Unknown drop policy / 未知的丢弃策略: {drop_policy}")
+        super().__init__(log_queue)
+        # 保留具体类型的引用，供 put/get 超时调用 / Concretely typed reference for put/get with timeouts
+        self._bounded_queue = log_queue
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Return a copy of the record that is safe to hand to another thread.
+        返回可安全交给其他线程的记录副本。
+
+        The message is merged with its arguments and the exception text is cached, then
+        `args` and `exc_info` are cleared. Structured fields from `extra` are kept.
+        合并消息与参数并缓存异常文本，然后清空 `args` 和 `exc_info`。`extra` 中的结构化字段保持不变。
+        """
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Enqueue a record, applying the drop policy when the queue is full.
+        将记录入队，队列已满时应用丢弃策略。
+        """
+        try:
+            if self.drop_policy == self.BLOCK:
+                self._bounded_queue.put(record, timeout=self.block_timeout)
+            else:
+                self._bounded_queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.drop_policy == self.DROP_OLDEST:
+            try:
+                self._bounded_queue.get_nowait()
+                self.dropped += 1
+                self._bounded_queue.put_nowait(record)
+                return
+            except (queue.Empty, queue.Full):
+                pass
+        self.dropped += 1
+
+
+class _VisionDeskQueueListener(logging.handlers.QueueListener):
+    """
+    Queue listener whose stop sentinel waits for room in a full bounded queue.
+    停止标记会等待有界队列腾出空间的队列监听器。
+    """
+
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler, respect_handler_level: bool = False):
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self._bounded_queue = log_queue
+
+    def enqueue_sentinel(self) -> None:
+        # 标准库的停止标记为 None / The standard library's stop sentinel is None
+        self._bounded_queue.put(None)
+
+
+class CompressingRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """
+    File handler rotating at day boundaries and at a size limit, with gzip-compressed segments.
+    在日期边界和大小上限处轮转、并以 gzip 压缩旧分段的文件处理器。
+
+    The active file is always named `<prefix>_<YYYYMMDD>.<extension>` for the current day.
+    On rollover it is renamed to `<prefix>_<YYYYMMDD>.<n>.<extension>`, and a background
+    thread compresses it to `.gz` and then deletes the oldest log files until the directory
+    is within `max_total_bytes`. At startup, uncompressed files left by previous runs are
+    compressed too, once they have been idle for IDLE_SECONDS.
+    活动文件始终以当天日期命名为 `<prefix>_<YYYYMMDD>.<extension>`。轮转时它被重命名为
+    `<prefix>_<YYYYMMDD>.<n>.<extension>`，后台线程将其压缩为 `.gz`，
+    然后删除最旧的日志文件，直到目录总大小不超过 `max_total_bytes`。
+    启动时，之前运行遗留的未压缩文件在闲置 IDLE_SECONDS 秒后也会被压缩。
+    """
+
+    _STOP = object()
+    # 启动时只压缩这么多秒内未被修改的遗留文件；更新的文件可能仍被另一个进程写入
+    # At startup, only leftover files unmodified for this many seconds are compressed; newer
+    # files may still be written by another process
+    IDLE_SECONDS = 300.0
+
+    def __init__(
+            self,
+            directory: Path,
+            prefix: str = "visiondesk",
+            extension: str = "log",
+            max_bytes: int = 10 * 1024 * 1024,
+            max_total_bytes: int = 200 * 1024 * 1024,
+            encoding: str = "utf-8"
+    ):
+        """
+        Initialise the handler and start its compression thread.
+        初始化处理器并启动其压缩线程。
+
+        Args:
+            directory: Log directory / 日志目录
+            prefix: Log file name prefix / 日志文件名前缀
+            extension: Log file extension / 日志文件扩展名
+            max_bytes: Size of a segment before it is rotated, 0 rotates daily only
+                / 分段轮转前的大小，0 表示只按天轮转
+            max_total_bytes: Cap on the total size of the log directory, 0 disables
+                / 日志目录总大小上限，0 表示禁用
+            encoding: File encoding / 文件编码
+        """
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.extension = extension
+        self.max_bytes = max_bytes
+        self.max_total_bytes = max_total_bytes
+        self._day = datetime.now().strftime("%Y%m%d")
+        self._next_rollover = self._next_midnight()
+        super().__init__(str(self._active_path(self._day)), "a", encoding=encoding)
+
+        self._jobs: queue.Queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run_jobs, name="visiondesk-log-compress", daemon=True)
+        self._worker.start()
+
+        # Compress files left uncompressed by previous runs, then apply the cap. Files modified
+        # recently may belong to another running instance and are left alone.
+        # 压缩之前运行遗留的未压缩文件，然后应用大小上限。最近被修改的文件可能属于另一个正在运行的实例，保持不动。
+        active = Path(self.baseFilename)
+        idle_before = time.time() - self.IDLE_SECONDS
+        for path in sorted(self.directory.glob(f"{self.prefix}_*.{self.extension}")):
+            try:
+                idle = path.stat().st_mtime < idle_before
+            except OSError:
+                continue
+            if path != active and idle:
+                self._jobs.put(path)
+        self._jobs.put(None)
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        """
+        Return whether the day has changed or the active file reached max_bytes.
+        返回日期是否已变化，或活动文件是否已达到 max_bytes。
+        """
+        if time.time() >= self._next_rollover:
+            return True
+        return self.max_bytes > 0 and self.stream is not None and self.stream.tell() >= self.max_bytes
+
+    def doRollover(self) -> None:
+        """
+        Rename the active file to a numbered segment, queue it for compression and open a new file.
+        将活动文件重命名为编号分段，排队等待压缩，并打开新文件。
+        """
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+        active = Path(self.baseFilename)
+        if active.exists() and active.stat().st_size > 0:
+            segment = self._segment_path(self._day)
+            os.replace(active, segment)
+            self._jobs.put(segment)
+
+        self._day = datetime.now().strftime("%Y%m%d")
+        self._next_rollover = self._next_midnight()
+        self.baseFilename = os.path.abspath(self._active_path(self._day))
+        self.stream = self._open()
+
+    def close(self) -> None:
+        """
+        Close the active file and wait for pending compression jobs.
+        关闭活动文件，并等待未完成的压缩任务。
+        """
+        super().close()
+        if self._worker.is_alive():
+            self._jobs.put(self._STOP)
+            self._worker.join()
+
+    def _active_path(self, day: str) -> Path:
+        return self.directory / f"{self.prefix}_{day}.{self.extension}"
+
+    def _segment_path(self, day: str) -> Path:
+        # Numbers are never reused, even after the cap deleted older segments
+        # 编号不会被重复使用，即使较旧的分段已被大小上限删除
+        n = 0
+        for path in self.directory.glob(f"{self.prefix}_{day}.*.{self.extension}*"):
+            number = path.name[len(f"{self.prefix}_{day}."):].split(".", 1)[0]
+            if number.isdigit():
+                n = max(n, int(number))
+        return self.directory / f"{self.prefix}_{day}.{n + 1}.{self.extension}"
+
+    @staticmethod
+    def _next_midnight() -> float:
+        tomorrow = datetime.now().date() + timedelta(days=1)
+        return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+
+    def _run_jobs(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is self._STOP:
+                return
+            try:
+                if job is not None:
+                    self._compress(job)
+                self._enforce_cap()
+            except OSError as e:
+                # Not logged, to avoid feeding back into this handler / 不记录日志，以免回流到此处理器
+                sys.stderr.write(f"Log rotation failed / 日志轮转失败: {e}\n")
+
+    @staticmethod
+    def _compress(path: Path) -> None:
+        if not path.exists():
+            return
+        target = path.with_name(path.name + ".gz")
+        temp = path.with_name(path.name + ".gz.tmp")
+        with open(path, "rb") as src, gzip.open(temp, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        # Keep the segment's age so the size cap deletes the oldest logs first
+        # 保留分段的时间，使大小上限先删除最旧的日志
+        shutil.copystat(path, temp)
+        os.replace(temp, target)
+        path.unlink()
+
+    def _enforce_cap(self) -> None:
+        if self.max_total_bytes <= 0:
+            return
+        files = []
+        total = 0
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.is_file():
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        # Delete the oldest log files first, never the active one / 先删除最旧的日志文件，从不删除活动文件
+        active = Path(self.baseFilename)
+        for _, size, path in sorted(files):
+            if total <= self.max_total_bytes:
+                break
+            if path == active or path.name.endswith(".tmp") or not path.name.startswith(f"{self.prefix}_"):
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+
 class VisionDeskLogger:
     """
     Main logger class for VisionDesk application.
@@ -192,6 +765,13 @@ class VisionDeskLogger:
     _default_level: str = "INFO"
     _file_logging_enabled: bool = True
     _console_logging_enabled: bool = True
+    _handlers: List[logging.Handler] = []
+    _queue_handler: Optional[BoundedQueueHandler] = None
+    _listener: Optional[logging.handlers.QueueListener] = None
+    _dedup_filters: List[DedupFilter] = []
+    _atexit_registered: bool = False
+    _configured: bool = False
+    _setup_lock = threading.RLock()
 
     @classmethod
     def setup_logging(
@@ -201,7 +781,15 @@ class VisionDeskLogger:
             console_logging: bool = True,
             use_emoji: bool = True,
             use_colors: bool = False,
-            log_file_prefix: str = "visiondesk"
+            log_file_prefix: str = "visiondesk",
+            file_format: str = "text",
+            async_logging: bool = False,
+            queue_size: int = 10000,
+            drop_policy: str = BoundedQueueHandler.DROP_OLDEST,
+            max_bytes: int = 10 * 1024 * 1024,
+            max_total_bytes: int = 200 * 1024 * 1024,
+            dedup_window: float = 0.0,
+            sample_rates: Optional[Dict[str, float]] = None
     ) -> None:
         """
         Set up global logging configuration.
@@ -214,7 +802,24 @@ class VisionDeskLogger:
             use_emoji: Use emojis in logs / 在日志中使用表情
             use_colors: Use colors in console / 在控制台使用颜色
             log_file_prefix: Log file name prefix / 日志文件名前缀
+            file_format: Log file format, "text" or "json" (JSON Lines) / 日志文件格式，"text" 或 "json"（JSON Lines）
+            async_logging: Format and write records on a background listener thread
+                / 在后台监听线程中格式化并写入日志记录
+            queue_size: Maximum number of queued records in async mode / 异步模式下队列中的最大记录数
+            drop_policy: Policy when the queue is full: "drop_new", "drop_oldest" or "block"
+                / 队列已满时的策略："drop_new"、"drop_oldest" 或 "block"
+            max_bytes: Size at which the log file is rotated / 日志文件轮转的大小
+            max_total_bytes: Cap on the total size of the logs directory, 0 disables
+                / 日志目录总大小上限，0 表示禁用
+            dedup_window: Collapse identical messages within this many seconds, 0 disables
+                / 在此秒数内折叠相同的消息，0 表示禁用
+            sample_rates: Fraction of records kept per operation category, e.g. {"SCREENSHOT": 0.1}
+                / 每个操作类别保留的记录比例，例如 {"SCREENSHOT": 0.1}
         """
+        # Flush and close the handlers of any previous configuration / 刷新并关闭之前配置的处理器
+        cls.shutdown()
+
+        cls._configured = True
         cls._default_level = default_level.upper()
         cls._file_logging_enabled = file_logging
         cls._console_logging_enabled = console_logging
@@ -224,25 +829,35 @@ class VisionDeskLogger:
         root_logger.setLevel(getattr(logging, cls._default_level, logging.INFO))
 
         # Clear existing handlers / 清除现有处理器
-        root_logger.handlers.clear()
+        # (a new list, since this may run while the root logger iterates its handlers)
+        # （使用新列表，因为此时根日志记录器可能正在遍历其处理器）
+        root_logger.handlers = []
+        handlers: List[logging.Handler] = []
 
-        # File handler with rotation / 带轮转的文件处理器
+        # File handler rotating daily and by size, with compressed segments
+        # 按天和按大小轮转、并压缩旧分段的文件处理器
         if file_logging:
-            log_file = LOGS_DIR / f"{log_file_prefix}_{datetime.now().strftime('%Y%m%d')}.log"
-            file_handler = logging.handlers.RotatingFileHandler(
-                log_file,
-                maxBytes=10 * 1024 * 1024,  # 10MB
-                backupCount=10,  # 最大轮转数 10 个文件
+            # Create logs directory if it doesn't exist / 如果日志目录不存在则创建
+            LOGS_DIR.mkdir(parents=True, exist_ok=True)
+            file_handler = CompressingRotatingFileHandler(
+                LOGS_DIR,
+                prefix=log_file_prefix,
+                extension="jsonl" if file_format == "json" else "log",
+                max_bytes=max_bytes,
+                max_total_bytes=max_total_bytes,
                 encoding='utf-8'
             )
-            file_formatter = VisionDeskFormatter(
-                fmt='[%(asctime)s] [%(name)s] %(levelname)s: %(message)s',
-                use_emoji=False,  # No emojis in file logs / 文件日志中不使用表情
-                use_colors=False
-            )
+            if file_format == "json":
+                file_formatter: logging.Formatter = JSONLinesFormatter()
+            else:
+                file_formatter = VisionDeskFormatter(
+                    fmt='[%(asctime)s] [%(name)s] %(levelname)s: %(message)s',
+                    use_emoji=False,  # No emojis in file logs / 文件日志中不使用表情
+                    use_colors=False
+                )
             file_handler.setFormatter(file_formatter)
             file_handler.setLevel(logging.DEBUG)  # Always log everything to file / 总是记录所有内容到文件
-            root_logger.addHandler(file_handler)
+            handlers.append(file_handler)
 
         # Console handler / 控制台处理器
         if console_logging:
@@ -253,13 +868,93 @@ class VisionDeskLogger:
             )
             console_handler.setFormatter(console_formatter)
             console_handler.setLevel(getattr(logging, cls._default_level, logging.INFO))
-            root_logger.addHandler(console_handler)
+            handlers.append(console_handler)
+
+        # Duplicates are collapsed per output handler (on the listener thread in async mode)
+        # 按输出处理器折叠重复消息（异步模式下在监听线程中进行）
+        if dedup_window > 0:
+            for handler in handlers:
+                dedup_filter = DedupFilter(handler, dedup_window)
+                handler.addFilter(dedup_filter)
+                cls._dedup_filters.append(dedup_filter)
+
+        cls._handlers = handlers
+        if async_logging:
+            # Records are queued here and handled on the listener thread / 记录在此入队，由监听线程处理
+            log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+            cls._queue_handler = BoundedQueueHandler(log_queue, drop_policy)
+            cls._listener = _VisionDeskQueueListener(log_queue, *handlers, respect_handler_level=True)
+            cls._listener.start()
+            root_logger.addHandler(cls._queue_handler)
+            entry_handlers: List[logging.Handler] = [cls._queue_handler]
+        else:
+            for handler in handlers:
+                root_logger.addHandler(handler)
+            entry_handlers = handlers
+
+        # Sampled-out records are discarded before they are queued or formatted
+        # 被采样丢弃的记录在入队或格式化之前就被丢弃
+        if sample_rates:
+            sampling_filter = SamplingFilter(sample_rates)
+            for handler in entry_handlers:
+                handler.filters.insert(0, sampling_filter)
+
+        if not cls._atexit_registered:
+            atexit.register(cls.shutdown)
+            cls._atexit_registered = True
+
+    @classmethod
+    def ensure_configured(cls) -> None:
+        """
+        Configure logging with the default settings unless it is already configured.
+        如果日志尚未配置，则使用默认设置进行配置。
+
+        Logging configured by the host application (handlers on the root logger) is left as is.
+        宿主应用已配置的日志（根日志器上已有处理器）保持不变。
+        """
+        with cls._setup_lock:
+            if cls._configured:
+                return
+            if logging.getLogger().handlers:
+                cls._configured = True
+                return
+            cls.setup_logging()
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        Flush queued records and close all handlers created by setup_logging.
+        刷新队列中的记录，并关闭 setup_logging 创建的所有处理器。
+        """
+        root_logger = logging.getLogger()
+        if cls._listener is not None:
+            # Stopping the listener processes every record still in the queue / 停止监听器会处理队列中剩余的所有记录
+            cls._listener.stop()
+            cls._listener = None
+        if cls._queue_handler is not None:
+            root_logger.removeHandler(cls._queue_handler)
+            if cls._queue_handler.dropped:
+                message = f"Dropped {cls._queue_handler.dropped} log records / 丢弃了 {cls._queue_handler.dropped} 条日志记录"
+                record = logging.LogRecord("visiondesk.logger", logging.WARNING, __file__, 0, message, (), None)
+                for handler in cls._handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            cls._queue_handler.close()
+            cls._queue_handler = None
+        for dedup_filter in cls._dedup_filters:
+            dedup_filter.flush()
+        cls._dedup_filters = []
+        for handler in cls._handlers:
+            root_logger.removeHandler(handler)
+            handler.flush()
+            handler.close()
+        cls._handlers = []
 
     @classmethod
     def get_logger(cls, name: str) -> logging.Logger:
         """
-        Get or create a logger instance.
-        获取或创建日志实例。
+        Get or create a logger instance, configuring logging with the defaults on first use.
+        获取或创建日志实例，首次使用时以默认设置配置日志。
 
         Args:
             name: Logger name (usually __name__) / 日志名称（通常是 __name__）
@@ -267,27 +962,48 @@ class VisionDeskLogger:
         Returns:
             Logger instance / 日志实例
         """
+        if not cls._configured:
+            cls.ensure_configured()
         if name not in cls._instances:
             logger = logging.getLogger(name)
             cls._instances[name] = logger
         return cls._instances[name]
 
     @classmethod
-    def log_step(cls, logger: logging.Logger, message: str, emoji: str = LogEmoji.STEP_START) -> None:
+    def log_step(
+            cls,
+            logger: logging.Logger,
+            message: str,
+            emoji: str = LogEmoji.STEP_START,
+            op: Optional[str] = None,
+            level: int = logging.INFO,
+            **fields: Any
+    ) -> None:
         """
-        Log a step with emoji.
-        使用表情记录步骤。
+        Log a step with emoji and optional structured fields.
+        使用表情和可选的结构化字段记录步骤。
 
         Args:
             logger: Logger instance / 日志实例
             message: Log message / 日志消息
             emoji: Emoji to use / 要使用的表情
+            op: Operation category, derived from the emoji when None / 操作类别，为 None 时根据表情推断
+            level: Log level / 日志级别
+            **fields: Structured fields such as duration_ms, region, payload_bytes, tokens
+                / 结构化字段，例如 duration_ms、region、payload_bytes、tokens
         """
+        # Fast path: no record is created when the level is disabled / 快速路径：级别被禁用时不创建记录
+        if not logger.isEnabledFor(level):
+            return
+        if not cls._configured:
+            cls.ensure_configured()
         record = logger.makeRecord(
-            logger.name, logging.INFO, "(custom)", 0,
+            logger.name, level, "(custom)", 0,
             message, (), None
         )
         record.emoji = emoji
+        record.op = op or LogEmoji.category_of(emoji)
+        record.__dict__.update(fields)
         logger.handle(record)
 
 
@@ -314,49 +1030,221 @@ def setup_logging(**kwargs) -> None:
     VisionDeskLogger.setup_logging(**kwargs)
 
 
+def shutdown_logging() -> None:
+    """
+    Flush and close the log handlers (also runs automatically at exit).
+    刷新并关闭日志处理器（退出时也会自动运行）。
+    """
+    VisionDeskLogger.shutdown()
+
+
 # Helper functions for logging with emojis / 带表情的日志辅助函数
-def log_step_start(logger: logging.Logger, message: str) -> None:
+def log_step_start(logger: logging.Logger, message: str, **fields: Any) -> None:
     """Log the start of a step. / 记录步骤开始。"""
-    VisionDeskLogger.log_step(logger, message, LogEmoji.STEP_START)
+    if logger.isEnabledFor(logging.INFO):
+        VisionDeskLogger.log_step(logger, message, LogEmoji.STEP_START, op="STEP_START", **fields)
 
 
-def log_step_complete(logger: logging.Logger, message: str) -> None:
+def log_step_complete(logger: logging.Logger, message: str, **fields: Any) -> None:
     """Log the completion of a step. / 记录步骤完成。"""
-    VisionDeskLogger.log_step(logger, message, LogEmoji.STEP_COMPLETE)
+    if logger.isEnabledFor(logging.INFO):
+        VisionDeskLogger.log_step(logger, message, LogEmoji.STEP_COMPLETE, op="STEP_COMPLETE", **fields)
 
 
-def log_phase_complete(logger: logging.Logger, message: str) -> None:
+def log_phase_complete(logger: logging.Logger, message: str, **fields: Any) -> None:
     """Log the completion of a phase. / 记录阶段完成。"""
-    VisionDeskLogger.log_step(logger, message, LogEmoji.PHASE_COMPLETE)
+    if logger.isEnabledFor(logging.INFO):
+        VisionDeskLogger.log_step(logger, message, LogEmoji.PHASE_COMPLETE, op="PHASE_COMPLETE", **fields)
 
 
-def log_init(logger: logging.Logger, message: str) -> None:
+def log_init(logger: logging.Logger, message: str, **fields: Any) -> None:
     """Log initialisation. / 记录初始化。"""
-    VisionDeskLogger.log_step(logger, message, LogEmoji.INIT)
+    if logger.isEnabledFor(logging.INFO):
+        VisionDeskLogger.log_step(logger, message, LogEmoji.INIT, op="INIT", **fields)
 
 
-def log_config(logger: logging.Logger, message: str) -> None:
+def log_config(logger: logging.Logger, message: str, **fields: Any) -> None:
     """Log configuration. / 记录配置。"""
-    VisionDeskLogger.log_step(logger, message, LogEmoji.CONFIG)
+    if logger.isEnabledFor(logging.INFO):
+        VisionDeskLogger.log_step(logger, message, LogEmoji.CONFIG, op="CONFIG", **fields)
 
 
-def log_network(logger: logging.Logger, message: str) -> None:
+def log_network(logger: logging.Logger, message: str, **fields: Any) -> None:
     """Log network operation. / 记录网络操作。"""
-    VisionDeskLogger.log_step(logger, message, LogEmoji.NETWORK)
+    if logger.isEnabledFor(logging.INFO):
+        VisionDeskLogger.log_step(logger, message, LogEmoji.NETWORK, op="NETWORK", **fields)
 
 
-def log_ai(logger: logging.Logger, message: str) -> None:
+def log_ai(logger: logging.Logger, message: str, **fields: Any) -> None:
     """Log AI operation. / 记录 AI 操作。"""
-    VisionDeskLogger.log_step(logger, message, LogEmoji.AI)
+    if logger.isEnabledFor(logging.INFO):
+        VisionDeskLogger.log_step(logger, message, LogEmoji.AI, op="AI", **fields)
 
 
-def log_screenshot(logger: logging.Logger, message: str) -> None:
+def log_screenshot(logger: logging.Logger, message: str, **fields: Any) -> None:
     """Log screenshot operation. / 记录截图操作。"""
-    VisionDeskLogger.log_step(logger, message, LogEmoji.SCREENSHOT)
+    if logger.isEnabledFor(logging.INFO):
+        VisionDeskLogger.log_step(logger, message, LogEmoji.SCREENSHOT, op="SCREENSHOT", **fields)
+
+
+@contextmanager
+def log_timed(
+        logger: logging.Logger,
+        message: str,
+        op: str = "STEP_COMPLETE",
+        level: int = logging.INFO,
+        **fields: Any
+) -> Iterator[Dict[str, Any]]:
+    """
+    Time the enclosed block and log it with its duration and structured fields.
+    为代码块计时，并连同耗时和结构化字段一起记录。
+
+    The yielded dict can be filled inside the block with fields only known at the end,
+    such as payload_bytes or tokens.
+    代码块内可以向返回的字典补充只有结束时才知道的字段，例如 payload_bytes 或 tokens。
+
+    If the block raises, the record is logged at ERROR (WARNING when the block was
+    cancelled or interrupted) instead of `level`, with `outcome` set to "error" or
+    "cancelled" and `error` describing the exception, and the exception propagates.
+    如果代码块抛出异常，则改为以 ERROR（代码块被取消或中断时为 WARNING）级别记录，
+    `outcome` 为 "error" 或 "cancelled"，`error` 描述该异常，异常照常向外传播。
+
+    Args:
+        logger: Logger instance / 日志实例
+        message: Log message / 日志消息
+        op: Operation category, a LogEmoji name such as "AI" or "SCREENSHOT"
+            / 操作类别，LogEmoji 中的名称，例如 "AI" 或 "SCREENSHOT"
+        level: Log level / 日志级别
+        **fields: Initial structured fields / 初始结构化字段
+
+    Yields:
+        Mutable dict of structured fields / 可修改的结构化字段字典
+    """
+    if not logger.isEnabledFor(level) and not logger.isEnabledFor(logging.WARNING):
+        yield fields
+        return
+
+    start = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        fields["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        if isinstance(e, Exception):
+            fields["outcome"] = "error"
+            emoji, failure_level = LogEmoji.ERROR, max(level, logging.ERROR)
+        else:
+            fields["outcome"] = "cancelled"
+            emoji, failure_level = LogEmoji.WARNING, max(level, logging.WARNING)
+        fields["error"] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        VisionDeskLogger.log_step(logger, message, emoji, op=op, level=failure_level, **fields)
+        raise
+    fields["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    emoji = getattr(LogEmoji, op, LogEmoji.STEP_COMPLETE)
+    VisionDeskLogger.log_step(logger, message, emoji, op=op, level=level, **fields)
+
+
+# State of the hot-loop helpers, keyed by caller-chosen keys / 热循环辅助函数的状态，按调用方选择的键索引
+# Keys often embed region names, so each map keeps only the most recently used keys
+# 键常包含区域名称，因此每个映射只保留最近使用的键
+_HOT_LOOP_MAX_KEYS = 1024
+_throttle_state: "OrderedDict[str, List[float]]" = OrderedDict()
+_sample_counters: "OrderedDict[str, int]" = OrderedDict()
+_hot_loop_lock = threading.Lock()
+
+
+def _remember(state: "OrderedDict[str, Any]", key: str, value: Any) -> None:
+    """
+    Store a value as the most recently used key, evicting the least recently used beyond the cap.
+    将值存为最近使用的键，超出上限时淘汰最久未使用的键。
+    """
+    state[key] = value
+    state.move_to_end(key)
+    if len(state) > _HOT_LOOP_MAX_KEYS:
+        state.popitem(last=False)
+
+
+def log_throttled(
+        logger: logging.Logger,
+        key: str,
+        message: str,
+        interval: float = 1.0,
+        emoji: str = LogEmoji.STEP_PROGRESS,
+        level: int = logging.INFO,
+        **fields: Any
+) -> bool:
+    """
+    Log at most once per interval for the given key; suppressed calls are counted.
+    对给定的键，每个时间间隔内最多记录一次；被抑制的调用会被计数。
+
+    The next emitted record carries the number of calls suppressed since the previous one
+    in its `suppressed` field.
+    下一条记录的 `suppressed` 字段包含自上一条记录以来被抑制的调用次数。
+
+    Args:
+        logger: Logger instance / 日志实例
+        key: Throttling key, e.g. "capture:<region>" / 限流键，例如 "capture:<区域>"
+        message: Log message / 日志消息
+        interval: Minimum seconds between records for the key / 同一键两条记录之间的最短间隔（秒）
+        emoji: Emoji to use / 要使用的表情
+        level: Log level / 日志级别
+        **fields: Structured fields / 结构化字段
+
+    Returns:
+        Whether a record was emitted / 是否记录了日志
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    now = time.monotonic()
+    with _hot_loop_lock:
+        state = _throttle_state.get(key)
+        if state is not None and now - state[0] < interval:
+            state[1] += 1
+            _throttle_state.move_to_end(key)
+            return False
+        suppressed = int(state[1]) if state is not None else 0
+        _remember(_throttle_state, key, [now, 0])
+    if suppressed:
+        fields["suppressed"] = suppressed
+    VisionDeskLogger.log_step(logger, message, emoji, level=level, **fields)
+    return True
+
+
+def log_sampled(
+        logger: logging.Logger,
+        key: str,
+        message: str,
+        every: int = 10,
+        emoji: str = LogEmoji.STEP_PROGRESS,
+        level: int = logging.INFO,
+        **fields: Any
+) -> bool:
+    """
+    Log one call out of every `every` calls for the given key (the first call is always logged).
+    对给定的键，每 `every` 次调用记录一次（第一次调用总会被记录）。
+
+    Args:
+        logger: Logger instance / 日志实例
+        key: Sampling key / 采样键
+        message: Log message / 日志消息
+        every: Sampling period / 采样周期
+        emoji: Emoji to use / 要使用的表情
+        level: Log level / 日志级别
+        **fields: Structured fields / 结构化字段
+
+    Returns:
+        Whether a record was emitted / 是否记录了日志
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    with _hot_loop_lock:
+        count = _sample_counters.get(key, 0)
+        _remember(_sample_counters, key, count + 1)
+    if count % every:
+        return False
+    VisionDeskLogger.log_step(logger, message, emoji, level=level, sampled_every=every, **fields)
+    return True
 
 
-# Initialise with default settings when module is imported / 导入模块时使用默认设置初始化
-VisionDeskLogger.setup_logging()
 # --- Example Usage / 使用示例 ---
 if __name__ == "__main__":
     import time
@@ -434,4 +1322,4 @@ if __name__ == "__main__":
     print("\n--- Console Output (expect no emojis/colors): ---")
     print("--- 控制台输出（期望无表情/颜色）：---")
     print("    (You should see plain text without any special characters or colors.)")
-    print("    (您应该看到纯文本，没有任何特殊字符或颜色。)\n")
\ No newline at end of file
+    print("    (您应该看到纯文本，没有任何特殊字符或颜色。)\n")
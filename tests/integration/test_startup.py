@@ -0,0 +1,99 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""启动开销的集成测试。 / Integration tests for the startup cost."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytestmark = pytest.mark.integration
+
+SRC_DIR = Path(__file__).resolve().parents[2] / "src"
+
+# 导入 visiondesk.utils 的时间预算（秒），在子进程内测量，不含解释器自身的启动时间
+# Time budget (seconds) for importing visiondesk.utils, measured inside the subprocess,
+# excluding the interpreter's own startup
+IMPORT_BUDGET_SECONDS = 1.0
+
+# `python -m visiondesk` 从开始运行到进入 Qt 主事件循环（主窗口已显示）的时间预算（秒）
+# Time budget (seconds) for `python -m visiondesk` to reach the Qt main event loop (main window shown)
+STARTUP_BUDGET_SECONDS = 3.0
+
+_MEASURE = """
+import time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+import logging
+root = logging.getLogger()
+# 导入不应配置根日志器 / Importing must not configure the root logger
+assert not root.handlers and root.level == logging.WARNING, (root.handlers, root.level)
+print(elapsed)
+"""
+
+# 以 `python -m visiondesk` 的方式运行应用；进入主事件循环时打印耗时并立即返回，随后应用正常关闭
+# Run the app as `python -m visiondesk`; on entering the main event loop, print the elapsed time
+# and return at once, after which the app shuts down normally
+_MEASURE_STARTUP = """
+import runpy
+import sys
+import time
+start = time.perf_counter()
+from PySide6 import QtWidgets
+
+def _exec(self):
+    print(time.perf_counter() - start, flush=True)
+    return 0
+
+QtWidgets.QApplication.exec = _exec
+sys.argv = ["visiondesk"]
+runpy.run_module("visiondesk", run_name="__main__", alter_sys=True)
+"""
+
+
+def _run_in_fresh_home(code: str, home: Path) -> float:
+    env = dict(os.environ, HOME=str(home), USERPROFILE=str(home), QT_QPA_PLATFORM="offscreen")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", ["visiondesk", "visiondesk.utils", "visiondesk.main"])
+def test_import_is_fast_and_has_no_side_effects(module, tmp_path):
+    elapsed = _run_in_fresh_home(_MEASURE.format(module=module), tmp_path)
+
+    assert elapsed < IMPORT_BUDGET_SECONDS, f"import {module} took {elapsed:.3f}s"
+    assert not (tmp_path / ".visiondesk").exists()
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.slow
+def test_python_m_visiondesk_reaches_the_event_loop_within_budget(tmp_path):
+    pytest.importorskip("PySide6")
+    elapsed = _run_in_fresh_home(_MEASURE_STARTUP, tmp_path)
+
+    assert elapsed < STARTUP_BUDGET_SECONDS, f"python -m visiondesk took {elapsed:.3f}s to start"
+    # 应用只在自己的目录下写入日志 / The app only writes logs under its own directory
+    assert list(tmp_path.iterdir()) == [tmp_path / ".visiondesk"]
+    assert list((tmp_path / ".visiondesk" / "logs").glob("visiondesk_*.log"))
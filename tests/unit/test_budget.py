@@ -0,0 +1,118 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""周期令牌和请求预算规划的单元测试。 / Unit tests for cycle token and request budget planning."""
+
+from visiondesk.ai.providers.mock import MockProvider
+from visiondesk.core.services.ai_service import AIService, PlannedImage, estimate_text_tokens
+from visiondesk.core.services.rate_limiter import ProviderRateLimiter
+from visiondesk.core.services.screenshot_service import SyntheticFrameSource
+from visiondesk.models.settings import AISettings, CaptureSettings
+
+PROMPT = "p"
+
+
+def _service(interval_seconds: int = 60, **ai) -> AIService:
+    ai.setdefault("requests_per_minute", 0)
+    ai.setdefault("tokens_per_minute", 0)
+    return AIService(
+        AISettings(provider="mock", cache_enabled=False, mosaic_enabled=False, **ai),
+        MockProvider(),
+        rate_limiter=ProviderRateLimiter(0, 0),
+        capture=CaptureSettings(interval_seconds=interval_seconds),
+    )
+
+
+def _frames(*sizes):
+    source = SyntheticFrameSource(1920, 1080)
+    return [source.grab(0, 0, width, height) for width, height in sizes]
+
+
+def _overhead(service: AIService) -> int:
+    return estimate_text_tokens(PROMPT) + service.settings.max_tokens
+
+
+def test_estimate_text_tokens():
+    assert estimate_text_tokens("") == 1
+    assert estimate_text_tokens("abcdefgh") == 3
+    assert estimate_text_tokens("区域") == 3
+
+
+def test_cycle_budget_is_derived_from_per_minute_limits():
+    assert _service(30, requests_per_minute=60, tokens_per_minute=6000).cycle_budget() == (3000, 30)
+    assert _service(1, requests_per_minute=10, tokens_per_minute=30).cycle_budget() == (1, 1)
+    assert _service().cycle_budget() == (None, None)
+    explicit = _service(30, tokens_per_minute=6000, cycle_token_budget=100, cycle_max_requests=2)
+    assert explicit.cycle_budget() == (100, 2)
+
+
+def test_unlimited_budget_sends_everything_unscaled():
+    service = _service()
+    frames = _frames((1920, 1080), (100, 100), (800, 600))
+    plan = service.plan_budget(frames, PROMPT)
+
+    assert plan.deferred == [] and plan.token_budget is None
+    assert [(r.input_index, r.max_image_tokens) for r in plan.requests] == [(0, None), (1, None), (2, None)]
+    assert plan.requests[0].estimated_tokens == service.estimate_tokens(frames[0], PROMPT)
+    assert plan.estimated_tokens == sum(service.estimate_tokens(frame, PROMPT) for frame in frames)
+
+
+def test_request_limit_defers_the_lowest_priority_frames():
+    plan = _service(cycle_max_requests=2).plan_budget(_frames(*[(100, 100)] * 4), PROMPT)
+    assert [request.input_index for request in plan.requests] == [0, 1]
+    assert plan.deferred == [2, 3]
+
+
+def test_token_budget_downscales_large_images_and_keeps_small_ones():
+    service = _service()
+    frames = _frames((100, 100), (1920, 1080), (1920, 1080))
+    full = sum(service.estimate_tokens(frame, PROMPT) for frame in frames)
+    budget = full - 400
+    service.settings.cycle_token_budget = budget
+    plan = service.plan_budget(frames, PROMPT)
+
+    assert plan.deferred == []
+    small, *large = plan.requests
+    assert small.max_image_tokens is None
+    assert all(request.max_image_tokens is not None for request in large)
+    assert plan.estimated_tokens <= budget
+    assert all(isinstance(request, PlannedImage) for request in plan.requests)
+
+
+def test_frames_that_cannot_fit_one_tile_are_deferred():
+    service = _service()
+    frames = _frames((1920, 1080), (1920, 1080), (1920, 1080))
+    min_request = _overhead(service) + service.image_profile.tokens_for(1, 1)
+    service.settings.cycle_token_budget = 2 * min_request + 10
+    plan = service.plan_budget(frames, PROMPT)
+
+    assert [request.input_index for request in plan.requests] == [0, 1]
+    assert plan.deferred == [2]
+    assert plan.estimated_tokens <= service.settings.cycle_token_budget
+
+
+def test_budget_below_one_request_still_sends_the_first_frame():
+    service = _service(cycle_token_budget=10)
+    plan = service.plan_budget(_frames((100, 100), (100, 100)), PROMPT)
+    assert [request.input_index for request in plan.requests] == [0]
+    assert plan.deferred == [1]
+
+
+def test_budget_below_one_request_caps_the_first_frame_at_one_tile():
+    service = _service(cycle_token_budget=10)
+    (request,) = service.plan_budget(_frames((1920, 1080), (800, 600)), PROMPT).requests
+
+    min_image_tokens = service.image_profile.tokens_for(1, 1)
+    assert isinstance(request, PlannedImage)
+    assert request.max_image_tokens == min_image_tokens
+    assert request.estimated_tokens == min_image_tokens + _overhead(service)
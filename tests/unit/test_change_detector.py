@@ -0,0 +1,105 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""变化检测器的单元测试。 / Unit tests for the change detector."""
+
+import pytest
+
+from visiondesk.core.services.change_detector import ChangeDetector
+from visiondesk.core.services.screenshot_service import SyntheticFrameSource
+from visiondesk.models.region import Region
+
+WHITE = (255, 255, 255, 255)
+BLACK = (0, 0, 0, 255)
+
+
+@pytest.fixture
+def source() -> SyntheticFrameSource:
+    return SyntheticFrameSource(320, 320)
+
+
+def test_first_frame_counts_as_changed(source):
+    detector = ChangeDetector(tile_size=32)
+    assert detector.has_changed("r", source.grab(0, 0, 320, 320))
+
+
+def test_identical_frame_is_unchanged(source):
+    detector = ChangeDetector(tile_size=32)
+    detector.has_changed("r", source.grab(0, 0, 320, 320))
+    assert not detector.has_changed("r", source.grab(0, 0, 320, 320))
+
+
+def test_change_at_threshold_is_reported(source):
+    # 100 个图块中变化 10 个 = 0.1，等于阈值 / 10 of 100 tiles = 0.1, equal to the threshold
+    detector = ChangeDetector(threshold=0.1, tile_size=32, row_step=1)
+    detector.has_changed("r", source.grab(0, 0, 320, 320))
+    source.fill_rect(0, 0, 320, 32, WHITE)
+    assert detector.changed_fraction("r", source.grab(0, 0, 320, 320)) == pytest.approx(0.1)
+    assert detector.has_changed("r", source.grab(0, 0, 320, 320))
+
+
+def test_gradual_change_accumulates_until_reported(source):
+    detector = ChangeDetector(threshold=0.05, tile_size=32, row_step=1)
+    detector.has_changed("r", source.grab(0, 0, 320, 320))
+
+    # 每个节拍只变化一个图块 (1%)，低于 5% 的阈值
+    # Each tick changes a single tile (1%), below the 5% threshold
+    reported = []
+    for tick in range(5):
+        source.fill_rect(tick * 32, 0, 32, 32, WHITE)
+        reported.append(detector.has_changed("r", source.grab(0, 0, 320, 320)))
+    assert reported == [False, False, False, False, True]
+
+    # 报告后基准被更新 / The baseline is updated once reported
+    assert not detector.has_changed("r", source.grab(0, 0, 320, 320))
+
+
+def test_quantization_ignores_low_bit_noise(source):
+    detector = ChangeDetector(tile_size=32, row_step=1, quantize_bits=2)
+    source.fill_rect(0, 0, 320, 320, (100, 100, 100, 255))
+    detector.has_changed("r", source.grab(0, 0, 320, 320))
+    source.fill_rect(0, 0, 64, 64, (101, 102, 103, 255))
+    assert not detector.has_changed("r", source.grab(0, 0, 320, 320))
+    source.fill_rect(0, 0, 64, 64, BLACK)
+    assert detector.has_changed("r", source.grab(0, 0, 320, 320))
+
+
+def test_size_change_counts_as_changed(source):
+    detector = ChangeDetector()
+    detector.has_changed("r", source.grab(0, 0, 100, 100))
+    assert detector.changed_fraction("r", source.grab(0, 0, 120, 100)) == 1.0
+
+
+def test_filter_changed_and_reset(source):
+    detector = ChangeDetector(tile_size=32)
+    regions = [Region(x=0, y=0, width=64, height=64, name="a"), Region(x=64, y=0, width=64, height=64)]
+    frames = [source.grab(0, 0, 64, 64), source.grab(64, 0, 64, 64)]
+    assert len(detector.filter_changed(regions, frames)) == 2
+    assert detector.filter_changed(regions, frames) == []
+
+    detector.reset(ChangeDetector.region_key(regions[1]))
+    assert [region.name for region, _ in detector.filter_changed(regions, frames)] == [None]
+    detector.reset()
+    assert len(detector.filter_changed(regions, frames)) == 2
+
+
+def test_region_key_falls_back_to_coordinates():
+    assert ChangeDetector.region_key(Region(x=1, y=2, width=3, height=4, name="n")) == "n"
+    assert ChangeDetector.region_key(Region(x=1, y=2, width=3, height=4)) == "1, 2, 3, 4"
+
+
+def test_invalid_parameters_are_rejected():
+    with pytest.raises(ValueError):
+        ChangeDetector(tile_size=0)
+    with pytest.raises(ValueError):
+        ChangeDetector(quantize_bits=8)
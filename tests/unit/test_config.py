@@ -0,0 +1,184 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""配置保存与重新加载的单元测试。 / Unit tests for saving and reloading the configuration."""
+
+import json
+import threading
+
+import pytest
+
+from visiondesk.core.config import REGIONS_SECTION, Config
+from visiondesk.models.region import Region
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "config.json"
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    written = []
+    original = Config._write_atomic
+
+    def counting(self, text):
+        written.append(text)
+        original(self, text)
+
+    monkeypatch.setattr(Config, "_write_atomic", counting)
+    return written
+
+
+def _edit(path, edit):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    edit(data)
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def test_save_round_trip_matches_json_dumps(path):
+    config = Config(str(path), save_delay=60)
+    config.set("ai", "model_name", "gpt-4o-mini")
+    config.set_region(Region(x=1, y=2, width=3, height=4, name="区域"))
+    config.save()
+
+    text = path.read_text(encoding="utf-8")
+    assert text == json.dumps(config.settings.model_dump(mode="json"), indent=2, ensure_ascii=False)
+    restored = Config(str(path))
+    assert restored.get("ai", "model_name") == "gpt-4o-mini"
+    assert restored.settings.saved_regions["区域"].coordinates == (1, 2, 3, 4)
+    assert [p.name for p in path.parent.iterdir()] == ["config.json"]
+
+
+def test_clean_saves_are_skipped(path, writes):
+    config = Config(str(path), save_delay=60)
+    config.save()
+    assert len(writes) == 1
+    config.save()
+    config.set("ai", "model_name", config.get("ai", "model_name"))
+    config.save()
+    assert len(writes) == 1
+    assert not config.is_dirty
+
+    config.set("capture", "interval_seconds", 9)
+    assert config.dirty_keys() == {"capture": {"interval_seconds"}}
+    config.save()
+    assert len(writes) == 2
+
+
+def test_deferred_saves_are_coalesced(path, writes):
+    config = Config(str(path), save_delay=0.05)
+    for interval in range(1, 11):
+        config.set("capture", "interval_seconds", interval)
+    assert writes == []
+    config.close()
+    assert len(writes) == 1
+    assert json.loads(path.read_text(encoding="utf-8"))["capture"]["interval_seconds"] == 10
+
+
+def test_concurrent_saves_never_write_older_text_last(path, monkeypatch):
+    config = Config(str(path), save_delay=60)
+    original = Config._write_atomic
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_first_write(self, text):
+        if json.loads(text)["ai"]["max_tokens"] == 111:
+            entered.set()
+            release.wait(2.0)
+        original(self, text)
+
+    monkeypatch.setattr(Config, "_write_atomic", slow_first_write)
+    config.set("ai", "max_tokens", 111)
+    first = threading.Thread(target=config.save)
+    first.start()
+    assert entered.wait(2.0)
+
+    config.set("ai", "max_tokens", 222)
+    second = threading.Thread(target=config.flush)
+    second.start()
+    # 第二次保存等待第一次写入完成，而不是先写入后被覆盖
+    # The second save waits for the first write instead of writing first and being overwritten
+    second.join(0.1)
+    assert second.is_alive()
+    release.set()
+    first.join()
+    second.join()
+
+    assert json.loads(path.read_text(encoding="utf-8"))["ai"]["max_tokens"] == 222
+    assert not config.is_dirty
+    config.close()
+
+
+def test_subscribers_receive_changes_until_unsubscribed(path):
+    config = Config(str(path), save_delay=60)
+    received = []
+    unsubscribe = config.subscribe(lambda *change: received.append(change), section="ai")
+    config.set("ai", "temperature", 0.2)
+    config.set("capture", "interval_seconds", 7)
+    unsubscribe()
+    config.set("ai", "temperature", 0.3)
+    assert received == [("ai", "temperature", 0.2)]
+
+
+def test_reload_applies_only_external_changes(path):
+    config = Config(str(path), save_delay=60)
+    config.set_region(Region(x=0, y=0, width=10, height=10, name="a"))
+    config.save()
+    assert config.reload() == {}
+
+    ai = config.settings.ai
+    received = []
+    config.subscribe(lambda *change: received.append(change))
+
+    def edit(data):
+        data["ai"]["temperature"] = 1.5
+        data[REGIONS_SECTION]["b"] = {"x": 5, "y": 5, "width": 20, "height": 20, "name": "b"}
+        del data[REGIONS_SECTION]["a"]
+
+    _edit(path, edit)
+    assert config.reload() == {"ai": {"temperature"}, REGIONS_SECTION: {"a", "b"}}
+    # 现有的部分对象被原地修改 / The existing section object is updated in place
+    assert config.settings.ai is ai and ai.temperature == 1.5
+    assert sorted(config.settings.saved_regions) == ["b"]
+    assert ("ai", "temperature", 1.5) in received and (REGIONS_SECTION, "a", None) in received
+
+
+def test_reload_keeps_unsaved_local_changes(path):
+    config = Config(str(path), save_delay=60)
+    config.save()
+    config.set("ai", "model_name", "local")
+
+    def edit(data):
+        data["ai"]["model_name"] = "external"
+        data["ai"]["max_tokens"] = 800
+
+    _edit(path, edit)
+    assert config.reload() == {"ai": {"max_tokens"}}
+    assert config.get("ai", "model_name") == "local"
+    assert config.get("ai", "max_tokens") == 800
+
+
+def test_invalid_reload_leaves_settings_untouched(path):
+    config = Config(str(path), save_delay=60)
+    config.save()
+
+    def edit(data):
+        data["ai"]["model_name"] = "external"
+        data["capture"]["interval_seconds"] = 0
+
+    _edit(path, edit)
+    assert config.reload() == {}
+    assert config.get("ai", "model_name") == "gpt-4o"
+
+    path.write_text("{not json", encoding="utf-8")
+    assert config.reload() == {}
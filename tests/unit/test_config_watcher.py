@@ -0,0 +1,124 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""配置文件监视器的单元测试。 / Unit tests for the configuration file watcher."""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import visiondesk.core.config_watcher as config_watcher
+from visiondesk.core.config import Config
+from visiondesk.core.config_watcher import ConfigWatcher
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watcher(request, tmp_path, monkeypatch):
+    if request.param == "polling":
+        monkeypatch.setattr(config_watcher, "_inotify_fd", lambda directory: None)
+    else:
+        fd = config_watcher._inotify_fd(str(tmp_path))
+        if fd is None:
+            pytest.skip("inotify is not available")
+        os.close(fd)
+    config = Config(str(tmp_path / "config.json"), save_delay=60)
+    config.save(force=True)
+    watcher = ConfigWatcher(config, poll_interval=0.02, settle_delay=0.02)
+    yield watcher
+    watcher.stop()
+    config.close()
+
+
+def _edit(path, edit):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    edit(data)
+    # 像下发工具一样原子替换文件 / Replace the file atomically, like a pushed update
+    temp = path.with_name("config.json.new")
+    temp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(temp, path)
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_external_edits_are_reloaded(watcher):
+    received = []
+    watcher.config.subscribe(lambda section, key, value: received.append((section, key, value)))
+    watcher.start()
+    time.sleep(0.05)
+
+    _edit(watcher.config.config_file, lambda data: data["ai"].update(max_tokens=321))
+
+    assert _wait_for(lambda: watcher.reloads == 1)
+    assert watcher.config.get("ai", "max_tokens") == 321
+    assert received == [("ai", "max_tokens", 321)]
+
+
+def test_own_saves_are_not_reloaded(watcher):
+    watcher.start()
+    time.sleep(0.05)
+    watcher.config.set("ai", "max_tokens", 123)
+    watcher.config.save()
+
+    time.sleep(0.2)
+    assert watcher.reloads == 0
+
+
+def test_stop_closes_the_inotify_descriptor(watcher):
+    watcher.start()
+    fd = watcher._fd
+    watcher.stop()
+
+    assert not watcher.is_running
+    assert watcher._fd is None
+    if fd is not None:
+        with pytest.raises(OSError):
+            os.fstat(fd)
+
+
+def test_stop_timeout_keeps_the_descriptor_until_the_thread_exits(watcher, monkeypatch):
+    entered, release = threading.Event(), threading.Event()
+
+    def blocking_reload():
+        entered.set()
+        release.wait(2.0)
+        return {}
+
+    monkeypatch.setattr(watcher.config, "reload", blocking_reload)
+    watcher.start()
+    time.sleep(0.05)
+    _edit(watcher.config.config_file, lambda data: data["ai"].update(max_tokens=321))
+    assert entered.wait(2.0)
+    fd = watcher._fd
+
+    watcher.stop(timeout=0.05)
+    # 线程仍在重新加载，描述符不能被关闭（否则可能被其他文件复用）
+    # The thread is still reloading, so the descriptor must stay open (it could be reused for another file)
+    assert watcher.is_running
+    assert watcher._fd == fd
+    if fd is not None:
+        os.fstat(fd)
+
+    release.set()
+    watcher.stop()
+    assert not watcher.is_running
+    assert watcher._fd is None
@@ -0,0 +1,120 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""图像规划、缩放和预处理流水线的单元测试。 / Unit tests for image size planning, resizing and the preprocessing pipeline."""
+
+import io
+
+import pytest
+from PIL import Image
+
+from visiondesk.core.services.screenshot_service import SyntheticFrameSource
+from visiondesk.utils.image_utils import (
+    DEFAULT_IMAGE_PROFILE,
+    IMAGE_PROFILES,
+    estimate_image_tokens,
+    frame_to_image,
+    get_image_profile,
+    plan_image_size,
+    prepare_image,
+    resize_image,
+)
+
+MINI = IMAGE_PROFILES["gpt-4o-mini"]
+
+
+def test_estimate_image_tokens_applies_the_model_scaling_first():
+    # 1920x1080 -> 1365x768 -> 3 x 2 个图块 / 1920x1080 -> 1365x768 -> 3 x 2 tiles
+    assert estimate_image_tokens(1920, 1080) == 85 + 170 * 6
+    assert estimate_image_tokens(512, 512) == 85 + 170
+    assert estimate_image_tokens(513, 512) == 85 + 170 * 2
+    assert estimate_image_tokens(512, 512, MINI) == 2833 + 5667
+
+
+def test_get_image_profile_matches_the_longest_prefix():
+    assert get_image_profile("gpt-4o-mini-2024-07-18") is MINI
+    assert get_image_profile("gpt-4o-2024-08-06") is DEFAULT_IMAGE_PROFILE
+    assert get_image_profile("unknown-model") is DEFAULT_IMAGE_PROFILE
+
+
+def test_plan_image_size_applies_the_model_scaling():
+    assert plan_image_size(1920, 1080) == (1365, 768)
+    assert plan_image_size(4000, 1000) == (2048, 512)
+    assert plan_image_size(300, 200) == (300, 200)
+
+
+def test_plan_image_size_snaps_to_a_tile_boundary_within_tolerance():
+    # 1100 像素宽占 3 列图块；缩小 7% 到 1024 只占 2 列 / 1100 px spans 3 tile columns; shrinking 7% to 1024 spans 2
+    assert plan_image_size(1100, 500) == (1024, 465)
+    assert estimate_image_tokens(1024, 465) < estimate_image_tokens(1100, 500)
+    # 需要缩小 20% 时保持原样 / Left alone when it would take a 20% shrink
+    assert plan_image_size(1280, 500) == (1280, 500)
+    assert plan_image_size(1100, 500, snap_tolerance=0.0) == (1100, 500)
+
+
+@pytest.mark.parametrize("max_tokens", [85 + 170 * 4, 85 + 170 * 2, 85 + 170])
+def test_plan_image_size_shrinks_tile_by_tile_to_fit_the_cap(max_tokens):
+    width, height = plan_image_size(1920, 1080, max_tokens=max_tokens)
+    assert estimate_image_tokens(width, height) <= max_tokens
+    # 不会比需要的多缩小一个图块 / Never shrinks a whole tile more than needed
+    assert estimate_image_tokens(width, height) > max_tokens - 170 * 2
+    assert width / height == pytest.approx(1920 / 1080, rel=0.01)
+
+
+def test_plan_image_size_keeps_one_tile_under_a_tiny_cap():
+    width, height = plan_image_size(1920, 1080, max_tokens=1)
+    assert max(width, height) <= DEFAULT_IMAGE_PROFILE.tile_size
+    assert min(width, height) >= 1
+
+
+def test_plan_image_size_uses_the_profile_tile_math():
+    profile = DEFAULT_IMAGE_PROFILE._replace(tile_size=256)
+    size = plan_image_size(1920, 1080, profile, max_tokens=profile.tokens_for(512, 512))
+    assert profile.tiles_for(*size) <= 4
+
+
+def test_resize_image():
+    image = Image.new("RGB", (400, 300), (10, 20, 30))
+    assert resize_image(image, (400, 300)) is image
+    resized = resize_image(image, (100, 75))
+    assert resized.size == (100, 75)
+    assert resized.getpixel((50, 37)) == (10, 20, 30)
+
+
+def test_frame_to_image_converts_bgra_and_honours_the_stride():
+    source = SyntheticFrameSource(64, 32)
+    source.fill_rect(40, 20, 24, 12, (10, 20, 30, 255))
+    # 位于画布末尾的带跨度子视图 / A strided sub-view at the very end of the canvas
+    frame = source.canvas.view(40, 20, 24, 12)
+    image = frame_to_image(frame)
+    assert image.size == (24, 12)
+    assert image.getpixel((23, 11)) == (30, 20, 10)
+
+
+@pytest.mark.parametrize("image_format, mime_type", [("JPEG", "image/jpeg"), ("webp", "image/webp"), ("PNG", "image/png")])
+def test_prepare_image_downscales_and_encodes(image_format, mime_type):
+    frame = SyntheticFrameSource(1920, 1080).grab(0, 0, 1920, 1080)
+    encoded = prepare_image(frame, image_format)
+    assert encoded.mime_type == mime_type
+    assert encoded.size == (1365, 768)
+    assert encoded.source_size == (1920, 1080)
+    with Image.open(io.BytesIO(encoded.data)) as decoded:
+        assert decoded.size == (1365, 768)
+
+
+def test_prepare_image_respects_the_token_cap():
+    frame = SyntheticFrameSource(1920, 1080).grab(0, 0, 1920, 1080)
+    encoded = prepare_image(frame, max_tokens=85 + 170 * 2)
+    assert encoded.estimated_tokens() <= 85 + 170 * 2
+    with pytest.raises(ValueError):
+        prepare_image(frame, "BMP")
@@ -0,0 +1,446 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""日志工具的单元测试。 / Unit tests for the logging utilities."""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+import pytest
+
+import visiondesk.utils.logger as logger_module
+from visiondesk.utils.logger import (
+    BoundedQueueHandler,
+    CompressingRotatingFileHandler,
+    DedupFilter,
+    JSONLinesFormatter,
+    LogEmoji,
+    SamplingFilter,
+    VisionDeskLogger,
+    log_sampled,
+    log_throttled,
+    log_timed,
+)
+
+
+class ListHandler(logging.Handler):
+    """把记录保存在列表中的处理器。 / Handler keeping records in a list."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.fixture
+def handler(request):
+    logger = logging.getLogger(f"visiondesk.test.{request.node.name}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    list_handler = ListHandler()
+    list_handler.logger = logger
+    logger.addHandler(list_handler)
+    yield list_handler
+    logger.removeHandler(list_handler)
+
+
+def test_log_timed_success(handler):
+    with log_timed(handler.logger, "done", op="AI", region="r") as fields:
+        fields["tokens"] = 12
+
+    (record,) = handler.records
+    assert record.levelno == logging.INFO
+    assert (record.op, record.region, record.tokens) == ("AI", "r", 12)
+    assert record.duration_ms >= 0
+    assert not hasattr(record, "outcome")
+
+
+def test_log_timed_failure_is_logged_as_error_and_propagates(handler):
+    with pytest.raises(ValueError):
+        with log_timed(handler.logger, "done", op="AI", region="r"):
+            raise ValueError("bad reply")
+
+    (record,) = handler.records
+    assert record.levelno == logging.ERROR
+    assert (record.outcome, record.error) == ("error", "ValueError: bad reply")
+    assert record.duration_ms >= 0
+
+    line = json.loads(JSONLinesFormatter().format(record))
+    assert (line["level"], line["outcome"], line["error"]) == ("ERROR", "error", "ValueError: bad reply")
+
+
+def test_log_timed_cancellation_is_logged_as_warning(handler):
+    async def run():
+        with log_timed(handler.logger, "done", op="AI"):
+            await asyncio.sleep(10)
+
+    async def cancel():
+        task = asyncio.ensure_future(run())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel())
+    (record,) = handler.records
+    assert record.levelno == logging.WARNING
+    assert (record.outcome, record.error) == ("cancelled", "CancelledError")
+
+
+def test_log_timed_failure_is_logged_when_level_is_disabled(handler):
+    logger = handler.logger
+    logger.setLevel(logging.WARNING)
+    with log_timed(logger, "done"):
+        pass
+    with pytest.raises(RuntimeError):
+        with log_timed(logger, "done"):
+            raise RuntimeError()
+
+    (record,) = handler.records
+    assert (record.levelno, record.error) == (logging.ERROR, "RuntimeError")
+
+
+def test_dedup_collapses_identical_records(handler):
+    dedup = DedupFilter(handler, window=60)
+    handler.addFilter(dedup)
+    for _ in range(5):
+        handler.logger.info("same")
+    assert len(handler.records) == 1
+
+    dedup.flush()
+    assert handler.records[-1].repeated == 4
+
+
+def test_dedup_keeps_records_with_different_structured_fields(handler):
+    handler.addFilter(DedupFilter(handler, window=60))
+    for region in ("a", "b", "a"):
+        VisionDeskLogger.log_step(handler.logger, "captured", LogEmoji.SCREENSHOT, region=region)
+    assert [record.region for record in handler.records] == ["a", "b"]
+
+
+def test_dedup_never_collapses_timed_records(handler):
+    handler.addFilter(DedupFilter(handler, window=60))
+    for _ in range(3):
+        with log_timed(handler.logger, "analysed", op="AI", region="a"):
+            pass
+    assert len(handler.records) == 3
+
+
+def _record(msg: str, *args, exc_info=None) -> logging.LogRecord:
+    return logging.LogRecord("visiondesk.test", logging.INFO, __file__, 1, msg, args, exc_info)
+
+
+def _queued_messages(log_queue: queue.Queue) -> List[str]:
+    messages = []
+    while not log_queue.empty():
+        messages.append(log_queue.get_nowait().getMessage())
+    return messages
+
+
+def test_queue_handler_prepare_merges_args_and_caches_exception_text():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = _record("region %s: %d tokens", "r1", 42, exc_info=sys.exc_info())
+    record.op = "AI"
+    log_queue: queue.Queue = queue.Queue()
+    BoundedQueueHandler(log_queue).handle(record)
+
+    queued = log_queue.get_nowait()
+    assert queued.msg == queued.getMessage() == "region r1: 42 tokens"
+    assert queued.args is None and queued.exc_info is None
+    assert "ValueError: boom" in queued.exc_text
+    assert queued.op == "AI"
+    # 原记录不被修改，其他处理器仍可使用 / The original record is untouched for other handlers
+    assert record.args == ("r1", 42) and record.exc_info is not None
+    # 监听线程上的格式化器仍输出异常 / Formatters on the listener thread still output the exception
+    assert "ValueError: boom" in json.loads(JSONLinesFormatter().format(queued))["exc"]
+    assert "ValueError: boom" in logging.Formatter().format(queued)
+
+
+def test_queue_handler_drop_oldest_keeps_the_newest_records():
+    log_queue: queue.Queue = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue, BoundedQueueHandler.DROP_OLDEST)
+    for i in range(4):
+        handler.handle(_record(f"m{i}"))
+
+    assert _queued_messages(log_queue) == ["m2", "m3"]
+    assert handler.dropped == 2
+
+
+def test_queue_handler_drop_new_keeps_the_oldest_records():
+    log_queue: queue.Queue = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue, BoundedQueueHandler.DROP_NEW)
+    for i in range(4):
+        handler.handle(_record(f"m{i}"))
+
+    assert _queued_messages(log_queue) == ["m0", "m1"]
+    assert handler.dropped == 2
+
+
+def test_queue_handler_block_waits_for_room_then_drops():
+    log_queue: queue.Queue = queue.Queue(maxsize=1)
+    handler = BoundedQueueHandler(log_queue, BoundedQueueHandler.BLOCK, block_timeout=0.05)
+    handler.handle(_record("m0"))
+
+    start = time.monotonic()
+    handler.handle(_record("m1"))
+    assert time.monotonic() - start >= 0.04
+    assert handler.dropped == 1
+
+    # 超时内腾出空间时记录被入队 / A record is enqueued when room appears within the timeout
+    handler.block_timeout = 2.0
+    consumer = threading.Timer(0.05, log_queue.get_nowait)
+    consumer.start()
+    handler.handle(_record("m2"))
+    consumer.join()
+    assert _queued_messages(log_queue) == ["m2"]
+    assert handler.dropped == 1
+
+
+def test_queue_handler_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        BoundedQueueHandler(queue.Queue(), "drop_random")
+
+
+def test_lazy_configuration_leaves_host_logging_alone(monkeypatch):
+    monkeypatch.setattr(VisionDeskLogger, "_configured", False)
+    root = logging.getLogger()
+    host_handler = ListHandler()
+    root.addHandler(host_handler)
+    try:
+        VisionDeskLogger.get_logger("visiondesk.test.host")
+    finally:
+        root.removeHandler(host_handler)
+
+    assert VisionDeskLogger._configured
+    assert VisionDeskLogger._handlers == []
+
+
+def test_log_throttled_counts_suppressed_calls(handler):
+    assert log_throttled(handler.logger, "throttle-test", "tick", interval=60.0)
+    for _ in range(3):
+        assert not log_throttled(handler.logger, "throttle-test", "tick", interval=60.0)
+    assert log_throttled(handler.logger, "throttle-test", "tick", interval=0.0)
+
+    first, second = handler.records
+    assert not hasattr(first, "suppressed")
+    assert second.suppressed == 3
+
+
+def test_log_sampled_logs_one_call_in_every(handler):
+    emitted = [log_sampled(handler.logger, "sample-test", "tick", every=3) for _ in range(7)]
+
+    assert emitted == [True, False, False, True, False, False, True]
+    assert [record.sampled_every for record in handler.records] == [3, 3, 3]
+
+
+def test_hot_loop_state_is_bounded_to_recent_keys(handler, monkeypatch):
+    monkeypatch.setattr(logger_module, "_HOT_LOOP_MAX_KEYS", 4)
+    for i in range(10):
+        log_throttled(handler.logger, f"bounded:{i}", "tick", interval=60.0)
+        log_sampled(handler.logger, f"bounded:{i}", "tick", every=2)
+
+    assert list(logger_module._throttle_state)[-4:] == [f"bounded:{i}" for i in range(6, 10)]
+    assert len(logger_module._throttle_state) <= 4
+    assert len(logger_module._sample_counters) <= 4
+
+
+def test_log_sampled_is_thread_safe(handler):
+    barrier = threading.Barrier(8)
+
+    def worker() -> None:
+        barrier.wait()
+        for _ in range(1000):
+            log_sampled(handler.logger, "threaded-sample", "tick", every=1000, level=logging.WARNING)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 8000 次调用中恰好每 1000 次记录一次；无锁时计数会丢失 / Exactly one in 1000 of 8000 calls; without the lock counts get lost
+    assert len(handler.records) == 8
+
+
+def _sampled(rates, records):
+    sampling_filter = SamplingFilter(rates)
+    return [record for record in records if sampling_filter.filter(record)]
+
+
+def _op_record(op, level=logging.INFO) -> logging.LogRecord:
+    record = logging.LogRecord("visiondesk.test", level, __file__, 1, "capture", (), None)
+    if op is not None:
+        record.op = op
+    return record
+
+
+def test_sampling_filter_keeps_a_fixed_fraction_per_category():
+    records = [_op_record("SCREENSHOT") for _ in range(9)]
+    kept = _sampled({"SCREENSHOT": 0.25}, records)
+
+    assert kept == [records[0], records[4], records[8]]
+    assert [record.sampled_every for record in kept] == [4, 4, 4]
+
+
+def test_sampling_filter_accepts_emoji_keys_and_passes_other_records():
+    records = [_op_record("SCREENSHOT") for _ in range(4)]
+    others = [_op_record("AI"), _op_record(None), _op_record("SCREENSHOT", logging.WARNING)]
+    kept = _sampled({LogEmoji.SCREENSHOT: 0.5}, records + others)
+
+    assert kept == [records[0], records[2]] + others
+
+
+def test_sampling_filter_rate_zero_drops_the_category():
+    assert _sampled({"SCREENSHOT": 0.0}, [_op_record("SCREENSHOT") for _ in range(5)]) == []
+
+
+def test_sampling_filter_decision_is_shared_by_every_handler():
+    sampling_filter = SamplingFilter({"SCREENSHOT": 0.5})
+    records = [_op_record("SCREENSHOT") for _ in range(6)]
+    # 每条记录依次经过两个处理器 / Each record passes through two handlers in turn
+    first, second = [], []
+    for record in records:
+        if sampling_filter.filter(record):
+            first.append(record)
+        if sampling_filter.filter(record):
+            second.append(record)
+
+    assert first == second == records[::2]
+
+
+def test_sampling_filter_rejects_rates_outside_unit_interval():
+    with pytest.raises(ValueError):
+        SamplingFilter({"SCREENSHOT": 1.5})
+
+
+class _FakeDatetime(datetime):
+    """可控制当前时间的 datetime。 / datetime with a controllable current time."""
+
+    current = datetime(2026, 3, 1, 12, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+def _line(handler: CompressingRotatingFileHandler, text: str) -> None:
+    handler.handle(logging.LogRecord("visiondesk.test", logging.INFO, __file__, 1, text, (), None))
+
+
+def _age(path: Path, seconds: float) -> None:
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def rotating(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger_module, "datetime", _FakeDatetime)
+    monkeypatch.setattr(_FakeDatetime, "current", datetime(2026, 3, 1, 12, 0))
+    # 日期轮转由各用例通过 _next_rollover 触发 / Day rollovers are triggered by each test through _next_rollover
+    monkeypatch.setattr(CompressingRotatingFileHandler, "_next_midnight", staticmethod(lambda: float("inf")))
+    handlers = []
+
+    def create(**kwargs) -> CompressingRotatingFileHandler:
+        kwargs.setdefault("max_total_bytes", 0)
+        handler = CompressingRotatingFileHandler(tmp_path, **kwargs)
+        handlers.append(handler)
+        return handler
+
+    yield create
+    for handler in handlers:
+        handler.close()
+
+
+def test_rotating_handler_rolls_over_by_size_and_compresses_numbered_segments(tmp_path, rotating):
+    handler = rotating(max_bytes=100)
+    lines = [f"line {i:02d} " + "x" * 40 for i in range(9)]
+    for text in lines:
+        _line(handler, text)
+    handler.close()
+
+    segments = sorted(tmp_path.glob("visiondesk_20260301.*.log.gz"))
+    assert [path.name for path in segments] == [f"visiondesk_20260301.{n}.log.gz" for n in range(1, 3)]
+    assert not list(tmp_path.glob("visiondesk_20260301.*.log"))
+    written = b"".join(gzip.decompress(path.read_bytes()) for path in segments)
+    written += (tmp_path / "visiondesk_20260301.log").read_bytes()
+    assert written.decode().splitlines() == lines
+
+
+def test_rotating_handler_never_reuses_segment_numbers(tmp_path, rotating):
+    (tmp_path / "visiondesk_20260301.5.log.gz").write_bytes(gzip.compress(b"old\n"))
+    handler = rotating(max_bytes=10)
+    _line(handler, "first line")
+    _line(handler, "second line")
+    handler.close()
+
+    assert (tmp_path / "visiondesk_20260301.6.log.gz").exists()
+
+
+def test_rotating_handler_rolls_over_at_day_boundary(tmp_path, rotating, monkeypatch):
+    handler = rotating(max_bytes=0)
+    _line(handler, "before midnight")
+    monkeypatch.setattr(_FakeDatetime, "current", datetime(2026, 3, 2, 0, 0, 1))
+    handler._next_rollover = 0.0
+    _line(handler, "after midnight")
+    handler.close()
+
+    assert gzip.decompress((tmp_path / "visiondesk_20260301.1.log.gz").read_bytes()) == b"before midnight\n"
+    assert (tmp_path / "visiondesk_20260302.log").read_text() == "after midnight\n"
+    assert not (tmp_path / "visiondesk_20260301.log").exists()
+
+
+def test_rotating_handler_caps_the_directory_size(tmp_path, rotating):
+    for day in range(1, 5):
+        path = tmp_path / f"visiondesk_202602{day:02d}.1.log.gz"
+        path.write_bytes(b"x" * 1000)
+        _age(path, 86400 * (10 - day))
+    unrelated = tmp_path / "notes.txt"
+    unrelated.write_bytes(b"x" * 1000)
+    _age(unrelated, 86400 * 30)
+
+    handler = rotating(max_total_bytes=2500)
+    _line(handler, "current")
+    handler.close()
+
+    remaining = sorted(path.name for path in tmp_path.iterdir())
+    assert remaining == ["notes.txt", "visiondesk_20260204.1.log.gz", "visiondesk_20260301.log"]
+
+
+def test_rotating_handler_compresses_only_idle_leftovers_at_startup(tmp_path, rotating):
+    idle = tmp_path / "visiondesk_20260228.log"
+    idle.write_text("previous run\n")
+    _age(idle, CompressingRotatingFileHandler.IDLE_SECONDS + 60)
+    # 另一个实例可能仍在写入最近修改过的文件 / Another instance may still be writing a recently modified file
+    busy = tmp_path / "visiondesk_20260227.3.log"
+    busy.write_text("other instance\n")
+
+    rotating().close()
+
+    assert gzip.decompress((tmp_path / "visiondesk_20260228.log.gz").read_bytes()) == b"previous run\n"
+    assert not idle.exists()
+    assert busy.read_text() == "other instance\n"
+    assert not (tmp_path / "visiondesk_20260227.3.log.gz").exists()
@@ -0,0 +1,72 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""显示器拓扑和物理坐标映射的单元测试。 / Unit tests for the monitor topology and physical mapping."""
+
+from visiondesk.core.services.monitor_topology import MonitorTopology
+from visiondesk.core.services.screenshot_service import ScreenshotService, SyntheticFrameSource
+from visiondesk.models.region import Region
+
+
+class CountingSource(SyntheticFrameSource):
+    """统计布局读取次数的帧来源。 / Frame source counting layout reads."""
+
+    reads = 0
+
+    @property
+    def monitors(self):
+        self.reads += 1
+        return super().monitors
+
+
+def _source() -> CountingSource:
+    # 主显示器 1920 宽，第二个显示器位于其右侧 / Primary monitor 1920 wide, second monitor to its right
+    return CountingSource(4480, 1440, monitors=[(0, 0, 1920, 1080), (1920, 0, 2560, 1440)])
+
+
+def test_monitors_are_numbered_as_in_mss():
+    topology = MonitorTopology(_source())
+    assert [(m.number, m.left, m.width) for m in topology.monitors] == [(0, 0, 4480), (1, 0, 1920), (2, 1920, 2560)]
+
+
+def test_regions_without_monitor_are_physical_and_ignore_scale():
+    source = _source()
+    topology = MonitorTopology(source)
+    region = Region(x=100, y=50, width=200, height=100, scale=2.0)
+    assert topology.to_physical(region) == region.bounds
+    assert source.reads == 0
+
+
+def test_monitor_regions_scale_around_the_monitor_origin():
+    topology = MonitorTopology(_source())
+    region = Region(x=1920 + 100, y=50, width=200, height=100, monitor_id=2, scale=1.5)
+    assert topology.to_physical(region) == (1920 + 150, 75, 1920 + 450, 225)
+
+
+def test_missing_monitor_falls_back_to_virtual_screen():
+    topology = MonitorTopology(_source())
+    region = Region(x=10, y=10, width=20, height=20, monitor_id=9, scale=2.0)
+    assert topology.to_physical(region) == (20, 20, 60, 60)
+
+
+def test_screenshot_service_delegates_to_the_topology():
+    source = _source()
+    service = ScreenshotService(source=source)
+    regions = [
+        Region(x=100, y=50, width=200, height=100, scale=2.0),
+        Region(x=1920 + 100, y=50, width=200, height=100, monitor_id=2, scale=1.5),
+    ]
+    for region in regions:
+        assert service.physical_bounds(region) == service.topology.to_physical(region)
+    frame = service.capture_region(regions[0])
+    assert (frame.width, frame.height) == (200, 100)
@@ -0,0 +1,153 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""拼图装箱、提示词和按区域拆分回复的单元测试。 / Unit tests for mosaic packing, prompts and per-region reply splitting."""
+
+import asyncio
+import json
+from typing import Optional
+
+import pytest
+
+from visiondesk.ai.models.vision_model import AnalysisResult
+from visiondesk.ai.providers.mock import MockProvider
+from visiondesk.core.services.ai_service import (
+    AIService,
+    PlannedMosaic,
+    mosaic_prompt,
+    mosaic_tile_id,
+    split_mosaic_reply,
+)
+from visiondesk.core.services.rate_limiter import ProviderRateLimiter
+from visiondesk.core.services.screenshot_service import SyntheticFrameSource
+from visiondesk.models.settings import AISettings
+from visiondesk.utils.image_utils import build_mosaic, pack_mosaic
+
+
+def _service(provider: Optional[MockProvider] = None) -> AIService:
+    return AIService(
+        AISettings(provider="mock", cache_enabled=False, requests_per_minute=0, tokens_per_minute=0),
+        provider or MockProvider(),
+        rate_limiter=ProviderRateLimiter(0, 0),
+    )
+
+
+def _frames(count: int):
+    source = SyntheticFrameSource(400, 100)
+    return [source.grab(i * 40, 0, 40, 40) for i in range(count)]
+
+
+def _overlaps(a, b) -> bool:
+    return a.x < b.x + b.width and b.x < a.x + a.width and a.y < b.y + b.height and b.y < a.y + a.height
+
+
+def test_pack_mosaic_keeps_input_order_within_limits_without_overlaps():
+    items = [(mosaic_tile_id(i), 100 + 20 * i, 40 + 10 * i) for i in range(6)]
+    (layout,) = pack_mosaic(items, 1024, 1024)
+    assert [tile.label for tile in layout.tiles] == [label for label, _, _ in items]
+    assert layout.width <= 1024 and layout.height <= 1024
+    for i, tile in enumerate(layout.tiles):
+        assert (tile.width, tile.height) == items[i][1:]
+        assert tile.x + tile.width <= layout.width and tile.y + tile.height <= layout.height
+        assert not any(_overlaps(tile, other) for other in layout.tiles[i + 1:])
+
+
+def test_pack_mosaic_opens_a_new_mosaic_when_one_is_full():
+    layouts = pack_mosaic([(mosaic_tile_id(i), 300, 300) for i in range(4)], 640, 640, tile_size=512)
+    assert len(layouts) > 1
+    assert sorted(tile.label for layout in layouts for tile in layout.tiles) == ["R1", "R2", "R3", "R4"]
+
+
+def test_pack_mosaic_rejects_duplicate_and_non_ascii_labels():
+    with pytest.raises(ValueError):
+        pack_mosaic([("R1", 10, 10), ("R1", 10, 10)])
+    with pytest.raises(ValueError):
+        pack_mosaic([("终端", 10, 10)])
+    assert pack_mosaic([]) == []
+
+
+def test_build_mosaic_draws_every_tile():
+    frames = _frames(3)
+    layout = pack_mosaic([(mosaic_tile_id(i), 40, 40) for i in range(3)])[0]
+    image = build_mosaic(layout, {tile.label: frame for tile, frame in zip(layout.tiles, frames)})
+    assert image.size == (layout.width, layout.height)
+
+
+def test_mosaic_prompt_keys_by_tile_id_and_lists_names():
+    text = mosaic_prompt("describe", ["R1", "R2"], ["终端", "终端"])
+    assert text.startswith("describe\n\n")
+    assert 'Region names: {"R1": "终端", "R2": "终端"}' in text
+    assert text.endswith('JSON keys: ["R1", "R2"]')
+    assert "Region names" not in mosaic_prompt("describe", ["R1"])
+
+
+def test_split_mosaic_reply():
+    reply = '```json\n{"R1": "a terminal", "R2": {"lines": 3}, "R9": "unrequested"}\n```'
+    assert split_mosaic_reply(reply, ["R1", "R2", "R3"]) == {"R1": "a terminal", "R2": '{"lines": 3}'}
+    with pytest.raises(ValueError):
+        split_mosaic_reply("not json", ["R1"])
+    with pytest.raises(ValueError):
+        split_mosaic_reply("[1, 2]", ["R1"])
+
+
+def test_plan_budget_tiles_regions_that_share_a_name():
+    # 两个未命名且坐标相同的区域得到相同的键 / Two unnamed regions with the same coordinates get the same key
+    labels = ["0, 0, 40, 40", "0, 0, 40, 40", "终端"]
+    plan = _service().plan_budget(_frames(3), "p", labels=labels)
+    (request,) = plan.requests
+    assert isinstance(request, PlannedMosaic)
+    assert request.indices == (0, 1, 2)
+    assert request.names == tuple(labels)
+    assert [tile.label for tile in request.layout.tiles] == ["R1", "R2", "R3"]
+
+
+def test_analyze_images_splits_a_planned_mosaic_per_region():
+    provider = MockProvider()
+    service = _service(provider)
+    frames = _frames(3)
+    plan = service.plan_budget(frames, labels=["终端", "终端", "浏览器"])
+
+    async def run():
+        return dict([item async for item in service.analyze_images(frames, return_exceptions=True, plan=plan)])
+
+    results = asyncio.run(run())
+    assert provider.calls == 1
+    assert sorted(results) == [0, 1, 2]
+    for index, result in results.items():
+        assert isinstance(result, AnalysisResult)
+        assert result.text.endswith(f"({mosaic_tile_id(index)})")
+        assert result.finish_reason == "stop"
+
+
+class _FirstTileOnly(MockProvider):
+    @staticmethod
+    def reply_for(image, prompt, model):
+        return json.dumps({"R1": "only the first region"})
+
+
+def test_regions_missing_from_the_reply_yield_errors():
+    service = _service(_FirstTileOnly())
+    frames = _frames(2)
+    assert [result and result.text for result in asyncio.run(service.analyze_mosaic(frames))] == [
+        "only the first region",
+        None,
+    ]
+
+    plan = service.plan_budget(frames, labels=["a", "b"])
+
+    async def run():
+        return dict([item async for item in service.analyze_images(frames, return_exceptions=True, plan=plan)])
+
+    results = asyncio.run(run())
+    assert isinstance(results[0], AnalysisResult)
+    assert isinstance(results[1], ValueError) and "b" in str(results[1])
@@ -0,0 +1,163 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""提供商流及其结束原因的单元测试。 / Unit tests for provider streams and their finish reasons."""
+
+import asyncio
+import base64
+import json
+
+import pytest
+
+from visiondesk.ai.models.vision_model import TokenUsage
+from visiondesk.ai.providers.base import FinishReason
+from visiondesk.ai.providers.mock import MockProvider
+from visiondesk.ai.providers.mock_server import MockChatServer
+from visiondesk.ai.providers.openai import _IMAGE_PLACEHOLDER, OpenAIProvider
+from visiondesk.core.services.ai_service import AIService
+from visiondesk.core.services.rate_limiter import ProviderRateLimiter
+from visiondesk.core.services.response_cache import ResponseCache
+from visiondesk.core.services.screenshot_service import SyntheticFrameSource
+from visiondesk.models.settings import AISettings
+from visiondesk.utils.image_utils import iter_base64, prepare_image
+
+
+class ScriptedProvider(MockProvider):
+    """按脚本产生流元素的提供商。 / Provider that yields scripted stream items."""
+
+    def __init__(self, items):
+        super().__init__()
+        self.items = items
+
+    async def _stream(self, image, prompt, model, temperature, max_tokens):
+        self.calls += 1
+        for item in self.items:
+            yield item
+
+
+def _image():
+    return prepare_image(SyntheticFrameSource(64, 64).grab(0, 0, 64, 64), "PNG")
+
+
+def _collect(provider, max_tokens=500):
+    return asyncio.run(provider.stream(_image(), "p", "m", 0.0, max_tokens).collect())
+
+
+def test_server_finish_reason_is_reported():
+    assert _collect(ScriptedProvider(["a", FinishReason("stop")])).finish_reason == "stop"
+    result = _collect(ScriptedProvider(["a", " b", FinishReason("length"), TokenUsage(completion_tokens=2)]))
+    assert (result.text, result.finish_reason, result.usage.completion_tokens) == ("a b", "length", 2)
+
+
+def test_stream_without_finish_reason_is_incomplete():
+    assert _collect(ScriptedProvider(["a"])).finish_reason == "incomplete"
+
+
+def test_mock_provider_reports_truncation():
+    assert _collect(MockProvider()).finish_reason == "stop"
+    assert _collect(MockProvider(), max_tokens=2).finish_reason == "length"
+
+
+def test_openai_stream_carries_wire_finish_reason():
+    async def run():
+        async with MockChatServer() as server:
+            provider = OpenAIProvider(api_key="test", base_url=server.base_url)
+            try:
+                complete = await provider.stream(_image(), "p", "m", 0.0, 500).collect()
+                truncated = await provider.stream(_image(), "p", "m", 0.0, 2).collect()
+            finally:
+                await provider.aclose()
+        return complete, truncated
+
+    complete, truncated = asyncio.run(run())
+    assert complete.finish_reason == "stop"
+    assert truncated.finish_reason == "length"
+    assert len(truncated.text.split(" ")) == 2
+
+
+def test_truncated_replies_are_not_cached():
+    provider = ScriptedProvider(["partial", FinishReason("length")])
+    service = AIService(
+        AISettings(provider="mock", cache_persist=False),
+        provider,
+        cache=ResponseCache(),
+        rate_limiter=ProviderRateLimiter(0, 0),
+    )
+    frame = SyntheticFrameSource(64, 64).grab(0, 0, 64, 64)
+
+    async def run():
+        first = await service.analyze_image(frame)
+        second = await service.analyze_image(frame)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.finish_reason == second.finish_reason == "length"
+    assert not second.cached
+    assert provider.calls == 2
+
+
+class ClosingProvider(MockProvider):
+    """记录是否已关闭的提供商。 / Provider recording whether it was closed."""
+
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_replaced_provider_serves_new_requests_and_closes_the_old_one():
+    old, new, spare = ClosingProvider(), ClosingProvider(), ClosingProvider()
+    service = AIService(
+        AISettings(provider="mock", cache_enabled=False, request_timeout=0.05),
+        old,
+        rate_limiter=ProviderRateLimiter(0, 0),
+    )
+    frame = SyntheticFrameSource(64, 64).grab(0, 0, 64, 64)
+
+    async def run():
+        replacing = asyncio.ensure_future(service.replace_provider(new))
+        await asyncio.sleep(0)
+        await service.analyze_image(frame)
+        # 旧提供商在 request_timeout 之后才关闭 / The old provider is only closed after request_timeout
+        assert not old.closed
+        await replacing
+        assert old.closed
+
+        # aclose() 立即关闭仍在等待的旧提供商 / aclose() closes retired providers still waiting at once
+        asyncio.ensure_future(service.replace_provider(spare))
+        await asyncio.sleep(0)
+        await service.aclose()
+
+    asyncio.run(run())
+    assert (old.calls, new.calls) == (0, 1)
+    assert new.closed and spare.closed
+
+
+def test_request_body_survives_a_prompt_containing_the_placeholder():
+    image = _image()
+    prompt = f"before {_IMAGE_PLACEHOLDER} after"
+    prefix, suffix = OpenAIProvider()._body_parts(image, prompt, "m", 0.5, 100)
+    body = json.loads(prefix + b"".join(image.iter_base64()) + suffix)
+    text, image_part = body["messages"][0]["content"]
+    assert text["text"] == prompt
+    assert image_part["image_url"]["url"] == f"data:image/png;base64,{base64.b64encode(image.data).decode()}"
+    assert (body["max_tokens"], body["stream"]) == (100, True)
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 4, 47, 48, 49, 1000])
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 16, 48])
+def test_iter_base64_chunks_join_to_the_full_encoding(size, chunk_size):
+    data = memoryview(bytes(range(256)) * 4)[:size]
+    assert b"".join(iter_base64(data, chunk_size)) == base64.b64encode(data)
@@ -0,0 +1,165 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""速率限制器和并发分析的单元测试。 / Unit tests for the rate limiter and concurrent analysis."""
+
+import asyncio
+import time
+
+from visiondesk.ai.providers.mock import MockProvider
+from visiondesk.core.services.ai_service import AIService
+from visiondesk.core.services.rate_limiter import ProviderRateLimiter, TokenBucket, get_rate_limiter
+from visiondesk.core.services.screenshot_service import SyntheticFrameSource
+from visiondesk.models.settings import AISettings
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket(0)
+
+    async def run():
+        for _ in range(1000):
+            await bucket.acquire(10**6)
+
+    start = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - start < 0.5
+
+
+def test_bucket_waits_for_refill():
+    # 每秒 100 个令牌 / 100 tokens per second
+    bucket = TokenBucket(6000, capacity=10)
+
+    async def run():
+        await bucket.acquire(10)
+        start = time.monotonic()
+        await bucket.acquire(5)
+        return time.monotonic() - start
+
+    assert 0.03 <= asyncio.run(run()) < 0.5
+
+
+def test_bucket_is_usable_from_several_event_loops():
+    bucket = TokenBucket(60000, capacity=5)
+
+    async def contend():
+        await asyncio.gather(*(bucket.acquire(5) for _ in range(3)))
+
+    # 每次 asyncio.run 都使用新的事件循环 / Every asyncio.run uses a new event loop
+    asyncio.run(contend())
+    asyncio.run(contend())
+
+
+def test_set_rate_switches_between_limited_and_unlimited():
+    bucket = TokenBucket(0)
+    bucket.set_rate(60)
+    assert not bucket.unlimited
+    assert bucket.capacity == 60
+
+    async def run():
+        await bucket.acquire(60)
+        bucket.set_rate(0)
+        await bucket.acquire(60)
+
+    start = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - start < 0.5
+
+
+def test_record_usage_refunds_and_charges():
+    limiter = ProviderRateLimiter(0, 600)
+    asyncio.run(limiter.acquire(500))
+    limiter.record_usage(500, 100)
+    assert limiter.tokens._tokens >= 499
+    limiter.record_usage(100, 600)
+    assert limiter.tokens._tokens < 100
+
+
+def test_get_rate_limiter_is_shared_and_follows_new_limits():
+    first = get_rate_limiter("test-shared", 60, 1000)
+    second = get_rate_limiter("test-shared", 120, 1000)
+    assert first is second
+    assert first.requests_per_minute == 120
+    assert first.requests.capacity == 120
+    assert first.tokens.capacity == 1000
+
+
+def test_update_rate_limits_applies_edited_settings():
+    settings = AISettings(provider="mock", cache_enabled=False, requests_per_minute=60, tokens_per_minute=1000)
+    service = AIService(settings, MockProvider(), rate_limiter=ProviderRateLimiter(60, 1000))
+    settings.tokens_per_minute = 0
+    service.update_rate_limits()
+    assert service.rate_limiter.tokens.unlimited
+
+
+def test_analyze_images_yields_in_completion_order_and_cleans_up():
+    source = SyntheticFrameSource(400, 100)
+    frames = [source.grab(i * 100, 0, 100, 100) for i in range(4)]
+    provider = MockProvider(first_token_delay=0.05)
+    service = AIService(
+        AISettings(provider="mock", cache_enabled=False, max_concurrent_requests=2),
+        provider,
+        rate_limiter=ProviderRateLimiter(0, 0),
+    )
+
+    async def run():
+        results = [index async for index, _ in service.analyze_images(frames)]
+        assert sorted(results) == [0, 1, 2, 3]
+
+        # 提前停止迭代时，剩余的请求被取消并等待结束
+        # Stopping early cancels the remaining requests and waits for them
+        iterator = service.analyze_images(frames)
+        async for _ in iterator:
+            break
+        await iterator.aclose()
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    asyncio.run(run())
+
+
+class _CountingProvider(MockProvider):
+    def __init__(self) -> None:
+        super().__init__(first_token_delay=0.02)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _stream(self, *args, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            async for item in super()._stream(*args, **kwargs):
+                yield item
+        finally:
+            self.in_flight -= 1
+
+
+def test_concurrency_follows_max_concurrent_requests_on_every_loop():
+    source = SyntheticFrameSource(400, 100)
+    frames = [source.grab(i * 50, 0, 50, 50) for i in range(6)]
+    provider = _CountingProvider()
+    settings = AISettings(provider="mock", cache_enabled=False, max_concurrent_requests=3)
+    service = AIService(settings, provider, rate_limiter=ProviderRateLimiter(0, 0))
+
+    async def batch():
+        provider.peak = 0
+        assert len([index async for index, _ in service.analyze_images(frames)]) == 6
+        return provider.peak
+
+    async def run():
+        first = await batch()
+        settings.max_concurrent_requests = 1
+        return first, await batch()
+
+    assert asyncio.run(run()) == (3, 1)
+    # 每个事件循环使用自己的信号量 / Every event loop uses its own semaphore
+    settings.max_concurrent_requests = 2
+    assert asyncio.run(batch()) == 2
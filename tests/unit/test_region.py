@@ -0,0 +1,44 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""区域模型和 Rect 值类型的单元测试。 / Unit tests for the region model and the Rect value type."""
+
+import pytest
+from pydantic import ValidationError
+
+from visiondesk.models.region import Rect, Region
+
+
+def test_rect_round_trips_through_region():
+    region = Region(x=10, y=20, width=300, height=200, name="a", monitor_id=2, scale=1.5)
+    rect = region.to_rect()
+    assert rect == Rect.from_region(region)
+    assert rect.to_region() == region
+    assert hash(rect) == hash(Rect(10, 20, 300, 200, "a", 2, 1.5))
+    assert rect != Rect(10, 20, 300, 200, "b", 2, 1.5)
+
+
+def test_rect_matches_region_semantics():
+    region = Region(x=10, y=20, width=30, height=40)
+    rect = region.to_rect()
+    assert rect.coordinates == region.coordinates
+    assert rect.bounds == region.bounds
+    for point in [(10, 20), (40, 60), (41, 60), (9, 30)]:
+        assert rect.contains_point(*point) == region.contains_point(*point)
+    assert str(rect) == str(region)
+
+
+def test_rect_is_validated_at_the_persistence_boundary():
+    rect = Rect(0, 0, 0, 10)
+    with pytest.raises(ValidationError):
+        rect.to_region()
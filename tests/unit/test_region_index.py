@@ -0,0 +1,100 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""区域空间索引的单元测试。 / Unit tests for the region spatial index."""
+
+import math
+import random
+
+import pytest
+
+from visiondesk.core.config import Config
+from visiondesk.core.region_index import RegionIndex
+from visiondesk.models.region import Region
+
+
+def _random_regions(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        Region(x=rng.randrange(0, 2000), y=rng.randrange(0, 1200),
+               width=rng.randrange(1, 300), height=rng.randrange(1, 200), name=f"r{i:03d}")
+        for i in range(count)
+    ]
+
+
+def _overlaps(bounds, left, top, right, bottom) -> bool:
+    return bounds[0] < right and left < bounds[2] and bounds[1] < bottom and top < bounds[3]
+
+
+def _distance(region: Region, x: int, y: int) -> float:
+    left, top, right, bottom = region.bounds
+    return math.hypot(max(left - x, 0, x - right), max(top - y, 0, y - bottom))
+
+
+@pytest.mark.parametrize("cell_size", [16, 256])
+def test_queries_match_brute_force(cell_size):
+    regions = _random_regions(150)
+    index = RegionIndex(regions, cell_size=cell_size)
+    rng = random.Random(1)
+    for _ in range(100):
+        x, y = rng.randrange(-200, 2500), rng.randrange(-200, 1600)
+        assert index.at_point(x, y) == sorted(r.name for r in regions if r.contains_point(x, y))
+        assert index.intersecting(x, y, 50, 40) == sorted(
+            r.name for r in regions if _overlaps(r.bounds, x, y, x + 50, y + 40)
+        )
+        assert index.nearest(x, y) == min(regions, key=lambda r: (_distance(r, x, y), r.name)).name
+
+
+def test_affected_by_unions_dirty_rectangles():
+    index = RegionIndex([
+        Region(x=0, y=0, width=100, height=100, name="a"),
+        Region(x=300, y=0, width=100, height=100, name="b"),
+        Region(x=0, y=300, width=100, height=100, name="c"),
+    ], cell_size=64)
+    assert index.affected_by([(50, 50, 10, 10), (350, 50, 10, 10)]) == ["a", "b"]
+    # 只接触边的矩形和空矩形不影响区域 / Rectangles that only touch, and empty ones, affect nothing
+    assert index.affected_by([(100, 0, 10, 10), (10, 10, 0, 5)]) == []
+
+
+def test_add_replace_and_remove():
+    index = RegionIndex(cell_size=32)
+    assert index.nearest(0, 0) is None
+    index.add(Region(x=0, y=0, width=10, height=10, name="a"))
+    index.add(Region(x=500, y=500, width=10, height=10, name="a"))
+    assert len(index) == 1 and "a" in index
+    assert index.at_point(5, 5) == []
+    assert index.at_point(505, 505) == ["a"]
+    assert index.remove("a") and not index.remove("a")
+    assert index.nearest(505, 505) is None
+
+    with pytest.raises(ValueError):
+        index.add(Region(x=0, y=0, width=1, height=1))
+    with pytest.raises(ValueError):
+        RegionIndex(cell_size=0)
+
+
+def test_follows_config_changes(tmp_path):
+    config = Config(str(tmp_path / "config.json"), save_delay=60)
+    config.set_region(Region(x=0, y=0, width=50, height=50, name="a"))
+    index = RegionIndex.from_config(config)
+    assert index.at_point(10, 10) == ["a"]
+
+    config.set_region(Region(x=100, y=100, width=50, height=50, name="b"))
+    config.remove_region("a")
+    assert index.at_point(10, 10) == []
+    assert index.at_point(120, 120) == ["b"]
+
+    index.close()
+    config.set_region(Region(x=0, y=0, width=50, height=50, name="c"))
+    assert index.at_point(10, 10) == []
+    config.close()
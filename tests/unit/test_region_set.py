@@ -0,0 +1,111 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""区域集合的单元测试。 / Unit tests for the region set."""
+
+import random
+
+import pytest
+
+from visiondesk.models import region_set as region_set_module
+from visiondesk.models.region import Region
+from visiondesk.models.region_set import RegionSet
+
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(region_set_module, "np", None)
+    return request.param
+
+
+def _random_regions(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        Region(x=rng.randrange(0, 500), y=rng.randrange(0, 300),
+               width=rng.randrange(1, 120), height=rng.randrange(1, 80), name=f"r{i}")
+        for i in range(count)
+    ]
+
+
+def _overlaps(a: Region, b: Region) -> bool:
+    a_left, a_top, a_right, a_bottom = a.bounds
+    b_left, b_top, b_right, b_bottom = b.bounds
+    return a_left < b_right and b_left < a_right and a_top < b_bottom and b_top < a_bottom
+
+
+def test_backend_is_reported(backend):
+    assert RegionSet().backend == backend
+
+
+def test_queries_match_the_region_model(backend):
+    regions = _random_regions(60)
+    region_set = RegionSet(regions)
+    rng = random.Random(1)
+    for _ in range(50):
+        x, y = rng.randrange(0, 650), rng.randrange(0, 400)
+        assert region_set.contains_point(x, y) == [i for i, r in enumerate(regions) if r.contains_point(x, y)]
+        probe = Region(x=x, y=y, width=40, height=30)
+        assert region_set.intersecting(x, y, 40, 30) == [
+            i for i, r in enumerate(regions) if _overlaps(r, probe)
+        ]
+
+    expected = [
+        (i, j) for i in range(len(regions)) for j in range(i + 1, len(regions))
+        if _overlaps(regions[i], regions[j])
+    ]
+    assert region_set.overlapping_pairs() == expected
+
+
+def test_edges_follow_region_semantics(backend):
+    region_set = RegionSet([Region(x=10, y=10, width=10, height=10)])
+    # contains_point 包含右边和下边 / contains_point includes the right and bottom edges
+    assert region_set.contains_point(20, 20) == [0]
+    assert region_set.contains_point(21, 20) == []
+    # 只接触边的矩形不算重叠 / Rectangles that only touch do not overlap
+    assert region_set.intersecting(20, 10, 5, 5) == []
+
+
+def test_bounds_queries(backend):
+    region_set = RegionSet([
+        Region(x=0, y=0, width=10, height=10),
+        Region(x=5, y=5, width=10, height=10),
+        Region(x=30, y=30, width=5, height=5),
+    ])
+    assert region_set.intersection_bounds([0, 1]) == (5, 5, 10, 10)
+    assert region_set.intersection_bounds() is None
+    assert region_set.union_bounds() == (0, 0, 35, 35)
+    assert region_set.union_bounds([]) is None
+    assert RegionSet().union_bounds() is None
+
+
+def test_add_remove_and_round_trip(backend):
+    regions = [
+        Region(x=1, y=2, width=3, height=4, name="a"),
+        Region(x=5, y=6, width=7, height=8, name="b", monitor_id=2, scale=1.5),
+        Region(x=9, y=10, width=11, height=12),
+    ]
+    region_set = RegionSet(regions)
+    assert region_set.to_regions() == regions
+    assert region_set.index_of("b") == 1
+
+    # 查询之后修改集合，以覆盖 NumPy 视图的释放 / Mutate after a query to cover releasing the NumPy views
+    assert region_set.contains_point(6, 7) == [1]
+    region_set.remove(0)
+    assert region_set.index_of("a") is None
+    assert region_set.index_of("b") == 0
+    assert region_set.add(Region(x=0, y=0, width=2, height=2, name="c")) == 2
+    assert region_set.names == ["b", None, "c"]
+    assert region_set.contains_point(1, 1) == [2]
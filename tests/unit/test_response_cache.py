@@ -0,0 +1,118 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""响应缓存及其缓存键的单元测试。 / Unit tests for the response cache and its keys."""
+
+import asyncio
+
+from visiondesk.ai.providers.mock import MockProvider
+from visiondesk.core.services.ai_service import AIService
+from visiondesk.core.services.rate_limiter import ProviderRateLimiter
+from visiondesk.core.services.response_cache import ResponseCache
+from visiondesk.core.services.screenshot_service import SyntheticFrameSource
+from visiondesk.models.settings import AISettings
+from visiondesk.utils.image_utils import content_hash
+
+
+def test_get_put_and_stats():
+    cache = ResponseCache()
+    assert cache.get("k") is None
+    cache.put("k", "v")
+    assert cache.get("k") == "v"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction_by_entry_count():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_eviction_by_bytes():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", "xxxx")
+    cache.put("b", "yyyy")
+    cache.put("c", "zzzz")
+    assert len(cache) == 2
+    assert cache.total_bytes <= 10
+    # 单个超过上限的条目不会被存入 / A single entry over the limit is never stored
+    cache.put("d", "x" * 20)
+    assert cache.get("d") is None
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("visiondesk.core.services.response_cache.time.time", lambda: now[0])
+    cache = ResponseCache(ttl_seconds=10)
+    cache.put("k", "v")
+    now[0] += 9
+    assert cache.get("k") == "v"
+    now[0] += 2
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "cache" / "responses.json"
+    cache = ResponseCache(persist_path=path)
+    cache.put("k", "值")
+    cache.save()
+
+    restored = ResponseCache(persist_path=path)
+    restored.load()
+    assert restored.get("k") == "值"
+
+
+def test_make_key_depends_on_every_input():
+    base = ResponseCache.make_key(1, "m", "p", 0.7)
+    assert base == ResponseCache.make_key(1, "m", "p", 0.7)
+    assert len({base, ResponseCache.make_key(2, "m", "p", 0.7), ResponseCache.make_key(1, "n", "p", 0.7),
+                ResponseCache.make_key(1, "m", "q", 0.7), ResponseCache.make_key(1, "m", "p", 0.8)}) == 5
+
+
+def test_content_hash_sees_single_pixel_changes():
+    source = SyntheticFrameSource(200, 100)
+    before = content_hash(source.grab(10, 10, 120, 40))
+    assert before == content_hash(source.grab(10, 10, 120, 40))
+    source.fill_rect(70, 30, 1, 1, (255, 255, 255, 255))
+    assert content_hash(source.grab(10, 10, 120, 40)) != before
+    # 非连续的子视图与其副本哈希相同 / A strided sub-view hashes like its copy
+    frame = source.grab(0, 0, 200, 100)
+    assert content_hash(frame.view(10, 10, 120, 40)) == content_hash(source.grab(10, 10, 120, 40))
+
+
+def test_changed_counter_misses_the_cache():
+    source = SyntheticFrameSource(200, 100)
+    provider = MockProvider()
+    service = AIService(
+        AISettings(provider="mock", cache_persist=False),
+        provider,
+        cache=ResponseCache(),
+        rate_limiter=ProviderRateLimiter(0, 0),
+    )
+
+    async def run():
+        first = await service.analyze_image(source.grab(0, 0, 120, 40))
+        again = await service.analyze_image(source.grab(0, 0, 120, 40))
+        source.fill_rect(50, 15, 3, 7, (255, 255, 255, 255))
+        changed = await service.analyze_image(source.grab(0, 0, 120, 40))
+        return first, again, changed
+
+    first, again, changed = asyncio.run(run())
+    assert not first.cached and again.cached and not changed.cached
+    assert provider.calls == 2
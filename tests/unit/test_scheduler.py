@@ -0,0 +1,150 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""捕获调度器的单元测试。 / Unit tests for the capture scheduler."""
+
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from visiondesk.core.scheduler import POLICY_COALESCE, POLICY_DROP, CaptureScheduler
+
+
+def _run_for(scheduler: CaptureScheduler, seconds: float) -> None:
+    scheduler.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        scheduler.stop()
+
+
+def test_invalid_parameters_are_rejected():
+    with pytest.raises(ValueError):
+        CaptureScheduler(0, lambda: None)
+    with pytest.raises(ValueError):
+        CaptureScheduler(1, lambda: None, policy="queue")
+    scheduler = CaptureScheduler(1, lambda: None)
+    with pytest.raises(ValueError):
+        scheduler.set_interval(-1)
+
+
+def test_ticks_follow_the_grid_without_drift():
+    starts = []
+    scheduler = CaptureScheduler(0.05, lambda: starts.append(time.monotonic()))
+    _run_for(scheduler, 0.52)
+
+    assert not scheduler.is_running
+    assert 8 <= len(starts) <= 12
+    # 第 n 个节拍相对起始时间的偏移约为 n 个间隔，不随节拍累积
+    # Tick n starts about n intervals after the first, with no accumulated offset
+    assert abs((starts[-1] - starts[0]) - (len(starts) - 1) * 0.05) < 0.04
+    assert scheduler.stats()["runs"] == len(starts)
+
+
+def test_missed_ticks_are_skipped_not_replayed():
+    scheduler = CaptureScheduler(0.02, lambda: time.sleep(0.07))
+    _run_for(scheduler, 0.3)
+
+    stats = scheduler.stats()
+    assert stats["missed"] > 0
+    assert stats["runs"] <= 6
+
+
+def test_drop_policy_discards_ticks_while_in_flight():
+    future: "Future[None]" = Future()
+    scheduler = CaptureScheduler(0.02, lambda: future, policy=POLICY_DROP)
+    _run_for(scheduler, 0.2)
+
+    stats = scheduler.stats()
+    assert stats["runs"] == 1
+    assert stats["dropped"] >= 3
+    assert stats["in_flight"]
+    future.set_result(None)
+
+
+def test_coalesce_policy_runs_once_when_the_cycle_completes():
+    futures = []
+    ran = threading.Event()
+
+    def cycle():
+        if futures:
+            ran.set()
+            return None
+        futures.append(Future())
+        return futures[0]
+
+    scheduler = CaptureScheduler(0.02, cycle, policy=POLICY_COALESCE)
+    scheduler.start()
+    try:
+        time.sleep(0.15)
+        # 改为很长的间隔：补跑只能由周期完成触发，改间隔时的唤醒不得提前补跑
+        # Switch to a long interval: only the completed cycle may trigger the rerun, not the
+        # wake-up caused by changing the interval
+        scheduler.set_interval(10)
+        time.sleep(0.02)
+        assert not ran.is_set()
+        futures[0].set_result(None)
+        assert ran.wait(1.0)
+    finally:
+        scheduler.stop()
+
+    stats = scheduler.stats()
+    assert stats["runs"] == 2
+    assert stats["coalesced"] >= 1
+    assert [stat.action for stat in scheduler.history].count("coalesced") == stats["coalesced"]
+
+
+def test_failures_are_counted_and_do_not_stop_the_scheduler():
+    calls = []
+
+    def cycle():
+        calls.append(None)
+        raise RuntimeError("capture failed")
+
+    failed: "Future[None]" = Future()
+    failed.set_exception(RuntimeError("analysis failed"))
+    scheduler = CaptureScheduler(0.03, cycle)
+    _run_for(scheduler, 0.2)
+    assert scheduler.stats()["failures"] == len(calls) >= 3
+
+    scheduler = CaptureScheduler(10, lambda: failed)
+    _run_for(scheduler, 0.05)
+    assert scheduler.stats()["failures"] == 1
+
+
+def test_stop_timeout_keeps_the_thread_until_it_exits():
+    release = threading.Event()
+    entered = threading.Event()
+
+    def blocking() -> None:
+        entered.set()
+        release.wait(2.0)
+
+    scheduler = CaptureScheduler(0.05, blocking)
+    scheduler.start()
+    assert entered.wait(1.0)
+    first = scheduler._thread
+
+    scheduler.stop(timeout=0.05)
+    # 线程仍在回调中，不能被遗忘，也不能启动第二个线程
+    # The thread is still in the callback: it is not forgotten and no second thread starts
+    assert scheduler.is_running
+    scheduler.start()
+    assert scheduler._thread is first
+
+    release.set()
+    scheduler.stop(timeout=2.0)
+    assert not scheduler.is_running
+    assert not first.is_alive()
@@ -0,0 +1,186 @@
+# Copyright 2025 刘子健_LiuZijian
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""帧视图、帧来源和截图服务的单元测试。 / Unit tests for frame views, frame sources and the screenshot service."""
+
+import threading
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+import pytest
+
+from visiondesk.core.services.screenshot_service import (
+    BYTES_PER_PIXEL,
+    Frame,
+    MSSFrameSource,
+    ScreenshotService,
+    SyntheticFrameSource,
+    merge_bounds,
+)
+from visiondesk.models.region import Region
+
+
+def _frame(width: int = 8, height: int = 4) -> Frame:
+    return Frame(bytearray(range(256)) * (width * height * BYTES_PER_PIXEL // 256 + 1), width, height)
+
+
+def test_view_shares_the_buffer_and_tracks_screen_position():
+    frame = Frame(bytearray(8 * 4 * BYTES_PER_PIXEL), 8, 4, left=100, top=50)
+    view = frame.view(2, 1, 3, 2)
+    assert view.buffer.obj is frame.buffer.obj
+    assert view.bounds == (102, 51, 105, 53)
+    assert not view.is_contiguous
+
+    frame.buffer[view.offset] = 255
+    assert view.row(0)[0] == 255
+    assert view.tobytes() == b"".join(bytes(row) for row in view.rows())
+    with pytest.raises(ValueError):
+        frame.view(6, 0, 3, 1)
+
+
+def test_row_returns_memoryviews_into_the_buffer():
+    frame = _frame()
+    row = frame.row(2)
+    assert isinstance(row, memoryview) and len(row) == 8 * BYTES_PER_PIXEL
+    assert row.obj is frame.buffer.obj
+    assert bytes(row) == bytes(frame.buffer[2 * frame.stride:3 * frame.stride])
+    with pytest.raises(IndexError):
+        frame.row(4)
+
+
+def test_array_interface_is_zero_copy():
+    frame = _frame()
+    view = frame.view(1, 1, 4, 2)
+    array = np.asarray(view)
+    assert array.shape == (2, 4, BYTES_PER_PIXEL)
+    assert np.shares_memory(array, np.asarray(frame))
+    assert array.tobytes() == view.tobytes()
+    frame.buffer[view.offset] = 7
+    assert array[0, 0, 0] == 7
+
+
+def test_frame_rejects_buffers_that_are_too_small():
+    with pytest.raises(ValueError):
+        Frame(bytes(10), 2, 2)
+    with pytest.raises(ValueError):
+        Frame(bytes(64), 4, 2, stride=8)
+
+
+class _FakeMSS:
+    instances: List["_FakeMSS"] = []
+
+    def __init__(self) -> None:
+        self.thread = threading.current_thread().name
+        self.closed = False
+        self.monitors = [{"left": 0, "top": 0, "width": 4, "height": 4}]
+        _FakeMSS.instances.append(self)
+
+    def grab(self, monitor):
+        raw = bytearray(monitor["width"] * monitor["height"] * BYTES_PER_PIXEL)
+        return SimpleNamespace(raw=raw, left=monitor["left"], top=monitor["top"],
+                               width=monitor["width"], height=monitor["height"])
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def fake_mss(monkeypatch):
+    _FakeMSS.instances = []
+    monkeypatch.setattr("mss.mss", _FakeMSS)
+    return _FakeMSS.instances
+
+
+def test_mss_source_reuses_one_instance_per_thread(fake_mss):
+    source = MSSFrameSource()
+    source.grab(0, 0, 2, 2)
+    source.grab(1, 1, 2, 2)
+    assert len(fake_mss) == 1
+
+    worker = threading.Thread(target=source.grab, args=(0, 0, 2, 2), name="capture-worker")
+    worker.start()
+    worker.join()
+    assert [sct.thread for sct in fake_mss] == [threading.current_thread().name, "capture-worker"]
+
+    source.close()
+    assert all(sct.closed for sct in fake_mss)
+
+
+def test_mss_source_recreates_instances_after_refresh(fake_mss):
+    source = MSSFrameSource()
+    frame = source.grab(3, 4, 2, 2)
+    assert frame.bounds == (3, 4, 5, 6)
+    source.refresh_monitors()
+    assert source.monitors == fake_mss[0].monitors
+    assert len(fake_mss) == 2 and fake_mss[0].closed and not fake_mss[1].closed
+
+
+def _painted_source() -> SyntheticFrameSource:
+    source = SyntheticFrameSource(800, 600)
+    for i in range(8):
+        source.fill_rect(i * 100, i * 70, 100, 70, (i * 30, 255 - i * 30, i * 10, 255))
+    return source
+
+
+def test_merge_bounds_groups_nearby_rectangles():
+    groups = merge_bounds([(0, 0, 10, 10), (12, 0, 20, 10), (100, 100, 110, 110)], gap=4)
+    assert groups == [((0, 0, 20, 10), [0, 1]), ((100, 100, 110, 110), [2])]
+    assert len(merge_bounds([(0, 0, 10, 10), (12, 0, 20, 10)], gap=0)) == 2
+
+
+def test_capture_regions_matches_single_captures():
+    service = ScreenshotService(_painted_source(), merge_gap=32)
+    regions = [
+        Region(x=10, y=10, width=120, height=90, name="a"),
+        Region(x=100, y=50, width=80, height=80, name="b"),
+        Region(x=500, y=400, width=150, height=100, name="c"),
+    ]
+    frames = service.capture_regions(regions)
+    for region, frame in zip(regions, frames):
+        single = service.capture_region(region)
+        assert frame.bounds == single.bounds
+        assert frame.tobytes() == single.tobytes()
+    # a 和 b 重叠，共享一次抓取 / a and b overlap and share one grab
+    assert frames[0].buffer.obj is frames[1].buffer.obj
+    assert frames[0].buffer.obj is not frames[2].buffer.obj
+
+
+def test_capture_regions_clips_regions_partly_off_screen():
+    service = ScreenshotService(_painted_source())
+    regions = [
+        Region(x=790, y=10, width=40, height=20, name="edge"),
+        Region(x=900, y=10, width=40, height=20, name="outside"),
+        Region(x=700, y=500, width=50, height=50, name="inside"),
+    ]
+    edge, outside, inside = service.capture_regions(regions)
+    assert edge.bounds == (790, 10, 800, 30)
+    assert edge.tobytes() == service.source.grab(790, 10, 10, 20).tobytes()
+    assert outside is None
+    assert inside.tobytes() == service.capture_region(regions[2]).tobytes()
+
+
+class _FailingSource(SyntheticFrameSource):
+    def grab(self, left: int, top: int, width: int, height: int) -> Frame:
+        if left >= 400:
+            raise OSError("grab failed")
+        return super().grab(left, top, width, height)
+
+
+def test_capture_regions_isolates_failed_grabs():
+    service = ScreenshotService(_FailingSource(800, 600), merge_gap=0)
+    frames = service.capture_regions(
+        [Region(x=0, y=0, width=50, height=50), Region(x=500, y=0, width=50, height=50)]
+    )
+    assert frames[0] is not None and frames[0].size == (50, 50)
+    assert frames[1] is None